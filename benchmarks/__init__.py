@@ -0,0 +1,3 @@
+"""
+시뮬레이션 주요 경로 성능 측정 모음, python -m benchmarks.run으로 실행한다
+"""
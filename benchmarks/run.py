@@ -0,0 +1,348 @@
+"""
+시뮬레이션 주요 경로 성능 측정
+
+업비트 접속 없이 SyntheticMarket으로 만든 같은 캔들로 측정하므로 commit 사이의 결과를 비교할 수 있다.
+
+실행
+    python -m benchmarks.run
+    python -m benchmarks.run --sizes 1000,100000,10000000 --calls 1000000 --output result.json
+    python -m benchmarks.run --cases data_provider.get_info,virtual_market.handle_request --compare result.json
+
+측정 경우마다 캔들 size개로 준비한 후 대상 호출을 calls번(지정하지 않으면 가능한 최대 횟수) 측정한다.
+upbit_trader.send_request는 로컬 가짜 거래소 서버(MockExchangeServer)로 주문을 보내고 최대 MAX_ORDERS번 측정한다.
+- throughput: 초당 호출 수, 대상 호출에 걸린 시간의 합으로 계산하므로 준비 시간은 포함하지 않는다
+- latency: 호출별 소요 시간(초)의 p50, p99, max, LatencyHistogram으로 집계한다
+- peak_memory: 준비와 호출 동안 할당된 최대 메모리(byte), tracemalloc으로 한 번 더 실행해서 측정한다
+  memory-map으로 읽는 캔들 저장소 파일은 포함되지 않는다
+"""
+import argparse
+import json
+import math
+import os
+import platform
+import subprocess
+import tempfile
+import time
+import tracemalloc
+import numpy as np
+from smtm import LogManager, SimulationDataProvider, StrategyBuyAndHold
+from smtm.candle_store import CandleStore
+from smtm.date_converter import DataConverter
+from smtm.instrumentation import LatencyHistogram
+from smtm.mock_exchange_server import MockExchangeServer
+from smtm.synthetic_market import SyntheticMarket
+from smtm.upbit_trader import UpbitTrader
+from smtm.virtual_market import VirtualMarket
+
+MARKET = "KRW-BTC"
+SEED = 7
+ARRAY_CHUNK = 10000
+# VirtualMarket은 마지막 두 턴에 거래할 수 없으므로 여유 캔들을 더 저장한다
+MARGIN = 10
+# 로컬 가짜 거래소 서버로 보내는 최대 주문 수
+MAX_ORDERS = 2000
+
+
+class BenchmarkData:
+    """
+    측정에 사용할 size개 캔들을 저장한 캔들 저장소
+
+    start, stop: 캔들 구간 [start, stop) (UTC 기준 경과 분)
+    end_utc, end_kst: SimulationDataProvider, VirtualMarket 초기화에 사용할 끝 시간
+    """
+
+    def __init__(self, root, size):
+        self.size = size
+        self.market = SyntheticMarket(MARKET, seed=SEED)
+        self.start = self.market.origin
+        self.stop = self.start + size
+        self.end_utc = DataConverter.from_epoch_min(self.stop)
+        self.end_kst = DataConverter.from_epoch_min(self.stop + DataConverter.KST_OFFSET_MIN)
+        self.store = CandleStore(root=root, fetcher=self.market)
+        self.market.write_to(self.store, self.start, self.stop + MARGIN)
+
+    def series(self):
+        return self.store.get_candles(MARKET, self.end_utc, self.size)
+
+
+def bench_to_epoch_min(data, calls, record):
+    values = DataConverter.from_epoch_min_array(np.arange(data.start, data.start + calls)).tolist()
+    to_epoch_min = DataConverter.to_epoch_min
+    for value in values:
+        start = time.perf_counter()
+        to_epoch_min(value)
+        record(time.perf_counter() - start)
+    return calls
+
+
+def bench_to_epoch_min_array(data, calls, record):
+    values = DataConverter.from_epoch_min_array(np.arange(data.start, data.stop))
+    for index in range(calls):
+        chunk = values[index * ARRAY_CHUNK : (index + 1) * ARRAY_CHUNK]
+        start = time.perf_counter()
+        DataConverter.to_epoch_min_array(chunk)
+        record(time.perf_counter() - start)
+    return calls
+
+
+def bench_get_info(data, calls, record):
+    provider = SimulationDataProvider(store=data.store)
+    provider.initialize_simulation(end=data.end_utc, count=data.size)
+    for _ in range(calls):
+        start = time.perf_counter()
+        provider.get_info()
+        record(time.perf_counter() - start)
+    return calls
+
+
+def create_market(data):
+    market = VirtualMarket(store=data.store)
+    market.initialize(data.end_kst, data.size, 10**15)
+    return market
+
+
+def bench_handle_request(data, calls, record):
+    market = create_market(data)
+    close = market.data.columns["close"]
+    for index in range(calls):
+        if index % 2 == 0:
+            request = {"id": str(index), "type": "buy", "price": close[index] * 1.01, "amount": 0.01}
+        else:
+            request = {"id": str(index), "type": "sell", "price": close[index] * 0.99, "amount": 0.01}
+        start = time.perf_counter()
+        market.handle_request(request)
+        record(time.perf_counter() - start)
+    return calls
+
+
+def bench_get_balance(data, calls, record):
+    market = create_market(data)
+    market.asset[MARKET] = (float(market.data.columns["close"][0]), 1.0)
+    for index in range(calls):
+        market.turn_count = index
+        start = time.perf_counter()
+        market.get_balance()
+        record(time.perf_counter() - start)
+    return calls
+
+
+def create_strategy():
+    strategy = StrategyBuyAndHold()
+    strategy.is_simulation = True
+    strategy.initialize(10**12)
+    return strategy
+
+
+def bench_update_trading_info(data, calls, record):
+    series = data.series()
+    strategy = create_strategy()
+    for index in range(calls):
+        info = series[index]
+        start = time.perf_counter()
+        strategy.update_trading_info(info)
+        record(time.perf_counter() - start)
+    return calls
+
+
+def bench_get_request(data, calls, record):
+    series = data.series()
+    strategy = create_strategy()
+    for index in range(calls):
+        strategy.update_trading_info(series[index])
+        start = time.perf_counter()
+        strategy.get_request()
+        record(time.perf_counter() - start)
+    return calls
+
+
+def bench_update_result(data, calls, record):
+    series = data.series()
+    strategy = create_strategy()
+    for index in range(calls):
+        candle = series[index]
+        result = {
+            "request": {"id": str(index), "type": "buy", "price": candle["closing_price"], "amount": 0.001},
+            "type": "buy" if index % 2 == 0 else "sell",
+            "price": candle["closing_price"],
+            "amount": 0.001,
+            "msg": "success",
+            "state": "done",
+            "date_time": candle["date_time"],
+        }
+        start = time.perf_counter()
+        strategy.update_result(result)
+        record(time.perf_counter() - start)
+    return calls
+
+
+def bench_send_order(data, calls, record):
+    """로컬 가짜 거래소 서버로 주문 하나씩 보내는 시간, 요청 수 제한 없이 HTTP 요청과 인증 토큰 생성 비용만 측정한다"""
+    prices = data.market.columns(data.start, data.stop)["close"].tolist()
+    with MockExchangeServer(budget=10**15) as exchange:
+        trader = UpbitTrader(
+            MARKET,
+            access_key=exchange.access_key,
+            secret_key=exchange.secret_key.decode(),
+            server_url=exchange.url,
+            order_rate=10**9,
+            default_rate=10**9,
+            check_interval=math.inf,
+        )
+        try:
+            for index in range(calls):
+                request = {"id": str(index), "type": "buy", "price": prices[index], "amount": 0.01}
+                start = time.perf_counter()
+                trader.send_request([request], lambda result: None)
+                record(time.perf_counter() - start)
+        finally:
+            trader.close()
+    return calls
+
+
+# 이름: (측정 함수, 캔들 size개로 가능한 최대 호출 횟수)
+CASES = {
+    "date_converter.to_epoch_min": (bench_to_epoch_min, lambda size: size),
+    "date_converter.to_epoch_min_array": (
+        bench_to_epoch_min_array,
+        lambda size: math.ceil(size / ARRAY_CHUNK),
+    ),
+    "data_provider.get_info": (bench_get_info, lambda size: size),
+    "virtual_market.handle_request": (bench_handle_request, lambda size: size - 2),
+    "virtual_market.get_balance": (bench_get_balance, lambda size: size),
+    "strategy.update_trading_info": (bench_update_trading_info, lambda size: size),
+    "strategy.get_request": (bench_get_request, lambda size: size),
+    "strategy.update_result": (bench_update_result, lambda size: size),
+    "upbit_trader.send_request": (bench_send_order, lambda size: min(size, MAX_ORDERS)),
+}
+
+
+def run_case(name, data, calls=None, memory_calls=None):
+    """
+    name 경우를 측정
+    calls: 측정할 호출 횟수, None이면 가능한 최대 횟수
+    memory_calls: 메모리 측정에 사용할 호출 횟수, 0이면 메모리를 측정하지 않는다
+    Returns: {"case", "size", "calls", "throughput", "latency", "peak_memory"}
+    """
+    bench, max_calls = CASES[name]
+    limit = max_calls(data.size)
+    calls = limit if calls is None else min(calls, limit)
+
+    histogram = LatencyHistogram()
+    bench(data, calls, histogram.add)
+    latency = histogram.to_dict()
+
+    peak_memory = None
+    memory_calls = calls if memory_calls is None else min(memory_calls, calls)
+    if memory_calls > 0:
+        tracemalloc.start()
+        try:
+            bench(data, memory_calls, lambda elapsed: None)
+            peak_memory = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+
+    return {
+        "case": name,
+        "size": data.size,
+        "calls": calls,
+        "throughput": calls / latency["total"] if latency["total"] > 0 else 0.0,
+        "latency": {key: latency[key] for key in ("mean", "p50", "p99", "max")},
+        "peak_memory": peak_memory,
+    }
+
+
+def run(sizes, cases=None, calls=None, memory_calls=None, root=None):
+    """sizes의 캔들 개수마다 cases를 측정한 결과 리스트"""
+    cases = list(CASES) if cases is None else cases
+    for name in cases:
+        if name not in CASES:
+            raise UserWarning(f"unknown benchmark case {name}")
+
+    LogManager.set_profile("backtest")
+    results = []
+    for size in sizes:
+        with tempfile.TemporaryDirectory(dir=root) as tmp_dir:
+            data = BenchmarkData(tmp_dir, size)
+            for name in cases:
+                result = run_case(name, data, calls, memory_calls)
+                results.append(result)
+                print(format_result(result), flush=True)
+    return results
+
+
+def get_environment():
+    """측정 환경, 같은 환경의 결과끼리 비교한다"""
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "commit": commit,
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "machine": platform.machine(),
+        "processor": platform.processor(),
+    }
+
+
+def format_result(result, base=None):
+    latency = result["latency"]
+    peak = result["peak_memory"]
+    line = (
+        f"{result['case']:36s} {result['size']:>10d} {result['calls']:>10d}"
+        f" {result['throughput']:>14,.0f}/s"
+        f" p50 {latency['p50'] * 1e6:>9.2f}us p99 {latency['p99'] * 1e6:>9.2f}us"
+        f" max {latency['max'] * 1e6:>10.2f}us"
+        f" peak {'-' if peak is None else f'{peak / 2**20:.1f}MB':>9s}"
+    )
+    if base is not None and base["throughput"] > 0:
+        line += f" x{result['throughput'] / base['throughput']:.2f}"
+    return line
+
+
+def compare(results, base_results):
+    """같은 경우, 같은 size의 이전 결과 대비 처리량 비율을 출력"""
+    base_map = {(item["case"], item["size"]): item for item in base_results}
+    for result in results:
+        print(format_result(result, base_map.get((result["case"], result["size"]))))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="smtm simulation benchmarks")
+    parser.add_argument("--sizes", default="1000,100000", help="캔들 개수 목록, 쉼표로 구분")
+    parser.add_argument("--cases", default=None, help="측정할 경우 목록, 쉼표로 구분, 지정하지 않으면 전체")
+    parser.add_argument("--calls", type=int, default=None, help="경우마다 측정할 최대 호출 횟수")
+    parser.add_argument("--memory-calls", type=int, default=10000, help="메모리 측정 호출 횟수, 0이면 측정하지 않는다")
+    parser.add_argument("--output", default=None, help="결과를 저장할 json 파일")
+    parser.add_argument("--compare", default=None, help="비교할 이전 결과 json 파일")
+    parser.add_argument("--list", action="store_true", help="측정 경우 목록 출력")
+    args = parser.parse_args(argv)
+
+    if args.list:
+        print("\n".join(CASES))
+        return None
+
+    sizes = [int(size) for size in args.sizes.split(",")]
+    cases = args.cases.split(",") if args.cases else None
+    results = run(sizes, cases, args.calls, args.memory_calls)
+    report = {"environment": get_environment(), "results": results}
+
+    if args.compare is not None:
+        with open(args.compare, "r", encoding="utf-8") as file:
+            base = json.load(file)
+        print(f"compare with {base['environment'].get('commit')}")
+        compare(results, base["results"])
+    if args.output is not None:
+        with open(args.output, "w", encoding="utf-8") as file:
+            json.dump(report, file, indent=2)
+    return report
+
+
+if __name__ == "__main__":
+    main()
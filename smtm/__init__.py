@@ -1,15 +1,20 @@
 '''
 Description for Package
+
+패키지를 불러올 때는 아무 모듈도 불러오지 않는다.
+__all__의 이름은 처음 사용할 때 해당 모듈을 불러오므로(module __getattr__)
+import smtm만으로는 파일을 만들거나 requests 같은 HTTP 모듈을 불러오지 않는다.
 '''
-import os
-import sys
-sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+import importlib
 
-from .data_provider import DataProvider
-from .simulation_data_provider import SimulationDataProvider
-from .log_manager import LogManager
-from .strategy import Strategy
-from .strategy_bnh import StrategyBuyAndHold
+# 이름 -> 정의된 모듈
+_LAZY_ATTRIBUTES={
+    "DataProvider": ".data_provider",
+    "SimulationDataProvider": ".simulation_data_provider",
+    "LogManager": ".log_manager",
+    "Strategy": ".strategy",
+    "StrategyBuyAndHold": ".strategy_bnh",
+}
 
 __all__=[
     "DataProvider",
@@ -18,4 +23,18 @@ __all__=[
     "Strategy",
     "StrategyBuyAndHold"
 ]
-__version__='0.1.0'
\ No newline at end of file
+__version__='0.1.0'
+
+
+def __getattr__(name):
+    module_name=_LAZY_ATTRIBUTES.get(name)
+    if module_name is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value=getattr(importlib.import_module(module_name, __name__), name)
+    # 다음부터는 __getattr__를 거치지 않도록 패키지 속성으로 저장
+    globals()[name]=value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | set(__all__))
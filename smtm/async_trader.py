@@ -0,0 +1,214 @@
+"""
+asyncio 기반 비동기 Trader
+
+Trader.send_request(request_list, callback)의 계약대로 거래 요청을 보내고 결과를 callback으로 전달한다.
+1. send_request는 요청을 event loop에 넘기고 바로 반환하므로 전략 loop가 거래소 응답을 기다리지 않는다.
+2. 거래소가 주문을 접수하면 state "requested", 체결되거나 취소되면 state "done", 거부하면 state "rejected" 결과를
+callback으로 전달한다.
+3. 처리 중인 주문은 요청 id를 키로 갖는 테이블에서 관리하며, 요청부터 완료까지 걸린 시간을 기록한다.
+4. 주문 상태는 OrderManager로 관리하고, 취소는 열린 주문에만 거래소로 보낸다.
+
+event loop는 별도 thread에서 동작하고, callback도 그 thread에서 호출된다.
+거래소(exchange)는 FakeExchange와 같은 비동기 인터페이스를 제공해야 한다.
+- async place_order(request), async cancel_order(request_id), async get_account(), subscribe(listener)
+"""
+import asyncio
+import threading
+import time
+from smtm_abs.trader import Trader
+from .log_manager import LogManager
+from .order_manager import OrderManager
+
+
+class AsyncTrader(Trader):
+    """
+    비동기 거래소에 거래 요청을 보내고 결과를 callback으로 전달하는 Trader
+
+    exchange: 비동기 거래소
+    timeout: 계좌 조회 등 결과를 기다려야 하는 요청의 최대 대기 시간(초)
+    orders: 처리 중인 주문 테이블 {요청 id: {"request", "callback", "state", "sent_at"}}
+    latencies: 요청부터 체결 또는 취소 완료까지 걸린 시간 목록(초)
+    order_manager: 주문 상태 관리, 요청을 보낼 때 추가하므로 바로 취소할 수 있다
+    """
+
+    def __init__(self, exchange, timeout=5):
+        self.logger = LogManager.get_logger(__class__.__name__)
+        self.exchange = exchange
+        self.timeout = timeout
+        self.name = "Async"
+        self.orders = {}
+        self.order_manager = OrderManager()
+        self.latencies = []
+        self.__lock = threading.Lock()
+        self.__inflight = 0
+        self.__idle = threading.Event()
+        self.__idle.set()
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, daemon=True)
+        self.thread.start()
+        self.exchange.subscribe(self.__on_result)
+
+    def send_request(self, request_list, callback):
+        """
+        거래 요청 기능, 요청을 event loop에 넘기고 바로 반환한다
+        type이 cancel인 요청은 해당 id의 주문을 취소한다
+        """
+        for request in request_list:
+            if request["type"] == "cancel":
+                self.cancel_request(request["id"])
+                continue
+            # 처리 중이거나 이미 보낸 id의 주문은 테이블을 덮어쓰지 않도록 거래소에 보내지 않는다
+            with self.__lock:
+                is_duplicated = request["id"] in self.orders or request["id"] in self.order_manager
+                if not is_duplicated:
+                    self.order_manager.add(request)
+                    self.orders[request["id"]] = {
+                        "request": request,
+                        "callback": callback,
+                        "state": "sending",
+                        "sent_at": time.perf_counter(),
+                    }
+            if is_duplicated:
+                self.logger.warning(f"duplicated request id {request['id']}")
+                self.__call(callback, self.__make_result(request, "duplicated id", "rejected"))
+                continue
+            self.__begin()
+            asyncio.run_coroutine_threadsafe(self.__submit(request), self.loop)
+
+    def cancel_request(self, request_id):
+        """체결되지 않은 주문 취소, 열린 주문이 아니면 거래소에 보내지 않는다"""
+        with self.__lock:
+            is_open = self.order_manager.is_open(request_id)
+        if not is_open:
+            self.logger.debug(f"nothing to cancel {request_id}")
+            return
+        self.__begin()
+        asyncio.run_coroutine_threadsafe(self.__cancel(request_id), self.loop)
+
+    def cancel_all_requests(self):
+        """처리 중인 모든 주문 취소"""
+        with self.__lock:
+            request_ids = self.order_manager.open_ids()
+        for request_id in request_ids:
+            self.cancel_request(request_id)
+
+    def get_account_info(self):
+        """계좌 정보를 요청하고 결과를 기다려서 반환"""
+        future = asyncio.run_coroutine_threadsafe(self.exchange.get_account(), self.loop)
+        return future.result(self.timeout)
+
+    def wait_idle(self, timeout=None):
+        """보낸 요청이 모두 처리될 때까지 대기, 시간 안에 처리되면 True 반환"""
+        return self.__idle.wait(timeout)
+
+    def get_latency_stats(self):
+        """요청부터 완료까지 걸린 시간 통계(초)"""
+        latencies = sorted(self.latencies)
+        if len(latencies) == 0:
+            return {"count": 0}
+        return {
+            "count": len(latencies),
+            "mean": sum(latencies) / len(latencies),
+            "p50": latencies[int(0.5 * (len(latencies) - 1))],
+            "p99": latencies[int(0.99 * (len(latencies) - 1))],
+            "max": latencies[-1],
+        }
+
+    def stop(self):
+        """event loop를 멈춘다"""
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join(self.timeout)
+
+    async def __submit(self, request):
+        try:
+            ack = await self.exchange.place_order(request)
+        except Exception as error:  # pylint: disable=broad-except
+            self.logger.error(f"fail to send request {request['id']} - {error}")
+            ack = {"request": request, "state": "rejected", "msg": "internal error"}
+
+        # 주문 테이블은 전략 thread와 같이 쓰므로 lock 안에서만 읽고 바꾸고, callback은 lock 밖에서 호출한다
+        with self.__lock:
+            order = self.orders.get(request["id"])
+            if order is not None:
+                if ack["state"] == "rejected":
+                    del self.orders[request["id"]]
+                else:
+                    order["state"] = "requested"
+        if order is None:
+            # 접수 응답보다 체결 결과나 취소가 먼저 처리된 경우
+            return
+
+        if ack["state"] == "rejected":
+            self.__update(request["id"], OrderManager.REJECTED, ack["msg"])
+            self.__complete(order, self.__make_result(request, ack["msg"], "rejected"))
+            return
+
+        self.__call(order["callback"], self.__make_result(request, ack["msg"], "requested"))
+
+    async def __cancel(self, request_id):
+        try:
+            is_canceled = await self.exchange.cancel_order(request_id)
+        except Exception as error:  # pylint: disable=broad-except
+            self.logger.error(f"fail to cancel request {request_id} - {error}")
+            is_canceled = False
+
+        order = None
+        if is_canceled:
+            with self.__lock:
+                order = self.orders.pop(request_id, None)
+        if order is not None:
+            self.__update(request_id, OrderManager.CANCELLED, "cancelled")
+            result = self.__make_result(order["request"], "cancelled", "done")
+            result["type"] = "cancel"
+            self.__complete(order, result)
+        self.__end()
+
+    def __on_result(self, result):
+        """거래소의 체결 결과 처리, event loop thread에서 호출된다"""
+        with self.__lock:
+            order = self.orders.pop(result["request"]["id"], None)
+            if order is not None:
+                self.order_manager.apply_result(result)
+        if order is not None:
+            self.__complete(order, result)
+
+    def __update(self, request_id, state, msg):
+        with self.__lock:
+            if self.order_manager.is_open(request_id):
+                self.order_manager.transition(request_id, state, msg=msg)
+
+    def __complete(self, order, result):
+        """주문 테이블에서 제거된 주문의 최종 결과 전달"""
+        self.latencies.append(time.perf_counter() - order["sent_at"])
+        self.__call(order["callback"], result)
+        self.__end()
+
+    def __call(self, callback, result):
+        try:
+            callback(result)
+        except Exception as error:  # pylint: disable=broad-except
+            self.logger.error(f"callback error {error}")
+
+    def __begin(self):
+        with self.__lock:
+            self.__inflight += 1
+            self.__idle.clear()
+
+    def __end(self):
+        with self.__lock:
+            self.__inflight -= 1
+            if self.__inflight == 0:
+                self.__idle.set()
+
+    @staticmethod
+    def __make_result(request, msg, state):
+        return {
+            "request": request,
+            "type": request["type"],
+            "price": request["price"],
+            "amount": request["amount"] if state == "requested" else 0,
+            "msg": msg,
+            "balance": None,
+            "state": state,
+            "date_time": request.get("date_time"),
+        }
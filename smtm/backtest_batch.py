@@ -0,0 +1,335 @@
+"""
+한 번 불러온 캔들 데이터로 여러 평가 구간을 만들어 동시에 백테스트하는 모듈
+
+기간 하나를 VirtualMarket으로 시뮬레이션한 결과만으로는 전략이 기간 선택에 얼마나 민감한지 알 수 없다.
+같은 캔들 배열에서 평가 구간을 여러 개 만들고, 구간별 수익률과 최대 낙폭의 분포를 모은다.
+
+1. 평가 구간 종류
+- window: 시작 위치를 무작위로 고른 고정 길이 구간(random_offsets)
+- walk_forward: 학습 구간에서 파라미터 그리드 중 수익률이 가장 높은 조합을 고르고 바로 다음 평가 구간에 적용
+- bootstrap: 캔들 사이의 가격 변화율을 block 단위로 다시 뽑아 만든 가상 가격 경로
+
+2. 캔들 데이터는 공유 메모리에 한 번만 올리고 worker는 작업마다 구간 정보(tuple)만 전달받는다.
+- window, walk_forward 구간은 공유 배열의 slice(view)로 계산하므로 복사가 없다.
+- bootstrap 경로는 seed와 경로 번호로 만들기 때문에 어느 worker에서 계산해도 같은 경로가 나온다.
+
+3. 구간마다 신호 함수로 턴별 거래 요청 배열을 만들고 VectorMarket으로 체결 결과를 계산한다.
+- 기본 신호 함수 bnh_signals는 StrategyBuyAndHold를 VirtualMarket에서 실행한 것과 같은 요청을 만든다.
+"""
+import functools
+import math
+import os
+import numpy as np
+from .log_manager import LogManager
+from .shared_candles import expand_grid, map_shared
+from .strategy_bnh import StrategyBuyAndHold
+from .vector_market import VectorMarket
+
+
+def _setup_worker(config, columns):
+    return BacktestBatch(**config), columns
+
+
+def _run_task(context, spec):
+    batch, columns = context
+    return batch.evaluate(columns, spec)
+
+
+def bnh_signals(
+    columns,
+    budget,
+    split_count=StrategyBuyAndHold.SPLIT_COUNT,
+    min_price=5000,
+    commission_ratio=0.0005,
+    strategy_commission_ratio=StrategyBuyAndHold.COMMISSION_RATIO,
+):
+    """
+    StrategyBuyAndHold가 VirtualMarket에서 턴마다 만드는 거래 요청을 배열로 계산
+
+    전략의 요청은 체결될 때만 바뀌는 잔고에 따라 달라지므로, 잔고가 같은 구간마다
+    요청 수량과 체결 여부를 배열 연산으로 계산하고 첫 번째 체결 턴에서 잔고를 갱신한다.
+    체결은 보통 앞쪽 몇 턴 안에 일어나기 때문에 다음 체결을 찾는 구간은 작게 시작해서 두 배씩 늘린다.
+
+    commission_ratio: 가상 거래소 수수료율, 잔고 부족으로 체결되지 않는 요청을 판단할 때 사용
+    strategy_commission_ratio: 전략이 체결 결과로 잔고를 계산할 때 사용하는 수수료율
+    Returns: VectorMarket.run의 signals 딕셔너리
+    """
+    close = np.asarray(columns["close"], dtype=np.float64)
+    low = np.asarray(columns["low"], dtype=np.float64)
+    size = len(close)
+    amount = np.zeros(size, dtype=np.float64)
+    side = np.zeros(size, dtype=np.int8)
+
+    # 마지막 두 턴은 game-over
+    tradable_end = max(size - 2, 0)
+    next_low = low[1:]
+    strategy_balance = budget
+    market_balance = budget
+    start = 0
+    chunk = 64
+    while start < tradable_end:
+        target_budget = budget / split_count
+        if target_budget > strategy_balance:
+            target_budget = strategy_balance
+
+        stop = min(start + chunk, tradable_end)
+        price = close[start:stop]
+        request_amount = np.floor((target_budget / price) * 10000) / 10000
+        total_value = np.round(price * request_amount)
+        # 최소 주문 금액 미만이거나 잔고보다 크면 전략은 빈 요청을 보낸다
+        requested = (total_value >= min_price) & (total_value <= strategy_balance) & (request_amount != 0)
+        filled = (
+            requested
+            & (price >= next_low[start:stop])
+            & (price * request_amount * (1 + commission_ratio) <= market_balance)
+        )
+        hits = np.flatnonzero(filled)
+        end = stop if len(hits) == 0 else start + hits[0] + 1
+        count = end - start
+        amount[start:end] = np.where(requested[:count], request_amount[:count], 0.0)
+        side[start:end] = np.where(requested[:count], VectorMarket.BUY, 0)
+
+        if len(hits) == 0:
+            start = stop
+            chunk *= 2
+            continue
+
+        index = end - 1
+        total = float(close[index]) * float(amount[index])
+        strategy_balance -= round(total + total * strategy_commission_ratio)
+        market_balance = round(market_balance - total * (1 + commission_ratio))
+        start = end
+        chunk = 64
+
+    return {"price": close, "amount": amount, "side": side}
+
+
+class BacktestBatch:
+    """
+    평가 구간 리스트를 여러 프로세스에서 백테스트하고 수익률, 최대 낙폭 분포를 집계
+
+    signal_func: signal_func(columns, budget, commission_ratio=..., **params) -> VectorMarket signals
+    params: 신호 함수에 전달할 고정 파라미터
+    param_grid: walk_forward 구간의 학습 구간에서 고를 파라미터 그리드 {이름: 값 리스트}
+    budget: 구간마다 시작 잔고
+    commission_ratio: 가상 거래소 수수료율
+    max_workers: worker 프로세스 수, None이면 CPU 개수
+    """
+
+    PERCENTILES = (5, 25, 50, 75, 95)
+
+    def __init__(
+        self,
+        signal_func=bnh_signals,
+        params=None,
+        param_grid=None,
+        budget=500000,
+        commission_ratio=0.0005,
+        max_workers=None,
+    ):
+        self.logger = LogManager.get_logger(__class__.__name__)
+        self.signal_func = signal_func
+        self.params = dict(params) if params is not None else {}
+        self.param_grid = param_grid
+        self.budget = budget
+        self.commission_ratio = commission_ratio
+        self.max_workers = max_workers
+        self.market = VectorMarket(commission_ratio)
+        self.__source = None
+        self.__source_ratios = None
+
+    def run(self, columns, specs):
+        """
+        평가 구간 리스트를 모두 백테스트
+
+        columns: CandleStore.load_columns 결과, 과거 데이터부터 정렬된 캔들 컬럼 배열
+        specs: walk_forward, random_offsets, bootstrap으로 만든 평가 구간 리스트
+        Returns:
+        {
+            "paths": 구간 순서대로 evaluate 결과 리스트
+            "summary": summarize 결과
+        }
+        """
+        specs = list(specs)
+        config = {
+            "signal_func": self.signal_func,
+            "params": self.params,
+            "param_grid": self.param_grid,
+            "budget": self.budget,
+            "commission_ratio": self.commission_ratio,
+        }
+        workers = self.max_workers if self.max_workers is not None else os.cpu_count() or 1
+        chunksize = max(1, len(specs) // (workers * 4))
+        self.logger.info(f"batch {len(specs)} paths over {len(columns['close'])} candles")
+
+        paths = map_shared(
+            columns, functools.partial(_setup_worker, config), _run_task, specs, workers, chunksize
+        )
+        return {"paths": paths, "summary": self.summarize(paths)}
+
+    def evaluate(self, columns, spec):
+        """
+        평가 구간 하나를 백테스트
+        Returns:
+        {
+            "kind": 구간 종류
+            "start", "stop": 평가한 캔들 위치, bootstrap이면 경로 번호와 길이
+            "params": 사용한 파라미터
+            "final_balance": 마지막 현금 잔고
+            "final_value": 마지막 현금 잔고 + 보유 자산 평가 금액
+            "return": 수익률
+            "trade_count": 체결 횟수
+            "max_drawdown": 최대 낙폭 비율
+        }
+        """
+        kind = spec[0]
+        if kind == "window":
+            _, start, stop = spec
+            result = self.simulate(self.__slice(columns, start, stop), self.params)
+        elif kind == "walk_forward":
+            _, start, split, stop = spec
+            params = self.__select_params(self.__slice(columns, start, split))
+            result = self.simulate(self.__slice(columns, split, stop), params)
+            start = split
+        elif kind == "bootstrap":
+            _, seed, index, length, block_size = spec
+            path = self.__make_bootstrap_path(columns, seed, index, length, block_size)
+            result = self.simulate(path, self.params)
+            start, stop = index, length
+        else:
+            raise UserWarning(f"invalid spec kind {kind}")
+        return dict(result, kind=kind, start=start, stop=stop)
+
+    def simulate(self, columns, params):
+        """캔들 컬럼 배열 하나를 신호 함수와 VectorMarket으로 끝까지 실행, ParameterSweep.simulate와 같은 지표를 계산"""
+        size = len(columns["close"])
+        if size < 3:
+            raise UserWarning(f"too short window {size}")
+        signals = self.signal_func(
+            columns, self.budget, commission_ratio=self.commission_ratio, **params
+        )
+        result = self.market.run(columns, signals, self.budget)
+
+        # game-over 턴까지의 평가 금액, 시작 잔고를 최고 금액의 초기값으로 사용
+        values = result["equity"][: size - 1]
+        peak = np.maximum(np.maximum.accumulate(values), self.budget)
+        drawdown = np.where(peak > 0, (peak - values) / np.where(peak > 0, peak, 1), 0.0)
+        final_value = float(values[-1])
+        return {
+            "params": dict(params),
+            "final_balance": float(result["balance"][size - 2]),
+            "final_value": final_value,
+            "return": (final_value - self.budget) / self.budget if self.budget else 0.0,
+            "trade_count": result["trade_count"],
+            "max_drawdown": max(float(drawdown.max()), 0.0),
+        }
+
+    @classmethod
+    def summarize(cls, paths):
+        """
+        구간별 결과의 수익률, 최대 낙폭 분포를 집계
+        Returns:
+        {
+            "count": 구간 개수
+            "loss_ratio": 손실 구간 비율
+            "return": {"mean", "std", "min", "p5", "p25", "p50", "p75", "p95", "max"}
+            "max_drawdown": return과 같은 형식
+        }
+        """
+        summary = {"count": len(paths)}
+        if len(paths) == 0:
+            return summary
+        returns = np.array([path["return"] for path in paths], dtype=np.float64)
+        summary["loss_ratio"] = float(np.mean(returns < 0))
+        for name in ("return", "max_drawdown"):
+            values = np.array([path[name] for path in paths], dtype=np.float64)
+            stats = {"mean": float(values.mean()), "std": float(values.std()), "min": float(values.min())}
+            percentiles = np.percentile(values, cls.PERCENTILES)
+            for percent, value in zip(cls.PERCENTILES, percentiles):
+                stats[f"p{percent}"] = float(value)
+            stats["max"] = float(values.max())
+            summary[name] = stats
+        return summary
+
+    @staticmethod
+    def walk_forward(size, train_size, test_size, step=None):
+        """
+        학습 구간 다음에 평가 구간이 이어지는 구간을 step 간격으로 이동하면서 생성
+        step: 이동 간격, None이면 평가 구간 길이
+        Returns: ("walk_forward", 학습 시작, 평가 시작, 평가 끝) 리스트
+        """
+        step = step if step is not None else test_size
+        return [
+            ("walk_forward", start, start + train_size, start + train_size + test_size)
+            for start in range(0, size - train_size - test_size + 1, step)
+        ]
+
+    @staticmethod
+    def random_offsets(size, length, count, seed=None):
+        """길이 length인 구간의 시작 위치를 무작위로 count개 생성, Returns: ("window", 시작, 끝) 리스트"""
+        if length > size:
+            raise UserWarning(f"window length {length} is longer than data {size}")
+        starts = np.random.default_rng(seed).integers(0, size - length + 1, size=count)
+        return [("window", start, start + length) for start in starts.tolist()]
+
+    @staticmethod
+    def bootstrap(count, length, block_size=60, seed=None):
+        """
+        가격 변화율을 block_size 단위로 다시 뽑아 만드는 가상 경로 count개 생성
+        Returns: ("bootstrap", seed, 경로 번호, 길이, block_size) 리스트
+        """
+        if seed is None:
+            seed = np.random.SeedSequence().entropy
+        return [("bootstrap", seed, index, length, block_size) for index in range(count)]
+
+    expand_grid = staticmethod(expand_grid)
+
+    def __select_params(self, columns):
+        """학습 구간에서 수익률이 가장 높은 파라미터 조합, 같으면 그리드 순서가 빠른 조합"""
+        if not self.param_grid:
+            return self.params
+        best = None
+        for combination in self.expand_grid(self.param_grid):
+            params = dict(self.params, **combination)
+            result = self.simulate(columns, params)
+            if best is None or result["return"] > best[0]:
+                best = (result["return"], params)
+        return best[1]
+
+    def __make_bootstrap_path(self, columns, seed, index, length, block_size):
+        """
+        연속된 block_size개 캔들의 종가 변화율을 무작위로 이어 붙여 가상 종가 경로를 만들고,
+        고가, 저가는 뽑힌 캔들의 종가 대비 비율을 그대로 적용한다
+        """
+        growth, low_ratio, high_ratio = self.__get_ratios(columns)
+        if len(growth) < block_size:
+            raise UserWarning(f"block size {block_size} is longer than data {len(growth)}")
+        rng = np.random.default_rng([seed, index])
+        block_count = math.ceil((length - 1) / block_size)
+        starts = rng.integers(0, len(growth) - block_size + 1, size=block_count)
+        steps = (starts[:, np.newaxis] + np.arange(block_size)).ravel()[: length - 1]
+
+        # steps[k]번째 변화율로 만든 캔들은 원래 데이터의 steps[k] + 1번째 캔들
+        origin = np.concatenate((steps[:1], steps + 1))
+        close = columns["close"][origin[0]] * np.concatenate(([1.0], np.cumprod(growth[steps])))
+        return {
+            "close": close,
+            "low": close * low_ratio[origin],
+            "high": close * high_ratio[origin],
+        }
+
+    def __get_ratios(self, columns):
+        if self.__source is not columns:
+            close = np.asarray(columns["close"], dtype=np.float64)
+            self.__source_ratios = (
+                close[1:] / close[:-1],
+                np.asarray(columns["low"], dtype=np.float64) / close,
+                np.asarray(columns["high"], dtype=np.float64) / close,
+            )
+            self.__source = columns
+        return self.__source_ratios
+
+    @staticmethod
+    def __slice(columns, start, stop):
+        """공유 배열을 복사하지 않는 구간 view"""
+        return {name: column[start:stop] for name, column in columns.items()}
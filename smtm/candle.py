@@ -0,0 +1,204 @@
+"""
+캔들(분봉) 데이터를 적은 메모리로 표현하는 모듈
+
+업비트 응답 딕셔너리, get_info가 만드는 딕셔너리, 전략이 deepcopy한 딕셔너리까지 캔들 하나에
+딕셔너리가 세 번 만들어지면 수백만 개의 캔들을 다룰 때 메모리가 부족해진다.
+
+CandleSeries: 컬럼별 numpy 배열로 캔들 목록을 저장, 캔들 하나당 56 바이트
+Candle: 캔들 하나를 표현하는 __slots__ 레코드, 딕셔너리처럼 조회할 수 있다
+
+Candle은 DataProvider.get_info 형식의 키와 업비트 응답의 키를 모두 지원하기 때문에
+기존 딕셔너리를 사용하던 코드(VirtualMarket, Strategy)를 그대로 사용할 수 있다.
+"""
+from collections.abc import Mapping
+import numpy as np
+from .date_converter import DataConverter
+
+KST_OFFSET_MIN = DataConverter.KST_OFFSET_MIN
+
+
+class Candle(Mapping):
+    """
+    캔들 하나를 표현하는 변경 불가능한 레코드
+
+    timestamp: 1970-01-01T00:00:00(UTC) 기준 경과 분(minute)
+    나머지 속성은 DataProvider.get_info의 키와 같다
+    """
+
+    __slots__ = (
+        "market",
+        "timestamp",
+        "opening_price",
+        "high_price",
+        "low_price",
+        "closing_price",
+        "acc_price",
+        "acc_volume",
+    )
+    # get_info 형식의 키
+    KEYS = (
+        "market",
+        "date_time",
+        "opening_price",
+        "high_price",
+        "low_price",
+        "closing_price",
+        "acc_price",
+        "acc_volume",
+    )
+    # 업비트 응답의 키 -> 속성 이름
+    UPBIT_ALIASES = {
+        "trade_price": "closing_price",
+        "candle_acc_trade_price": "acc_price",
+        "candle_acc_trade_volume": "acc_volume",
+    }
+
+    def __init__(
+        self,
+        market,
+        timestamp,
+        opening_price,
+        high_price,
+        low_price,
+        closing_price,
+        acc_price,
+        acc_volume,
+    ):
+        self.market = market
+        self.timestamp = timestamp
+        self.opening_price = opening_price
+        self.high_price = high_price
+        self.low_price = low_price
+        self.closing_price = closing_price
+        self.acc_price = acc_price
+        self.acc_volume = acc_volume
+
+    def __getitem__(self, key):
+        if key in ("date_time", "candle_date_time_kst"):
+            return DataConverter.from_epoch_min(self.timestamp + KST_OFFSET_MIN)
+        if key == "candle_date_time_utc":
+            return DataConverter.from_epoch_min(self.timestamp)
+        name = self.UPBIT_ALIASES.get(key, key)
+        if name not in self.__slots__:
+            raise KeyError(key)
+        return getattr(self, name)
+
+    def __iter__(self):
+        return iter(self.KEYS)
+
+    def __len__(self):
+        return len(self.KEYS)
+
+    def __copy__(self):
+        # 변경 불가능한 레코드이므로 복사하지 않고 그대로 사용한다
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def __reduce__(self):
+        return (self.__class__, tuple(getattr(self, name) for name in self.__slots__))
+
+    def __repr__(self):
+        return f"Candle({dict(self)})"
+
+
+class CandleSeries:
+    """
+    한 마켓의 캔들 목록을 컬럼별 numpy 배열로 저장
+
+    market: 마켓 이름
+    columns: COLUMNS 이름을 키로 갖는 같은 길이의 배열 딕셔너리, memory-map 배열도 그대로 사용한다
+    series[i]는 Candle, series[a:b]는 복사 없이 배열을 공유하는 CandleSeries를 반환한다
+    """
+
+    COLUMNS = ("timestamp", "open", "high", "low", "close", "acc_price", "acc_volume")
+    # 업비트 응답의 키 -> 컬럼 이름
+    UPBIT_FIELDS = {
+        "open": "opening_price",
+        "high": "high_price",
+        "low": "low_price",
+        "close": "trade_price",
+        "acc_price": "candle_acc_trade_price",
+        "acc_volume": "candle_acc_trade_volume",
+    }
+
+    def __init__(self, market, columns):
+        self.market = market
+        self.columns = columns
+
+    @classmethod
+    def empty(cls, market):
+        """빈 캔들 목록"""
+        columns = {
+            name: np.empty(0, dtype=np.int64 if name == "timestamp" else np.float64)
+            for name in cls.COLUMNS
+        }
+        return cls(market, columns)
+
+    @classmethod
+    def from_upbit_candles(cls, market, candles):
+        """업비트 형식 캔들 리스트(순서 그대로)를 CandleSeries로 변환"""
+        columns = {
+            "timestamp": DataConverter.to_epoch_min_array(
+                [candle["candle_date_time_utc"] for candle in candles]
+            )
+        }
+        for name, field in cls.UPBIT_FIELDS.items():
+            columns[name] = np.array([candle[field] for candle in candles], dtype=np.float64)
+        return cls(market, columns)
+
+    def to_upbit_candles(self):
+        """업비트 형식 캔들 딕셔너리 리스트로 변환"""
+        values = {name: self.columns[name].tolist() for name in self.UPBIT_FIELDS}
+        timestamp = self.columns["timestamp"]
+        utc = DataConverter.from_epoch_min_array(timestamp).tolist()
+        kst = DataConverter.from_epoch_min_array(DataConverter.utc_to_kst(timestamp)).tolist()
+        candles = []
+        for index in range(len(utc)):
+            candle = {
+                "market": self.market,
+                "candle_date_time_utc": utc[index],
+                "candle_date_time_kst": kst[index],
+            }
+            for name, field in self.UPBIT_FIELDS.items():
+                candle[field] = values[name][index]
+            candles.append(candle)
+        return candles
+
+    def __len__(self):
+        return len(self.columns["timestamp"])
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return CandleSeries(
+                self.market, {name: column[index] for name, column in self.columns.items()}
+            )
+
+        columns = self.columns
+        return Candle(
+            self.market,
+            int(columns["timestamp"][index]),
+            float(columns["open"][index]),
+            float(columns["high"][index]),
+            float(columns["low"][index]),
+            float(columns["close"][index]),
+            float(columns["acc_price"][index]),
+            float(columns["acc_volume"][index]),
+        )
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self[index]
+
+    def __eq__(self, other):
+        if not isinstance(other, CandleSeries):
+            return NotImplemented
+        return self.market == other.market and all(
+            np.array_equal(self.columns[name], other.columns[name]) for name in self.COLUMNS
+        )
+
+    __hash__ = None
+
+    def __repr__(self):
+        return f"CandleSeries(market={self.market}, size={len(self)})"
@@ -0,0 +1,214 @@
+"""
+업비트 분봉 데이터 대량 다운로더
+
+업비트 OpenAPI는 한 번에 최대 200개의 캔들만 제공하기 때문에 긴 기간의 데이터를 받으려면
+여러 번 나눠서 요청해야 한다. 이 모듈은 기간을 페이지 크기의 구간으로 나누고,
+HttpClient의 keep-alive 세션 pool로 여러 구간을 동시에 요청한 뒤 캔들 저장소에 합친다.
+
+1. 요청 수 제한 대응
+- 초당 요청 수(max_rate)를 넘지 않도록 TokenBucket으로 요청 간격을 조절한다.
+- 429 응답을 받으면 HttpClient가 bucket을 비워서 모든 worker의 요청을 늦춘다.
+- Remaining-Req 헤더의 sec=0 을 받으면 그 초가 끝날 때까지(PAUSE_SEC) 모든 worker가 요청을 멈춘다.
+  max_rate로 제한하지 않을 때도 적용되도록 bucket과 별도로 공유하는 재개 시각을 사용한다.
+- 429, 5xx, 연결 오류는 HttpClient가 full jitter 대기 시간(Retry-After가 있으면 그 시간) 후 재시도한다.
+
+2. 이어받기
+- 받아온 구간은 flush_count 개마다 저장소에 기록되므로 중간에 중단돼도 다시 실행하면
+  받지 못한 구간만 요청한다.
+"""
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import threading
+import time
+import numpy as np
+from .candle_store import CandleStore, UpbitCandleFetcher
+from .date_converter import DataConverter
+from .http_client import HttpClient, SessionPool, TokenBucket
+from .log_manager import LogManager
+
+
+class CandleDownloader:
+    """
+    기간 문자열로 주어진 분봉 데이터를 동시에 받아서 캔들 저장소에 저장
+
+    store: 캔들 저장소
+    url: 분봉 조회 API 주소, 테스트에서는 로컬 서버 주소로 교체
+    max_workers: 동시에 요청할 worker 수, 세션 pool 크기와 같다
+    max_rate: 초당 최대 요청 수, 0이나 None이면 제한하지 않는다
+    max_retry: 구간 하나당 최대 재시도 횟수
+    backoff: 첫 재시도 대기 시간의 상한(초), 재시도마다 2배씩 증가
+    flush_count: 저장소에 기록할 구간 개수 단위
+    client: 분봉 요청에 사용하는 HttpClient
+    """
+
+    # Remaining-Req의 sec=0 을 받았을 때 모든 worker가 요청을 멈추는 시간(초)
+    PAUSE_SEC = 1.0
+
+    def __init__(
+        self,
+        store=None,
+        url=None,
+        max_workers=8,
+        max_rate=10,
+        max_retry=5,
+        backoff=0.5,
+        flush_count=20,
+    ):
+        self.logger = LogManager.get_logger(__class__.__name__)
+        url = url if url is not None else UpbitCandleFetcher.URL
+        server_url, _ = UpbitCandleFetcher.split_url(url)
+        # 요청 간격을 고르게 유지하도록 한 번에 토큰 하나만 쌓는다
+        self.bucket = TokenBucket(max_rate, capacity=1) if max_rate else None
+        self.client = HttpClient(
+            server_url,
+            pool=SessionPool(max_workers),
+            limits={UpbitCandleFetcher.GROUP: self.bucket} if self.bucket is not None else None,
+            retries=max_retry,
+            backoff=backoff,
+        )
+        self.fetcher = UpbitCandleFetcher(url, client=self.client)
+        self.store = store if store is not None else CandleStore(fetcher=self.fetcher)
+        self.page_size = UpbitCandleFetcher.MAX_COUNT
+        self.max_workers = max_workers
+        self.flush_count = flush_count
+        self.__pause_lock = threading.Lock()
+        self.__resume_at = 0.0
+
+    def download(self, from_dash_to, market="KRW-BTC"):
+        """
+        기간 문자열에 해당하는 분봉을 받아서 저장하고 결과를 반환
+
+        from_dash_to: DataConverter.to_end_min 형태의 기간 '200220-200320', UTC 기준
+        Returns:
+        {
+            "market": 마켓 이름
+            "start": 시작 시간
+            "end": 끝 시간(포함하지 않음)
+            "count": 저장소에 있는 해당 기간의 캔들 개수
+            "pages": 이번에 요청한 구간 개수
+            "gaps": 캔들이 없는 구간 목록 [(시작 시간, 빠진 분), ...]
+        }
+        """
+        end_min = DataConverter.to_end_min(from_dash_to)
+        if end_min is None:
+            raise UserWarning(f"invalid range {from_dash_to}")
+        end, count = end_min
+        start, stop = CandleStore.to_range(end, count)
+
+        windows = self.split_windows(self.store.missing_ranges(market, start, stop))
+        self.logger.info(f"download {market} {from_dash_to} - {len(windows)} pages")
+        self.__download_windows(market, windows)
+
+        columns = self.store.read_columns(market, start, stop)
+        return {
+            "market": market,
+            "start": DataConverter.from_epoch_min(start),
+            "end": DataConverter.from_epoch_min(stop),
+            "count": len(columns["timestamp"]),
+            "pages": len(windows),
+            "gaps": self.find_gaps(columns["timestamp"], start, stop),
+        }
+
+    def split_windows(self, ranges):
+        """[start, stop) 구간 목록을 페이지 크기의 구간으로 나눈다"""
+        windows = []
+        for start, stop in ranges:
+            for window_start in range(start, stop, self.page_size):
+                windows.append((window_start, min(window_start + self.page_size, stop)))
+        return windows
+
+    @staticmethod
+    def find_gaps(timestamp, start, stop):
+        """[start, stop) 구간에서 캔들이 없는 구간을 (시작 시간, 빠진 분) 리스트로 반환"""
+        edges = np.concatenate(([start - 1], np.asarray(timestamp), [stop]))
+        missing = np.diff(edges) - 1
+        gaps = []
+        for index in np.flatnonzero(missing > 0).tolist():
+            gaps.append(
+                (DataConverter.from_epoch_min(edges[index] + 1), int(missing[index]))
+            )
+        return gaps
+
+    def __download_windows(self, market, windows):
+        """
+        구간을 동시에 받아서 저장, 한 구간이라도 실패하면 아직 시작하지 않은 구간은 취소하고 UserWarning
+        """
+        done = []
+        candles = []
+        executor = ThreadPoolExecutor(max_workers=self.max_workers)
+        try:
+            futures = {
+                executor.submit(self.__fetch_window, market, window): window
+                for window in windows
+            }
+            for future in as_completed(futures):
+                try:
+                    page = future.result()
+                except Exception as error:  # pylint: disable=broad-except
+                    # 남은 구간을 받아도 이번 실행 결과는 실패이므로 더 요청하지 않는다
+                    executor.shutdown(wait=True, cancel_futures=True)
+                    if isinstance(error, UserWarning):
+                        raise
+                    raise UserWarning(f"Fail to download {market} {futures[future]}") from error
+                candles.extend(page)
+                done.append(futures[future])
+                if len(done) >= self.flush_count:
+                    self.__flush(market, candles, done)
+                    candles, done = [], []
+        finally:
+            executor.shutdown(wait=True)
+            # 중단되더라도 받아온 구간은 저장해서 다음 실행 때 이어받는다
+            self.__flush(market, candles, done)
+
+    def __flush(self, market, candles, windows):
+        if len(windows) == 0:
+            return
+        self.store.put(market, candles)
+        self.store.add_coverage(market, windows)
+
+    def __fetch_window(self, market, window):
+        start, stop = window
+        to = DataConverter.from_epoch_min(stop) + "Z"
+        self.__wait_pause()
+        try:
+            res = self.fetcher.request(market, to, stop - start)
+        except UserWarning as error:
+            raise UserWarning(f"Fail to download {market} {window}") from error
+
+        if res.status_code >= 400:
+            raise UserWarning(f"Fail to download {market} {window} - status {res.status_code}")
+        if self.__remaining_sec(res) == 0:
+            self.__pause()
+        # 페이지 구간 밖의 캔들은 앞 구간에서 받으므로 제외
+        return [
+            candle
+            for candle in res.json()
+            if start <= CandleStore.to_timestamp(candle) < stop
+        ]
+
+    def __pause(self):
+        """모든 worker의 다음 요청을 PAUSE_SEC 초 뒤로 미룬다"""
+        with self.__pause_lock:
+            self.__resume_at = max(self.__resume_at, time.monotonic() + self.PAUSE_SEC)
+        if self.bucket is not None:
+            self.bucket.drain()
+
+    def __wait_pause(self):
+        """요청을 멈춘 시간이 끝날 때까지 대기"""
+        while True:
+            with self.__pause_lock:
+                delay = self.__resume_at - time.monotonic()
+            if delay <= 0:
+                return
+            time.sleep(delay)
+
+    @staticmethod
+    def __remaining_sec(res):
+        """Remaining-Req: group=candles; min=600; sec=9 헤더에서 초당 남은 요청 수 반환"""
+        remaining = res.headers.get("Remaining-Req")
+        if remaining is None:
+            return None
+        for item in remaining.split(";"):
+            key, _, value = item.strip().partition("=")
+            if key == "sec" and value.isdigit():
+                return int(value)
+        return None
@@ -0,0 +1,66 @@
+"""
+분봉 데이터를 더 긴 단위(3분, 5분, 15분, 1시간, 1일 등)의 캔들로 합치는 모듈
+
+캔들 시간(UTC 기준 경과 분)을 unit으로 나눈 몫이 같은 캔들을 하나의 캔들로 합친다.
+정렬된 배열에서 몫이 바뀌는 위치를 구하고 numpy ufunc의 reduceat으로 묶음마다 한 번에 계산한다.
+
+- timestamp: 묶음의 시작 시간(unit의 배수)
+- open: 묶음의 첫 번째 시가, close: 마지막 종가
+- high, low: 묶음의 최고가, 최저가
+- acc_price, acc_volume: 묶음의 합계
+
+일 단위(1440분) 묶음은 UTC 0시에 시작하므로 업비트 일봉과 같이 한국 시간 9시에 시작한다.
+거래가 없던 분은 캔들이 없으므로 거래가 없던 묶음도 캔들이 없다.
+"""
+import numpy as np
+from .candle import CandleSeries
+
+
+class CandleResampler:
+    """
+    분봉 컬럼 배열을 unit 분 캔들 컬럼 배열로 변환
+
+    UNITS: 지원하는 캔들 단위(분), 업비트 분봉 단위와 일봉
+    """
+
+    UNITS = (1, 3, 5, 10, 15, 30, 60, 240, 1440)
+
+    @classmethod
+    def check_unit(cls, unit):
+        """지원하지 않는 단위면 UserWarning"""
+        if unit not in cls.UNITS:
+            raise UserWarning(f"not supported unit {unit}, use one of {cls.UNITS}")
+
+    @staticmethod
+    def floor(timestamp, unit):
+        """timestamp가 속한 unit 묶음의 시작 시간"""
+        return timestamp // unit * unit
+
+    @staticmethod
+    def ceil(timestamp, unit):
+        """timestamp 이후(포함) 첫 번째 unit 묶음의 시작 시간"""
+        return -(-timestamp // unit) * unit
+
+    @classmethod
+    def resample(cls, columns, unit):
+        """
+        과거 데이터부터 정렬된 분봉 컬럼 배열을 unit 분 캔들 컬럼 배열로 합친다
+        Returns: CandleSeries.COLUMNS 이름을 키로 갖는 컬럼 배열 딕셔너리
+        """
+        cls.check_unit(unit)
+        timestamp = np.asarray(columns["timestamp"], dtype=np.int64)
+        if unit == 1 or len(timestamp) == 0:
+            return {name: np.array(columns[name]) for name in CandleSeries.COLUMNS}
+
+        bucket = cls.floor(timestamp, unit)
+        starts = np.concatenate(([0], np.flatnonzero(bucket[1:] != bucket[:-1]) + 1))
+        ends = np.append(starts[1:], len(bucket)) - 1
+        return {
+            "timestamp": bucket[starts],
+            "open": np.asarray(columns["open"], dtype=np.float64)[starts],
+            "high": np.maximum.reduceat(np.asarray(columns["high"], dtype=np.float64), starts),
+            "low": np.minimum.reduceat(np.asarray(columns["low"], dtype=np.float64), starts),
+            "close": np.asarray(columns["close"], dtype=np.float64)[ends],
+            "acc_price": np.add.reduceat(np.asarray(columns["acc_price"], dtype=np.float64), starts),
+            "acc_volume": np.add.reduceat(np.asarray(columns["acc_volume"], dtype=np.float64), starts),
+        }
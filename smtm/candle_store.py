@@ -0,0 +1,365 @@
+"""
+분봉 거래 정보를 로컬 디스크에 저장하고 제공하는 캔들 저장소
+
+시뮬레이션을 실행할 때마다 같은 기간의 데이터를 거래소에서 다시 받아오지 않도록
+마켓별로 컬럼 단위 numpy 배열(.npy)에 저장해 두고, 저장돼 있지 않은 구간만 거래소에 요청한다.
+
+저장 구조
+{root}/{market}/timestamp.npy: int64, 1970-01-01T00:00:00(UTC) 기준 경과 분(minute)
+{root}/{market}/open.npy, high.npy, low.npy, close.npy, acc_price.npy, acc_volume.npy: float64
+{root}/{market}/coverage.npy: int64 (N, 2), 거래소에서 이미 받아온 [시작, 끝) 구간 목록
+{root}/{market}/rollup/{unit}/*.npy: 분봉을 unit 분 단위로 합친 캔들, 분봉과 같은 컬럼 구조
+{root}/{market}/rollup/{unit}/dirty.npy: int64 (N, 2), 합친 뒤에 분봉이 바뀐 [시작, 끝) 구간 목록
+
+업비트는 거래가 없는 분의 캔들을 제공하지 않기 때문에, 저장된 캔들만으로는 받아온 구간인지
+알 수 없다. 그래서 받아온 구간을 coverage에 따로 기록한다.
+- 아직 끝나지 않은 현재 분의 캔들은 바뀔 수 있으므로 coverage에는 마지막으로 끝난 분까지만 기록한다.
+- 같은 이유로 조회 개수(count)는 캔들 개수가 아니라 기간(unit 분의 개수)이다. 거래가 없던 분은 캔들이 없으므로
+  반환하는 캔들은 count보다 적을 수 있다.
+
+더 긴 단위의 캔들은 거래소에 따로 요청하지 않고 저장된 분봉을 CandleResampler로 합쳐서 저장해 둔다.
+분봉을 저장할 때는 이미 만들어진 단위마다 바뀐 구간만 dirty에 기록하고, 해당 단위를 조회할 때
+dirty 구간에 걸친 묶음만 다시 합친다.
+"""
+import os
+from urllib.parse import urlsplit
+import numpy as np
+from .candle import CandleSeries
+from .candle_resampler import CandleResampler
+from .date_converter import DataConverter
+from .lazy_module import lazy_module
+from .log_manager import LogManager
+
+# 거래소에 요청할 때 불러온다
+requests = lazy_module("requests")
+
+
+class UpbitCandleFetcher:
+    """
+    업비트 OpenAPI로 분봉 데이터를 가져오는 fetcher
+
+    fetcher(market, to, count) 형태로 호출하며, 업비트 응답(최신순 리스트)을 그대로 반환한다
+    to: %Y-%m-%dT%H:%M:%SZ 형태의 UTC 시간, 해당 시간 이전의 캔들을 가져온다
+    count: 가져올 캔들 개수, 최대 MAX_COUNT
+    client: 요청에 사용할 HttpClient, base_url은 url의 서버 주소여야 한다. 없으면 requests.get으로 요청한다
+    """
+
+    URL = "https://api.upbit.com/v1/candles/minutes/1"
+    MAX_COUNT = 200
+    GROUP = "candles"
+
+    def __init__(self, url=None, client=None):
+        self.url = url if url is not None else self.URL
+        self.client = client
+
+    @staticmethod
+    def split_url(url):
+        """url을 HttpClient의 base_url로 사용할 서버 주소와 요청 경로로 나눈다"""
+        parts = urlsplit(url)
+        return f"{parts.scheme}://{parts.netloc}", parts.path
+
+    def __call__(self, market, to, count):
+        res = self.request(market, to, count)
+        res.raise_for_status()
+        return res.json()
+
+    def request(self, market, to, count):
+        """응답 헤더(요청 수 제한 정보 등)가 필요한 경우를 위해 응답 객체를 그대로 반환"""
+        query_string = {"market": market, "to": to, "count": count}
+        headers = {"accept": "application/json"}
+        if self.client is None:
+            return requests.get(self.url, params=query_string, headers=headers)
+        _, path = self.split_url(self.url)
+        return self.client.request("GET", path, params=query_string, headers=headers, group=self.GROUP)
+
+
+class CandleStore:
+    """
+    마켓별 분봉 데이터를 컬럼 단위로 저장하고, 없는 구간만 fetcher로 채워서 제공
+
+    root: 저장 경로, 지정하지 않으면 SMTM_CANDLE_DIR 환경 변수 또는 ~/.smtm/candles
+    fetcher: fetcher(market, to, count) -> 업비트 형식 캔들 리스트, 테스트에서는 가짜 fetcher로 교체
+    page_size: fetcher 한 번에 요청할 최대 캔들 개수
+    """
+
+    COLUMNS = CandleSeries.COLUMNS
+    DEFAULT_ROOT = os.path.join(os.path.expanduser("~"), ".smtm", "candles")
+
+    def __init__(self, root=None, fetcher=None, page_size=UpbitCandleFetcher.MAX_COUNT):
+        self.logger = LogManager.get_logger(__class__.__name__)
+        if root is None:
+            root = os.environ.get("SMTM_CANDLE_DIR", self.DEFAULT_ROOT)
+        self.root = root
+        self.fetcher = fetcher if fetcher is not None else UpbitCandleFetcher()
+        self.page_size = page_size
+
+    def get_candles(self, market, end=None, count=100, unit=1):
+        """
+        end 이전 count 개 unit 분 캔들을 과거 데이터부터 순서대로 CandleSeries로 반환
+
+        end: %Y-%m-%dT%H:%M:%S 형태의 UTC 시간, None이면 현재 시간
+        count: 가져올 기간(unit 개수), 거래가 없던 분은 캔들이 없으므로 반환 개수는 count보다 작을 수 있다
+        unit: 캔들 단위(분), CandleResampler.UNITS 중 하나
+        """
+        return CandleSeries(market, self.load_columns(market, end, count, unit))
+
+    def load_columns(self, market, end=None, count=100, unit=1):
+        """
+        end 이전 count 개 unit 분 구간의 캔들을 컬럼별 numpy 배열 딕셔너리로 반환
+        count는 캔들 개수가 아니라 기간이므로 거래가 없던 분이 있으면 캔들은 count보다 적다
+        저장돼 있지 않은 분봉 구간은 fetcher로 먼저 채운다
+        """
+        CandleResampler.check_unit(unit)
+        start, stop = self.to_range(end, count, unit)
+        for missing_start, missing_stop in self.missing_ranges(market, start, stop):
+            self.fetch(market, missing_start, missing_stop)
+        if unit == 1:
+            return self.read_columns(market, start, stop)
+        return self.read_rollup(market, unit, start, stop)
+
+    @classmethod
+    def to_range(cls, end, count, unit=1):
+        """
+        end, count를 경과 분 기준 [start, stop) 구간으로 변환
+        unit이 1보다 크면 end가 속한 묶음은 아직 끝나지 않았으므로 제외하고 그 이전 count 개 묶음의 구간
+        """
+        if end is None:
+            stop = DataConverter.now_epoch_min()
+        else:
+            stop = DataConverter.to_epoch_min(end)
+        stop = CandleResampler.floor(stop, unit)
+        return stop - count * unit, stop
+
+    def read_columns(self, market, start=None, stop=None):
+        """
+        저장된 캔들 중 [start, stop) 구간을 컬럼별 배열로 반환, fetcher는 호출하지 않는다
+        저장된 파일은 memory-map 으로 열기 때문에 필요한 구간만 디스크에서 읽는다
+        """
+        return self.__slice(self.__load(market), market, start, stop)
+
+    def read_rollup(self, market, unit, start=None, stop=None):
+        """
+        저장된 분봉을 unit 분 단위로 합친 캔들 중 [start, stop) 구간을 컬럼별 배열로 반환
+        합친 캔들이 없거나 분봉이 바뀐 구간이 있으면 먼저 update_rollup으로 갱신한다
+        """
+        CandleResampler.check_unit(unit)
+        if unit == 1:
+            return self.read_columns(market, start, stop)
+        self.update_rollup(market, unit)
+        return self.__slice(self.__load(market, unit), market, start, stop)
+
+    def update_rollup(self, market, unit):
+        """
+        unit 분 캔들을 저장된 분봉과 같게 갱신
+        처음이면 전체 분봉을 합치고, 이후에는 dirty 구간에 걸친 묶음만 다시 합쳐서 교체한다
+        """
+        base = self.__load(market)
+        if base is None:
+            return
+
+        path = self.__market_path(market, unit)
+        dirty_path = os.path.join(path, "dirty.npy")
+        rollup = self.__load(market, unit)
+        if rollup is None:
+            merged = CandleResampler.resample(base, unit)
+        else:
+            dirty = self.__load_ranges(dirty_path)
+            if len(dirty) == 0:
+                return
+            timestamp = rollup["timestamp"]
+            keep = np.ones(len(timestamp), dtype=bool)
+            parts = []
+            # 묶음 단위로 넓힌 뒤에 다시 합쳐야 같은 묶음에 걸친 dirty 구간이 중복된 캔들을 만들지 않는다
+            buckets = self.__merge_ranges(
+                (CandleResampler.floor(dirty_start, unit), CandleResampler.ceil(dirty_stop, unit))
+                for dirty_start, dirty_stop in dirty
+            )
+            for begin, end in buckets:
+                keep &= (timestamp < begin) | (timestamp >= end)
+                parts.append(CandleResampler.resample(self.__slice(base, market, begin, end), unit))
+            merged = {
+                name: np.concatenate([rollup[name][keep]] + [part[name] for part in parts])
+                for name in self.COLUMNS
+            }
+            order = np.argsort(merged["timestamp"], kind="stable")
+            merged = {name: column[order] for name, column in merged.items()}
+
+        os.makedirs(path, exist_ok=True)
+        for name in self.COLUMNS:
+            self.__save(os.path.join(path, f"{name}.npy"), merged[name])
+        # 캔들을 모두 저장한 뒤에 dirty를 지우므로 중간에 중단되면 다음 조회에서 다시 합친다
+        if os.path.exists(dirty_path):
+            os.remove(dirty_path)
+        self.logger.debug(f"rollup updated - {market} {unit}m, {len(merged['timestamp'])} candles")
+
+    def rollup_units(self, market):
+        """저장돼 있는 합친 캔들의 단위 목록"""
+        path = os.path.join(self.__market_path(market), "rollup")
+        if not os.path.isdir(path):
+            return []
+        return sorted(int(name) for name in os.listdir(path) if name.isdigit())
+
+    @staticmethod
+    def __slice(columns, market, start, stop):
+        if columns is None:
+            return CandleSeries.empty(market).columns
+
+        timestamp = columns["timestamp"]
+        begin = 0 if start is None else np.searchsorted(timestamp, start, side="left")
+        end = len(timestamp) if stop is None else np.searchsorted(timestamp, stop, side="left")
+        return {name: column[begin:end] for name, column in columns.items()}
+
+    def missing_ranges(self, market, start, stop):
+        """[start, stop) 구간 중 거래소에서 받아오지 않은 구간 목록 반환"""
+        missing = []
+        cursor = start
+        for covered_start, covered_stop in self.__load_coverage(market):
+            if covered_stop <= cursor:
+                continue
+            if covered_start >= stop:
+                break
+            if covered_start > cursor:
+                missing.append((cursor, covered_start))
+            cursor = max(cursor, covered_stop)
+        if cursor < stop:
+            missing.append((cursor, stop))
+        return missing
+
+    def fetch(self, market, start, stop):
+        """
+        [start, stop) 구간을 page_size 단위로 나눠 최신 구간부터 fetcher로 받아와서 저장
+        업비트는 거래가 없는 분을 건너뛰기 때문에 받아온 가장 과거 캔들을 기준으로 다음 요청 위치를 정한다
+        현재 분과 그 이후는 받아온 구간으로 기록하지 않으므로 다음 조회에서 다시 받아온다
+        """
+        candles = []
+        cursor = stop
+        while cursor > start:
+            count = min(self.page_size, cursor - start)
+            page = self.fetcher(market, DataConverter.from_epoch_min(cursor) + "Z", count)
+            candles.extend(page)
+            if len(page) < count:
+                # 더 이상 과거 데이터가 없음
+                cursor = start
+                break
+            cursor = min(self.to_timestamp(candle) for candle in page)
+
+        covered_start = min(cursor, start)
+        covered_stop = min(stop, DataConverter.now_epoch_min())
+        if covered_start < covered_stop:
+            self.put(market, candles, covered_start, covered_stop)
+        else:
+            self.put(market, candles)
+        self.logger.debug(f"fetched {len(candles)} candles - {market} [{start}, {stop})")
+
+    def put(self, market, candles, start=None, stop=None):
+        """
+        업비트 형식 캔들 리스트를 저장소에 합쳐서 저장
+        같은 시간의 캔들은 새로 받은 데이터로 교체하고, start, stop이 주어지면 받아온 구간으로 기록한다
+        """
+        self.put_columns(market, self.from_upbit_candles(candles), start, stop)
+
+    def put_columns(self, market, columns, start=None, stop=None):
+        """컬럼별 배열을 저장소에 합쳐서 저장, put과 같지만 업비트 형식 변환을 거치지 않는다"""
+        new_columns = {name: np.asarray(columns[name]) for name in self.COLUMNS}
+        if len(new_columns["timestamp"]) > 0:
+            timestamp = new_columns["timestamp"]
+            self.__mark_rollup_dirty(market, int(timestamp.min()), int(timestamp.max()) + 1)
+
+        old_columns = self.__load(market)
+        if old_columns is not None:
+            new_columns = {
+                name: np.concatenate((new_columns[name], old_columns[name]))
+                for name in self.COLUMNS
+            }
+
+        # np.unique는 처음 나온 값의 index를 반환하므로 새로 받은 데이터가 우선한다
+        _, index = np.unique(new_columns["timestamp"], return_index=True)
+        merged = {name: column[index] for name, column in new_columns.items()}
+
+        path = self.__market_path(market)
+        os.makedirs(path, exist_ok=True)
+        for name in self.COLUMNS:
+            self.__save(os.path.join(path, f"{name}.npy"), merged[name])
+
+        if start is not None and stop is not None:
+            self.add_coverage(market, [(start, stop)])
+
+    def __mark_rollup_dirty(self, market, start, stop):
+        """
+        이미 만들어진 합친 캔들마다 바뀔 분봉 구간 [start, stop)을 기록해 두고 조회할 때 갱신한다
+        분봉보다 먼저 기록하므로 분봉을 저장하다 중단돼도 갱신할 구간을 놓치지 않는다
+        """
+        for unit in self.rollup_units(market):
+            dirty_path = os.path.join(self.__market_path(market, unit), "dirty.npy")
+            ranges = self.__merge_ranges(self.__load_ranges(dirty_path) + [(start, stop)])
+            self.__save(dirty_path, np.array(ranges, dtype=np.int64))
+
+    @classmethod
+    def to_timestamp(cls, candle):
+        """업비트 캔들의 UTC 시간을 경과 분으로 변환"""
+        return DataConverter.to_epoch_min(candle["candle_date_time_utc"])
+
+    @classmethod
+    def from_upbit_candles(cls, candles):
+        """업비트 형식 캔들 리스트를 컬럼별 배열로 변환"""
+        return CandleSeries.from_upbit_candles(None, candles).columns
+
+    @classmethod
+    def to_upbit_candles(cls, market, columns):
+        """컬럼별 배열을 과거 데이터부터 정렬된 업비트 형식 캔들 리스트로 변환"""
+        return CandleSeries(market, columns).to_upbit_candles()
+
+    def __market_path(self, market, unit=1):
+        if unit == 1:
+            return os.path.join(self.root, market)
+        return os.path.join(self.root, market, "rollup", str(unit))
+
+    def __load(self, market, unit=1):
+        path = self.__market_path(market, unit)
+        if not os.path.exists(os.path.join(path, "timestamp.npy")):
+            return None
+        return {
+            name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r")
+            for name in self.COLUMNS
+        }
+
+    def __load_coverage(self, market):
+        return self.__load_ranges(os.path.join(self.__market_path(market), "coverage.npy"))
+
+    @staticmethod
+    def __load_ranges(path):
+        if not os.path.exists(path):
+            return []
+        return [tuple(item) for item in np.load(path).tolist()]
+
+    @staticmethod
+    def __merge_ranges(ranges):
+        """[start, stop) 구간 목록을 정렬하고 겹치거나 맞닿은 구간은 하나로 합친다"""
+        ranges = sorted(ranges)
+        if len(ranges) == 0:
+            return []
+        merged = [list(ranges[0])]
+        for range_start, range_stop in ranges[1:]:
+            if range_start <= merged[-1][1]:
+                merged[-1][1] = max(merged[-1][1], range_stop)
+            else:
+                merged.append([range_start, range_stop])
+        return merged
+
+    def add_coverage(self, market, ranges):
+        """받아온 [start, stop) 구간 목록을 추가하고 겹치거나 맞닿은 구간은 하나로 합친다"""
+        merged = self.__merge_ranges(self.__load_coverage(market) + list(ranges))
+        if len(merged) == 0:
+            return
+
+        path = self.__market_path(market)
+        os.makedirs(path, exist_ok=True)
+        self.__save(os.path.join(path, "coverage.npy"), np.array(merged, dtype=np.int64))
+
+    @staticmethod
+    def __save(path, array):
+        """임시 파일에 저장 후 교체해서 저장 도중 중단돼도 기존 파일이 깨지지 않도록 한다"""
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as file:
+            np.save(file, array)
+        os.replace(tmp_path, path)
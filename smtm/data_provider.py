@@ -1,6 +1,9 @@
 """
 DataProvider 추상클래스
 거래 관련 데이터 수집 후 필요한 데이터 포맷에 맞게 정보 제공
+
+데이터는 캔들 묶음(batch) 단위의 iterator로 제공하고, get_info는 그 iterator에서 하나씩 꺼내서 전달한다.
+전체 데이터를 다 받기 전에 첫 번째 묶음부터 사용할 수 있고, 메모리에는 묶음 몇 개만 유지된다.
 """
 from abc import ABCMeta, abstractmethod
 
@@ -26,4 +29,12 @@ class DataProvider(metaclass=ABCMeta):
             "acc_price": 단위 시간 내 누적 거래 가격
             "acc_volume": 단위 시간 내 누적 거래량
         }
-        """
\ No newline at end of file
+        """
+
+    @abstractmethod
+    def iter_batches(self):
+        """
+        거래 정보 묶음을 시간 순서대로 제공하는 iterator
+
+        Returns: CandleSeries를 순서대로 반환하는 iterator
+        """
@@ -1,10 +1,31 @@
-"""datetime을 거래 형태에 맞게 변경"""
-from datetime import datetime, timedelta
+"""
+datetime을 거래 형태에 맞게 변경
+
+캔들 시간은 %Y-%m-%dT%H:%M:%S 형태의 문자열 또는 1970-01-01T00:00:00 기준 경과 분(epoch minute) 정수로 다룬다.
+문자열 하나씩 datetime으로 변환하면 수백만 개의 캔들 시간에는 수 초가 걸리기 때문에
+
+1. 같은 문자열, 같은 경과 분은 반복해서 변환하는 경우가 많으므로 변환 결과를 lru_cache로 재사용한다.
+2. 시간 컬럼 전체는 고정 길이 문자열의 각 자리 숫자를 numpy 배열로 꺼내서 날짜 계산을 배열 연산으로 한다.
+- 날짜 <-> 1970-01-01 기준 경과 일 변환은 proleptic gregorian 달력의 days_from_civil, civil_from_days 공식을 사용
+- 형식이 다른 문자열이 섞여 있으면 하나씩 변환하는 방법으로 처리한다
+3. 한국 시간(KST) <-> UTC 변환은 경과 분에 KST_OFFSET_MIN을 더하거나 빼는 정수 연산이다.
+"""
+from datetime import datetime, timedelta, timezone
+from functools import lru_cache
+import numpy as np
 
 
 class DataConverter:
     """날짜, 시간 변경해주는 클래스"""
     ISO_DATEFORMAT='%Y-%m-%dT%H:%M:%S'
+    EPOCH=datetime(1970, 1, 1)
+    KST_OFFSET_MIN=9 * 60
+    CACHE_SIZE=65536
+    # %Y-%m-%dT%H:%M:%S 형태 문자열의 길이와 숫자가 아닌 자리
+    ISO_LENGTH=19
+    ISO_SEPARATORS={4: "-", 7: "-", 13: ":", 16: ":"}
+    # 평년의 월별 일수
+    MONTH_DAYS=np.array([31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31], dtype=np.int32)
 
     @classmethod
     def to_end_min(cls, from_dash_to):
@@ -40,6 +61,7 @@ class DataConverter:
         return cls.to_iso_string(to_dt), count
 
     @classmethod
+    @lru_cache(maxsize=CACHE_SIZE)
     def num_2_datetime(cls, num_string):
         """
         숫자로 주어진 시간을 datetime 객체로 변환 후 반환
@@ -59,11 +81,157 @@ class DataConverter:
     @classmethod
     def to_iso_string(cls, dt):
         """datetime 객체를 %Y-%m-%dT%H:%M:%S 형태의 문자열로 변환하여 반환"""
-        return dt.strftime(cls.ISO_DATEFORMAT)
+        return dt.isoformat(sep="T", timespec="seconds")
 
     @classmethod
     def from_kst_to_utc_str(cls, datetime_str):
         """%Y-%m-%dT%H:%M:%S 형태에서 9시간 뺀 문자열 반환"""
-        dt = datetime.strptime(datetime_str, cls.ISO_DATEFORMAT)
-        dt -= timedelta(hours=9)
-        return dt.strftime(cls.ISO_DATEFORMAT)
\ No newline at end of file
+        return cls.__shift_kst_to_utc(datetime_str)
+
+    @classmethod
+    def to_epoch_min(cls, datetime_str):
+        """
+        %Y-%m-%dT%H:%M:%S 형태의 문자열을 1970-01-01T00:00:00 기준 경과 분(minute)으로 변환
+        'T' 대신 공백, 끝에 붙은 'Z' 도 허용한다
+        to_epoch_min("2020-04-30T16:30:00") -> 26471070
+        """
+        return cls.__parse_epoch_min(datetime_str)
+
+    @classmethod
+    def from_epoch_min(cls, epoch_min):
+        """경과 분(minute)을 %Y-%m-%dT%H:%M:%S 형태의 문자열로 변환"""
+        return cls.__format_epoch_min(int(epoch_min))
+
+    @staticmethod
+    @lru_cache(maxsize=CACHE_SIZE)
+    def __parse_epoch_min(datetime_str):
+        dt = datetime.fromisoformat(datetime_str.rstrip("Z"))
+        return (dt - DataConverter.EPOCH) // timedelta(minutes=1)
+
+    @staticmethod
+    @lru_cache(maxsize=CACHE_SIZE)
+    def __shift_kst_to_utc(datetime_str):
+        dt = datetime.strptime(datetime_str, DataConverter.ISO_DATEFORMAT)
+        dt -= timedelta(minutes=DataConverter.KST_OFFSET_MIN)
+        return dt.isoformat(sep="T", timespec="seconds")
+
+    @staticmethod
+    @lru_cache(maxsize=CACHE_SIZE)
+    def __format_epoch_min(epoch_min):
+        dt = DataConverter.EPOCH + timedelta(minutes=epoch_min)
+        return dt.isoformat(sep="T", timespec="seconds")
+
+    @classmethod
+    def to_epoch_min_array(cls, datetime_strs):
+        """
+        %Y-%m-%dT%H:%M:%S 형태 문자열 리스트(또는 배열)를 경과 분 int64 배열로 한 번에 변환
+        19자 뒤에 붙은 문자('Z' 등)는 무시하고, 형식이 다른 문자열이 있으면 하나씩 to_epoch_min으로 변환한다
+        """
+        if isinstance(datetime_strs, np.ndarray) and datetime_strs.dtype.kind == "U":
+            values = datetime_strs.ravel()
+            if len(values) == 0:
+                return np.zeros(0, dtype=np.int64)
+            chars = np.ascontiguousarray(values.astype(f"U{max(values.dtype.itemsize // 4, cls.ISO_LENGTH)}"))
+            chars = chars.view(np.uint32).reshape(len(values), -1)[:, : cls.ISO_LENGTH]
+            if np.any(chars > 127):
+                return np.array([cls.to_epoch_min(str(value)) for value in values], dtype=np.int64)
+        else:
+            values = list(datetime_strs)
+            if len(values) == 0:
+                return np.zeros(0, dtype=np.int64)
+            joined = "".join(values)
+            if len(joined) != cls.ISO_LENGTH * len(values) or not joined.isascii():
+                return np.array([cls.to_epoch_min(value) for value in values], dtype=np.int64)
+            chars = np.frombuffer(joined.encode("ascii"), dtype=np.uint8).reshape(len(values), -1)
+
+        # 자리별로 연속된 배열이 되도록 (자리, 개수) 모양으로 바꾼다
+        columns = np.ascontiguousarray(chars.T, dtype=np.uint8)
+        # 숫자가 아닌 문자는 uint8로 빼면 9보다 큰 값이 된다
+        digits = (columns - ord("0")).astype(np.uint8)
+        is_valid = bool(np.all(np.delete(digits, list(cls.ISO_SEPARATORS) + [10], axis=0) <= 9))
+        for index, separator in cls.ISO_SEPARATORS.items():
+            is_valid = is_valid and bool(np.all(columns[index] == ord(separator)))
+        is_valid = is_valid and bool(np.all((columns[10] == ord("T")) | (columns[10] == ord(" "))))
+        if not is_valid:
+            return np.array([cls.to_epoch_min(str(value)) for value in values], dtype=np.int64)
+
+        digits = digits.astype(np.int32)
+        year = digits[0] * 1000 + digits[1] * 100 + digits[2] * 10 + digits[3]
+        month = digits[5] * 10 + digits[6]
+        day = digits[8] * 10 + digits[9]
+        hour = digits[11] * 10 + digits[12]
+        minute = digits[14] * 10 + digits[15]
+        second = digits[17] * 10 + digits[18]
+        if np.any((year < 1) | (month < 1) | (month > 12) | (hour > 23) | (minute > 59) | (second > 59)):
+            return np.array([cls.to_epoch_min(str(value)) for value in values], dtype=np.int64)
+        # 날짜는 윤년을 포함한 그 달의 일수까지만 허용하고, 틀린 값은 to_epoch_min에서 예외를 발생시킨다
+        is_leap = (year % 4 == 0) & ((year % 100 != 0) | (year % 400 == 0))
+        month_days = cls.MONTH_DAYS[month - 1] + ((month == 2) & is_leap)
+        if np.any((day < 1) | (day > month_days)):
+            return np.array([cls.to_epoch_min(str(value)) for value in values], dtype=np.int64)
+
+        # 연, 월 조합은 몇 개 되지 않으므로 월 첫날의 경과 일을 표로 만들어 두고 찾는다
+        months = year * 12 + month - 1
+        first = int(months.min())
+        table = np.arange(first, int(months.max()) + 1)
+        table = cls.days_from_civil(table // 12, table % 12 + 1, 1).astype(np.int64)
+        return (table[months - first] + (day - 1)) * 1440 + (hour * 60 + minute)
+
+    @classmethod
+    def from_epoch_min_array(cls, epoch_mins):
+        """경과 분 배열을 %Y-%m-%dT%H:%M:%S 형태 문자열(numpy 유니코드) 배열로 한 번에 변환"""
+        epoch_mins = np.asarray(epoch_mins, dtype=np.int64).ravel()
+        days, minutes = np.divmod(epoch_mins, 1440)
+        year, month, day = cls.civil_from_days(days)
+        hour, minute = np.divmod(minutes, 60)
+
+        # 자리별 문자 코드를 (자리, 개수) 모양으로 채우고 (개수, 자리) 모양의 유니코드 배열로 바꾼다
+        columns = np.empty((cls.ISO_LENGTH, len(epoch_mins)), dtype=np.uint32)
+        for index, char in enumerate("0000-00-00T00:00:00"):
+            columns[index] = ord(char)
+        for offset, value, width in ((0, year, 4), (5, month, 2), (8, day, 2), (11, hour, 2), (14, minute, 2)):
+            for position in range(width - 1, -1, -1):
+                value, digit = np.divmod(value, 10)
+                columns[offset + position] += digit.astype(np.uint32)
+        return np.ascontiguousarray(columns.T).view(f"U{cls.ISO_LENGTH}").ravel()
+
+    @classmethod
+    def kst_to_utc(cls, epoch_min):
+        """한국 시간 경과 분(또는 배열)을 UTC 경과 분으로 변환"""
+        return epoch_min - cls.KST_OFFSET_MIN
+
+    @classmethod
+    def utc_to_kst(cls, epoch_min):
+        """UTC 경과 분(또는 배열)을 한국 시간 경과 분으로 변환"""
+        return epoch_min + cls.KST_OFFSET_MIN
+
+    @staticmethod
+    def days_from_civil(year, month, day):
+        """연, 월, 일(정수 또는 배열)을 1970-01-01 기준 경과 일로 변환"""
+        year = year - (month <= 2)
+        era = year // 400
+        year_of_era = year - era * 400
+        day_of_year = (153 * ((month + 9) % 12) + 2) // 5 + day - 1
+        day_of_era = year_of_era * 365 + year_of_era // 4 - year_of_era // 100 + day_of_year
+        return era * 146097 + day_of_era - 719468
+
+    @staticmethod
+    def civil_from_days(days):
+        """1970-01-01 기준 경과 일(정수 또는 배열)을 (연, 월, 일)로 변환"""
+        days = days + 719468
+        era = days // 146097
+        day_of_era = days - era * 146097
+        year_of_era = (
+            day_of_era - day_of_era // 1460 + day_of_era // 36524 - day_of_era // 146096
+        ) // 365
+        day_of_year = day_of_era - (365 * year_of_era + year_of_era // 4 - year_of_era // 100)
+        month_index = (5 * day_of_year + 2) // 153
+        day = day_of_year - (153 * month_index + 2) // 5 + 1
+        month = np.where(month_index < 10, month_index + 3, month_index - 9)
+        year = year_of_era + era * 400 + (month <= 2)
+        return year, month, day
+
+    @classmethod
+    def now_epoch_min(cls):
+        """현재 UTC 시간의 경과 분(minute) 반환"""
+        return (datetime.now(timezone.utc).replace(tzinfo=None) - cls.EPOCH) // timedelta(minutes=1)
@@ -0,0 +1,347 @@
+"""
+DataProvider, Strategy, Trader를 연결해서 거래를 진행하는 이벤트 기반 Operator
+
+한 턴의 흐름
+1. candle 이벤트: DataProvider.get_info로 받은 거래 정보를 Strategy.update_trading_info로 전달하고
+   Strategy.get_request로 만든 거래 요청을 order 이벤트로 등록한 뒤 다음 거래 정보를 candle 이벤트로 등록한다.
+2. order 이벤트: Trader.send_request로 거래 요청을 보낸다.
+3. fill 이벤트: Trader가 callback으로 전달한 결과를 Strategy.update_result로 전달한다.
+
+모든 이벤트는 거래 정보의 date_time을 기준으로 우선순위 큐(heapq)에 들어간다.
+같은 시간의 이벤트는 candle -> order -> fill 순서로 처리되므로 결과는 항상 다음 거래 정보보다 먼저 전략에 전달된다.
+Trader가 다른 thread에서 callback을 호출해도 이벤트는 Operator를 실행하는 thread에서 처리된다.
+
+동작 방식
+- backtest: interval이 None이면 대기 없이 최대 속도로 진행한다.
+- realtime: interval 초마다 거래 정보 하나를 처리하고, 기다리는 동안 도착한 결과를 처리한다.
+
+journal을 지정하면 거래 요청과 결과를 TradeJournal에 기록하고, 끝날 때 Trader의 계좌 정보를 잔고 기록으로 남긴다.
+Instrumentation이 켜져 있으면 단계별 소요 시간을 "operator.단계" 이름으로 기록하고 거래 정보마다 턴을 나눈다.
+
+snapshot_store를 지정하면 snapshot_every 턴마다 Operator, DataProvider, Strategy, Trader 상태의 snapshot을 저장한다.
+snapshot은 거래 정보를 처리하기 직전, 이전 턴의 요청과 결과를 모두 처리한 시점에 만들고,
+restore로 같은 설정으로 초기화한 구성 요소에 복원해서 이어서 진행한다.
+"""
+import heapq
+import itertools
+import threading
+import time
+from .log_manager import LogManager
+from .instrumentation import Instrumentation
+from .snapshot import Snapshot
+
+
+class Operator:
+    """
+    이벤트 큐로 거래 정보 -> 전략 -> 거래 요청 -> 결과 흐름을 진행
+
+    data_provider: 거래 정보를 제공하는 DataProvider
+    strategy: 초기화된 Strategy
+    trader: 거래 요청을 처리하는 Trader, 시뮬레이션이면 초기화된 SimulationTrader
+    interval: realtime 동작에서 거래 정보 사이의 시간(초), None이면 backtest 동작
+    journal: 거래 요청과 결과를 기록할 TradeJournal
+    snapshot_store: snapshot을 저장할 SnapshotStore
+    snapshot_every: snapshot을 저장할 턴 간격
+    state: ready, running, terminated
+    """
+
+    CANDLE = 0
+    ORDER = 1
+    FILL = 2
+    STAGES = ("data", "strategy", "order", "result")
+
+    def __init__(
+        self,
+        data_provider,
+        strategy,
+        trader,
+        interval=None,
+        journal=None,
+        snapshot_store=None,
+        snapshot_every=None,
+    ):
+        self.logger = LogManager.get_logger(__class__.__name__)
+        self.data_provider = data_provider
+        self.strategy = strategy
+        self.trader = trader
+        self.interval = interval
+        self.journal = journal
+        self.snapshot_store = snapshot_store
+        self.snapshot_every = snapshot_every
+        self.state = "ready"
+        self.turn_count = 0
+        self.result_count = 0
+        self.elapsed = 0.0
+        self.timing = {stage: [0, 0.0, 0.0] for stage in self.STAGES}
+        self.thread = None
+        self.__events = []
+        self.__sequence = itertools.count()
+        self.__condition = threading.Condition()
+        self.__last_time = None
+        self.__last_market = ""
+        self.__next_tick = 0.0
+        self.__snapshot_turn = None
+
+    def run(self, max_turns=None):
+        """
+        거래 정보가 없거나 game-over 결과를 받거나 stop이 호출될 때까지 진행
+        max_turns: 처리할 최대 거래 정보 개수
+        Returns: get_report 결과
+        """
+        if self.state == "running":
+            raise UserWarning("operator is already running")
+
+        self.state = "running"
+        started = time.perf_counter()
+        self.__next_tick = time.monotonic()
+        # 멈췄다가 다시 진행하거나 복원한 경우 이미 받은 거래 정보부터 처리한다
+        if all(event[1] != self.CANDLE for event in self.__events):
+            self.__schedule_candle()
+        try:
+            while self.state == "running":
+                event = self.__pop()
+                if event is None:
+                    break
+                _, kind, _, payload = event
+                if kind == self.CANDLE:
+                    if self.__is_snapshot_turn():
+                        self.__save_snapshot(event)
+                    self.__handle_candle(payload)
+                    if max_turns is not None and self.turn_count >= max_turns:
+                        self.__drain()
+                        break
+                elif kind == self.ORDER:
+                    self.__handle_order(payload)
+                else:
+                    self.__handle_fill(payload)
+        finally:
+            Instrumentation.finish_turn()
+            self.state = "terminated"
+            self.elapsed += time.perf_counter() - started
+            if self.journal is not None:
+                self.__record_balance()
+
+        self.logger.info(
+            f"operator terminated - turn: {self.turn_count}, result: {self.result_count}"
+        )
+        return self.get_report()
+
+    def start(self, max_turns=None):
+        """별도 thread에서 run을 실행"""
+        self.thread = threading.Thread(target=self.run, args=(max_turns,), daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        """진행 중인 이벤트를 처리한 후 멈춘다"""
+        with self.__condition:
+            if self.state == "running":
+                self.state = "stopping"
+            self.__condition.notify_all()
+        if self.thread is not None and self.thread is not threading.current_thread():
+            self.thread.join()
+
+    def snapshot(self):
+        """Operator, DataProvider, Strategy, Trader 상태의 snapshot 바이트 데이터"""
+        return Snapshot.dumps(self.__get_components(), self.turn_count)
+
+    def restore(self, data):
+        """snapshot을 복원하고 snapshot의 턴을 반환, 구성 요소는 같은 설정으로 초기화돼 있어야 한다"""
+        if self.state == "running":
+            raise UserWarning("operator is running")
+        return Snapshot.restore(data, self.__get_components())
+
+    def resume(self):
+        """snapshot_store의 가장 최근 snapshot을 복원하고 턴을 반환, snapshot이 없으면 None"""
+        if self.snapshot_store is None:
+            raise UserWarning("snapshot store is not set")
+        latest = self.snapshot_store.latest()
+        if latest is None:
+            return None
+        return self.restore(latest[1])
+
+    def get_state(self):
+        """진행한 턴 수, 결과 수와 처리하지 않은 이벤트"""
+        with self.__condition:
+            events = [(date_time, kind, payload) for date_time, kind, _, payload in sorted(self.__events)]
+        return {
+            "turn_count": self.turn_count,
+            "result_count": self.result_count,
+            "last_time": self.__last_time,
+            "last_market": self.__last_market,
+            "events": events,
+        }
+
+    def set_state(self, state):
+        """get_state 결과로 진행 상태와 처리하지 않은 이벤트를 복원"""
+        with self.__condition:
+            self.turn_count = state["turn_count"]
+            self.result_count = state["result_count"]
+            self.__last_time = state["last_time"]
+            self.__last_market = state["last_market"]
+            self.__snapshot_turn = self.turn_count
+            self.__events = []
+            for date_time, kind, payload in state["events"]:
+                heapq.heappush(self.__events, (date_time, kind, next(self.__sequence), payload))
+
+    def get_timing(self):
+        """
+        단계별 소요 시간(초)
+        data: get_info, strategy: update_trading_info + get_request,
+        order: send_request, result: update_result
+        """
+        timing = {}
+        for stage, (count, total, maximum) in self.timing.items():
+            timing[stage] = {
+                "count": count,
+                "total": total,
+                "mean": total / count if count > 0 else 0.0,
+                "max": maximum,
+            }
+        return timing
+
+    def get_report(self):
+        """진행한 턴 수, 결과 수, 초당 처리 턴 수와 단계별 소요 시간"""
+        return {
+            "turn_count": self.turn_count,
+            "result_count": self.result_count,
+            "elapsed": self.elapsed,
+            "turns_per_sec": self.turn_count / self.elapsed if self.elapsed > 0 else 0.0,
+            "timing": self.get_timing(),
+        }
+
+    def __get_components(self):
+        return {
+            "operator": self,
+            "data_provider": self.data_provider,
+            "strategy": self.strategy,
+            "trader": self.trader,
+        }
+
+    def __is_snapshot_turn(self):
+        return (
+            self.snapshot_store is not None
+            and self.snapshot_every is not None
+            and self.turn_count > 0
+            and self.turn_count % self.snapshot_every == 0
+            and self.turn_count != self.__snapshot_turn
+        )
+
+    def __save_snapshot(self, event):
+        """꺼낸 거래 정보 이벤트를 처리하지 않은 이벤트로 포함해서 snapshot 저장"""
+        start = time.perf_counter()
+        with self.__condition:
+            heapq.heappush(self.__events, event)
+        try:
+            self.snapshot_store.save(self.turn_count, self.snapshot())
+            self.__snapshot_turn = self.turn_count
+        except (UserWarning, OSError) as error:
+            self.logger.error(f"fail to save snapshot {error}")
+        finally:
+            with self.__condition:
+                self.__events.remove(event)
+                heapq.heapify(self.__events)
+        if Instrumentation.enabled:
+            Instrumentation.record("operator.snapshot", time.perf_counter() - start)
+
+    def __record_balance(self):
+        try:
+            account = self.trader.get_account_info()
+        except UserWarning as error:
+            self.logger.warning(f"fail to get account info {error}")
+        else:
+            self.journal.record_balance(account["balance"], account["asset"], self.__last_time)
+        self.journal.flush()
+
+    def __schedule_candle(self):
+        start = time.perf_counter()
+        info = self.data_provider.get_info()
+        self.__record("data", start)
+        if info is None:
+            return
+        self.__push(info["date_time"], self.CANDLE, info)
+
+    def __handle_candle(self, info):
+        Instrumentation.next_turn()
+        self.turn_count += 1
+        self.__last_time = info["date_time"]
+        self.__last_market = info["market"]
+
+        start = time.perf_counter()
+        self.strategy.update_trading_info(info)
+        requests = self.strategy.get_request()
+        self.__record("strategy", start)
+
+        if requests is not None and len(requests) > 0:
+            self.__push(info["date_time"], self.ORDER, requests)
+        self.__schedule_candle()
+
+    def __handle_order(self, requests):
+        if self.journal is not None:
+            for request in requests:
+                self.journal.record_request(request, self.__last_market)
+        start = time.perf_counter()
+        try:
+            self.trader.send_request(requests, self.__on_result)
+        except UserWarning as error:
+            self.logger.error(f"fail to send request {error}")
+        self.__record("order", start)
+
+    def __handle_fill(self, result):
+        self.result_count += 1
+        if self.journal is not None:
+            self.journal.record_result(result, self.__last_market)
+        start = time.perf_counter()
+        self.strategy.update_result(result)
+        self.__record("result", start)
+        if result.get("msg") == "game-over":
+            self.logger.info("game-over result received")
+            self.state = "stopping"
+
+    def __on_result(self, result):
+        """Trader의 callback, 다른 thread에서 호출될 수 있다"""
+        date_time = result.get("date_time") or self.__last_time
+        self.__push(date_time, self.FILL, result)
+
+    def __push(self, date_time, kind, payload):
+        with self.__condition:
+            heapq.heappush(self.__events, (date_time, kind, next(self.__sequence), payload))
+            self.__condition.notify()
+
+    def __pop(self):
+        """다음 이벤트를 꺼낸다, realtime 동작에서는 다음 거래 정보의 시간이 될 때까지 결과를 기다린다"""
+        with self.__condition:
+            while self.state == "running":
+                if len(self.__events) == 0:
+                    return None
+                event = self.__events[0]
+                if event[1] != self.CANDLE or self.interval is None:
+                    return heapq.heappop(self.__events)
+
+                remaining = self.__next_tick - time.monotonic()
+                if remaining <= 0:
+                    self.__next_tick = max(self.__next_tick + self.interval, time.monotonic())
+                    return heapq.heappop(self.__events)
+                self.__condition.wait(remaining)
+            return None
+
+    def __drain(self):
+        """이미 등록된 거래 요청과 결과를 처리한다"""
+        while self.state == "running":
+            with self.__condition:
+                if len(self.__events) == 0 or self.__events[0][1] == self.CANDLE:
+                    return
+                _, kind, _, payload = heapq.heappop(self.__events)
+            if kind == self.ORDER:
+                self.__handle_order(payload)
+            else:
+                self.__handle_fill(payload)
+
+    def __record(self, stage, start):
+        elapsed = time.perf_counter() - start
+        timing = self.timing[stage]
+        timing[0] += 1
+        timing[1] += elapsed
+        if elapsed > timing[2]:
+            timing[2] = elapsed
+        if Instrumentation.enabled:
+            Instrumentation.record("operator." + stage, elapsed)
@@ -0,0 +1,120 @@
+"""
+asyncio 기반 로컬 가짜 거래소
+
+실제 거래소 없이 비동기 Trader의 동작과 주문 지연 시간을 측정하기 위한 모듈
+1. 주문, 취소, 계좌 조회는 latency 초만큼 지연된 후 응답한다.
+2. 접수된 주문은 latency + fill_delay 초 후에 요청 가격으로 전량 체결되고, 구독자에게 체결 결과를 전달한다.
+3. 잔고와 보유 자산은 VirtualMarket과 같은 방식(수수료, 평균 매입 가격)으로 계산한다.
+"""
+import asyncio
+
+
+class FakeExchange:
+    """
+    주문 접수 후 일정 시간 뒤 체결 결과를 알려주는 가짜 거래소
+
+    budget: 시작 잔고
+    latency: 요청 하나의 응답 지연 시간(초)
+    fill_delay: 주문 접수 후 체결까지 추가로 걸리는 시간(초)
+    commission_ratio: 수수료율
+    market: 거래 마켓 이름
+    """
+
+    def __init__(self, budget=0, latency=0.001, fill_delay=0.0, commission_ratio=0.0005, market="KRW-BTC"):
+        self.balance = budget
+        self.asset = {}
+        self.latency = latency
+        self.fill_delay = fill_delay
+        self.commission_ratio = commission_ratio
+        self.market = market
+        self.quote = {}
+        self.orders = {}
+        self.listeners = []
+
+    def subscribe(self, listener):
+        """체결 결과를 받을 listener(result) 등록, 거래소의 event loop에서 호출된다"""
+        self.listeners.append(listener)
+
+    async def place_order(self, request):
+        """
+        주문 접수
+        Returns: {"request": 요청 정보, "state": "requested" 또는 "rejected", "msg": 결과 메세지}
+        """
+        await asyncio.sleep(self.latency)
+        if request["price"] <= 0 or request["amount"] <= 0:
+            return {"request": request, "state": "rejected", "msg": "invalid price or amount"}
+        if request["type"] not in ("buy", "sell"):
+            return {"request": request, "state": "rejected", "msg": "invalid type request"}
+        if request["id"] in self.orders:
+            return {"request": request, "state": "rejected", "msg": "duplicated id"}
+
+        task = asyncio.get_running_loop().create_task(self.__fill_later(request))
+        self.orders[request["id"]] = (request, task)
+        return {"request": request, "state": "requested", "msg": "success"}
+
+    async def cancel_order(self, request_id):
+        """체결되지 않은 주문 취소, 취소됐으면 True 반환"""
+        await asyncio.sleep(self.latency)
+        order = self.orders.pop(request_id, None)
+        if order is None:
+            return False
+        order[1].cancel()
+        return True
+
+    async def get_account(self):
+        """계좌 정보 조회"""
+        await asyncio.sleep(self.latency)
+        return {
+            "balance": self.balance,
+            "asset": dict(self.asset),
+            "quote": dict(self.quote),
+        }
+
+    async def __fill_later(self, request):
+        # 체결 알림도 latency만큼 지연되어 접수 응답 이후에 도착한다
+        await asyncio.sleep(self.latency + self.fill_delay)
+        if self.orders.pop(request["id"], None) is None:
+            return
+        result = self.__fill(request)
+        for listener in self.listeners:
+            listener(result)
+
+    def __fill(self, request):
+        """요청 가격으로 체결하고 잔고와 자산을 갱신, 잔고나 자산이 부족하면 체결 수량 0"""
+        price = request["price"]
+        amount = request["amount"]
+        name = self.market
+        self.quote[name] = price
+        msg = "success"
+        if request["type"] == "buy":
+            total = price * amount * (1 + self.commission_ratio)
+            if total > self.balance:
+                amount, msg = 0, "no money"
+            else:
+                old_amount = self.asset.get(name, (0, 0))
+                new_amount = round(old_amount[1] + amount, 6)
+                new_value = (amount * price) + (old_amount[0] * old_amount[1])
+                self.asset[name] = (round(new_value / new_amount), new_amount)
+                self.balance = round(self.balance - total)
+        else:
+            if name not in self.asset:
+                amount, msg = 0, "asset empty"
+            else:
+                amount = min(amount, self.asset[name][1])
+                new_amount = round(self.asset[name][1] - amount, 6)
+                if new_amount > 0:
+                    self.asset[name] = (self.asset[name][0], new_amount)
+                else:
+                    del self.asset[name]
+                self.balance = round(self.balance + price * amount * (1 - self.commission_ratio))
+
+        return {
+            "request": request,
+            "type": request["type"],
+            "price": price,
+            "amount": amount,
+            "msg": msg,
+            "balance": self.balance,
+            "state": "done",
+            "date_time": request.get("date_time"),
+        }
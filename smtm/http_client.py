@@ -0,0 +1,225 @@
+"""
+거래소 API용 HTTP 클라이언트
+
+요청마다 requests.get을 새로 호출하면 매번 TCP, TLS 연결을 새로 맺고, 요청 수 제한(429)을 받으면 그대로 실패한다.
+이 모듈은 여러 Trader가 같이 사용할 수 있는 keep-alive 세션 pool과 요청 수 제한, 재시도를 제공한다.
+
+1. SessionPool
+- requests.Session을 size개까지 만들어서 재사용한다. 최근에 반환된 세션을 먼저 꺼내므로 열린 연결을 다시 사용한다.
+- 여러 thread에서 동시에 요청해도 세션 하나는 한 thread만 사용한다.
+2. TokenBucket
+- 초당 rate개의 토큰을 채우고 요청마다 토큰 하나를 사용한다. 토큰이 없으면 채워질 때까지 기다린다.
+- 429 응답을 받으면 남은 토큰을 비워서 다른 thread의 요청도 속도를 늦춘다.
+3. HttpClient
+- 429, 5xx 응답과 연결 오류는 retries번까지 다시 요청한다.
+- 주문처럼 멱등이 아닌 요청(idempotent=False)은 처리되지 않은 것이 확실한 429만 다시 요청한다.
+  5xx와 연결 오류는 거래소가 이미 처리했을 수 있으므로 호출한 쪽에서 결과를 확인해야 한다.
+- 재시도 간격은 backoff * 2^시도 횟수를 상한으로 하는 임의의 시간(full jitter)이라서 여러 요청이 같은 시간에 몰리지 않는다.
+  응답에 Retry-After가 있으면 그 시간만큼 기다린다.
+- 요청부터 응답까지 걸린 시간(재시도 포함)을 LatencyHistogram에 기록한다.
+"""
+import contextlib
+import queue
+import random
+import threading
+import time
+from .instrumentation import LatencyHistogram
+from .lazy_module import lazy_module
+from .log_manager import LogManager
+
+# 실제로 요청을 보낼 때 불러온다
+requests = lazy_module("requests")
+
+
+class TokenBucket:
+    """
+    요청 수 제한용 토큰 bucket
+
+    rate: 초당 채워지는 토큰 개수
+    capacity: 최대 토큰 개수, 한 번에 보낼 수 있는 요청 개수, None이면 rate
+    """
+
+    def __init__(self, rate, capacity=None):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else rate
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.__lock = threading.Lock()
+
+    def acquire(self, tokens=1):
+        """토큰을 사용, 토큰이 부족하면 채워질 때까지 기다린다. Returns: 기다린 시간(초)"""
+        waited = 0.0
+        while True:
+            with self.__lock:
+                self.__refill()
+                if self.tokens >= tokens:
+                    self.tokens -= tokens
+                    return waited
+                delay = (tokens - self.tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
+
+    def try_acquire(self, tokens=1):
+        """토큰이 있으면 사용하고 True, 없으면 기다리지 않고 False"""
+        with self.__lock:
+            self.__refill()
+            if self.tokens >= tokens:
+                self.tokens -= tokens
+                return True
+            return False
+
+    def drain(self):
+        """남은 토큰을 모두 비운다, 거래소가 요청 수 제한을 알려왔을 때 사용한다"""
+        with self.__lock:
+            self.__refill()
+            self.tokens = 0
+
+    def __refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+
+class SessionPool:
+    """
+    keep-alive 연결을 유지하는 requests.Session pool
+
+    size: 최대 세션 개수, 동시에 보낼 수 있는 요청 개수
+    """
+
+    def __init__(self, size=8):
+        self.size = size
+        self.created = 0
+        self.__sessions = queue.LifoQueue()
+        self.__lock = threading.Lock()
+
+    @contextlib.contextmanager
+    def session(self):
+        """세션을 꺼내서 사용하고 pool에 반환, 모두 사용 중이면 반환될 때까지 기다린다"""
+        session = self.__acquire()
+        try:
+            yield session
+        finally:
+            self.__sessions.put(session)
+
+    def close(self):
+        """pool의 세션과 연결을 모두 닫는다"""
+        while True:
+            try:
+                self.__sessions.get_nowait().close()
+            except queue.Empty:
+                break
+        with self.__lock:
+            self.created = 0
+
+    def __acquire(self):
+        try:
+            return self.__sessions.get_nowait()
+        except queue.Empty:
+            pass
+        with self.__lock:
+            if self.created < self.size:
+                self.created += 1
+                return self.__create()
+        return self.__sessions.get()
+
+    def __create(self):
+        session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=1)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        return session
+
+
+class HttpClient:
+    """
+    세션 pool, 요청 수 제한, 재시도를 적용해서 요청을 보내는 클라이언트
+
+    base_url: 요청 경로 앞에 붙일 주소
+    pool: 사용할 SessionPool, 여러 클라이언트가 같은 pool을 사용할 수 있다
+    limits: {요청 그룹 이름: TokenBucket}, 요청의 group으로 사용할 bucket을 선택한다
+    retries: 최대 재시도 횟수
+    backoff: 첫 재시도 간격의 상한(초), 재시도마다 두 배가 된다
+    max_backoff: 재시도 간격의 최대 상한(초)
+    timeout: 요청 하나의 응답 대기 시간(초)
+    latency: 요청부터 응답까지 걸린 시간(초)의 LatencyHistogram
+    """
+
+    RETRY_STATUS = (429, 500, 502, 503, 504)
+
+    def __init__(self, base_url, pool=None, limits=None, retries=3, backoff=0.05, max_backoff=2.0, timeout=5):
+        self.logger = LogManager.get_logger(__class__.__name__)
+        self.base_url = base_url.rstrip("/")
+        self.pool = pool if pool is not None else SessionPool()
+        self.limits = limits if limits is not None else {}
+        self.retries = retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.timeout = timeout
+        self.latency = LatencyHistogram()
+        self.retry_count = 0
+        self.throttled_count = 0
+        self.random = random.Random()
+        self.__lock = threading.Lock()
+
+    def request(self, method, path, params=None, json=None, headers=None, group=None, idempotent=True):
+        """
+        요청을 보내고 응답 객체를 반환, 재시도 후에도 429, 5xx면 마지막 응답을 반환한다
+        headers: 요청 헤더 또는 시도마다 새 헤더를 만드는 함수(인증 토큰 등)
+        group: 요청 수 제한 그룹 이름, limits에 없으면 제한하지 않는다
+        idempotent: False면 429만 다시 요청하고 5xx 응답은 바로 반환한다
+        재시도 후에도 연결하지 못하면 UserWarning, idempotent가 False면 연결 오류를 다시 요청하지 않고 UserWarning
+        """
+        bucket = self.limits.get(group)
+        url = self.base_url + path
+        start = time.perf_counter()
+        attempt = 0
+        while True:
+            if bucket is not None:
+                bucket.acquire()
+            request_headers = headers() if callable(headers) else headers
+            try:
+                with self.pool.session() as session:
+                    response = session.request(
+                        method, url, params=params, json=json, headers=request_headers, timeout=self.timeout
+                    )
+            except requests.RequestException as error:
+                if not idempotent or attempt >= self.retries:
+                    self.__record(start)
+                    raise UserWarning(f"fail to request {method} {path}") from error
+                self.logger.warning(f"request error {method} {path} - {error}")
+                self.__wait(attempt, None)
+                attempt += 1
+                continue
+
+            is_retryable = response.status_code == 429 or (idempotent and response.status_code in self.RETRY_STATUS)
+            if not is_retryable or attempt >= self.retries:
+                self.__record(start)
+                return response
+
+            if response.status_code == 429:
+                with self.__lock:
+                    self.throttled_count += 1
+                if bucket is not None:
+                    bucket.drain()
+            self.logger.debug(f"retry {method} {path} - {response.status_code}")
+            self.__wait(attempt, response.headers.get("Retry-After"))
+            attempt += 1
+
+    def close(self):
+        self.pool.close()
+
+    def __wait(self, attempt, retry_after):
+        with self.__lock:
+            self.retry_count += 1
+            delay = self.random.uniform(0, min(self.max_backoff, self.backoff * 2**attempt))
+        if retry_after is not None:
+            try:
+                delay = max(delay, float(retry_after))
+            except ValueError:
+                pass
+        time.sleep(delay)
+
+    def __record(self, start):
+        with self.__lock:
+            self.latency.add(time.perf_counter() - start)
@@ -0,0 +1,376 @@
+"""
+전략이 사용하는 기술 지표
+
+전략이 매 턴마다 전체 거래 정보로 지표를 다시 계산하면 턴마다 O(n), 시뮬레이션 전체는 O(n^2)이 된다.
+이 모듈의 지표는 거래 정보 하나마다 전체 기간, period와 관계없이 평균 O(1)로 갱신되고(update),
+같은 값을 전체 기간에 대해 한 번에 계산하는 batch 계산(compute)을 함께 제공한다.
+
+update와 compute가 같은 값을 만들도록 같은 순서의 부동소수점 연산을 사용한다.
+- 구간 합은 값을 period 개씩 묶은 block으로 나눠서 이전 block의 뒷부분 합과 현재 block의 앞부분 합을 더한다.
+  앞부분 합은 값마다 하나씩 더하고, 뒷부분 합은 block이 끝날 때 한 번 계산하므로 값 하나당 평균 O(1)이다.
+  block마다 합을 새로 시작하므로 누적 합의 차이처럼 긴 기간에서 오차가 쌓이지 않는다.
+  batch 계산은 같은 덧셈을 (block 수, period) 배열의 np.add.accumulate로 한 번에 처리한다.
+- 분산은 block마다 기준 값을 빼고 구한 합과 제곱 합으로 계산해서 1억 원대 가격에서도 정밀도를 유지한다.
+- EMA, RSI처럼 이전 값을 사용하는 지표는 벡터화하지 않고, 같은 갱신 함수를
+  np.frompyfunc(...).accumulate로 값 하나씩 적용한다(batch 계산도 값마다 Python 함수를 호출하는 loop).
+  alpha의 거듭제곱을 곱하는 닫힌 식이나 선형 필터로 벡터화하면 반올림 순서가 달라져
+  update와 compute의 값이 같지 않고, 긴 기간에서는 거듭제곱이 0으로 underflow 되기 때문이다.
+
+update는 DataProvider.get_info 형식의 거래 정보를, compute는 CandleSeries를 받는다.
+값이 준비되기 전에는 update는 None, compute는 nan을 반환한다.
+"""
+import math
+from abc import ABCMeta, abstractmethod
+import numpy as np
+
+# 거래 정보의 키 -> CandleSeries의 컬럼 이름
+SOURCE_COLUMNS = {
+    "opening_price": "open",
+    "high_price": "high",
+    "low_price": "low",
+    "closing_price": "close",
+    "acc_price": "acc_price",
+    "acc_volume": "acc_volume",
+}
+
+
+class RollingSum:
+    """
+    최근 period 개 값의 합, 값 하나당 평균 O(1)로 갱신한다
+
+    구간 합 = 이전 block의 뒷부분 합(suffixes) + 현재 block의 앞부분 합(prefix)
+    count: 추가한 값의 개수
+    block: 현재 block의 값
+    """
+
+    def __init__(self, period):
+        self.period = period
+        self.count = 0
+        self.block = []
+        self.prefix = 0.0
+        self.suffixes = None
+
+    def add(self, value):
+        """값을 추가하고 구간 합을 반환, period 개가 모이기 전에는 None"""
+        position = self.count % self.period
+        self.count += 1
+        self.block.append(value)
+        self.prefix = value if position == 0 else self.prefix + value
+        if position == self.period - 1:
+            # block이 끝나면 구간이 block과 같고, 다음 block에서 사용할 뒷부분 합을 계산한다
+            self.suffixes = _suffix_sums(self.block)
+            self.block = []
+            return self.prefix
+        if self.count < self.period:
+            return None
+        return self.suffixes[position + 1] + self.prefix
+
+    @staticmethod
+    def compute(values, period):
+        """모든 위치의 구간 합, period 개가 모이기 전에는 nan"""
+        sums = np.full(len(values), np.nan)
+        if len(values) >= period:
+            blocks = _to_blocks(values, period)
+            sums[period - 1 :] = _block_sums(blocks, blocks[:-1])[period - 1 : len(values)]
+        return sums
+
+
+class RollingDeviation:
+    """
+    최근 period 개 값의 평균과 평균과의 차이의 제곱 합, RollingSum과 같은 block 방식으로 계산한다
+
+    block마다 기준 값(anchor)을 뺀 값으로 합과 제곱 합을 구한다.
+    현재 block의 앞부분과 이전 block의 뒷부분은 같은 기준 값(이전 block의 마지막 값, 처음에는 첫 값)을 사용한다.
+    """
+
+    def __init__(self, period):
+        self.period = period
+        self.count = 0
+        self.block = []
+        self.anchor = None
+        self.prefix = (0.0, 0.0)
+        self.suffixes = None
+
+    def add(self, value):
+        """값을 추가하고 (평균, 제곱 합)을 반환, period 개가 모이기 전에는 None"""
+        if self.anchor is None:
+            self.anchor = value
+        position = self.count % self.period
+        self.count += 1
+        self.block.append(value)
+        deviation = value - self.anchor
+        if position == 0:
+            self.prefix = (deviation, deviation * deviation)
+        else:
+            self.prefix = (self.prefix[0] + deviation, self.prefix[1] + deviation * deviation)
+        anchor = self.anchor
+        if position == self.period - 1:
+            total, square = self.prefix
+            self.anchor = value
+            deviations = np.asarray(self.block) - value
+            self.suffixes = (_suffix_sums(deviations), _suffix_sums(deviations * deviations))
+            self.block = []
+        elif self.count < self.period:
+            return None
+        else:
+            total = self.suffixes[0][position + 1] + self.prefix[0]
+            square = self.suffixes[1][position + 1] + self.prefix[1]
+        return anchor + total / self.period, square - total * total / self.period
+
+    @staticmethod
+    def compute(values, period):
+        """모든 위치의 (평균 배열, 제곱 합 배열), period 개가 모이기 전에는 nan"""
+        means = np.full(len(values), np.nan)
+        squares = np.full(len(values), np.nan)
+        if len(values) < period:
+            return means, squares
+        blocks = _to_blocks(values, period)
+        anchors = np.empty(len(blocks))
+        anchors[0] = values[0]
+        anchors[1:] = values[period - 1 :: period][: len(blocks) - 1]
+        current = blocks - anchors[:, np.newaxis]
+        previous = blocks[:-1] - anchors[1:, np.newaxis]
+        total = _block_sums(current, previous)
+        square = _block_sums(current * current, previous * previous)
+        anchor = np.repeat(anchors, period)
+        ready = slice(period - 1, len(values))
+        means[ready] = anchor[ready] + total[ready] / period
+        squares[ready] = square[ready] - total[ready] * total[ready] / period
+        return means, squares
+
+
+class Indicator(metaclass=ABCMeta):
+    """
+    지표 기본 클래스
+
+    source: 계산에 사용할 거래 정보의 키
+    value: 마지막 update 결과
+    count: update 호출 횟수
+    """
+
+    def __init__(self, source="closing_price"):
+        self.source = source
+        self.value = None
+        self.count = 0
+
+    def update(self, info):
+        """거래 정보 하나로 지표를 갱신하고 값을 반환"""
+        self.count += 1
+        self.value = self._update(float(info[self.source]))
+        return self.value
+
+    def compute(self, candles):
+        """CandleSeries 전체 구간의 지표 값 배열"""
+        return self._compute(np.asarray(candles.columns[SOURCE_COLUMNS[self.source]], dtype=np.float64))
+
+    @abstractmethod
+    def _update(self, value):
+        """값 하나로 지표를 갱신하고 값을 반환, 값이 준비되기 전에는 None"""
+
+    @abstractmethod
+    def _compute(self, values):
+        """값 배열 전체 구간의 지표 값 배열, 값이 준비되기 전에는 nan"""
+
+
+class SMA(Indicator):
+    """단순 이동 평균"""
+
+    def __init__(self, period, source="closing_price"):
+        super().__init__(source)
+        self.period = period
+        self.sum = RollingSum(period)
+
+    def _update(self, value):
+        total = self.sum.add(value)
+        return None if total is None else total / self.period
+
+    def _compute(self, values):
+        return RollingSum.compute(values, self.period) / self.period
+
+
+class EMA(Indicator):
+    """지수 이동 평균, 첫 값에서 시작하고 period 개가 모인 후부터 값을 제공한다"""
+
+    def __init__(self, period, source="closing_price"):
+        super().__init__(source)
+        self.period = period
+        self.alpha = 2 / (period + 1)
+        self.average = None
+
+    def step(self, average, value):
+        """이전 평균과 새 값으로 다음 평균 계산"""
+        return self.alpha * value + (1 - self.alpha) * average
+
+    def _update(self, value):
+        self.average = value if self.average is None else self.step(self.average, value)
+        return self.average if self.count >= self.period else None
+
+    def _compute(self, values):
+        averages = _accumulate(self.step, values)
+        averages[: self.period - 1] = np.nan
+        return averages
+
+
+class RSI(Indicator):
+    """Wilder 방식의 상대 강도 지수, 첫 변화량에서 시작하고 period 개의 변화량이 모인 후부터 값을 제공한다"""
+
+    def __init__(self, period=14, source="closing_price"):
+        super().__init__(source)
+        self.period = period
+        self.alpha = 1 / period
+        self.last = None
+        self.gain = None
+        self.loss = None
+
+    def step(self, average, value):
+        """이전 평균과 새 변화량으로 다음 평균 계산"""
+        return self.alpha * value + (1 - self.alpha) * average
+
+    def _update(self, value):
+        if self.last is None:
+            self.last = value
+            return None
+        change = value - self.last
+        self.last = value
+        gain, loss = max(change, 0.0), max(-change, 0.0)
+        if self.gain is None:
+            self.gain, self.loss = gain, loss
+        else:
+            self.gain, self.loss = self.step(self.gain, gain), self.step(self.loss, loss)
+        if self.count <= self.period:
+            return None
+        if self.loss == 0:
+            return 100.0
+        return 100.0 - 100.0 / (1.0 + self.gain / self.loss)
+
+    def _compute(self, values):
+        result = np.full(len(values), np.nan)
+        if len(values) < 2:
+            return result
+        changes = np.diff(values)
+        gains = _accumulate(self.step, np.maximum(changes, 0.0))
+        losses = _accumulate(self.step, np.maximum(-changes, 0.0))
+        with np.errstate(divide="ignore", invalid="ignore"):
+            rsi = np.where(losses == 0, 100.0, 100.0 - 100.0 / (1.0 + gains / losses))
+        result[1:] = rsi
+        result[: self.period] = np.nan
+        return result
+
+
+class BollingerBands(Indicator):
+    """
+    볼린저 밴드, 값은 (하단, 중간, 상단)
+    표준편차는 RollingDeviation의 제곱 합으로 계산한 모집단 표준편차, 반올림으로 음수가 되면 0으로 본다
+    """
+
+    def __init__(self, period=20, width=2.0, source="closing_price"):
+        super().__init__(source)
+        self.period = period
+        self.width = width
+        self.moments = RollingDeviation(period)
+
+    def _update(self, value):
+        moments = self.moments.add(value)
+        if moments is None:
+            return None
+        mean, square = moments
+        deviation = math.sqrt(max(square, 0.0) / self.period)
+        return (mean - self.width * deviation, mean, mean + self.width * deviation)
+
+    def _compute(self, values):
+        """shape (n, 3) 배열, 컬럼 순서는 하단, 중간, 상단"""
+        result = np.full((len(values), 3), np.nan)
+        if len(values) < self.period:
+            return result
+        means, squares = RollingDeviation.compute(values, self.period)
+        mean = means[self.period - 1 :]
+        deviation = np.sqrt(np.maximum(squares[self.period - 1 :], 0.0) / self.period)
+        result[self.period - 1 :] = np.column_stack(
+            (mean - self.width * deviation, mean, mean + self.width * deviation)
+        )
+        return result
+
+
+class VWAP(Indicator):
+    """
+    거래량 가중 평균 가격, 구간의 누적 거래 금액 합 / 누적 거래량 합
+    period가 None이면 처음부터의 누적 값으로 계산한다
+    """
+
+    def __init__(self, period=None):
+        super().__init__("acc_price")
+        self.period = period
+        self.price = RollingSum(period) if period is not None else None
+        self.volume = RollingSum(period) if period is not None else None
+        self.total_price = 0.0
+        self.total_volume = 0.0
+
+    def update(self, info):
+        self.count += 1
+        self.value = self._update(float(info["acc_price"]), float(info["acc_volume"]))
+        return self.value
+
+    def compute(self, candles):
+        return self._compute(
+            np.asarray(candles.columns["acc_price"], dtype=np.float64),
+            np.asarray(candles.columns["acc_volume"], dtype=np.float64),
+        )
+
+    def _update(self, acc_price, acc_volume):  # pylint: disable=arguments-differ
+        if self.period is None:
+            self.total_price += acc_price
+            self.total_volume += acc_volume
+            price, volume = self.total_price, self.total_volume
+        else:
+            price, volume = self.price.add(acc_price), self.volume.add(acc_volume)
+        return None if volume is None or volume == 0 else price / volume
+
+    def _compute(self, prices, volumes):  # pylint: disable=arguments-differ
+        if self.period is None:
+            price, volume = np.cumsum(prices), np.cumsum(volumes)
+        else:
+            price = RollingSum.compute(prices, self.period)
+            volume = RollingSum.compute(volumes, self.period)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return np.where(volume == 0, np.nan, price / volume)
+
+
+def compute_all(indicators, candles):
+    """{이름: 지표}의 batch 계산 결과를 {이름: 배열}로 반환"""
+    return {name: indicator.compute(candles) for name, indicator in indicators.items()}
+
+
+def _to_blocks(values, period):
+    """values를 period 개씩 나눈 (block 수, period) 배열, 마지막 block의 빈 자리는 0"""
+    blocks = np.zeros(-(-len(values) // period) * period)
+    blocks[: len(values)] = values
+    return blocks.reshape(-1, period)
+
+
+def _suffix_sums(values):
+    """위치마다 그 위치부터 끝까지의 합, 마지막 값부터 차례로 더한다"""
+    return np.add.accumulate(np.asarray(values)[::-1])[::-1].tolist()
+
+
+def _block_sums(current, previous):
+    """
+    위치마다 현재 block의 앞부분 합 + 이전 block의 뒷부분 합을 1차원 배열로 반환
+    current는 block마다의 값, previous는 다음 block의 구간 계산에 사용할 block마다의 값(마지막 block 제외)
+    RollingSum.add, RollingDeviation.add와 같은 순서로 더한다
+    """
+    sums = np.add.accumulate(current, axis=1)
+    if len(previous) > 0:
+        suffixes = np.add.accumulate(previous[:, ::-1], axis=1)[:, ::-1]
+        sums[1:, :-1] = suffixes[:, 1:] + sums[1:, :-1]
+    return sums.ravel()
+
+
+def _accumulate(step, values):
+    """
+    step(이전 값, 새 값)을 순서대로 적용한 값의 배열, 첫 값은 그대로 사용한다
+    update와 같은 반올림을 얻기 위해 벡터화하지 않고 값마다 step을 호출하는 loop로 계산한다
+    """
+    if len(values) == 0:
+        return np.zeros(0)
+    accumulate = np.frompyfunc(step, 2, 1).accumulate
+    return accumulate(values.astype(object)).astype(np.float64)
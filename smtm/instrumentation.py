@@ -0,0 +1,300 @@
+"""
+거래 과정의 단계별 소요 시간 측정과 프로파일링 도구
+
+데이터 수집, 전략 판단, 가상 거래 체결, 로그 출력 중 어디에서 시간이 쓰이는지 확인하기 위한 모듈
+1. 이름별로 소요 시간(time.perf_counter)을 histogram에 기록하고 p50, p99, max를 제공한다.
+2. 턴마다 할당된 메모리 블록 수(sys.getallocatedblocks)의 변화를 기록한다.
+3. 지정한 턴 구간에서만 cProfile, tracemalloc을 실행한다.
+4. 실행이 끝나면 전체 측정 결과를 딕셔너리 또는 json 파일로 제공한다.
+
+기본으로 꺼져 있고, 꺼져 있을 때는 측정 지점마다 enabled 값 하나만 확인하므로 비용이 거의 없다.
+
+사용 예
+    Instrumentation.enable()
+    Instrumentation.profile_turns(100, 200, use_tracemalloc=True)
+    Operator(data_provider, strategy, trader).run()
+    Instrumentation.export("report.json")
+"""
+import cProfile
+import functools
+import io
+import json
+import math
+import pstats
+import sys
+import time
+import tracemalloc
+from contextlib import nullcontext
+
+
+class LatencyHistogram:
+    """
+    값을 로그 간격 bucket에 세는 histogram, 저장 공간은 값의 개수와 상관 없이 일정하다
+
+    2의 거듭제곱 구간마다 SUB_BUCKETS 개의 bucket을 사용하므로 백분위 값의 오차는 1/SUB_BUCKETS 이하이다
+    count, total, min, max는 정확한 값이다
+    0 이하의 값은 모든 bucket보다 앞에 정렬되는 ZERO_BUCKET 하나에 센다
+    """
+
+    SUB_BUCKETS = 16
+    ZERO_BUCKET = (-math.inf, 0)
+
+    def __init__(self):
+        self.buckets = {}
+        self.count = 0
+        self.total = 0.0
+        self.min = math.inf
+        self.max = 0.0
+
+    def add(self, value):
+        """값 하나를 기록"""
+        self.count += 1
+        self.total += value
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+        key = self.__to_bucket(value)
+        self.buckets[key] = self.buckets.get(key, 0) + 1
+
+    def percentile(self, ratio):
+        """ratio(0~1) 위치의 값, 해당 bucket의 상한을 max 이하로 반환"""
+        if self.count == 0:
+            return 0.0
+        rank = max(1, math.ceil(ratio * self.count))
+        seen = 0
+        for key in sorted(self.buckets):
+            seen += self.buckets[key]
+            if seen >= rank:
+                return min(self.__to_upper(key), self.max)
+        return self.max
+
+    def to_dict(self):
+        """count, total, mean, min, p50, p99, max"""
+        return {
+            "count": self.count,
+            "total": self.total,
+            "mean": self.total / self.count if self.count > 0 else 0.0,
+            "min": self.min if self.count > 0 else 0.0,
+            "p50": self.percentile(0.5),
+            "p99": self.percentile(0.99),
+            "max": self.max,
+        }
+
+    @classmethod
+    def __to_bucket(cls, value):
+        if value <= 0:
+            return cls.ZERO_BUCKET
+        mantissa, exponent = math.frexp(value)
+        return (exponent, int((mantissa - 0.5) * 2 * cls.SUB_BUCKETS))
+
+    @classmethod
+    def __to_upper(cls, key):
+        if key == cls.ZERO_BUCKET:
+            return 0.0
+        exponent, sub = key
+        return math.ldexp(0.5 + (sub + 1) / (2 * cls.SUB_BUCKETS), exponent)
+
+
+class Instrumentation:
+    """
+    프로세스 전체에서 공유하는 측정 기록
+
+    enabled: 측정 여부, disable 상태에서는 기록하지 않는다
+    histograms: 이름별 소요 시간(초) histogram, "단계" 또는 "컴포넌트.메서드" 형식의 이름을 사용한다
+    allocations: 턴마다 늘어난 메모리 블록 수 histogram
+    """
+
+    enabled = False
+    histograms = {}
+    allocations = LatencyHistogram()
+    turn_count = 0
+    profile_window = None
+    profile_result = None
+    tracemalloc_result = None
+    __turn_blocks = None
+    __profiler = None
+    __use_tracemalloc = False
+    __started_tracemalloc = False
+
+    @classmethod
+    def enable(cls):
+        """측정 시작"""
+        cls.enabled = True
+
+    @classmethod
+    def disable(cls):
+        """측정 중지, 실행 중인 프로파일러도 멈춘다"""
+        cls.__stop_profile()
+        cls.enabled = False
+
+    @classmethod
+    def reset(cls):
+        """기록 초기화"""
+        cls.__stop_profile()
+        cls.histograms = {}
+        cls.allocations = LatencyHistogram()
+        cls.turn_count = 0
+        cls.profile_window = None
+        cls.profile_result = None
+        cls.tracemalloc_result = None
+        cls.__turn_blocks = None
+
+    @classmethod
+    def record(cls, name, seconds):
+        """name의 소요 시간 기록"""
+        if cls.enabled is not True:
+            return
+        histogram = cls.histograms.get(name)
+        if histogram is None:
+            histogram = cls.histograms[name] = LatencyHistogram()
+        histogram.add(seconds)
+
+    @classmethod
+    def measure(cls, name):
+        """with 블록의 소요 시간을 기록하는 context manager, 꺼져 있으면 아무것도 하지 않는다"""
+        if cls.enabled is not True:
+            return nullcontext()
+        return _Timer(cls, name)
+
+    @classmethod
+    def timed(cls, name):
+        """함수의 소요 시간을 name으로 기록하는 decorator, 측정 여부는 호출할 때 확인한다"""
+
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                if cls.enabled is not True:
+                    return func(*args, **kwargs)
+                start = time.perf_counter()
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    cls.record(name, time.perf_counter() - start)
+
+            return wrapper
+
+        return decorator
+
+    @classmethod
+    def instrument_handler(cls, handler, name):
+        """logging handler의 emit 소요 시간을 name으로 기록"""
+        if getattr(handler, "_instrumented", False):
+            return handler
+        handler.emit = cls.timed(name)(handler.emit)
+        handler._instrumented = True
+        return handler
+
+    @classmethod
+    def profile_turns(cls, start, stop, use_tracemalloc=False):
+        """
+        start 번째 턴부터 stop 번째 턴 전까지 cProfile을 실행
+        use_tracemalloc: True면 같은 구간에서 tracemalloc으로 할당 위치를 기록한다
+        """
+        cls.profile_window = (start, stop)
+        cls.__use_tracemalloc = use_tracemalloc
+
+    @classmethod
+    def next_turn(cls):
+        """
+        이전 턴을 마치고 새 턴을 시작, Operator가 거래 정보마다 호출한다
+        턴 사이에 늘어난 메모리 블록 수를 기록하고 프로파일 구간을 시작하거나 끝낸다
+        """
+        if cls.enabled is not True:
+            return
+        cls.finish_turn()
+        if cls.profile_window is not None:
+            if cls.turn_count == cls.profile_window[0]:
+                cls.__start_profile()
+            elif cls.turn_count == cls.profile_window[1]:
+                cls.__stop_profile()
+        cls.turn_count += 1
+        cls.__turn_blocks = sys.getallocatedblocks()
+
+    @classmethod
+    def finish_turn(cls):
+        """진행 중인 턴을 마친다"""
+        if cls.__turn_blocks is None:
+            return
+        cls.allocations.add(max(sys.getallocatedblocks() - cls.__turn_blocks, 0))
+        cls.__turn_blocks = None
+
+    @classmethod
+    def report(cls, top=20):
+        """
+        측정 결과
+        {
+            "turn_count": 진행한 턴 수
+            "stages": {이름: LatencyHistogram.to_dict()}
+            "allocations": 턴마다 늘어난 메모리 블록 수 LatencyHistogram.to_dict()
+            "profile": cProfile 누적 시간 상위 top 개 함수 텍스트
+            "tracemalloc": 할당 크기 상위 top 개 위치
+        }
+        """
+        cls.finish_turn()
+        cls.__stop_profile()
+        report = {
+            "turn_count": cls.turn_count,
+            "stages": {name: cls.histograms[name].to_dict() for name in sorted(cls.histograms)},
+            "allocations": cls.allocations.to_dict(),
+        }
+        if cls.profile_result is not None:
+            stream = io.StringIO()
+            pstats.Stats(cls.profile_result, stream=stream).sort_stats("cumulative").print_stats(top)
+            report["profile"] = stream.getvalue()
+        if cls.tracemalloc_result is not None:
+            report["tracemalloc"] = [
+                {"location": str(stat.traceback), "size": stat.size, "count": stat.count}
+                for stat in cls.tracemalloc_result.statistics("lineno")[:top]
+            ]
+        return report
+
+    @classmethod
+    def export(cls, path, top=20):
+        """측정 결과를 json 파일로 저장하고 반환"""
+        report = cls.report(top)
+        with open(path, "w", encoding="utf-8") as file:
+            json.dump(report, file, indent=2, ensure_ascii=False)
+        return report
+
+    @classmethod
+    def __start_profile(cls):
+        if cls.__profiler is not None:
+            return
+        if cls.__use_tracemalloc and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            cls.__started_tracemalloc = True
+        cls.__profiler = cProfile.Profile()
+        cls.__profiler.enable()
+
+    @classmethod
+    def __stop_profile(cls):
+        if cls.__profiler is None:
+            return
+        cls.__profiler.disable()
+        cls.profile_result = cls.__profiler
+        cls.__profiler = None
+        if cls.__use_tracemalloc and tracemalloc.is_tracing():
+            cls.tracemalloc_result = tracemalloc.take_snapshot()
+            if cls.__started_tracemalloc:
+                tracemalloc.stop()
+                cls.__started_tracemalloc = False
+
+
+class _Timer:
+    """Instrumentation.measure가 사용하는 context manager"""
+
+    __slots__ = ("owner", "name", "start")
+
+    def __init__(self, owner, name):
+        self.owner = owner
+        self.name = name
+        self.start = 0.0
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.owner.record(self.name, time.perf_counter() - self.start)
+        return False
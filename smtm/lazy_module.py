@@ -0,0 +1,29 @@
+"""
+속성을 처음 사용할 때 불러오는 모듈
+
+requests처럼 불러오는 데 시간이 걸리고 실제로 거래소에 요청할 때만 필요한 모듈을
+모듈 최상단에서 이름만 정의해 두고, 처음 속성을 사용할 때 불러온다.
+except 절의 예외 클래스는 예외가 발생했을 때만 평가되므로 요청하지 않으면 모듈을 불러오지 않는다.
+"""
+import importlib.util
+import sys
+
+
+def lazy_module(name):
+    """
+    name 모듈을 속성을 처음 사용할 때 불러오는 모듈로 반환, 이미 불러온 모듈이면 그대로 반환
+    설치되지 않은 모듈이면 ModuleNotFoundError
+    """
+    module = sys.modules.get(name)
+    if module is not None:
+        return module
+
+    spec = importlib.util.find_spec(name)
+    if spec is None:
+        raise ModuleNotFoundError(f"No module named {name!r}", name=name)
+    loader = importlib.util.LazyLoader(spec.loader)
+    spec.loader = loader
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    loader.exec_module(module)
+    return module
@@ -1,43 +1,76 @@
 """
 logger 인스턴스를 제공
 이 모듈은 상황에 맞는 핸들러가 설정된 logger 인스턴스 제공
+
+1. 기본으로 파일, 스트림 핸들러가 호출한 thread에서 바로 로그를 출력한다.
+- 핸들러는 처음 logger를 요청할 때 만들고, 로그 파일은 첫 로그를 출력할 때 연다.
+  모듈을 불러오기만 해서는 파일이 생기지 않는다.
+- 로그 파일 경로는 SMTM_LOG_FILE 환경 변수, 없으면 현재 디렉토리의 smtm.log
+2. start_queue를 호출하면 로그는 queue에 넣기만 하고, 출력은 background thread(QueueListener)에서 한다.
+3. set_profile("backtest")로 모든 logger의 레벨을 WARNING으로 올려서 시뮬레이션 중에는 로그를 만들지 않는다.
+- 자주 호출되는 곳에서는 f-string 대신 %-style 인자를 사용하거나 isEnabledFor로 확인해서
+  꺼진 레벨의 로그 문자열을 만들지 않는다.
 """
 
 import logging
-from logging.handlers import RotatingFileHandler
+import os
+import queue
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from .instrumentation import Instrumentation
+
+
+class _DeferredQueueHandler(QueueHandler):
+    """메세지 인자만 합쳐서 queue에 넣고, 시간 등 formatter 적용은 listener thread에서 한다"""
+
+    def prepare(self, record):
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
 
 class LogManager:
     """
     파일, 스트림 핸들러가 설정된 logger 인스턴스 제공
+
+    PROFILES: 실행 프로파일별 logger 레벨
+    - default: 모든 로그 출력
+    - backtest: 경고 이상만 출력
     """
+    LOG_FILE="smtm.log"
     file_formatter=logging.Formatter(
         fmt="%(asctime)s %(levelname)5.5s %(name)20.20s %(lineno)5d - %(message)s"
     )
-    file_handler=RotatingFileHandler(filename="smtm.log", maxBytes=1000000, backupCount=10)
-    file_handler.setLevel(logging.DEBUG)
-    file_handler.setFormatter(file_formatter)
-    
     stream_formatter=logging.Formatter(
         fmt="%(asctime)s %(levelname)5.5s %(name)20.20s - %(message)s"
     )
-    stream_handler=logging.StreamHandler()
-    stream_handler.setLevel(logging.DEBUG)
-    stream_handler.setFormatter(stream_formatter)
+    # 핸들러는 처음 logger를 만들 때 생성한다
+    file_handler=None
+    stream_handler=None
+
+    PROFILES={"default": logging.DEBUG, "backtest": logging.WARNING}
 
     logger_map={}
+    level=logging.DEBUG
+    queue_handler=None
+    listener=None
 
     @classmethod
     def get_logger(cls, name):
         """
         파일, 스트림 핸들러가 설정된 logger 인스턴스 제공
+        queue 모드에서는 queue 핸들러가 설정된 logger 제공
         """
         logger=logging.getLogger(name)
         if name in cls.logger_map:
             return logger
 
-        logger.addHandler(cls.stream_handler)
-        logger.addHandler(cls.file_handler)
-        logger.setLevel(logging.DEBUG)
+        cls.__create_handlers()
+        for handler in cls.__handlers():
+            logger.addHandler(handler)
+        logger.setLevel(cls.level)
         cls.logger_map[name]=True
         return logger
 
@@ -46,4 +79,88 @@ class LogManager:
         """
         스트림 핸들러의 레벨을 설정
         """
-        cls.stream_handler.setLevel(level)
\ No newline at end of file
+        cls.__create_handlers()
+        cls.stream_handler.setLevel(level)
+
+    @classmethod
+    def set_level(cls, level):
+        """
+        모든 logger의 레벨을 설정, 이후에 만들어지는 logger도 같은 레벨을 사용한다
+        logger 레벨보다 낮은 로그는 메세지를 만들기 전에 버려진다
+        """
+        cls.level=level
+        for name in cls.logger_map:
+            logging.getLogger(name).setLevel(level)
+
+    @classmethod
+    def set_profile(cls, profile):
+        """
+        실행 프로파일에 맞게 logger 레벨을 설정
+        profile: PROFILES의 이름, default 또는 backtest
+        """
+        if profile not in cls.PROFILES:
+            raise UserWarning(f"invalid log profile {profile}")
+        cls.set_level(cls.PROFILES[profile])
+
+    @classmethod
+    def start_queue(cls):
+        """
+        queue 모드 시작
+        logger는 로그를 queue에 넣기만 하고, 파일과 스트림 출력은 background thread에서 처리한다
+        """
+        if cls.listener is not None:
+            return
+
+        cls.__create_handlers()
+        cls.queue_handler=_DeferredQueueHandler(queue.SimpleQueue())
+        cls.listener=QueueListener(
+            cls.queue_handler.queue, cls.stream_handler, cls.file_handler, respect_handler_level=True
+        )
+        cls.listener.start()
+        cls.__replace_handlers((cls.stream_handler, cls.file_handler), (cls.queue_handler,))
+
+    @classmethod
+    def stop_queue(cls):
+        """queue에 남은 로그를 모두 출력하고 핸들러가 바로 출력하는 모드로 돌아간다"""
+        if cls.listener is None:
+            return
+
+        cls.__replace_handlers((cls.queue_handler,), (cls.stream_handler, cls.file_handler))
+        cls.listener.stop()
+        cls.listener=None
+        cls.queue_handler=None
+
+    @classmethod
+    def __create_handlers(cls):
+        """아직 만들지 않은 핸들러 생성, 파일 핸들러는 첫 로그를 출력할 때 파일을 연다"""
+        if cls.file_handler is None:
+            cls.file_handler=RotatingFileHandler(
+                filename=os.environ.get("SMTM_LOG_FILE", cls.LOG_FILE),
+                maxBytes=1000000,
+                backupCount=10,
+                delay=True,
+            )
+            cls.file_handler.setLevel(logging.DEBUG)
+            cls.file_handler.setFormatter(cls.file_formatter)
+            # 측정이 켜져 있으면 로그 출력에 걸린 시간을 기록
+            Instrumentation.instrument_handler(cls.file_handler, "log.file")
+        if cls.stream_handler is None:
+            cls.stream_handler=logging.StreamHandler()
+            cls.stream_handler.setLevel(logging.DEBUG)
+            cls.stream_handler.setFormatter(cls.stream_formatter)
+            Instrumentation.instrument_handler(cls.stream_handler, "log.stream")
+
+    @classmethod
+    def __handlers(cls):
+        if cls.queue_handler is not None:
+            return (cls.queue_handler,)
+        return (cls.stream_handler, cls.file_handler)
+
+    @classmethod
+    def __replace_handlers(cls, old_handlers, new_handlers):
+        for name in cls.logger_map:
+            logger=logging.getLogger(name)
+            for handler in old_handlers:
+                logger.removeHandler(handler)
+            for handler in new_handlers:
+                logger.addHandler(handler)
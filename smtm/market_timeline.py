@@ -0,0 +1,75 @@
+"""
+여러 마켓의 캔들을 하나의 시간 축으로 정렬하는 모듈
+
+업비트는 거래가 없는 분의 캔들을 만들지 않기 때문에 마켓마다 캔들의 시간과 개수가 다르다.
+모든 마켓의 캔들 시간을 합친 시간 축(timestamps)을 만들고, 마켓과 시간 축 위치마다 캔들 위치를
+index 행렬로 미리 계산해 두면 조회할 때 캔들 목록을 탐색하지 않아도 된다.
+
+positions[row, turn]: turn 시간의 캔들 위치, 그 시간에 캔들이 없으면 -1
+latest[row, turn]: turn 시간 이전(포함)의 마지막 캔들 위치, 아직 캔들이 없으면 -1
+"""
+import numpy as np
+from .candle import KST_OFFSET_MIN
+from .date_converter import DataConverter
+
+
+class MarketTimeline:
+    """
+    마켓별 CandleSeries를 합친 시간 축과 마켓별 캔들 위치 index
+
+    series_list: 마켓마다 하나씩, 과거 데이터부터 정렬된 CandleSeries 리스트
+    markets: 마켓 이름 리스트, series_list와 같은 순서
+    market_index: 마켓 이름 -> 행 번호
+    timestamps: 모든 마켓의 캔들 시간을 합쳐서 정렬한 시간 축(UTC 기준 경과 분)
+    """
+
+    def __init__(self, series_list):
+        self.series = list(series_list)
+        self.markets = [series.market for series in self.series]
+        self.market_index = {name: row for row, name in enumerate(self.markets)}
+        if len(self.series) > 0:
+            self.timestamps = np.unique(
+                np.concatenate([series.columns["timestamp"] for series in self.series])
+            )
+        else:
+            self.timestamps = np.zeros(0, dtype=np.int64)
+
+        shape = (len(self.series), len(self.timestamps))
+        self.positions = np.full(shape, -1, dtype=np.int32)
+        self.latest = np.full(shape, -1, dtype=np.int32)
+        for row, series in enumerate(self.series):
+            timestamps = series.columns["timestamp"]
+            if len(timestamps) == 0:
+                continue
+            latest = np.searchsorted(timestamps, self.timestamps, side="right") - 1
+            exact = (latest >= 0) & (timestamps[np.maximum(latest, 0)] == self.timestamps)
+            self.latest[row] = latest
+            self.positions[row] = np.where(exact, latest, -1)
+
+    def __len__(self):
+        return len(self.timestamps)
+
+    def candle(self, name, turn):
+        """turn 시간의 name 마켓 캔들, 그 시간에 거래가 없었으면 None"""
+        row = self.market_index[name]
+        position = self.positions[row, turn]
+        if position < 0:
+            return None
+        return self.series[row][position]
+
+    def latest_candle(self, name, turn):
+        """turn 시간 이전(포함)의 마지막 name 마켓 캔들, 아직 캔들이 없으면 None"""
+        row = self.market_index[name]
+        position = self.latest[row, turn]
+        if position < 0:
+            return None
+        return self.series[row][position]
+
+    def candles_at(self, turn):
+        """turn 시간에 거래가 있었던 모든 마켓의 캔들 리스트"""
+        rows = np.flatnonzero(self.positions[:, turn] >= 0)
+        return [self.series[row][self.positions[row, turn]] for row in rows]
+
+    def date_time(self, turn):
+        """turn 시간의 한국 시간 문자열"""
+        return DataConverter.from_epoch_min(int(self.timestamps[turn]) + KST_OFFSET_MIN)
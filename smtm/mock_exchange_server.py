@@ -0,0 +1,356 @@
+"""
+업비트 OpenAPI를 흉내내는 로컬 HTTP 거래소 서버
+
+실제 거래소 없이 UpbitTrader의 동작과 초당 주문 수, 응답 지연 시간을 측정하기 위한 모듈
+1. 127.0.0.1의 빈 포트에서 thread로 동작하고, HTTP/1.1 keep-alive 연결을 지원한다.
+2. 모든 응답은 latency 초만큼 지연된다.
+3. 요청 그룹(주문, 기본)마다 초당 요청 수를 제한하고, 넘으면 429 응답을 보낸다.
+- throttle(count)로 다음 count개의 요청에 429 응답을 보내도록 지정할 수 있다.
+- fail_orders(count, accept)로 다음 count개의 주문에 500 응답을 보내도록 지정할 수 있다.
+  accept가 True면 주문은 접수하고 응답만 실패해서, 접수 여부를 알 수 없는 상황을 만든다.
+4. 인증 토큰(JWT HS256)의 서명, access key, query_hash를 확인하고 틀리면 401 응답을 보낸다.
+5. 접수된 주문은 fill_delay 초 후 주문 가격으로 전량 체결된다. 체결은 주문이나 계좌를 조회할 때 반영된다.
+- 잔고와 보유 자산은 VirtualMarket과 같은 방식(수수료, 평균 매입 가격)으로 계산한다.
+
+지원하는 API
+- POST /v1/orders, GET /v1/orders, GET /v1/order, DELETE /v1/order, GET /v1/accounts, GET /v1/ticker
+- GET /v1/orders는 identifiers[], states[]로 여러 주문을 한 번에 조회한다. 업비트처럼 열린 상태(wait, watch)와
+  끝난 상태(done, cancel)를 함께 조회할 수 없다.
+"""
+import base64
+import hashlib
+import hmac
+import json
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, unquote, urlencode, urlsplit
+from .http_client import TokenBucket
+
+
+class MockExchangeServer:
+    """
+    업비트 OpenAPI 형식으로 응답하는 로컬 거래소 서버
+
+    access_key, secret_key: 인증 토큰 확인에 사용할 키
+    budget: 시작 원화 잔고
+    latency: 응답 지연 시간(초)
+    order_rate, default_rate: 주문 그룹, 기본 그룹의 초당 최대 요청 수, None이면 제한하지 않는다
+    fill_delay: 주문 접수 후 체결까지 걸리는 시간(초)
+    commission_ratio: 수수료율
+    price: ticker로 제공할 현재 가격
+    """
+
+    def __init__(
+        self,
+        access_key="access",
+        secret_key="secret",
+        budget=0,
+        latency=0.0,
+        order_rate=None,
+        default_rate=None,
+        fill_delay=0.0,
+        commission_ratio=0.0005,
+        price=10000,
+    ):
+        self.access_key = access_key
+        self.secret_key = secret_key.encode()
+        self.balance = budget
+        self.asset = {}
+        self.latency = latency
+        self.limits = {
+            "order": TokenBucket(order_rate) if order_rate is not None else None,
+            "default": TokenBucket(default_rate) if default_rate is not None else None,
+        }
+        self.fill_delay = fill_delay
+        self.commission_ratio = commission_ratio
+        self.price = price
+        self.orders = {}
+        self.request_count = 0
+        self.throttled_count = 0
+        self.__throttle = 0
+        self.__fail_orders = 0
+        self.__fail_accept = True
+        self.__lock = threading.Lock()
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), self.__make_handler())
+        self.server.daemon_threads = True
+        self.thread = None
+
+    @property
+    def url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        # stop이 빨리 끝나도록 종료 요청을 짧은 간격으로 확인한다
+        self.thread = threading.Thread(target=self.server.serve_forever, args=(0.05,), daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+        if self.thread is not None:
+            self.thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def throttle(self, count):
+        """다음 count개의 요청에 429 응답을 보낸다"""
+        with self.__lock:
+            self.__throttle = count
+
+    def fail_orders(self, count, accept=True):
+        """다음 count개의 주문에 500 응답을 보낸다, accept가 True면 주문은 접수한다"""
+        with self.__lock:
+            self.__fail_orders = count
+            self.__fail_accept = accept
+
+    def handle(self, method, path, query, body, authorization):
+        """
+        요청 하나를 처리
+        Returns: (HTTP 상태 코드, 응답 딕셔너리 또는 리스트)
+        """
+        if self.latency > 0:
+            time.sleep(self.latency)
+        group = "order" if path in ("/v1/orders", "/v1/order") and method != "GET" else "default"
+        with self.__lock:
+            self.request_count += 1
+            throttled = self.__throttle > 0
+            if throttled:
+                self.__throttle -= 1
+        bucket = self.limits[group]
+        if throttled or (bucket is not None and not bucket.try_acquire()):
+            with self.__lock:
+                self.throttled_count += 1
+            return 429, self.__error("too_many_requests", "요청 수 제한을 초과했습니다")
+
+        if path == "/v1/ticker":
+            markets = dict(query).get("markets", "")
+            return 200, [{"market": market, "trade_price": self.price} for market in markets.split(",") if market]
+
+        params = body if body is not None else self.__to_params(query)
+        if not self.__is_authorized(authorization, params if len(params) > 0 else None):
+            return 401, self.__error("invalid_access_key", "잘못된 인증 토큰입니다")
+
+        with self.__lock:
+            if path == "/v1/orders" and method == "POST":
+                if self.__fail_orders == 0:
+                    return self.__place_order(params)
+                self.__fail_orders -= 1
+                if self.__fail_accept:
+                    self.__place_order(params)
+                return 500, self.__error("server_error", "일시적인 서버 오류입니다")
+            if path == "/v1/orders" and method == "GET":
+                return self.__list_orders(params)
+            if path == "/v1/order" and method == "GET":
+                return self.__get_order(params)
+            if path == "/v1/order" and method == "DELETE":
+                return self.__cancel_order(params)
+            if path == "/v1/accounts" and method == "GET":
+                return 200, self.__get_accounts()
+        return 404, self.__error("not_found", "지원하지 않는 API입니다")
+
+    def __place_order(self, params):
+        try:
+            side = params["side"]
+            price = float(params["price"])
+            volume = float(params["volume"])
+            identifier = params["identifier"]
+        except (KeyError, TypeError, ValueError):
+            return 400, self.__error("validation_error", "잘못된 주문입니다")
+        if side not in ("bid", "ask") or price <= 0 or volume <= 0:
+            return 400, self.__error("validation_error", "잘못된 주문입니다")
+        if identifier in self.orders:
+            return 400, self.__error("duplicated_identifier", "이미 사용한 identifier입니다")
+
+        market = params.get("market", "KRW-BTC")
+        if side == "bid":
+            locked = price * volume * (1 + self.commission_ratio)
+            if locked > self.balance:
+                return 400, self.__error("insufficient_funds_bid", "주문가능한 금액이 부족합니다")
+            self.balance -= locked
+        else:
+            owned = self.asset.get(market, (0, 0))[1]
+            if volume > owned:
+                return 400, self.__error("insufficient_funds_ask", "주문가능한 수량이 부족합니다")
+            self.__add_asset(market, price, -volume)
+
+        order = {
+            "uuid": str(uuid.uuid4()),
+            "identifier": identifier,
+            "market": market,
+            "side": side,
+            "ord_type": "limit",
+            "price": str(price),
+            "volume": str(volume),
+            "state": "wait",
+            "executed_volume": "0",
+            "remaining_volume": str(volume),
+            "created_at": time.time(),
+        }
+        self.orders[identifier] = order
+        return 201, self.__to_response(order)
+
+    def __get_order(self, params):
+        order = self.orders.get(params.get("identifier"))
+        if order is None:
+            return 404, self.__error("order_not_found", "주문을 찾지 못했습니다")
+        self.__fill(order)
+        return 200, self.__to_response(order)
+
+    def __list_orders(self, params):
+        states = params.get("states[]", ["wait"])
+        is_open = [state in ("wait", "watch") for state in states]
+        if any(is_open) and not all(is_open):
+            return 400, self.__error("validation_error", "미체결 주문과 완료 주문은 함께 조회할 수 없습니다")
+        orders = []
+        for identifier in params.get("identifiers[]", []):
+            order = self.orders.get(identifier)
+            if order is None:
+                continue
+            self.__fill(order)
+            if order["state"] in states:
+                orders.append(self.__to_response(order))
+        return 200, orders
+
+    def __cancel_order(self, params):
+        order = self.orders.get(params.get("identifier"))
+        if order is None:
+            return 404, self.__error("order_not_found", "주문을 찾지 못했습니다")
+        self.__fill(order)
+        if order["state"] != "wait":
+            return 400, self.__error("canceled_order" if order["state"] == "cancel" else "done_order", "취소할 수 없는 주문입니다")
+
+        # 체결되지 않은 주문의 잔고나 수량을 돌려준다
+        price = float(order["price"])
+        volume = float(order["remaining_volume"])
+        if order["side"] == "bid":
+            self.balance += price * volume * (1 + self.commission_ratio)
+        else:
+            self.__add_asset(order["market"], price, volume)
+        order["state"] = "cancel"
+        return 200, self.__to_response(order)
+
+    def __get_accounts(self):
+        for order in self.orders.values():
+            self.__fill(order)
+        accounts = [{"currency": "KRW", "balance": str(round(self.balance)), "locked": "0", "avg_buy_price": "0", "unit_currency": "KRW"}]
+        for market, (price, amount) in self.asset.items():
+            unit, currency = market.split("-")
+            accounts.append(
+                {"currency": currency, "balance": str(amount), "locked": "0", "avg_buy_price": str(price), "unit_currency": unit}
+            )
+        return accounts
+
+    def __fill(self, order):
+        """fill_delay가 지난 대기 주문을 주문 가격으로 전량 체결"""
+        if order["state"] != "wait" or time.time() - order["created_at"] < self.fill_delay:
+            return
+        price = float(order["price"])
+        volume = float(order["remaining_volume"])
+        if order["side"] == "bid":
+            self.__add_asset(order["market"], price, volume)
+        else:
+            self.balance += price * volume * (1 - self.commission_ratio)
+        order["state"] = "done"
+        order["executed_volume"] = order["volume"]
+        order["remaining_volume"] = "0"
+
+    def __add_asset(self, market, price, volume):
+        old_price, old_amount = self.asset.get(market, (0, 0))
+        amount = round(old_amount + volume, 8)
+        if amount <= 0:
+            self.asset.pop(market, None)
+        elif volume > 0:
+            self.asset[market] = (round((old_price * old_amount + price * volume) / amount), amount)
+        else:
+            self.asset[market] = (old_price, amount)
+
+    def __is_authorized(self, authorization, params):
+        """Bearer 토큰의 서명, access key, query_hash 확인"""
+        if authorization is None or not authorization.startswith("Bearer "):
+            return False
+        try:
+            header, payload, signature = authorization[len("Bearer ") :].encode().split(b".")
+            expected = hmac.new(self.secret_key, header + b"." + payload, hashlib.sha256).digest()
+            if not hmac.compare_digest(self.__decode(signature), expected):
+                return False
+            claims = json.loads(self.__decode(payload))
+        except (ValueError, TypeError):
+            return False
+        if claims.get("access_key") != self.access_key:
+            return False
+        if params is None:
+            return True
+        query_hash = hashlib.sha512(unquote(urlencode(params, doseq=True)).encode()).hexdigest()
+        return claims.get("query_hash") == query_hash
+
+    def __make_handler(self):
+        exchange = self
+
+        class Handler(BaseHTTPRequestHandler):
+            # keep-alive 연결을 유지하고, 헤더와 본문을 나눠 보내도 지연되지 않도록 Nagle 알고리즘을 끈다
+            protocol_version = "HTTP/1.1"
+            disable_nagle_algorithm = True
+
+            def do_GET(self):
+                self.__respond("GET")
+
+            def do_POST(self):
+                self.__respond("POST")
+
+            def do_DELETE(self):
+                self.__respond("DELETE")
+
+            def log_message(self, format, *args):  # pylint: disable=redefined-builtin
+                pass
+
+            def __respond(self, method):
+                url = urlsplit(self.path)
+                length = int(self.headers.get("Content-Length") or 0)
+                body = None
+                if length > 0:
+                    try:
+                        body = json.loads(self.rfile.read(length))
+                    except ValueError:
+                        body = {}
+                status, data = exchange.handle(
+                    method, url.path, parse_qsl(url.query), body, self.headers.get("Authorization")
+                )
+                content = json.dumps(data).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(content)))
+                self.end_headers()
+                self.wfile.write(content)
+
+        return Handler
+
+    @staticmethod
+    def __to_params(query):
+        """query string 목록을 딕셔너리로 변환, 이름이 []로 끝나는 배열 파라미터는 리스트로 모은다"""
+        params = {}
+        for key, value in query:
+            if key.endswith("[]"):
+                params.setdefault(key, []).append(value)
+            else:
+                params[key] = value
+        return params
+
+    @staticmethod
+    def __to_response(order):
+        return {key: value for key, value in order.items() if key != "created_at"}
+
+    @staticmethod
+    def __error(name, message):
+        return {"error": {"name": name, "message": message}}
+
+    @staticmethod
+    def __decode(data):
+        return base64.urlsafe_b64decode(data + b"=" * (-len(data) % 4))
@@ -0,0 +1,140 @@
+"""
+체결되지 않은 지정가 주문을 보관하는 주문장
+
+가상 거래소가 요청을 다음 캔들에 바로 체결하거나 버리면 requested 상태와 취소 요청이 시뮬레이션에서 사용되지 않는다.
+주문장은 체결되지 않은 주문을 다음 턴까지 보관하고, 캔들마다 가격 우선, 시간 우선 순서로 체결한다.
+
+1. 매수 주문은 높은 가격, 매도 주문은 낮은 가격이 먼저 나오는 heap에 보관한다.
+2. 취소는 id 테이블에서만 지우고, heap에 남은 항목은 꺼낼 때 버린다(lazy cancel).
+- 버려야 할 항목이 보관 중인 주문보다 많아지면 heap을 다시 만든다.
+3. 캔들 하나에서 체결 가능한 수량은 캔들 거래량으로 제한하므로 주문이 나눠서 체결될 수 있다.
+- 체결 조건은 VirtualMarket과 같다. 매수는 가격 >= 저가, 매도는 가격 < 고가
+- 체결 가격은 주문 가격
+- match는 캔들에서 체결된 주문을 모두 반환하므로 일부만 체결된 주문의 결과도 만들 수 있다.
+"""
+import heapq
+import itertools
+
+
+class Order:
+    """
+    주문장에 보관 중인 주문
+
+    request: 거래 요청 정보
+    market: 마켓 이름
+    amount: 남은 수량
+    filled: 체결된 수량
+    """
+
+    __slots__ = ("id", "request", "market", "type", "price", "amount", "filled")
+
+    def __init__(self, request, market):
+        self.id = request["id"]
+        self.request = request
+        self.market = market
+        self.type = request["type"]
+        self.price = request["price"]
+        self.amount = request["amount"]
+        self.filled = 0
+
+
+class OrderBook:
+    """
+    한 마켓의 매수, 매도 주문장
+
+    orders: 보관 중인 주문 {요청 id: Order}
+    """
+
+    def __init__(self, market):
+        self.market = market
+        self.orders = {}
+        self.bids = []
+        self.asks = []
+        self.__sequence = itertools.count()
+
+    def __len__(self):
+        return len(self.orders)
+
+    def __contains__(self, order_id):
+        return order_id in self.orders
+
+    def add(self, request):
+        """주문 추가, 이미 있는 id면 UserWarning"""
+        if request["id"] in self.orders:
+            raise UserWarning(f"duplicated order id {request['id']}")
+        order = Order(request, self.market)
+        self.orders[order.id] = order
+        if order.type == "buy":
+            heapq.heappush(self.bids, (-order.price, next(self.__sequence), order))
+        else:
+            heapq.heappush(self.asks, (order.price, next(self.__sequence), order))
+        return order
+
+    def get_state(self):
+        """보관 중인 주문의 (요청 정보, 남은 수량, 체결된 수량) 리스트, 주문 추가 순서"""
+        return [(order.request, order.amount, order.filled) for order in self.orders.values()]
+
+    @classmethod
+    def from_state(cls, market, state):
+        """
+        get_state 결과로 주문장을 다시 만든다
+        같은 가격의 주문은 추가 순서로 체결되므로 추가 순서대로 넣으면 체결 순서가 유지된다
+        """
+        book = cls(market)
+        for request, amount, filled in state:
+            order = book.add(request)
+            order.amount = amount
+            order.filled = filled
+        return book
+
+    def cancel(self, order_id):
+        """주문 취소, 취소한 주문을 반환하고 없으면 None"""
+        order = self.orders.pop(order_id, None)
+        if order is not None and len(self.bids) + len(self.asks) > 2 * len(self.orders) + 64:
+            self.__compact()
+        return order
+
+    def match(self, low_price, high_price, volume, fill):
+        """
+        캔들 하나로 주문 체결
+        volume: 매수, 매도 쪽 각각 체결 가능한 최대 수량
+        fill(order, amount): 잔고와 자산을 반영하고 실제 체결한 수량을 반환하는 함수
+        Returns: 이번 캔들에서 체결된 주문 리스트, 모든 수량이 체결된 주문은 주문장에서 빠진다
+        """
+        filled_orders = []
+        self.__match_side(self.bids, True, low_price, volume, fill, filled_orders)
+        self.__match_side(self.asks, False, high_price, volume, fill, filled_orders)
+        return filled_orders
+
+    def __match_side(self, heap, is_bid, limit, volume, fill, filled_orders):
+        skipped = []
+        while heap and volume > 0:
+            key, _, order = heap[0]
+            if self.orders.get(order.id) is not order:
+                heapq.heappop(heap)
+                continue
+            price = -key if is_bid else key
+            if (is_bid and price < limit) or (not is_bid and price >= limit):
+                break
+
+            amount = min(order.amount, volume)
+            filled = fill(order, amount)
+            if filled > 0:
+                order.amount = round(order.amount - filled, 6)
+                order.filled = round(order.filled + filled, 6)
+                volume = round(volume - filled, 6)
+                filled_orders.append(order)
+            if order.amount <= 0:
+                heapq.heappop(heap)
+                del self.orders[order.id]
+            elif filled < amount:
+                # 잔고나 자산이 부족한 주문은 이번 캔들에서 건너뛴다
+                skipped.append(heapq.heappop(heap))
+        for entry in skipped:
+            heapq.heappush(heap, entry)
+
+    def __compact(self):
+        self.bids = [entry for entry in self.bids if self.orders.get(entry[2].id) is entry[2]]
+        self.asks = [entry for entry in self.asks if self.orders.get(entry[2].id) is entry[2]]
+        heapq.heapify(self.bids)
+        heapq.heapify(self.asks)
@@ -0,0 +1,275 @@
+"""
+주문 관리(OMS)
+
+전략과 Trader가 각자 요청 id 딕셔너리로 주문을 관리하면 id가 겹치거나 주문 상태가 서로 달라진다.
+주문 관리자는 주문 상태를 한 곳에서 관리하고, Trader의 취소 기능이 열린 주문을 바로 찾을 수 있게 한다.
+
+1. 주문 id는 OrderIdGenerator로 만든다.
+- 현재 시간(마이크로초)과 마지막 id 중 큰 값을 사용하므로 같은 시간에 여러 개를 만들어도 겹치지 않고 항상 증가한다.
+- 형식은 기존 요청 id와 같은 "초.마이크로초" 문자열 "1607862457.560075"
+2. 주문 상태
+- requested: 접수됨, partial: 일부 체결됨, done: 모두 체결됨, cancelled: 취소됨, rejected: 거부됨
+- requested -> partial, done, cancelled, rejected
+- partial -> partial, done, cancelled
+- done, cancelled, rejected는 끝난 상태로 더 바뀌지 않는다
+3. 상태별, 마켓별, 전략별 index
+- 모든 index는 {주문 id: 주문} 딕셔너리라서 추가, 상태 변경, 조회가 O(1)이다.
+- 마켓별, 전략별 index에는 열린 주문(requested, partial)만 보관한다.
+- 끝난 주문은 keep_finished 개까지만 보관하고 오래된 것부터 지운다.
+"""
+import collections
+import threading
+import time
+
+
+class OrderIdGenerator:
+    """
+    겹치지 않고 항상 증가하는 주문 id 생성기
+
+    prefix: id 앞에 붙일 문자열
+    """
+
+    def __init__(self, prefix=""):
+        self.prefix = prefix
+        self.last = 0
+        self.__lock = threading.Lock()
+
+    def next_id(self):
+        """새 주문 id, 시스템 시간이 뒤로 가도 마지막 id보다 큰 값을 만든다"""
+        with self.__lock:
+            self.last = max(time.time_ns() // 1000, self.last + 1)
+            value = self.last
+        return f"{self.prefix}{value // 1000000}.{value % 1000000:06d}"
+
+
+class ManagedOrder:
+    """
+    주문 관리자가 관리하는 주문
+
+    request: 거래 요청 정보
+    market: 마켓 이름, 요청에 없으면 None
+    strategy: 주문을 만든 전략 이름, 요청에 없으면 None
+    filled: 체결된 수량
+    state: 주문 상태
+    msg: 마지막 결과 메세지
+    """
+
+    __slots__ = ("id", "request", "market", "strategy", "type", "price", "amount", "filled", "state", "msg")
+
+    def __init__(self, request, market, strategy):
+        self.id = request["id"]
+        self.request = request
+        self.market = market
+        self.strategy = strategy
+        self.type = request["type"]
+        self.price = request["price"]
+        self.amount = request["amount"]
+        self.filled = 0
+        self.state = OrderManager.REQUESTED
+        self.msg = None
+
+    def is_open(self):
+        return self.state in OrderManager.OPEN_STATES
+
+
+class OrderManager:
+    """
+    주문 상태와 상태별, 마켓별, 전략별 index 관리
+
+    orders: 보관 중인 주문 {주문 id: ManagedOrder}
+    keep_finished: 보관할 끝난 주문 개수, None이면 모두 보관
+    """
+
+    REQUESTED = "requested"
+    PARTIAL = "partial"
+    DONE = "done"
+    CANCELLED = "cancelled"
+    REJECTED = "rejected"
+    STATES = (REQUESTED, PARTIAL, DONE, CANCELLED, REJECTED)
+    OPEN_STATES = (REQUESTED, PARTIAL)
+    TRANSITIONS = {
+        REQUESTED: (PARTIAL, DONE, CANCELLED, REJECTED),
+        PARTIAL: (PARTIAL, DONE, CANCELLED),
+        DONE: (),
+        CANCELLED: (),
+        REJECTED: (),
+    }
+
+    def __init__(self, keep_finished=10000):
+        self.keep_finished = keep_finished
+        self.orders = {}
+        self.__by_state = {state: {} for state in self.STATES}
+        self.__by_market = {}
+        self.__by_strategy = {}
+        self.__open = {}
+        self.__finished = collections.deque()
+
+    def __len__(self):
+        return len(self.orders)
+
+    def __contains__(self, order_id):
+        return order_id in self.orders
+
+    def get(self, order_id):
+        """주문 id의 주문, 없으면 None"""
+        return self.orders.get(order_id)
+
+    def is_open(self, order_id):
+        """체결이나 취소를 기다리는 주문이면 True"""
+        order = self.orders.get(order_id)
+        return order is not None and order.state in self.OPEN_STATES
+
+    def add(self, request, market=None, strategy=None):
+        """
+        requested 상태의 주문 추가, 이미 있는 id면 UserWarning
+        market, strategy: 지정하지 않으면 요청의 market, strategy
+        """
+        if request["id"] in self.orders:
+            raise UserWarning(f"duplicated order id {request['id']}")
+        order = ManagedOrder(
+            request,
+            request.get("market") if market is None else market,
+            request.get("strategy") if strategy is None else strategy,
+        )
+        self.orders[order.id] = order
+        self.__by_state[order.state][order.id] = order
+        self.__open[order.id] = order
+        self.__by_market.setdefault(order.market, {})[order.id] = order
+        self.__by_strategy.setdefault(order.strategy, {})[order.id] = order
+        return order
+
+    def transition(self, order_id, state, filled=None, msg=None):
+        """
+        주문 상태 변경, 없는 주문이거나 허용되지 않는 상태 변경이면 UserWarning
+        filled: 지금까지 체결된 수량, None이면 그대로 둔다
+        Returns: 변경된 주문
+        """
+        order = self.orders.get(order_id)
+        if order is None:
+            raise UserWarning(f"order not found {order_id}")
+        if state not in self.TRANSITIONS[order.state]:
+            raise UserWarning(f"invalid order state {order.state} -> {state} {order_id}")
+
+        del self.__by_state[order.state][order_id]
+        order.state = state
+        self.__by_state[state][order_id] = order
+        if filled is not None:
+            order.filled = filled
+        if msg is not None:
+            order.msg = msg
+        if state not in self.OPEN_STATES:
+            self.__close(order)
+        return order
+
+    def apply_result(self, result):
+        """
+        Trader가 전달한 거래 결과를 주문 상태에 반영
+        - state rejected, msg game-over: rejected
+        - msg cancelled: cancelled, 취소 전에 체결된 수량은 amount
+        - state done: done
+        - state requested: 체결된 수량(amount)이 있으면 partial, 없으면 그대로 requested
+        거부된 취소 요청은 주문 상태를 바꾸지 않는다
+        Returns: 변경된 주문, 관리하지 않거나 이미 끝난 주문이면 None
+        """
+        request = result["request"]
+        order = self.orders.get(request["id"])
+        if order is None or order.state not in self.OPEN_STATES:
+            return None
+        if request["type"] == "cancel" and result["state"] == self.REJECTED:
+            return None
+
+        amount = result.get("amount") or 0
+        msg = result.get("msg")
+        if result["state"] == self.REJECTED or msg == "game-over":
+            return self.transition(order.id, self.REJECTED, msg=msg)
+        if msg == "cancelled":
+            return self.transition(order.id, self.CANCELLED, max(order.filled, amount), msg)
+        if result["state"] == self.DONE:
+            return self.transition(order.id, self.DONE, amount, msg)
+        if amount > order.filled:
+            return self.transition(order.id, self.PARTIAL, amount, msg)
+        order.msg = msg
+        return order
+
+    def find(self, state=None, market=None, strategy=None):
+        """
+        조건에 맞는 주문 리스트, 추가 순서
+        market, strategy를 지정하면 열린 주문 중에서 찾는다
+        """
+        if market is not None:
+            candidates = self.__by_market.get(market, {})
+        elif strategy is not None:
+            candidates = self.__by_strategy.get(strategy, {})
+        elif state is not None:
+            return list(self.__by_state[state].values())
+        else:
+            return list(self.orders.values())
+
+        return [
+            order
+            for order in candidates.values()
+            if (state is None or order.state == state)
+            and (strategy is None or order.strategy == strategy)
+        ]
+
+    def open_ids(self, market=None, strategy=None):
+        """취소 대상인 열린 주문의 id 리스트, 추가 순서"""
+        if market is None and strategy is None:
+            return list(self.__open)
+        return [order.id for order in self.find(market=market, strategy=strategy)]
+
+    def count(self, state=None):
+        """state 상태인 주문 개수, None이면 열린 주문 개수"""
+        if state is None:
+            return len(self.__open)
+        return len(self.__by_state[state])
+
+    def cancel_all(self, market=None, strategy=None, msg="cancelled"):
+        """
+        조건에 맞는 열린 주문을 모두 cancelled 상태로 변경
+        거래소에서 일괄 취소가 끝난 후 호출한다
+        Returns: 취소된 주문 리스트
+        """
+        return [
+            self.transition(order_id, self.CANCELLED, msg=msg)
+            for order_id in self.open_ids(market, strategy)
+        ]
+
+    def get_state(self):
+        """열린 주문의 (요청 정보, 마켓, 전략, 상태, 체결된 수량) 리스트, 추가 순서"""
+        return [
+            (order.request, order.market, order.strategy, order.state, order.filled)
+            for order in self.__open.values()
+        ]
+
+    @classmethod
+    def from_state(cls, state, keep_finished=10000):
+        """get_state 결과로 주문 관리자를 다시 만든다"""
+        manager = cls(keep_finished)
+        for request, market, strategy, order_state, filled in state:
+            order = manager.add(request, market, strategy)
+            if order_state != cls.REQUESTED:
+                manager.transition(order.id, order_state, filled)
+        return manager
+
+    def __close(self, order):
+        """끝난 주문을 열린 주문 index에서 빼고, 오래된 끝난 주문을 지운다"""
+        del self.__open[order.id]
+        self.__remove_index(self.__by_market, order.market, order.id)
+        self.__remove_index(self.__by_strategy, order.strategy, order.id)
+        if self.keep_finished is None:
+            return
+        self.__finished.append(order.id)
+        while len(self.__finished) > self.keep_finished:
+            old_id = self.__finished.popleft()
+            old = self.orders.pop(old_id)
+            del self.__by_state[old.state][old_id]
+
+    @staticmethod
+    def __remove_index(index, key, order_id):
+        orders = index.get(key)
+        if orders is None:
+            return
+        orders.pop(order_id, None)
+        if len(orders) == 0:
+            del index[key]
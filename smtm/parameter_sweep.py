@@ -0,0 +1,162 @@
+"""
+전략 파라미터 조합별 시뮬레이션을 여러 프로세스에서 동시에 실행하는 모듈
+
+1. 캔들 데이터는 한 번만 불러와서 공유 메모리에 올린다.
+- worker는 시작할 때 공유 메모리를 복사 없이 CandleSeries로 열고, 작업마다 파라미터만 전달받는다.
+
+2. 파라미터 조합마다 독립적인 VirtualMarket과 전략 인스턴스로 시뮬레이션한다.
+- initialize 메서드의 인자(budget, min_price)는 initialize 호출에 사용
+- commission_ratio는 VirtualMarket의 수수료율로 설정
+- 그 외 이름(COMMISSION_RATIO, SPLIT_COUNT 등)은 전략 인스턴스의 속성으로 설정
+- 전략의 COMMISSION_RATIO와 VirtualMarket의 commission_ratio는 하나만 지정해도 같은 값으로 맞춘다
+
+3. 결과는 파라미터 조합 순서대로 최종 잔고, 수익률, 체결 횟수, 최대 낙폭을 담은 딕셔너리 리스트로 반환한다.
+- 체결 횟수는 state가 done인 결과만 센다.
+"""
+import functools
+import inspect
+from .candle import CandleSeries
+from .candle_store import CandleStore
+from .date_converter import DataConverter
+from .log_manager import LogManager
+from .shared_candles import expand_grid, map_shared
+from .virtual_market import VirtualMarket
+
+
+def _setup_worker(market, columns):
+    return CandleSeries(market, columns)
+
+
+def _run_task(candles, args):
+    strategy_class, params, budget = args
+    return ParameterSweep.simulate(strategy_class, params, candles, budget)
+
+
+class ParameterSweep:
+    """
+    전략 클래스와 파라미터 그리드, 기간을 받아 조합별 시뮬레이션 결과를 수집
+
+    strategy_class: Strategy를 상속한 전략 클래스
+    store: 캔들 저장소
+    max_workers: worker 프로세스 수, None이면 CPU 개수
+    """
+
+    MARKET_PARAMS = ("commission_ratio",)
+
+    def __init__(self, strategy_class, store=None, max_workers=None):
+        self.logger = LogManager.get_logger(__class__.__name__)
+        self.strategy_class = strategy_class
+        self.store = store if store is not None else CandleStore()
+        self.max_workers = max_workers
+
+    def run(self, param_grid, from_dash_to=None, budget=500000, market="KRW-BTC", columns=None):
+        """
+        파라미터 그리드의 모든 조합을 시뮬레이션
+
+        param_grid: {파라미터 이름: 값 리스트}
+        from_dash_to: DataConverter.to_end_min 형태의 기간 '200220-200320', UTC 기준
+        budget: 시작 예산, 그리드에 budget이 있으면 그 값을 사용
+        columns: 이미 불러온 캔들 컬럼 배열, 주어지면 from_dash_to는 사용하지 않는다
+        Returns: 조합별 결과 리스트
+        [{
+            "params": 파라미터 조합
+            "final_balance": 마지막 현금 잔고
+            "final_value": 마지막 현금 잔고 + 보유 자산 평가 금액
+            "return": 수익률
+            "trade_count": 체결 횟수
+            "max_drawdown": 최대 낙폭 비율
+        }]
+        """
+        if columns is None:
+            end, count = DataConverter.to_end_min(from_dash_to)
+            columns = self.store.load_columns(market, end, count)
+
+        combinations = self.expand_grid(param_grid)
+        tasks = [(self.strategy_class, params, budget) for params in combinations]
+        self.logger.info(f"sweep {len(tasks)} combinations over {len(columns['timestamp'])} candles")
+
+        return map_shared(
+            columns, functools.partial(_setup_worker, market), _run_task, tasks, self.max_workers
+        )
+
+    expand_grid = staticmethod(expand_grid)
+
+    @classmethod
+    def simulate(cls, strategy_class, params, candles, budget):
+        """
+        한 파라미터 조합으로 VirtualMarket과 전략을 끝까지 실행하고 결과를 반환
+        candles: 과거 데이터부터 정렬된 CandleSeries
+        """
+        params = dict(params)
+        budget = params.pop("budget", budget)
+        strategy = strategy_class()
+        strategy.is_simulation = True
+        market = VirtualMarket()
+        market.data = candles
+        market.balance = budget
+        market.is_initialized = True
+
+        init_names = inspect.signature(strategy.initialize).parameters
+        init_params = {"budget": budget}
+        for name, value in params.items():
+            if name in init_names:
+                init_params[name] = value
+            elif name in cls.MARKET_PARAMS:
+                setattr(market, name, value)
+            else:
+                setattr(strategy, name, value)
+        # 수수료율을 한쪽만 바꾸면 전략의 잔고 계산과 가상 거래소의 체결 금액이 달라진다
+        if "COMMISSION_RATIO" in params and "commission_ratio" not in params:
+            market.commission_ratio = params["COMMISSION_RATIO"]
+        elif "commission_ratio" in params and hasattr(strategy, "COMMISSION_RATIO"):
+            strategy.COMMISSION_RATIO = params["commission_ratio"]
+        strategy.initialize(**init_params)
+
+        trade_count = 0
+        peak = value = budget
+        max_drawdown = 0.0
+        for candle in candles:
+            strategy.update_trading_info(candle)
+            requests = strategy.get_request()
+            if requests is None:
+                requests = [{"id": "skip", "type": "buy", "price": 0, "amount": 0}]
+
+            is_over = False
+            for request in requests:
+                if request["type"] == "cancel":
+                    continue
+                result = market.handle_request(request)
+                # 턴만 넘긴 요청과 거부된 요청은 거래로 세지 않는다
+                if result is None or result["state"] == "rejected":
+                    continue
+                if result["msg"] == "game-over":
+                    is_over = True
+                    break
+                # 접수만 된 요청(requested)은 체결될 때 다시 결과가 오므로 done만 센다
+                if result["state"] == "done":
+                    trade_count += 1
+                strategy.update_result(result)
+
+            value = cls.get_value(market)
+            peak = max(peak, value)
+            max_drawdown = max(max_drawdown, (peak - value) / peak if peak > 0 else 0.0)
+            if is_over:
+                break
+
+        return {
+            "params": dict(params, budget=budget),
+            "final_balance": market.balance,
+            "final_value": value,
+            "return": (value - budget) / budget if budget else 0.0,
+            "trade_count": trade_count,
+            "max_drawdown": max_drawdown,
+        }
+
+    @staticmethod
+    def get_value(market):
+        """현재 턴의 종가로 평가한 현금 + 보유 자산 금액"""
+        index = min(market.turn_count, len(market.data) - 1)
+        value = market.balance
+        for amount_price in market.asset.values():
+            value += amount_price[1] * market.data[index]["trade_price"]
+        return value
@@ -0,0 +1,113 @@
+"""
+여러 프로세스가 같은 캔들 컬럼 배열을 복사 없이 사용하도록 공유 메모리에 올려주는 모듈
+
+ProcessPoolExecutor의 worker에 캔들 데이터를 인자로 넘기면 작업마다 전체 데이터가 pickle 되어 복사된다.
+SharedCandles는 컬럼 배열을 공유 메모리 한 블록에 한 번만 복사하고, worker에는 블록 이름과
+컬럼별 위치(descriptor)만 전달한다. worker는 descriptor로 공유 메모리를 열어 numpy 배열 view를 만든다.
+
+map_shared는 ParameterSweep, BacktestBatch가 함께 사용하는 worker pool 실행 방식이다.
+worker는 시작할 때 공유 메모리를 한 번 열어 setup으로 작업 환경(context)을 만들고, 작업마다 작은 인자만 전달받는다.
+"""
+import itertools
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+import numpy as np
+from .log_manager import LogManager
+
+# worker 프로세스마다 한 번 열어 두는 공유 메모리, 작업 환경, 작업 함수
+_worker_shared = None
+_worker_context = None
+_worker_run = None
+
+
+def _init_worker(descriptor, setup, run):
+    global _worker_shared, _worker_context, _worker_run  # pylint: disable=global-statement
+    LogManager.set_profile("backtest")
+    _worker_shared = SharedCandles.attach(descriptor)
+    _worker_context = setup(_worker_shared.columns)
+    _worker_run = run
+
+
+def _run_worker(task):
+    return _worker_run(_worker_context, task)
+
+
+def map_shared(columns, setup, run, tasks, max_workers=None, chunksize=1):
+    """
+    컬럼 배열을 공유 메모리에 올리고 worker 프로세스에서 run(context, task)를 실행
+    setup(columns): worker가 시작할 때 공유 메모리 view로 context를 만든다, pickle 가능한 함수여야 한다
+    Returns: tasks 순서대로 정렬한 run 결과 리스트
+    """
+    with SharedCandles.create(columns) as shared:
+        with ProcessPoolExecutor(
+            max_workers=max_workers,
+            initializer=_init_worker,
+            initargs=(shared.descriptor, setup, run),
+        ) as executor:
+            return list(executor.map(_run_worker, tasks, chunksize=chunksize))
+
+
+def expand_grid(param_grid):
+    """{이름: 값 리스트}를 모든 조합의 {이름: 값} 리스트로 변환"""
+    names = list(param_grid)
+    return [
+        dict(zip(names, values))
+        for values in itertools.product(*(param_grid[name] for name in names))
+    ]
+
+
+class SharedCandles:
+    """
+    컬럼 배열을 공유 메모리에 올리고 view를 제공
+
+    descriptor: (공유 메모리 이름, {컬럼 이름: (시작 위치, dtype, 길이)}), pickle 가능한 작은 값
+    columns: 공유 메모리를 바라보는 컬럼별 numpy 배열
+    """
+
+    def __init__(self, shm, descriptor, is_owner):
+        self.shm = shm
+        self.descriptor = descriptor
+        self.is_owner = is_owner
+        _, layout = descriptor
+        self.columns = {
+            name: np.ndarray((length,), dtype=np.dtype(dtype), buffer=shm.buf, offset=offset)
+            for name, (offset, dtype, length) in layout.items()
+        }
+
+    @classmethod
+    def create(cls, columns):
+        """컬럼 배열을 공유 메모리 한 블록에 복사해서 생성, 생성한 프로세스가 unlink 해야 한다"""
+        layout = {}
+        offset = 0
+        for name, column in columns.items():
+            column = np.asarray(column)
+            layout[name] = (offset, column.dtype.str, len(column))
+            # 컬럼마다 8바이트 단위로 정렬
+            offset += (column.nbytes + 7) // 8 * 8
+
+        shm = shared_memory.SharedMemory(create=True, size=max(offset, 1))
+        shared = cls(shm, (shm.name, layout), is_owner=True)
+        for name, column in columns.items():
+            shared.columns[name][:] = column
+        return shared
+
+    @classmethod
+    def attach(cls, descriptor):
+        """다른 프로세스에서 descriptor로 공유 메모리를 연다"""
+        name, _ = descriptor
+        # worker는 생성한 프로세스의 resource tracker를 함께 사용하므로 해제는 생성한 프로세스가 담당한다
+        shm = shared_memory.SharedMemory(name=name)
+        return cls(shm, descriptor, is_owner=False)
+
+    def close(self):
+        """view를 정리하고 공유 메모리를 닫는다, 생성한 프로세스면 공유 메모리를 해제한다"""
+        self.columns = {}
+        self.shm.close()
+        if self.is_owner:
+            self.shm.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
@@ -1,14 +1,21 @@
 """
 시뮬레이션을 위한 DataProvider 구현체
 """
-import os
-import sys
-import copy
-import requests
+import queue
+import logging
+import threading
+from .data_provider import DataProvider
+from .log_manager import LogManager
+from .candle import Candle, CandleSeries
+from .candle_store import CandleStore, UpbitCandleFetcher
+from .candle_resampler import CandleResampler
+from .date_converter import DataConverter
+from .instrumentation import Instrumentation
+from .lazy_module import lazy_module
+from .time_index import TimeIndex
 
-sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from smtm.data_provider import DataProvider
-from smtm.log_manager import LogManager
+# 거래소 요청 오류를 처리할 때만 불러온다
+requests=lazy_module("requests")
 
 
 class SimulationDataProvider(DataProvider):
@@ -16,41 +23,213 @@ class SimulationDataProvider(DataProvider):
     업비트 거래소로부터 과거 데이터를 수집해서 순차적으로 데이터 제공
     업비트의 OpenAPI -> 별도의 가입, 인증, token 없이 사용 가능
     https://docs.upbit.com/reference#%EC%8B%9C%EC%84%B8-%EC%BA%94%EB%93%A4-%EC%A1%B0%ED%9A%8C
+
+    store: 캔들 저장소, 저장돼 있지 않은 구간만 거래소에서 가져온다
+    unit: 제공하는 캔들 단위(분), 1보다 크면 저장소에서 분봉을 합친 캔들을 제공한다
+    fill_gaps: True면 거래가 없었던 시간을 직전 종가의 캔들로 채워서 제공한다
     """
 
     URL="https://api.upbit.com/v1/candles/minutes/1"
     QUERY_STRING={"market":"KRW-BTC"}
 
-    def __init__(self):
+    def __init__(self, store=None):
         self.logger=LogManager.get_logger(__class__.__name__)
         self.is_initialized=False
         self.data=[]
         self.index=0
+        if store is None:
+            store=CandleStore(fetcher=UpbitCandleFetcher(self.URL))
+        self.store=store
+        self.batch_size=None
+        self.unit=1
+        self.fill_gaps=False
+        self.prefetch=2
+        self.__bounds=None
+        self.__time_index=None
+        self.__range=None
+        self.__batches=None
+        self.__batch=None
+        self.__batch_index=0
+        self.__last_timestamp=None
 
-    def initialize_simulation(self, end=None, count=100):
+    @Instrumentation.timed("SimulationDataProvider.initialize_simulation")
+    def initialize_simulation(self, end=None, count=100, batch_size=None, unit=1, fill_gaps=False):
         """
-        Upbit OpenAPI 사용하여 데이터 가져온 후 초기화
+        캔들 저장소에서 데이터 가져온 후 초기화
+        저장소에 없는 구간은 Upbit OpenAPI 사용하여 가져온다
+
+        count: 가져올 캔들 개수(unit 분 단위)
+        batch_size: 지정하면 전체 기간을 batch_size 개 캔들 단위로 나눠서 필요할 때 가져온다
+            첫 번째 묶음만 받으면 바로 get_info를 사용할 수 있고, 다음 묶음은 background에서 미리 가져온다
+        unit: 캔들 단위(분), 분봉만 거래소에서 받고 더 긴 단위는 저장소에서 합친 캔들을 사용한다
+        fill_gaps: True면 거래가 없었던 시간을 직전 종가의 캔들로 채운다, 첫 번째 캔들 이전 시간은 채우지 않는다
         """
+        CandleResampler.check_unit(unit)
 
         # index 초기화
         self.index=0
-        query_string=copy.deepcopy(self.QUERY_STRING)
+        self.batch_size=batch_size
+        self.unit=unit
+        self.fill_gaps=fill_gaps
+        self.__close_batches()
+        self.__batch=None
+        self.__batch_index=0
+        self.__time_index=None
+        self.__last_timestamp=None
+        self.__bounds=CandleStore.to_range(end, count, unit)
+
+        if batch_size is not None:
+            self.__range=self.__bounds
+            self.data=[]
+            self.is_initialized=True
+            self.logger.info(f"data will be streamed from store # end: {end}, count: {count}")
+            return
+
+        self.__range=None
+        # 과거 데이터가 제일 먼저 오도록 정렬된 리스트로 반환
+        self.data=self.__load_range(*self.__bounds)
+        self.is_initialized=True
+        self.logger.info(f"data is updated from store # end: {end}, count: {count}")
+
+    def seek(self, date_time):
+        """
+        date_time(한국 시간) 이후(포함)의 첫 번째 캔들부터 다시 제공
+        앞, 뒤 어느 방향으로도 이동할 수 있고, 나눠서 가져오는 경우 이동한 시간부터 다시 가져온다
+        Returns: 나눠서 가져오지 않는 경우 이동한 캔들 위치, 나눠서 가져오는 경우 None
+        """
+        if self.is_initialized is not True:
+            raise UserWarning("data provider is NOT initialized")
+        return self.__seek_timestamp(DataConverter.kst_to_utc(DataConverter.to_epoch_min(date_time)))
+
+    def get_state(self):
+        """
+        제공 위치 상태, snapshot에 사용한다
+        next: 다음에 제공할 캔들 시간 이후(포함) 시간(UTC 기준 경과 분), 아직 제공하지 않았으면 None
+        """
+        if self.is_initialized is not True:
+            raise UserWarning("data provider is NOT initialized")
+        return {
+            "bounds": self.__bounds,
+            "unit": self.unit,
+            "fill_gaps": self.fill_gaps,
+            "index": self.index,
+            "next": None if self.__last_timestamp is None else self.__last_timestamp + self.unit,
+        }
+
+    def set_state(self, state):
+        """get_state 결과의 위치부터 다시 제공, 같은 기간으로 초기화돼 있지 않으면 UserWarning"""
+        if self.is_initialized is not True:
+            raise UserWarning("data provider is NOT initialized")
+        if tuple(state["bounds"]) != tuple(self.__bounds) or state["unit"] != self.unit:
+            raise UserWarning(f"data mismatch {state['bounds']} != {self.__bounds}")
+        if state["fill_gaps"] != self.fill_gaps:
+            raise UserWarning("fill_gaps mismatch")
+        timestamp=state["next"]
+        self.__seek_timestamp(self.__bounds[0] if timestamp is None else timestamp)
+        self.__last_timestamp=None if timestamp is None else timestamp - self.unit
+        self.index=state["index"]
+
+    def __seek_timestamp(self, timestamp):
+        self.__close_batches()
+        self.__batch=None
+        self.__batch_index=0
+
+        if self.__range is not None:
+            start, stop=self.__bounds
+            self.__range=(min(max(start, CandleResampler.ceil(timestamp, self.unit)), stop), stop)
+            return None
 
-        if end is not None :
-            query_string['to']=end
+        if self.__time_index is None:
+            self.__time_index=TimeIndex(self.data.columns["timestamp"], self.unit)
+        row=self.__time_index.seek_row(timestamp)
+        # 현재 데이터의 row 위치부터 제공하도록 묶음을 설정
+        self.__batches=(batch for batch in ())
+        self.__batch=self.data
+        self.__batch_index=row
+        self.index=row
+        return row
 
-        query_string['count']=count
+    def gap_report(self, top=10):
+        """나눠서 가져오지 않는 경우 현재 데이터의 TimeIndex.gap_report 결과"""
+        if self.__range is not None:
+            raise UserWarning("gap report is not supported for streamed data")
+        return TimeIndex(self.data.columns["timestamp"], self.unit).gap_report(top)
 
+    def __close_batches(self):
+        """사용 중인 묶음 iterator를 닫아서 background thread를 멈춘다"""
+        if self.__batches is not None:
+            self.__batches.close()
+        self.__batches=None
+
+    def iter_batches(self):
+        """
+        거래 정보 묶음(CandleSeries)을 순서대로 제공
+        batch_size 없이 초기화했으면 전체 데이터를 한 묶음으로 제공한다
+        """
+        if self.__range is None:
+            if len(self.data) > 0:
+                yield self.data
+            return
+
+        start, stop = self.__range
+        loaded=queue.Queue(maxsize=self.prefetch)
+        stop_event=threading.Event()
+        loader=threading.Thread(
+            target=self.__load_batches, args=(start, stop, loaded, stop_event), daemon=True
+        )
+        loader.start()
         try:
-            headers = {"accept": "application/json"}
-            res=requests.get(self.URL, params=query_string, headers=headers)
-            res.raise_for_status()
-            # 리스트 안 json 형태로 데이터 반환
-            self.data=res.json()
-            # 최신순부터 데이터를 가져와서 역순으로 정렬하여 과거데이터가 제일 먼저 오도록
-            self.data.reverse()
-            self.is_initialized=True
-            self.logger.info(f"data is updated from server # end: {end}, count: {count}")
+            while True:
+                batch=loaded.get()
+                if batch is None:
+                    return
+                if isinstance(batch, Exception):
+                    raise batch
+                yield batch
+        finally:
+            stop_event.set()
+            # 저장소에 같이 쓰지 않도록 진행 중인 묶음을 마칠 때까지 기다린다
+            loader.join()
+
+    def __load_batches(self, start, stop, loaded, stop_event):
+        """background thread에서 batch_size 개 캔들 단위로 데이터를 가져와서 queue에 넣는다"""
+        step=self.batch_size * self.unit
+        last_close=None
+        try:
+            for batch_start in range(start, stop, step):
+                batch_stop=min(batch_start + step, stop)
+                batch=self.__load_range(batch_start, batch_stop, last_close)
+                if len(batch) > 0:
+                    last_close=float(batch.columns["close"][-1])
+                if not self.__put(loaded, batch, stop_event):
+                    return
+        # 어떤 에러든 전달하지 않으면 소비하는 쪽이 queue에서 영원히 기다린다
+        except Exception as error:  # pylint: disable=broad-except
+            self.__put(loaded, error, stop_event)
+            return
+        self.__put(loaded, None, stop_event)
+
+    @staticmethod
+    def __put(loaded, item, stop_event):
+        """소비하는 쪽이 중단되면 더 이상 넣지 않는다"""
+        while not stop_event.is_set():
+            try:
+                loaded.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def __load_range(self, start, stop, last_close=None):
+        """[start, stop) 구간의 캔들, fill_gaps면 거래가 없었던 시간을 채운다"""
+        series=self.__load(DataConverter.from_epoch_min(stop), (stop - start) // self.unit)
+        if self.fill_gaps:
+            series=CandleSeries(series.market, TimeIndex.fill(series.columns, start, stop, self.unit, last_close))
+        return series
+
+    def __load(self, end, count):
+        try:
+            return self.store.get_candles(self.QUERY_STRING["market"], end, count, self.unit)
         # 전달 받은 데이터가 json 형식이 아닐때 에러 발생
         except ValueError as error:
             self.logger.error("Invalid data from server")
@@ -63,8 +242,10 @@ class SimulationDataProvider(DataProvider):
             self.logger.error(error)
             raise UserWarning("Fail get data from server") from error
 
+    @Instrumentation.timed("SimulationDataProvider.get_info")
     def get_info(self):
         """순차적으로 거래 정보 전달한다
+        iter_batches가 제공하는 묶음에서 하나씩 꺼내서 전달
         Returns: 거래 정보 딕셔너리
         {
             "market": 거래 시장 종류 BTC
@@ -77,18 +258,32 @@ class SimulationDataProvider(DataProvider):
             "acc_volume": 단위 시간내 누적 거래 양
         }
         """
-
-        # 현재 순번
-        now=self.index
-        # 데이터의 개수가 현재 순번과 비교해서 작거나 같으면, 새로운 데이터를 가져오지 않았다는 의미
-        if now >= len(self.data):
+        if self.is_initialized is not True:
             return None
 
+        if self.__batches is None:
+            self.__batches=self.iter_batches()
+
+        # 현재 묶음을 다 사용했으면 다음 묶음을 가져온다
+        while self.__batch is None or self.__batch_index >= len(self.__batch):
+            self.__batch=next(self.__batches, None)
+            self.__batch_index=0
+            # 더 이상 가져올 묶음이 없으면 새로운 데이터가 없다는 의미
+            if self.__batch is None:
+                return None
+            # 나눠서 가져오는 경우 data는 현재 묶음
+            if self.__range is not None:
+                self.data=self.__batch
+
         # 새로운 데이터 가져오기 전에 index 갱신
         # get_info 메서드가 호출될 때마다 다음 데이터를 전달
-        self.index=now+1
-        self.logger.info(f'[DATA] @ {self.data[now]["candle_date_time_kst"]}')
-        return self.__create_candle_info(self.data[now])
+        candle=self.__batch[self.__batch_index]
+        self.__last_timestamp=candle.timestamp
+        self.__batch_index+=1
+        self.index+=1
+        if self.logger.isEnabledFor(logging.INFO):
+            self.logger.info("[DATA] @ %s", candle["candle_date_time_kst"])
+        return self.__create_candle_info(candle)
 
     # class의 메서드 명 앞에 __(언더바 2개)로 시작하면 privat 메서드를 의미
     def __create_candle_info(self, data):
@@ -97,7 +292,11 @@ class SimulationDataProvider(DataProvider):
         데이터의 형식을 바꾸는 이유는 다른 거래소에서 데이터 가져올 때
         각 변수명이 거래소마다 달라서 통일하기 위한 용도 (이후 확장성 고려)
         이해하기 쉬운 변수명으로 변경하고, 불필요한 데이터 제거, 필요한 데이터만 전달
+        Candle은 이미 요구사항에 맞는 키로 조회할 수 있으므로 새 딕셔너리를 만들지 않고 그대로 전달
         """
+        if isinstance(data, Candle):
+            return data
+
         try:
             return {
                 "market":data["market"],
@@ -115,6 +314,7 @@ class SimulationDataProvider(DataProvider):
 
 
 if __name__=='__main__':
+    # python -m smtm.simulation_data_provider
     dp=SimulationDataProvider()
     # end_date='2020-04-30T16:30:00'
     end_date='2022-11-18T04:06:00'
@@ -16,10 +16,9 @@ Trader 모듈의 요구사항
 2. 실제 환경을 제대로 반영하기 어려움 (과거 데이터 기반으로 현재 action을 취하는 가상 거래가 앞으로 나올 데이터에 영향을 미치지 않는다.)
    즉, 모두 과거 기반의 데이터이기 때문에 데이터가 정해져 있다.
 """
-import os, sys
-sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from .log_manager import LogManager
 from smtm_abs.trader import Trader
+from .log_manager import LogManager
+from .order_manager import OrderManager
 from .virtual_market import VirtualMarket
 
 class SimulationTrader(Trader):
@@ -30,15 +29,111 @@ class SimulationTrader(Trader):
     type: 거래 유형 sell, buy, cancel
     price: 거래 가격
     amount: 거래 수량
+    store: 가상 거래소가 사용할 캔들 저장소
+    order_manager: 보낸 주문의 상태를 관리하는 OrderManager, 취소할 주문을 찾는 데 사용한다
     """
 
-    def __init__(self):
+    def __init__(self, store=None):
         self.logger = LogManager.get_logger(__class__.__name__)
-        self.market = VirtualMarket()
+        self.market = VirtualMarket(store)
+        self.order_manager = OrderManager()
         self.is_initialized = False
         self.name = "Simulation"
 
     def initialize_simulation(self, end: str, count: int, budget: int):
         """가상 거래소의 기간, 횟수, 예산을 초기화 한다"""
         self.market.initialize(end, count, budget)
-        self.is_initialized = True
\ No newline at end of file
+        self.is_initialized = True
+
+    def send_request(self, request_list, callback):
+        """
+        거래 요청 기능
+        가상 거래소에서 요청을 바로 처리하고 체결 결과를 callback으로 전달한다
+        가상 거래소는 요청을 다음 턴에 바로 체결하거나 버리기 때문에 취소 요청은 처리하지 않는다
+        주문장을 사용하는 가상 거래소면 취소 요청도 처리하고, 주문장에 남아 있던 주문의 체결 결과를 먼저 전달한다
+        체결할 수 없는 요청은 state가 rejected인 결과를 전달한다
+        """
+        if self.is_initialized is not True:
+            self.logger.error("virtual market is NOT initialized")
+            raise UserWarning("virtual market is NOT initialized")
+
+        for request in request_list:
+            if request["type"] == "cancel":
+                self.__cancel(request, callback)
+                continue
+            # 가격이나 수량이 0인 요청은 턴만 넘기므로 주문으로 관리하지 않는다
+            if request["price"] != 0 and request["amount"] != 0:
+                try:
+                    self.order_manager.add(request)
+                except UserWarning as msg:
+                    self.logger.warning(msg)
+                    callback(self.__make_rejected_result(request, "duplicated id"))
+                    continue
+            self.__deliver(self.market.handle_request(request), callback)
+
+    def cancel_request(self, request_id):
+        """
+        주문장에 남아 있는 주문 취소, 주문장을 사용하지 않으면 취소할 것이 없다
+        취소 결과는 주문 상태에만 반영하고 callback으로 전달하지 않는다
+        """
+        self.__cancel({"id": request_id, "type": "cancel", "price": 0, "amount": 0}, None)
+
+    def cancel_all_requests(self):
+        """주문장에 남아 있는 모든 주문 취소"""
+        for request_id in self.order_manager.open_ids():
+            self.cancel_request(request_id)
+
+    def __cancel(self, request, callback):
+        """열린 주문만 가상 거래소에 취소 요청을 보낸다"""
+        if self.market.books is None or not self.order_manager.is_open(request["id"]):
+            self.logger.debug(f"nothing to cancel {request['id']}")
+            return
+        result = self.market.handle_request(request)
+        if callback is None:
+            self.order_manager.apply_result(result)
+            return
+        self.__deliver(result, callback)
+
+    def __deliver(self, result, callback):
+        """주문장에서 체결된 결과와 요청 결과를 주문 상태에 반영하고 callback으로 전달"""
+        for fill_result in self.market.pop_fill_results():
+            self.order_manager.apply_result(fill_result)
+            callback(fill_result)
+        # 턴만 넘긴 요청은 결과가 없다
+        if result is None:
+            return
+        self.order_manager.apply_result(result)
+        callback(result)
+
+    @staticmethod
+    def __make_rejected_result(request, msg):
+        return {
+            "request": request,
+            "type": request["type"],
+            "price": request["price"],
+            "amount": 0,
+            "msg": msg,
+            "balance": None,
+            "state": "rejected",
+            "date_time": request.get("date_time"),
+        }
+
+    def get_state(self):
+        """가상 거래소의 거래 진행 상태, snapshot에 사용한다"""
+        if self.is_initialized is not True:
+            raise UserWarning("virtual market is NOT initialized")
+        return {"market": self.market.get_state(), "orders": self.order_manager.get_state()}
+
+    def set_state(self, state):
+        """get_state 결과로 가상 거래소 상태를 복원, 같은 기간으로 초기화돼 있어야 한다"""
+        if self.is_initialized is not True:
+            raise UserWarning("virtual market is NOT initialized")
+        self.market.set_state(state["market"])
+        self.order_manager = OrderManager.from_state(state["orders"])
+
+    def get_account_info(self):
+        """가상 거래소의 계좌 정보를 반환"""
+        if self.is_initialized is not True:
+            self.logger.error("virtual market is NOT initialized")
+            raise UserWarning("virtual market is NOT initialized")
+        return self.market.get_balance()
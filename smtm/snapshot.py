@@ -0,0 +1,163 @@
+"""
+시뮬레이션 상태 snapshot
+
+긴 시뮬레이션은 중간에 멈추거나 프로세스가 종료되면 잔고, 보유 자산, 턴, 대기 중인 요청, 거래 기록을 모두 잃는다.
+snapshot은 get_state, set_state를 제공하는 구성 요소(Operator, DataProvider, Strategy, Trader, VirtualMarket)의
+상태를 한 번에 모아서 pickle로 직렬화하고 zlib으로 압축한 바이트 데이터다.
+
+- 캔들 데이터는 저장하지 않는다. 복원할 구성 요소는 snapshot을 만들 때와 같은 설정으로 초기화돼 있어야 하고,
+  VirtualMarket, SimulationDataProvider는 초기화된 기간이 다르면 UserWarning을 발생시킨다.
+- get_state는 내부 객체를 복사하지 않고 반환하므로 dumps로 바로 직렬화해서 사용한다.
+- 같은 snapshot을 새로 만든 구성 요소 여러 벌에 복원하면(fork) 앞 구간을 다시 실행하지 않고
+  서로 독립된 what-if 시뮬레이션을 진행할 수 있다.
+
+SnapshotStore는 snapshot을 디렉토리에 턴 번호로 저장하고, 가장 최근 snapshot으로 이어서 진행할 수 있게 한다.
+"""
+import os
+import pickle
+import tempfile
+import zlib
+
+
+class Snapshot:
+    """
+    구성 요소 상태의 직렬화, 복원
+
+    components: {이름: get_state, set_state를 제공하는 구성 요소} 딕셔너리
+    VERSION: snapshot 형식 버전, 다른 버전의 snapshot은 복원하지 않는다
+    COMPRESS_LEVEL: zlib 압축 수준, 자주 저장하므로 빠른 수준을 사용한다
+    """
+
+    MAGIC = b"SMTMSNAP"
+    VERSION = 1
+    COMPRESS_LEVEL = 1
+
+    @classmethod
+    def dumps(cls, components, turn=0):
+        """구성 요소의 상태를 압축한 바이트 데이터로 반환"""
+        states = {}
+        for name, component in components.items():
+            states[name] = cls.__get_state(name, component)
+        payload = pickle.dumps(
+            {"version": cls.VERSION, "turn": turn, "states": states}, protocol=pickle.HIGHEST_PROTOCOL
+        )
+        return cls.MAGIC + zlib.compress(payload, cls.COMPRESS_LEVEL)
+
+    @classmethod
+    def loads(cls, data):
+        """
+        snapshot 바이트 데이터를 푼다
+        Returns: {"version": 형식 버전, "turn": 턴, "states": {이름: 상태}}
+        """
+        if not data.startswith(cls.MAGIC):
+            raise UserWarning("invalid snapshot data")
+        try:
+            snapshot = pickle.loads(zlib.decompress(data[len(cls.MAGIC) :]))
+        except (zlib.error, pickle.UnpicklingError, EOFError) as error:
+            raise UserWarning("broken snapshot data") from error
+        if snapshot.get("version") != cls.VERSION:
+            raise UserWarning(f"not supported snapshot version {snapshot.get('version')}")
+        return snapshot
+
+    @classmethod
+    def restore(cls, data, components):
+        """
+        snapshot을 구성 요소에 복원하고 snapshot의 턴을 반환
+        components의 모든 이름이 snapshot에 있어야 한다
+        """
+        snapshot = cls.loads(data)
+        states = snapshot["states"]
+        for name in components:
+            if name not in states:
+                raise UserWarning(f"snapshot has no state of {name}")
+        for name, component in components.items():
+            component.set_state(states[name])
+        return snapshot["turn"]
+
+    @classmethod
+    def fork(cls, data, build, count=1):
+        """
+        같은 snapshot을 복원한 구성 요소 묶음을 count개 만든다
+        build: 새로 초기화한 구성 요소 딕셔너리를 반환하는 함수, 묶음마다 한 번씩 호출한다
+        Returns: 복원된 구성 요소 딕셔너리 리스트
+        """
+        branches = []
+        for _ in range(count):
+            components = build()
+            cls.restore(data, components)
+            branches.append(components)
+        return branches
+
+    @staticmethod
+    def __get_state(name, component):
+        get_state = getattr(component, "get_state", None)
+        if get_state is None:
+            raise UserWarning(f"{name} does not support snapshot")
+        return get_state()
+
+
+class SnapshotStore:
+    """
+    snapshot 파일 저장소
+
+    root: snapshot 파일을 저장할 디렉토리, 파일 이름은 snapshot-{턴}.bin
+    keep: 보관할 최근 snapshot 개수, None이면 모두 보관
+    """
+
+    PREFIX = "snapshot-"
+    SUFFIX = ".bin"
+
+    def __init__(self, root, keep=3):
+        self.root = root
+        self.keep = keep
+        os.makedirs(root, exist_ok=True)
+
+    def save(self, turn, data):
+        """
+        turn 턴의 snapshot 저장, 같은 디렉토리의 임시 파일에 쓴 후 이름을 바꾸므로
+        저장 중에 프로세스가 종료돼도 이전 snapshot은 그대로 남는다
+        """
+        path = self.path(turn)
+        descriptor, tmp_path = tempfile.mkstemp(dir=self.root, suffix=".tmp")
+        try:
+            with os.fdopen(descriptor, "wb") as file:
+                file.write(data)
+            os.replace(tmp_path, path)
+        except OSError:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        self.__prune()
+        return path
+
+    def load(self, turn):
+        """turn 턴의 snapshot 바이트 데이터"""
+        try:
+            with open(self.path(turn), "rb") as file:
+                return file.read()
+        except FileNotFoundError as error:
+            raise UserWarning(f"snapshot not found {turn}") from error
+
+    def latest(self):
+        """가장 최근 snapshot의 (턴, 바이트 데이터), 없으면 None"""
+        turns = self.turns()
+        if len(turns) == 0:
+            return None
+        return turns[-1], self.load(turns[-1])
+
+    def turns(self):
+        """저장된 snapshot의 턴 리스트, 오름차순"""
+        turns = []
+        for name in os.listdir(self.root):
+            if name.startswith(self.PREFIX) and name.endswith(self.SUFFIX):
+                turns.append(int(name[len(self.PREFIX) : -len(self.SUFFIX)]))
+        return sorted(turns)
+
+    def path(self, turn):
+        return os.path.join(self.root, f"{self.PREFIX}{turn:010d}{self.SUFFIX}")
+
+    def __prune(self):
+        if self.keep is None:
+            return
+        for turn in self.turns()[: -self.keep]:
+            os.remove(self.path(turn))
@@ -1,11 +1,60 @@
 """데이터 기반으로 매매 결정을 생성하는 Strategy 추상클래스"""
 from abc import ABCMeta, abstractmethod
+from .trading_history import CandleHistory, ResultHistory
 
 class Strategy(metaclass=ABCMeta):
     """
     데이터 받아서 매매 판단하고 결과를 받아 다음 판단에 반영하는 전략 클래스
+
+    HISTORY_CAPACITY: 보관할 최근 거래 정보 개수
+    RESULT_CAPACITY: 보관할 최근 거래 결과 개수
+    indicators: subscribe_indicator로 등록한 지표, 거래 정보마다 update_indicators로 갱신한다
+    STATE_KEYS: get_state로 저장하고 set_state로 복원할 속성 이름
     """
 
+    HISTORY_CAPACITY = 1000
+    RESULT_CAPACITY = 1000
+    STATE_KEYS = ("indicators",)
+
+    def create_history(self, capacity=None):
+        """최근 거래 정보를 정해진 개수만큼 보관하는 ring buffer 생성"""
+        return CandleHistory(capacity if capacity is not None else self.HISTORY_CAPACITY)
+
+    def create_result_history(self, capacity=None, spill_path=None):
+        """최근 거래 결과를 정해진 개수만큼 보관하고 전체 결과는 요약하는 기록 생성"""
+        return ResultHistory(
+            capacity if capacity is not None else self.RESULT_CAPACITY, spill_path
+        )
+
+    def subscribe_indicator(self, name, indicator):
+        """
+        거래 정보마다 갱신할 지표 등록, 등록한 지표는 indicators[name]으로 사용한다
+        indicator: smtm.indicator의 지표 인스턴스
+        """
+        indicators = getattr(self, "indicators", None)
+        if indicators is None:
+            indicators = self.indicators = {}
+        indicators[name] = indicator
+        return indicator
+
+    def update_indicators(self, info):
+        """등록된 지표를 새로운 거래 정보로 갱신, update_trading_info에서 호출한다"""
+        for indicator in getattr(self, "indicators", {}).values():
+            indicator.update(info)
+
+    def get_state(self):
+        """
+        STATE_KEYS 속성의 상태, snapshot에 사용한다
+        복사하지 않은 속성 객체를 반환하므로 바로 직렬화해서 사용한다
+        """
+        return {key: getattr(self, key) for key in self.STATE_KEYS if hasattr(self, key)}
+
+    def set_state(self, state):
+        """get_state 결과로 STATE_KEYS 속성을 복원"""
+        for key in self.STATE_KEYS:
+            if key in state:
+                setattr(self, key, state[key])
+
     @abstractmethod
     def initialize(self, budget, min_price=100):
         """예산을 설정하고 초기화"""
@@ -1,39 +1,58 @@
-import os, sys
-import copy
 import math
-import time
+import logging
 from datetime import datetime
-sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-from smtm import Strategy, LogManager, SimulationDataProvider
+from .strategy import Strategy
+from .log_manager import LogManager
+from .instrumentation import Instrumentation
+from .order_manager import OrderIdGenerator
 
 class StrategyBuyAndHold(Strategy):
     """
     분할 매수 후 홀딩하는 가벼운 전략
 
     isInitialized: 최초 잔고는 초기화 할 때만 갱신 된다
-    data: 거래 데이터 리스트, OHLCV 데이터
-    result: 거래 요청 결과 리스트
+    data: 최근 거래 데이터 기록, OHLCV 데이터 (HISTORY_CAPACITY 개까지 보관)
+    result: 최근 거래 요청 결과 기록 (RESULT_CAPACITY 개까지 보관, 전체 결과는 result.summary에 요약)
     request: 마지막 거래 요청
     budget: 시작 잔고
     balance: 현재 잔고
     min_price: 최소 주문 금액
+    SPLIT_COUNT: 분할 매수 횟수, 한 번에 예산의 1/SPLIT_COUNT 만큼 매수
+    id_generator: 거래 요청 id 생성기, 같은 시간에 여러 요청을 만들어도 id가 겹치지 않는다
+    is_empty_turn: 마지막으로 받은 거래 정보가 비어 있으면 True
     """
 
     ISO_DATEFORMAT = "%Y-%m-%dT%H:%M:%S"
     COMMISSION_RATIO = 0.0005
+    SPLIT_COUNT = 5
+    STATE_KEYS = (
+        "is_initialized",
+        "is_simulation",
+        "budget",
+        "balance",
+        "min_price",
+        "waiting_requests",
+        "data",
+        "result",
+        "request",
+        "indicators",
+        "is_empty_turn",
+    )
 
     def __init__(self):
         self.is_initialized = False
         self.is_simulation = False
-        self.data = []
+        self.data = self.create_history()
         self.budget = 0
         self.balance = 0.0
         self.min_price = 0
-        self.result = []
+        self.result = self.create_result_history()
         self.request = None
         self.logger = LogManager.get_logger(__class__.__name__)
         self.name = "BnH"
         self.waiting_requests = {}
+        self.id_generator = OrderIdGenerator()
+        self.is_empty_turn = False
 
     def initialize(self, budget, min_price=5000):
         """
@@ -70,8 +89,16 @@ class StrategyBuyAndHold(Strategy):
         if self.is_initialized is not True:
             return
         
-        # info == 최종 거래 요청 정보
-        self.data.append(copy.deepcopy(info))
+        # 비어 있는 거래 정보는 ring buffer에 넣을 수 없으므로 빈 턴으로 기록하고,
+        # get_request에서 건너뛰는 요청을 만든다
+        self.is_empty_turn = info is None
+        if self.is_empty_turn:
+            return
+
+        # info == 최종 거래 요청 정보, ring buffer에 값만 복사해서 저장
+        self.data.append(info)
+        # 등록된 지표 갱신
+        self.update_indicators(info)
 
     def update_result(self, result):
         """
@@ -83,8 +110,8 @@ class StrategyBuyAndHold(Strategy):
             "type": 거래 유형 sell, buy, cancel
             "price": 거래 가격
             "amount": 거래 수량
-            "msg": 거래 결과 메세지
-            "state": 거래 상태 requested, done
+            "msg": 거래 결과 메세지, rejected면 거부 이유
+            "state": 거래 상태 requested, done, rejected
             "date_time": 시뮬레이션 모드에서는 데이터 시간 +2초
         }
         """
@@ -99,6 +126,12 @@ class StrategyBuyAndHold(Strategy):
                 self.waiting_requests[request['id']]=result
                 return
 
+            # 거부된 요청은 체결되지 않았으므로 잔고를 바꾸지 않고 기다리는 요청에서만 지운다
+            if result['state']=="rejected":
+                self.waiting_requests.pop(request['id'], None)
+                self.logger.debug("rejected %s %s", request['id'], result['msg'])
+                return
+
             # 거래가 이미 완료 됐고, waiting requests에 id값이 이미 있을 때
             # self.waiting_requests 에서 요청값의 id로 저장된 값을 지운다
             # 즉, 요청된 거래가 실제 이뤄졌다는 의미이다
@@ -107,7 +140,7 @@ class StrategyBuyAndHold(Strategy):
                 del self.waiting_requests[request["id"]]
 
             # 거래 금액과 수수료를 계산해서 현금 잔고(balance)를 업데이트하고,
-            # 로그를 출력한 후 result 변수를 복사해서 저장해 놓는다.
+            # 로그를 출력한 후 result 변수를 복사해서 저장해 놓는다. (최근 결과만 보관하고 전체는 요약)
             total=float(result['price']) * float(result['amount'])
             fee=total * self.COMMISSION_RATIO
             if result['type']=='buy':
@@ -115,16 +148,19 @@ class StrategyBuyAndHold(Strategy):
             else:
                 self.balance+=round(total-fee)
 
-            self.logger.info(f"[RESULT] id: {result['request']['id']} ================")
-            self.logger.info(f"type: {result['type']}, msg: {result['msg']}")
-            self.logger.info(f"price: {result['price']}, amount: {result['amount']}")
-            self.logger.info(f"total: {total}, balance: {self.balance}")
-            self.logger.info("================================================")
-            self.result.append(copy.deepcopy(result))
+            # 결과마다 호출되므로 info 레벨이 꺼져 있으면 메세지를 만들지 않는다
+            if self.logger.isEnabledFor(logging.INFO):
+                self.logger.info("[RESULT] id: %s ================", request["id"])
+                self.logger.info("type: %s, msg: %s", result["type"], result["msg"])
+                self.logger.info("price: %s, amount: %s", result["price"], result["amount"])
+                self.logger.info("total: %s, balance: %s", total, self.balance)
+                self.logger.info("================================================")
+            self.result.append(result)
 
         except (AttributeError, TypeError) as msg:
             self.logger.error(msg)
 
+    @Instrumentation.timed("StrategyBuyAndHold.get_request")
     def get_request(self):
         """
         데이터 분석 결과에 따라 거래 요청 정보를 생성한다
@@ -142,22 +178,22 @@ class StrategyBuyAndHold(Strategy):
         if self.is_initialized is not True:
             return None
 
+        # 거래 요청 정보의 시간
+        # 기본으로 현재의 시간을 입력하되
+        # 시뮬레이션 상황이면, 기준 데이터의 시간을 사용
+        now=datetime.now().strftime(self.ISO_DATEFORMAT)
         try:
-            # 데이터가 없을 경우
-            if len(self.data)==0 or self.data[-1] is None:
+            if self.is_simulation and len(self.data) > 0:
+                now=self.data[-1]['date_time']
+
+            # 데이터가 없거나 마지막 턴의 거래 정보가 비어 있을 경우
+            if len(self.data)==0 or self.is_empty_turn:
                 raise UserWarning("data is empty")
 
             # 마지막 데이터의 종가
             last_closing_price=self.data[-1]['closing_price']
-
-            # 거래 요청 정보의 시간
-            # 기본으로 현재의 시간을 입력하되
-            # 시뮬레이션 상황이면, 기준 데이터의 시간을 사용
-            now=datetime.now().strftime(self.ISO_DATEFORMAT)
-            if self.is_simulation:
-                now=self.data[-1]['date_time']
             
-            target_budget=self.budget/5
+            target_budget=self.budget/self.SPLIT_COUNT
             # 매수 금액이 현재 잔고보다 높을 경우
             # 처음 설정한 매수금액을 현재 잔고 금액으로 변경한다.
             if target_budget>self.balance:
@@ -166,7 +202,7 @@ class StrategyBuyAndHold(Strategy):
             # 거래 수량
             amount=math.floor((target_budget/last_closing_price)*10000)/10000
             trading_request={
-                "id":str(round(time.time(),3)),
+                "id":self.id_generator.next_id(),
                 "type":"buy",
                 "price":last_closing_price,
                 "amount":amount,
@@ -179,10 +215,11 @@ class StrategyBuyAndHold(Strategy):
             if (self.min_price > total_value) or (total_value > self.balance):
                 raise UserWarning("매수할 거래대금(total_value)이 최소 주문 금액(min_price)보다 작거나 현재 잔고(balance)보다 큽니다.")
 
-            self.logger.info(f"[REQ] id: {trading_request['id']} =================")
-            self.logger.info(f"price: {last_closing_price}, amount: {amount}")
-            self.logger.info(f"type: buy, total_value: {total_value}")
-            self.logger.info("=======================================")
+            if self.logger.isEnabledFor(logging.INFO):
+                self.logger.info("[REQ] id: %s =================", trading_request["id"])
+                self.logger.info("price: %s, amount: %s", last_closing_price, amount)
+                self.logger.info("type: buy, total_value: %s", total_value)
+                self.logger.info("=======================================")
 
             final_requests=[]
             # 만약 waiting_requests에 체결되지 않고 대기 중이 거래 요청이 있다면
@@ -190,7 +227,7 @@ class StrategyBuyAndHold(Strategy):
             # 이는 이전 거래에 대해 먼저 취소 요청 정보를 생성하고 신규 거래 요청 정보를 추가하기 위함
             for request_id in self.waiting_requests:
                 # 거래 요청 정보는 중요하기 때문에 log 등록!
-                self.logger.info(f"cancel request added! {request_id}")
+                self.logger.info("cancel request added! %s", request_id)
                 final_requests.append(
                     {
                         "id":request_id,
@@ -213,7 +250,7 @@ class StrategyBuyAndHold(Strategy):
             self.logger.info(msg)
             if self.is_simulation:
                 return [{
-                    "id":str(round(time.time(),3)),
+                    "id":self.id_generator.next_id(),
                     "type":"buy",
                     "price":0,
                     "amount":0,
@@ -222,6 +259,9 @@ class StrategyBuyAndHold(Strategy):
             return None
 
 if __name__=='__main__':
+    # python -m smtm.strategy_bnh
+    from .simulation_data_provider import SimulationDataProvider
+
     dp=SimulationDataProvider()
     sbh=StrategyBuyAndHold()
 
@@ -0,0 +1,284 @@
+"""
+seed로 정해지는 가상 분봉 데이터 생성기
+
+성능 측정, 부하 테스트, 전략 stress test를 업비트 접속 없이 같은 데이터로 반복하기 위한 모듈
+origin 시간부터 매 분 캔들을 만들고, 같은 seed면 어느 구간을 어떤 순서로 요청해도 같은 캔들을 만든다.
+
+1. origin부터 BLOCK_SIZE 분 단위 묶음으로 나누고, 묶음마다 np.random.default_rng([seed, 묶음 번호])로 난수를 만든다.
+2. 묶음 끝의 상태(로그 가격, 로그 변동성, 국면)만 순서대로 계산해서 보관한다.
+- 구간 요청은 필요한 묶음만 만들어서 자르므로 앞 구간 캔들을 모두 보관하지 않는다.
+3. 모든 계산은 묶음 단위 numpy 배열 연산이다.
+
+가격 모형
+- 기하 브라운 운동(GBM): 분당 로그 수익률 = drift + sigma * N(0, 1)
+- 국면 전환(regimes): 분마다 regime_switch 확률로 다른 국면으로 바뀌고, 국면마다 (drift, 변동성 배율)을 사용한다
+- 변동성 군집(vol_persistence, vol_of_vol): 로그 변동성이 AR(1) 과정을 따르므로 큰 변동 뒤에 큰 변동이 이어진다
+- 급락(crash_prob): 1분 안에 crash_depth 까지 떨어졌다가 crash_recovery 비율만큼 회복하고 거래량이 늘어난다
+- 거래 없는 구간(gap_prob): 업비트처럼 거래가 없는 분의 캔들을 만들지 않는다, 평균 gap_length 분 동안 이어진다
+  가격은 거래가 없는 동안에도 움직이므로 구간 다음 캔들의 시가는 구간 직전 종가와 다르다
+
+시가는 직전 분의 종가, 고가, 저가는 시가와 종가에서 변동성에 비례한 난수만큼 벌어진 가격이다.
+
+사용 방법
+- columns, series, iter_series: 컬럼 배열, CandleSeries, 묶음 단위 CandleSeries iterator
+- get_candles: CandleStore와 같은 조회 함수이므로 SimulationDataProvider, VirtualMarket의 store로 바로 사용한다
+- fetcher로 사용하면 업비트 응답과 같은 형식의 캔들 리스트를 만든다
+"""
+import math
+import numpy as np
+from .candle import CandleSeries
+from .candle_resampler import CandleResampler
+from .date_converter import DataConverter
+
+
+class SyntheticMarket:
+    """
+    가상 분봉 생성기
+
+    market: 만든 캔들의 기본 마켓 이름, fetcher나 get_candles로 사용하면 요청한 마켓 이름을 사용한다
+    seed: 난수 seed
+    origin: 첫 번째 캔들 시간(UTC), 이전 시간의 캔들은 없다
+    price: origin 시간의 시가
+    volatility: 분당 로그 수익률의 표준편차
+    volume: 분당 평균 거래량
+    drift: 분당 로그 수익률의 평균
+    regimes: 국면별 (drift, 변동성 배율) 리스트, 첫 번째 국면에서 시작한다, None이면 drift, 1 하나
+    regime_switch: 분마다 다른 국면으로 바뀔 확률
+    vol_persistence: 로그 변동성 AR(1) 계수(0 ~ 1)
+    vol_of_vol: 로그 변동성 AR(1)의 분당 충격 표준편차, 0이면 변동성 군집을 사용하지 않는다
+    crash_prob: 분마다 급락이 일어날 확률
+    crash_depth: 급락 최대 하락 비율, 급락마다 절반 ~ 전체 사이에서 정한다
+    crash_recovery: 급락 분 안에 회복하는 비율
+    gap_prob: 분마다 거래 없는 구간이 시작될 확률
+    gap_length: 거래 없는 구간의 평균 길이(분), 묶음 끝에서 잘린다
+    """
+
+    BLOCK_SIZE = 4096
+    CRASH_VOLUME_RATIO = 10.0
+    # 변동성 AR(1)을 닫힌 식으로 계산할 때 허용하는 최대 배율 exp(10), 넘지 않도록 구간을 나눈다
+    AR_SCALE_LIMIT = 10.0
+
+    def __init__(
+        self,
+        market="KRW-BTC",
+        seed=0,
+        origin="2020-01-01T00:00:00",
+        price=10000000.0,
+        volatility=0.001,
+        volume=1.0,
+        drift=0.0,
+        regimes=None,
+        regime_switch=0.0,
+        vol_persistence=0.0,
+        vol_of_vol=0.0,
+        crash_prob=0.0,
+        crash_depth=0.1,
+        crash_recovery=0.7,
+        gap_prob=0.0,
+        gap_length=5.0,
+    ):
+        if regimes is not None and len(regimes) == 0:
+            raise UserWarning("regimes is empty")
+        if not 0 <= vol_persistence < 1:
+            raise UserWarning(f"vol_persistence should be in [0, 1) {vol_persistence}")
+        self.market = market
+        self.seed = seed
+        self.origin = DataConverter.to_epoch_min(origin)
+        self.price = price
+        self.volatility = volatility
+        self.volume = volume
+        self.drift = drift
+        self.regimes = [(drift, 1.0)] if regimes is None else [tuple(regime) for regime in regimes]
+        self.regime_switch = regime_switch
+        self.vol_persistence = vol_persistence
+        self.vol_of_vol = vol_of_vol
+        self.crash_prob = crash_prob
+        self.crash_depth = crash_depth
+        self.crash_recovery = crash_recovery
+        self.gap_prob = gap_prob
+        self.gap_length = gap_length
+        # 묶음별 시작 상태 (로그 가격, 로그 변동성, 국면)
+        self.__states = [(math.log(price), 0.0, 0)]
+        self.__cached = None
+
+    def __call__(self, market, to, count):
+        """
+        CandleStore fetcher, to 이전 count 개 캔들을 업비트 응답처럼 최신순 리스트로 반환
+        업비트처럼 거래가 없는 분은 건너뛰고 그 이전 캔들로 count 개를 채운다
+        """
+        stop = DataConverter.to_epoch_min(to)
+        window = count
+        while True:
+            columns = self.columns(stop - window, stop)
+            if len(columns["timestamp"]) >= count or stop - window <= self.origin:
+                break
+            window *= 2
+        columns = {name: column[-count:] for name, column in columns.items()}
+        candles = CandleSeries(market, columns).to_upbit_candles()
+        candles.reverse()
+        return candles
+
+    def get_candles(self, market, end=None, count=100, unit=1):
+        """
+        CandleStore.get_candles와 같은 조회, end(UTC) 이전 count 개 unit 분 캔들의 CandleSeries
+        저장소와 거래소를 거치지 않고 바로 만든다
+        """
+        CandleResampler.check_unit(unit)
+        if end is None:
+            stop = DataConverter.now_epoch_min()
+        else:
+            stop = DataConverter.to_epoch_min(end)
+        stop = CandleResampler.floor(stop, unit)
+        columns = self.columns(stop - count * unit, stop)
+        if unit > 1:
+            columns = CandleResampler.resample(columns, unit)
+        return CandleSeries(market, columns)
+
+    def series(self, start, stop):
+        """[start, stop) 구간(UTC 기준 경과 분)의 CandleSeries"""
+        return CandleSeries(self.market, self.columns(start, stop))
+
+    def iter_series(self, start, stop, batch_size=BLOCK_SIZE * 16):
+        """[start, stop) 구간을 batch_size 분 단위 CandleSeries로 나눠서 순서대로 제공"""
+        for batch_start in range(start, stop, batch_size):
+            yield self.series(batch_start, min(batch_start + batch_size, stop))
+
+    def columns(self, start, stop):
+        """[start, stop) 구간(UTC 기준 경과 분)의 CandleSeries.COLUMNS 컬럼 배열 딕셔너리"""
+        start = max(start, self.origin)
+        if stop <= start:
+            return CandleSeries.empty(self.market).columns
+
+        first = (start - self.origin) // self.BLOCK_SIZE
+        last = (stop - 1 - self.origin) // self.BLOCK_SIZE
+        blocks = [self.__block(index) for index in range(first, last + 1)]
+        if len(blocks) == 1:
+            columns = blocks[0]
+        else:
+            columns = {
+                name: np.concatenate([block[name] for block in blocks]) for name in CandleSeries.COLUMNS
+            }
+        timestamp = columns["timestamp"]
+        begin = np.searchsorted(timestamp, start, side="left")
+        end = np.searchsorted(timestamp, stop, side="left")
+        if len(blocks) == 1:
+            return {name: column[begin:end].copy() for name, column in columns.items()}
+        return {name: column[begin:end] for name, column in columns.items()}
+
+    def write_to(self, store, start, stop, market=None):
+        """[start, stop) 구간 캔들을 CandleStore에 바로 저장해서 fetcher 호출 없이 사용할 수 있게 한다"""
+        store.put_columns(market if market is not None else self.market, self.columns(start, stop), start, stop)
+
+    def __state_of(self, index):
+        """index 번째 묶음의 시작 상태, 이전 묶음을 순서대로 만들어서 끝 상태를 구한다"""
+        states = self.__states
+        while len(states) <= index:
+            _, state = self.__generate(len(states) - 1, states[-1])
+            states.append(state)
+        return states[index]
+
+    def __block(self, index):
+        if self.__cached is not None and self.__cached[0] == index:
+            return self.__cached[1]
+        block, state = self.__generate(index, self.__state_of(index))
+        if len(self.__states) == index + 1:
+            self.__states.append(state)
+        self.__cached = (index, block)
+        return block
+
+    def __generate(self, index, state):
+        """
+        index 번째 묶음의 캔들과 끝 상태
+        기본 모형의 난수를 먼저 사용하고 켜진 기능의 난수는 그 뒤에 사용하므로
+        기능을 꺼 두면 같은 seed의 기본 모형 캔들이 바뀌지 않는다
+        """
+        size = self.BLOCK_SIZE
+        log_price, log_vol, regime = state
+        rng = np.random.default_rng([self.seed, index])
+        shocks = rng.standard_normal(size)
+        spread = np.abs(rng.standard_normal((2, size)))
+        volume = self.volume * np.exp(rng.standard_normal(size) * 0.5 - 0.125)
+
+        drift, ratio = self.regimes[regime]
+        sigma = self.volatility * ratio
+        if len(self.regimes) > 1 and self.regime_switch > 0:
+            regime_path = self.__regime_path(rng, regime, size)
+            regime = int(regime_path[-1])
+            table = np.array(self.regimes, dtype=np.float64)
+            drift = table[regime_path, 0]
+            sigma = self.volatility * table[regime_path, 1]
+
+        if self.vol_of_vol > 0:
+            log_vols = self.__ar1(log_vol, self.vol_persistence, rng.standard_normal(size) * self.vol_of_vol)
+            log_vol = float(log_vols[-1])
+            # 로그 변동성의 정상 분산만큼 빼서 평균 분산이 volatility^2가 되도록 한다
+            variance = self.vol_of_vol**2 / (1 - self.vol_persistence**2)
+            sigma = sigma * np.exp(log_vols - variance)
+
+        returns = shocks * sigma + drift
+        crashes = None
+        if self.crash_prob > 0:
+            crashes = np.flatnonzero(rng.random(size) < self.crash_prob)
+            depth = self.crash_depth * rng.uniform(0.5, 1.0, len(crashes))
+            returns[crashes] += np.log1p(-depth * (1 - self.crash_recovery))
+
+        log_close = log_price + np.cumsum(returns)
+        close = np.exp(log_close)
+        open_ = np.exp(np.concatenate(([log_price], log_close[:-1])))
+        high = np.maximum(open_, close) * (1 + spread[0] * sigma * 0.5)
+        low = np.minimum(open_, close) * (1 - spread[1] * sigma * 0.5)
+        if crashes is not None and len(crashes) > 0:
+            low[crashes] = np.minimum(low[crashes], open_[crashes] * (1 - depth))
+            volume[crashes] *= self.CRASH_VOLUME_RATIO
+
+        block = {
+            "timestamp": self.origin + index * size + np.arange(size, dtype=np.int64),
+            "open": open_,
+            "high": high,
+            "low": low,
+            "close": close,
+            "acc_price": volume * (open_ + close) * 0.5,
+            "acc_volume": volume,
+        }
+        if self.gap_prob > 0:
+            traded = ~self.__gap_mask(rng, size)
+            block = {name: column[traded] for name, column in block.items()}
+        return block, (float(log_close[-1]), log_vol, regime)
+
+    def __regime_path(self, rng, regime, size):
+        """분마다 regime_switch 확률로 현재와 다른 국면으로 바뀌는 국면 번호 배열"""
+        count = len(self.regimes)
+        switches = rng.random(size) < self.regime_switch
+        offsets = rng.integers(1, count, size=int(switches.sum()))
+        # 바뀔 때마다 1 ~ count-1 만큼 이동하므로 항상 다른 국면이 된다
+        path = np.concatenate(([regime], (regime + np.cumsum(offsets)) % count))
+        return path[np.cumsum(switches)]
+
+    def __gap_mask(self, rng, size):
+        """거래 없는 분 mask, 구간 시작 위치와 기하 분포 길이로 만든다"""
+        starts = np.flatnonzero(rng.random(size) < self.gap_prob)
+        lengths = rng.geometric(1 / max(self.gap_length, 1.0), len(starts))
+        edges = np.zeros(size + 1, dtype=np.int64)
+        np.add.at(edges, starts, 1)
+        np.add.at(edges, np.minimum(starts + lengths, size), -1)
+        return np.cumsum(edges[:-1]) > 0
+
+    @classmethod
+    def __ar1(cls, initial, phi, shocks):
+        """
+        x[t] = phi * x[t-1] + shocks[t]를 구간별 닫힌 식으로 계산
+        x[t] = phi^(t+1) * (initial + sum(phi^-(i+1) * shocks[i])), phi^-구간길이가 커지지 않도록 구간을 나눈다
+        """
+        size = len(shocks)
+        if phi == 0:
+            return shocks.copy()
+        step = size if phi >= 1 else max(1, min(size, int(cls.AR_SCALE_LIMIT / -math.log(phi))))
+        result = np.empty(size)
+        powers = phi ** np.arange(1, step + 1, dtype=np.float64)
+        value = initial
+        for begin in range(0, size, step):
+            chunk = shocks[begin : begin + step]
+            scale = powers[: len(chunk)]
+            result[begin : begin + len(chunk)] = scale * (value + np.cumsum(chunk / scale))
+            value = result[begin + len(chunk) - 1]
+        return result
@@ -0,0 +1,141 @@
+"""
+캔들 시간으로 캔들 위치를 바로 찾는 시간 index
+
+업비트는 거래가 없는 분의 캔들을 만들지 않기 때문에 캔들 위치(turn)만으로는 시간을 알 수 없고,
+특정 시간의 캔들을 찾으려면 처음부터 탐색해야 한다.
+첫 번째 캔들부터 마지막 캔들까지 모든 unit 분 시간마다 캔들 위치를 배열로 만들어 두면
+시간 -> 캔들 위치 변환은 배열 조회 한 번으로 끝난다.
+
+rows[offset]: start + offset * unit 시간의 캔들 위치, 캔들이 없으면 -1
+latest[offset]: start + offset * unit 시간 이전(포함)의 마지막 캔들 위치
+
+캔들이 없는 시간(gap)은 gaps, gap_report로 확인하고, fill로 직전 종가의 캔들을 채울 수 있다.
+"""
+import numpy as np
+from .candle import CandleSeries
+
+
+class TimeIndex:
+    """
+    과거 데이터부터 정렬된 캔들 시간 배열의 시간 index
+
+    timestamps: 캔들 시간 배열(UTC 기준 경과 분)
+    unit: 캔들 단위(분)
+    start: 첫 번째 캔들 시간
+    """
+
+    def __init__(self, timestamps, unit=1):
+        self.timestamps = np.asarray(timestamps, dtype=np.int64)
+        self.unit = unit
+        if len(self.timestamps) == 0:
+            self.start = 0
+            self.rows = np.zeros(0, dtype=np.int32)
+            self.latest = np.zeros(0, dtype=np.int32)
+            return
+
+        self.start = int(self.timestamps[0])
+        size = (int(self.timestamps[-1]) - self.start) // unit + 1
+        self.rows = np.full(size, -1, dtype=np.int32)
+        self.rows[(self.timestamps - self.start) // unit] = np.arange(len(self.timestamps), dtype=np.int32)
+        self.latest = np.maximum.accumulate(self.rows)
+
+    def __len__(self):
+        return len(self.timestamps)
+
+    @property
+    def stop(self):
+        """마지막 캔들 다음 시간"""
+        return self.start + len(self.rows) * self.unit
+
+    def row(self, timestamp):
+        """timestamp 시간의 캔들 위치, 캔들이 없으면 -1"""
+        offset, remainder = divmod(timestamp - self.start, self.unit)
+        if remainder != 0 or offset < 0 or offset >= len(self.rows):
+            return -1
+        return int(self.rows[offset])
+
+    def latest_row(self, timestamp):
+        """timestamp 시간 이전(포함)의 마지막 캔들 위치, 첫 번째 캔들 이전이면 -1"""
+        offset = (timestamp - self.start) // self.unit
+        if offset < 0:
+            return -1
+        if offset >= len(self.rows):
+            return len(self.timestamps) - 1
+        return int(self.latest[offset])
+
+    def seek_row(self, timestamp):
+        """timestamp 시간 이후(포함)의 첫 번째 캔들 위치, 마지막 캔들 이후면 캔들 개수"""
+        offset = -((self.start - timestamp) // self.unit)
+        if offset <= 0:
+            return 0
+        if offset > len(self.rows):
+            return len(self.timestamps)
+        return int(self.latest[offset - 1]) + 1
+
+    def gaps(self):
+        """캔들이 없는 [시작, 끝) 시간 구간 리스트"""
+        is_missing = np.concatenate(([False], self.rows < 0, [False]))
+        edges = np.flatnonzero(is_missing[1:] != is_missing[:-1])
+        offsets = edges.reshape(-1, 2)
+        return [
+            (self.start + begin * self.unit, self.start + end * self.unit)
+            for begin, end in offsets.tolist()
+        ]
+
+    def gap_report(self, top=10):
+        """
+        캔들이 없는 시간 요약
+        Returns:
+        {
+            "start", "stop": 첫 번째 캔들 시간, 마지막 캔들 다음 시간
+            "expected": 구간의 전체 시간 개수
+            "actual": 캔들 개수
+            "missing": 캔들이 없는 시간 개수
+            "gap_count": 캔들이 없는 구간 개수
+            "longest": 가장 긴 구간들 [(시작, 끝)], 최대 top 개
+        }
+        """
+        gaps = self.gaps()
+        longest = sorted(gaps, key=lambda gap: gap[0] - gap[1])[:top]
+        return {
+            "start": self.start,
+            "stop": self.stop,
+            "expected": len(self.rows),
+            "actual": len(self.timestamps),
+            "missing": len(self.rows) - len(self.timestamps),
+            "gap_count": len(gaps),
+            "longest": longest,
+        }
+
+    @classmethod
+    def fill(cls, columns, start=None, stop=None, unit=1, last_close=None):
+        """
+        캔들이 없는 시간을 직전 종가의 캔들로 채운 컬럼 배열을 반환
+        채운 캔들은 시가, 고가, 저가, 종가가 직전 종가이고 거래 금액, 거래량은 0
+
+        start, stop: 채울 [start, stop) 구간, 없으면 첫 번째 캔들부터 마지막 캔들까지
+        last_close: start 이전의 마지막 종가, 없으면 첫 번째 캔들 이전 시간은 채우지 않는다
+        """
+        timestamp = np.asarray(columns["timestamp"], dtype=np.int64)
+        if start is None:
+            start = int(timestamp[0]) if len(timestamp) > 0 else 0
+        if stop is None:
+            stop = int(timestamp[-1]) + unit if len(timestamp) > 0 else start
+        axis = np.arange(start, stop, unit, dtype=np.int64)
+        latest = np.searchsorted(timestamp, axis, side="right") - 1
+        if last_close is None:
+            axis = axis[latest >= 0]
+            latest = latest[latest >= 0]
+
+        # 맨 앞에 start 이전 캔들 자리를 붙여서 latest가 -1이면 last_close를 가리키도록 한다
+        position = latest + 1
+        exact = np.concatenate(([-1], timestamp))[position] == axis
+        previous_close = np.concatenate(
+            ([np.nan if last_close is None else last_close], np.asarray(columns["close"], dtype=np.float64))
+        )[position]
+        filled = {"timestamp": axis}
+        for name in CandleSeries.COLUMNS[1:]:
+            value = np.concatenate(([0.0], np.asarray(columns[name], dtype=np.float64)))[position]
+            empty = 0.0 if name in ("acc_price", "acc_volume") else previous_close
+            filled[name] = np.where(exact, value, empty)
+        return filled
@@ -0,0 +1,235 @@
+"""
+거래 요청, 체결 결과, 취소, 잔고 기록을 저장하는 추가 전용(append-only) 바이너리 기록
+
+로그 파일은 용량 제한으로 지워지고 검색하려면 텍스트를 모두 읽어야 한다.
+이 모듈은 거래 흐름을 고정 길이 레코드로 파일에 추가하고, numpy memory-map으로 복사 없이 다시 읽는다.
+
+1. 레코드 형식(DTYPE, 레코드 하나에 88 바이트)
+- timestamp: 1970-01-01T00:00:00(UTC) 기준 경과 분(minute), CandleStore와 같은 기준
+- kind: REQUEST, FILL, CANCEL, BALANCE, ASSET
+- side: 매수 1, 매도 -1, 그 외 0
+- state: REQUESTED, DONE, REJECTED
+- request_id, market: 고정 길이 바이트 문자열
+- price, amount, balance
+2. 기록은 buffer_size 개씩 모아서 파일 끝에 추가하고, 조회하기 전에 남은 기록을 먼저 파일에 쓴다.
+3. 시간 순서대로 추가되므로 시간 구간 조회는 timestamp 컬럼의 이진 탐색으로 처리한다.
+4. 요청 id 조회는 request_id 컬럼을 정렬한 index를 만들어서 이진 탐색으로 처리한다.
+5. 마지막 잔고 기록과 그 이후 체결 결과로 VirtualMarket의 balance, asset을 복원한다.
+"""
+import os
+import numpy as np
+from .candle import KST_OFFSET_MIN
+from .date_converter import DataConverter
+
+
+class TradeJournal:
+    """
+    거래 기록을 고정 길이 레코드로 파일에 추가하고 memory-map으로 조회
+
+    path: 기록 파일 경로, 이미 있으면 이어서 기록한다
+    buffer_size: 파일에 한 번에 추가할 레코드 개수
+    """
+
+    REQUEST = 0
+    FILL = 1
+    CANCEL = 2
+    BALANCE = 3
+    ASSET = 4
+    REQUESTED = 0
+    DONE = 1
+    REJECTED = 2
+    STATES = {"requested": REQUESTED, "done": DONE, "rejected": REJECTED}
+    SIDES = {"buy": 1, "sell": -1}
+    DTYPE = np.dtype(
+        [
+            ("timestamp", np.int64),
+            ("kind", np.int8),
+            ("side", np.int8),
+            ("state", np.int8),
+            ("request_id", "S32"),
+            ("market", "S21"),
+            ("price", np.float64),
+            ("amount", np.float64),
+            ("balance", np.float64),
+        ]
+    )
+
+    def __init__(self, path, buffer_size=1024):
+        self.path = path
+        self.buffer = np.zeros(buffer_size, dtype=self.DTYPE)
+        self.buffer_count = 0
+        self.__last_timestamp = 0
+        self.__id_index = None
+        self.__id_index_size = 0
+        size = os.path.getsize(path) if os.path.exists(path) else 0
+        # 기록 중에 중단돼서 마지막 레코드가 잘렸으면 버린다
+        if size % self.DTYPE.itemsize != 0:
+            with open(path, "r+b") as file:
+                file.truncate(size - size % self.DTYPE.itemsize)
+        if len(self) > 0:
+            self.__last_timestamp = int(self.read()["timestamp"][-1])
+
+    def record_request(self, request, market=""):
+        """거래 요청 기록, 취소 요청은 CANCEL로 기록한다"""
+        kind = self.CANCEL if request["type"] == "cancel" else self.REQUEST
+        self.__append(
+            request.get("date_time"),
+            kind,
+            self.SIDES.get(request["type"], 0),
+            self.REQUESTED,
+            request["id"],
+            market,
+            request["price"],
+            request["amount"],
+            np.nan,
+        )
+
+    def record_result(self, result, market=""):
+        """Trader가 전달한 거래 결과 기록, 취소 결과는 CANCEL로 기록한다"""
+        kind = self.CANCEL if result["type"] == "cancel" else self.FILL
+        balance = result.get("balance")
+        self.__append(
+            result.get("date_time"),
+            kind,
+            self.SIDES.get(result["type"], 0),
+            self.STATES.get(result["state"], self.REQUESTED),
+            result["request"]["id"],
+            market,
+            result["price"],
+            result["amount"],
+            np.nan if balance is None else balance,
+        )
+
+    def record_balance(self, balance, asset, date_time=None):
+        """
+        잔고 기록, 현금 잔고 하나(BALANCE)와 자산마다 하나(ASSET)의 레코드를 추가한다
+        asset: VirtualMarket.asset 형식 {마켓 이름: (평균 매입 가격, 수량)}
+        """
+        self.__append(date_time, self.BALANCE, 0, self.DONE, "", "", 0, 0, balance)
+        for name, (price, amount) in asset.items():
+            self.__append(date_time, self.ASSET, 0, self.DONE, "", name, price, amount, balance)
+
+    def flush(self):
+        """모아둔 레코드를 파일 끝에 추가"""
+        if self.buffer_count == 0:
+            return
+        with open(self.path, "ab") as file:
+            file.write(self.buffer[: self.buffer_count].tobytes())
+        self.buffer_count = 0
+
+    def __len__(self):
+        size = os.path.getsize(self.path) if os.path.exists(self.path) else 0
+        return size // self.DTYPE.itemsize + self.buffer_count
+
+    def read(self, start=None, stop=None):
+        """start부터 stop 전까지의 레코드를 복사 없이 memory-map 구조체 배열로 반환"""
+        self.flush()
+        if len(self) == 0:
+            return np.zeros(0, dtype=self.DTYPE)
+        return np.memmap(self.path, dtype=self.DTYPE, mode="r")[start:stop]
+
+    def columns(self, start=None, stop=None):
+        """레코드를 {컬럼 이름: 배열} 딕셔너리로 반환"""
+        records = self.read(start, stop)
+        return {name: records[name] for name in self.DTYPE.names}
+
+    def find(self, request_id):
+        """요청 id의 모든 레코드를 기록 순서대로 반환"""
+        records = self.read()
+        sorted_ids, order = self.__get_id_index(records)
+        key = str(request_id).encode()
+        left = np.searchsorted(sorted_ids, key, side="left")
+        right = np.searchsorted(sorted_ids, key, side="right")
+        return records[np.sort(order[left:right])]
+
+    def between(self, start, end):
+        """
+        거래 시간이 start 이상 end 미만인 레코드 반환
+        start, end: 거래 요청, 결과와 같은 한국 시간 문자열 "2020-04-30T09:00:00"
+        """
+        records = self.read()
+        timestamps = records["timestamp"]
+        left = np.searchsorted(timestamps, self.to_timestamp(start), side="left")
+        right = np.searchsorted(timestamps, self.to_timestamp(end), side="left")
+        return records[left:right]
+
+    def restore_market(self, market):
+        """
+        마지막 잔고 기록과 그 이후의 체결 결과로 VirtualMarket의 balance, asset을 복원
+        체결 가격과 수량으로 VirtualMarket과 같은 방식으로 평균 매입 가격과 수량을 계산한다
+        잔고가 없는 체결 결과(AsyncTrader, UpbitTrader)는 체결 금액과 market의 수수료율로 잔고를 다시 계산한다
+        """
+        records = self.read()
+        kinds = records["kind"]
+        snapshots = np.flatnonzero(kinds == self.BALANCE)
+        balance = market.balance
+        asset = {}
+        start = 0
+        if len(snapshots) > 0:
+            start = snapshots[-1]
+            balance = float(records["balance"][start])
+            start += 1
+            while start < len(records) and kinds[start] == self.ASSET:
+                record = records[start]
+                asset[record["market"].decode()] = (float(record["price"]), float(record["amount"]))
+                start += 1
+
+        for record in records[start:][kinds[start:] == self.FILL]:
+            amount = float(record["amount"])
+            if record["state"] != self.DONE or amount == 0:
+                continue
+            name = record["market"].decode()
+            price = float(record["price"])
+            if record["side"] == 1:
+                if name in asset:
+                    old_price, old_amount = asset[name]
+                    new_amount = round(old_amount + amount, 6)
+                    asset[name] = (round((amount * price + old_price * old_amount) / new_amount), new_amount)
+                else:
+                    asset[name] = (price, amount)
+            elif name in asset:
+                new_amount = round(asset[name][1] - amount, 6)
+                if new_amount > 0:
+                    asset[name] = (asset[name][0], new_amount)
+                else:
+                    del asset[name]
+            if not np.isnan(record["balance"]):
+                balance = float(record["balance"])
+            elif record["side"] == 1:
+                balance = round(balance - price * amount * (1 + market.commission_ratio))
+            else:
+                balance = round(balance + price * amount * (1 - market.commission_ratio))
+
+        market.balance = round(balance)
+        market.asset = asset
+        return market
+
+    @staticmethod
+    def to_timestamp(date_time):
+        """한국 시간 문자열을 UTC 기준 경과 분으로 변환"""
+        return DataConverter.to_epoch_min(date_time) - KST_OFFSET_MIN
+
+    def __append(self, date_time, kind, side, state, request_id, market, price, amount, balance):
+        if date_time is not None:
+            self.__last_timestamp = self.to_timestamp(date_time)
+        record = self.buffer[self.buffer_count]
+        record["timestamp"] = self.__last_timestamp
+        record["kind"] = kind
+        record["side"] = side
+        record["state"] = state
+        record["request_id"] = str(request_id).encode()
+        record["market"] = market.encode()
+        record["price"] = price
+        record["amount"] = amount
+        record["balance"] = balance
+        self.buffer_count += 1
+        if self.buffer_count == len(self.buffer):
+            self.flush()
+
+    def __get_id_index(self, records):
+        """request_id 정렬 index, 레코드가 추가됐을 때만 다시 만든다"""
+        if self.__id_index is None or self.__id_index_size != len(records):
+            order = np.argsort(records["request_id"], kind="stable")
+            self.__id_index = (records["request_id"][order], order)
+            self.__id_index_size = len(records)
+        return self.__id_index
@@ -0,0 +1,151 @@
+"""
+전략이 사용하는 거래 정보, 거래 결과 기록
+
+전략이 받은 거래 정보와 거래 결과를 리스트에 계속 쌓으면 긴 시간 동작할수록 메모리 사용량이 늘어난다.
+이 모듈은 정해진 개수만큼만 보관하는 기록을 제공한다.
+
+CandleHistory: 최근 capacity 개의 거래 정보를 컬럼별 numpy 배열(ring buffer)에 저장
+ResultHistory: 최근 capacity 개의 거래 결과를 보관하고, 전체 결과는 요약 정보로 누적
+"""
+import json
+from collections import deque
+import numpy as np
+from .candle import Candle, KST_OFFSET_MIN
+from .date_converter import DataConverter
+
+
+class CandleHistory:
+    """
+    최근 capacity 개의 거래 정보를 보관하는 ring buffer
+
+    append: O(1), 가장 오래된 정보를 덮어쓴다
+    history[i]: 보관 중인 정보 중 i번째(오래된 순서, 음수 index 지원) Candle
+    column(name): 보관 중인 정보의 컬럼을 오래된 순서로 정렬한 numpy 배열
+    """
+
+    NUMERIC_KEYS = (
+        "opening_price",
+        "high_price",
+        "low_price",
+        "closing_price",
+        "acc_price",
+        "acc_volume",
+    )
+
+    def __init__(self, capacity=1000):
+        self.capacity = capacity
+        self.count = 0
+        self.markets = np.empty(capacity, dtype=object)
+        self.timestamp = np.zeros(capacity, dtype=np.int64)
+        self.values = {key: np.zeros(capacity, dtype=np.float64) for key in self.NUMERIC_KEYS}
+
+    def append(self, info):
+        """DataProvider.get_info 형식의 거래 정보(Candle 또는 딕셔너리)를 추가"""
+        position = self.count % self.capacity
+        self.markets[position] = info["market"]
+        if isinstance(info, Candle):
+            self.timestamp[position] = info.timestamp
+        else:
+            self.timestamp[position] = DataConverter.to_epoch_min(info["date_time"]) - KST_OFFSET_MIN
+        for key, column in self.values.items():
+            column[position] = info[key]
+        self.count += 1
+
+    def column(self, key):
+        """보관 중인 정보의 컬럼을 오래된 순서로 반환"""
+        if key == "timestamp":
+            column = self.timestamp
+        else:
+            column = self.values[key]
+        size = len(self)
+        start = (self.count - size) % self.capacity
+        if start + size <= self.capacity:
+            return column[start : start + size]
+        return np.concatenate((column[start:], column[: (start + size) % self.capacity]))
+
+    def __len__(self):
+        return min(self.count, self.capacity)
+
+    def __getitem__(self, index):
+        size = len(self)
+        if index < 0:
+            index += size
+        if index < 0 or index >= size:
+            raise IndexError("history index out of range")
+
+        position = (self.count - size + index) % self.capacity
+        values = self.values
+        return Candle(
+            self.markets[position],
+            int(self.timestamp[position]),
+            float(values["opening_price"][position]),
+            float(values["high_price"][position]),
+            float(values["low_price"][position]),
+            float(values["closing_price"][position]),
+            float(values["acc_price"][position]),
+            float(values["acc_volume"][position]),
+        )
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self[index]
+
+
+class ResultHistory:
+    """
+    최근 capacity 개의 거래 결과를 보관하고 전체 결과를 요약
+
+    spill_path: 지정하면 보관 개수를 넘어 밀려나는 결과를 json lines 형식으로 파일에 추가한다
+    summary:
+    {
+        "count": 전체 결과 개수
+        "buy_count": 매수 체결 개수
+        "sell_count": 매도 체결 개수
+        "buy_value": 누적 매수 금액
+        "sell_value": 누적 매도 금액
+        "last_balance": 마지막 결과의 잔고
+    }
+    """
+
+    def __init__(self, capacity=1000, spill_path=None):
+        self.results = deque(maxlen=capacity)
+        self.spill_path = spill_path
+        self.summary = {
+            "count": 0,
+            "buy_count": 0,
+            "sell_count": 0,
+            "buy_value": 0.0,
+            "sell_value": 0.0,
+            "last_balance": None,
+        }
+
+    def append(self, result):
+        """거래 결과를 추가하고 요약 정보를 갱신, 요청 정보까지 얕은 복사로 보관한다"""
+        if len(self.results) == self.results.maxlen and self.spill_path is not None:
+            with open(self.spill_path, "a", encoding="utf-8") as file:
+                file.write(json.dumps(self.results[0], default=str) + "\n")
+
+        result = dict(result)
+        if isinstance(result.get("request"), dict):
+            result["request"] = dict(result["request"])
+        self.results.append(result)
+
+        summary = self.summary
+        summary["count"] += 1
+        value = float(result["price"]) * float(result["amount"])
+        if result["type"] == "buy":
+            summary["buy_count"] += 1
+            summary["buy_value"] += value
+        elif result["type"] == "sell":
+            summary["sell_count"] += 1
+            summary["sell_value"] += value
+        summary["last_balance"] = result.get("balance")
+
+    def __len__(self):
+        return len(self.results)
+
+    def __getitem__(self, index):
+        return self.results[index]
+
+    def __iter__(self):
+        return iter(self.results)
@@ -0,0 +1,442 @@
+"""
+업비트 거래소 Trader
+
+업비트 OpenAPI로 실제 주문을 보내고 결과를 callback으로 전달한다.
+1. 모든 요청은 HttpClient로 보내므로 keep-alive 세션을 재사용하고, 요청 수 제한과 재시도가 적용된다.
+- 주문, 취소는 주문 그룹(기본 초당 8회), 그 외 요청은 기본 그룹(기본 초당 30회) 제한을 따른다.
+2. 인증 토큰은 JWT(HS256)이고, 요청마다 달라지는 nonce, query_hash만 새로 계산한다.
+- 헤더의 base64 문자열과 secret key를 넣은 HMAC 객체는 미리 만들어두고 복사해서 사용한다.
+3. 여러 거래 요청은 thread pool에서 동시에 보낸다(pipelining). 취소 요청을 먼저 보내고 새 주문을 보낸다.
+4. 주문 id는 업비트 주문의 identifier로 사용하므로 거래소 주문 번호(uuid)를 따로 관리하지 않는다.
+5. 주문 상태는 OrderManager로 관리한다.
+- 접수되면 requested, 거부되면 rejected 결과를 바로 전달한다.
+- 주문은 멱등이 아니므로 429 응답만 다시 보낸다. 5xx 응답, 연결 오류, duplicated_identifier 응답은
+  거래소가 이미 접수했을 수 있으므로 identifier로 주문을 조회해서 있으면 requested, 없으면 rejected 결과를 전달한다.
+  조회도 실패하면 requested 결과를 전달하고 열린 주문으로 두었다가 check_orders에서 거래소에 없으면 rejected 결과를 전달한다.
+- 체결과 취소는 check_orders로 열린 주문을 조회해서 done 결과를 전달한다.
+  주문마다 조회하지 않고 GET /v1/orders에 identifiers[]를 CHECK_BATCH_SIZE개씩 묶어서 조회한다.
+  send_request를 호출할 때 마지막 확인 후 check_interval 초가 지났으면 먼저 확인한다.
+
+API 키와 주소는 인자로 전달하거나 환경 변수로 설정한다.
+- UPBIT_OPEN_API_ACCESS_KEY, UPBIT_OPEN_API_SECRET_KEY, UPBIT_OPEN_API_SERVER_URL
+"""
+import base64
+import hashlib
+import hmac
+import json
+import os
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from urllib.parse import unquote, urlencode
+from smtm_abs.trader import Trader
+from .http_client import HttpClient, SessionPool, TokenBucket
+from .log_manager import LogManager
+from .order_manager import OrderManager
+
+
+class UpbitSigner:
+    """
+    업비트 인증 토큰(JWT, HS256) 생성기
+
+    access_key, secret_key: 업비트 OpenAPI 키
+    """
+
+    def __init__(self, access_key, secret_key):
+        self.access_key = access_key
+        self.__header = self.__encode(json.dumps({"alg": "HS256", "typ": "JWT"}, separators=(",", ":")).encode())
+        self.__hmac = hmac.new(secret_key.encode(), digestmod=hashlib.sha256)
+
+    def token(self, query=None):
+        """
+        인증 토큰
+        query: 요청 파라미터 딕셔너리, 있으면 query_hash(SHA512)를 포함한다
+        """
+        payload = {"access_key": self.access_key, "nonce": str(uuid.uuid4())}
+        if query:
+            payload["query_hash"] = self.query_hash(query)
+            payload["query_hash_alg"] = "SHA512"
+        signing_input = self.__header + b"." + self.__encode(json.dumps(payload, separators=(",", ":")).encode())
+        signature = self.__hmac.copy()
+        signature.update(signing_input)
+        return (signing_input + b"." + self.__encode(signature.digest())).decode()
+
+    def authorization(self, query=None):
+        """Authorization 요청 헤더"""
+        return {"Authorization": f"Bearer {self.token(query)}"}
+
+    @staticmethod
+    def query_hash(query):
+        """업비트 query_hash, 인코딩하지 않은 query string의 SHA512"""
+        return hashlib.sha512(unquote(urlencode(query, doseq=True)).encode()).hexdigest()
+
+    @staticmethod
+    def __encode(data):
+        return base64.urlsafe_b64encode(data).rstrip(b"=")
+
+
+class UpbitTrader(Trader):
+    """
+    업비트 거래소에 거래 요청을 보내고 결과를 callback으로 전달하는 Trader
+
+    market: 거래 마켓 이름, 요청에 market이 없으면 사용한다
+    pool: 사용할 SessionPool, 여러 Trader가 같은 pool을 사용할 수 있다
+    workers: 동시에 보낼 최대 요청 개수
+    order_rate, default_rate: 주문 그룹, 기본 그룹의 초당 최대 요청 수
+    check_interval: send_request에서 열린 주문의 체결 여부를 확인하는 최소 간격(초)
+    order_manager: 보낸 주문의 상태 관리
+    """
+
+    SERVER_URL = "https://api.upbit.com"
+    SIDES = {"buy": "bid", "sell": "ask"}
+    ORDER_GROUP = "order"
+    DEFAULT_GROUP = "default"
+    ISO_DATEFORMAT = "%Y-%m-%dT%H:%M:%S"
+    CHECK_BATCH_SIZE = 100
+    OPEN_ORDER_STATES = ("wait", "watch")
+    FINISHED_ORDER_STATES = ("done", "cancel")
+
+    def __init__(
+        self,
+        market="KRW-BTC",
+        access_key=None,
+        secret_key=None,
+        server_url=None,
+        pool=None,
+        workers=8,
+        order_rate=8,
+        default_rate=30,
+        retries=3,
+        backoff=0.05,
+        timeout=5,
+        check_interval=1.0,
+    ):
+        self.logger = LogManager.get_logger(__class__.__name__)
+        self.name = "Upbit"
+        self.market = market
+        access_key = access_key or os.environ.get("UPBIT_OPEN_API_ACCESS_KEY")
+        secret_key = secret_key or os.environ.get("UPBIT_OPEN_API_SECRET_KEY")
+        if not access_key or not secret_key:
+            raise UserWarning("upbit access key and secret key are required")
+        server_url = server_url or os.environ.get("UPBIT_OPEN_API_SERVER_URL", self.SERVER_URL)
+        self.signer = UpbitSigner(access_key, secret_key)
+        self.client = HttpClient(
+            server_url,
+            pool=pool if pool is not None else SessionPool(workers),
+            limits={
+                self.ORDER_GROUP: TokenBucket(order_rate),
+                self.DEFAULT_GROUP: TokenBucket(default_rate),
+            },
+            retries=retries,
+            backoff=backoff,
+            timeout=timeout,
+        )
+        self.check_interval = check_interval
+        self.order_manager = OrderManager()
+        self.executor = ThreadPoolExecutor(max_workers=workers)
+        self.__callbacks = {}
+        self.__unconfirmed = set()
+        self.__last_check = time.monotonic()
+
+    def send_request(self, request_list, callback):
+        """
+        거래 요청 기능, 요청을 동시에 보내고 접수 결과를 callback으로 전달한 후 반환한다
+        check_interval이 지났으면 체결, 취소된 이전 주문의 결과를 먼저 전달한다
+        type이 cancel인 요청은 해당 id의 주문을 취소하고, 가격이나 수량이 0인 요청은 보내지 않는다
+        """
+        if time.monotonic() - self.__last_check >= self.check_interval:
+            self.check_orders()
+
+        cancel_ids = [request["id"] for request in request_list if request["type"] == "cancel"]
+        if len(cancel_ids) > 0:
+            self.cancel_requests(cancel_ids)
+
+        orders = []
+        for request in request_list:
+            if request["type"] == "cancel" or request["price"] == 0 or request["amount"] == 0:
+                continue
+            try:
+                self.order_manager.add(request, market=request.get("market", self.market))
+            except UserWarning as msg:
+                self.logger.warning(msg)
+                self.__call(callback, self.__make_result(request, "duplicated id", "rejected"))
+                continue
+            self.__callbacks[request["id"]] = callback
+            orders.append(request)
+
+        for request, result in zip(orders, self.__map(self.__place_order, orders)):
+            # 접수 결과의 amount는 주문 수량이므로 거부된 경우만 주문 상태에 반영한다
+            if result["state"] == "rejected":
+                self.order_manager.transition(request["id"], OrderManager.REJECTED, msg=result["msg"])
+                self.__callbacks.pop(request["id"], None)
+            self.__call(callback, result)
+
+    def cancel_request(self, request_id):
+        """체결되지 않은 주문 취소, 열린 주문이 아니면 거래소에 보내지 않는다"""
+        self.cancel_requests([request_id])
+
+    def cancel_all_requests(self):
+        """열린 주문을 모두 취소"""
+        self.cancel_requests(self.order_manager.open_ids())
+
+    def cancel_requests(self, request_ids):
+        """
+        여러 주문을 동시에 취소하고 취소 결과를 주문을 보낼 때 받은 callback으로 전달
+        Returns: 취소된 주문 id 리스트
+        """
+        request_ids = [request_id for request_id in request_ids if self.order_manager.is_open(request_id)]
+        cancelled = []
+        for request_id, response in zip(request_ids, self.__map(self.__cancel_order, request_ids)):
+            if response is None:
+                continue
+            self.__finish(request_id, response, "cancelled")
+            cancelled.append(request_id)
+        return cancelled
+
+    def check_orders(self):
+        """
+        열린 주문의 상태를 CHECK_BATCH_SIZE개씩 묶어서 조회하고 체결, 취소된 주문의 done 결과를 전달
+        일부 체결된 주문은 주문 상태만 partial로 바꾸고, 거래소에 없는 미확인 주문은 rejected 결과를 전달한다
+        Returns: 끝난 주문 개수
+        """
+        self.__last_check = time.monotonic()
+        request_ids = self.order_manager.open_ids()
+        batches = [
+            request_ids[index : index + self.CHECK_BATCH_SIZE]
+            for index in range(0, len(request_ids), self.CHECK_BATCH_SIZE)
+        ]
+        finished = 0
+        for batch, responses in zip(batches, self.__map(self.__list_orders, batches)):
+            if responses is None:
+                continue
+            for request_id in batch:
+                response = responses.get(request_id)
+                if response is None:
+                    if request_id in self.__unconfirmed:
+                        self.__unconfirmed.discard(request_id)
+                        self.__reject(request_id, "order not found")
+                        finished += 1
+                    continue
+                self.__unconfirmed.discard(request_id)
+                if response["state"] == "done":
+                    self.__finish(request_id, response, "success")
+                    finished += 1
+                elif response["state"] == "cancel":
+                    self.__finish(request_id, response, "cancelled")
+                    finished += 1
+                else:
+                    executed = float(response.get("executed_volume") or 0)
+                    order = self.order_manager.get(request_id)
+                    if executed > order.filled:
+                        self.order_manager.transition(request_id, OrderManager.PARTIAL, executed)
+        return finished
+
+    def get_account_info(self):
+        """
+        계좌 정보를 요청해서 반환
+        Returns: {"balance": 현금 잔고, "asset": {마켓 이름: (평균 매입 가격, 수량)}, "quote": {마켓 이름: 현재 가격}}
+        """
+        response = self.client.request(
+            "GET", "/v1/accounts", headers=self.signer.authorization, group=self.DEFAULT_GROUP
+        )
+        accounts = self.__parse(response, "fail to get accounts")
+        balance = 0
+        asset = {}
+        for account in accounts:
+            amount = float(account["balance"]) + float(account.get("locked") or 0)
+            if account["currency"] == "KRW":
+                balance = round(float(account["balance"]))
+                continue
+            if amount <= 0:
+                continue
+            name = f"{account.get('unit_currency', 'KRW')}-{account['currency']}"
+            asset[name] = (float(account["avg_buy_price"]), amount)
+
+        quote = {}
+        markets = sorted(set(asset) | {self.market})
+        response = self.client.request(
+            "GET", "/v1/ticker", params={"markets": ",".join(markets)}, group=self.DEFAULT_GROUP
+        )
+        for ticker in self.__parse(response, "fail to get ticker"):
+            quote[ticker["market"]] = ticker["trade_price"]
+        return {"balance": balance, "asset": asset, "quote": quote}
+
+    def get_latency_stats(self):
+        """거래소 요청부터 응답까지 걸린 시간 통계(초), 재시도 시간을 포함한다"""
+        stats = self.client.latency.to_dict()
+        stats["retry_count"] = self.client.retry_count
+        stats["throttled_count"] = self.client.throttled_count
+        return stats
+
+    def close(self):
+        """thread pool과 세션 pool을 닫는다"""
+        self.executor.shutdown(wait=True)
+        self.client.close()
+
+    def __map(self, func, items):
+        """items마다 func를 동시에 실행한 결과, 하나면 thread를 거치지 않고 바로 실행한다"""
+        if len(items) <= 1:
+            return [func(item) for item in items]
+        return self.executor.map(func, items)
+
+    def __place_order(self, request):
+        """주문 하나를 보내고 requested 또는 rejected 결과를 반환"""
+        query = {
+            "market": request.get("market", self.market),
+            "side": self.SIDES.get(request["type"], request["type"]),
+            "volume": str(request["amount"]),
+            "price": str(request["price"]),
+            "ord_type": "limit",
+            "identifier": request["id"],
+        }
+        try:
+            response = self.client.request(
+                "POST",
+                "/v1/orders",
+                json=query,
+                headers=lambda: self.signer.authorization(query),
+                group=self.ORDER_GROUP,
+                idempotent=False,
+            )
+        except UserWarning as error:
+            self.logger.error(f"fail to send request {request['id']} - {error}")
+            return self.__verify_order(request, "internal error")
+
+        if response.status_code >= 400:
+            msg = self.__error_message(response)
+            if response.status_code >= 500 or msg == "duplicated_identifier":
+                return self.__verify_order(request, msg)
+            return self.__make_result(request, msg, "rejected")
+        return self.__make_result(request, "success", "requested")
+
+    def __verify_order(self, request, msg):
+        """
+        접수 여부를 알 수 없는 주문을 identifier로 조회해서 requested 또는 rejected 결과를 반환
+        조회도 실패하면 requested 결과를 반환하고 check_orders에서 다시 확인한다
+        """
+        is_found = self.__find_order(request["id"])
+        if is_found is None:
+            self.logger.warning(f"unconfirmed request {request['id']} - {msg}")
+            self.__unconfirmed.add(request["id"])
+            return self.__make_result(request, "unconfirmed", "requested")
+        if not is_found:
+            return self.__make_result(request, msg, "rejected")
+        return self.__make_result(request, "success", "requested")
+
+    def __find_order(self, request_id):
+        """identifier의 주문이 거래소에 있으면 True, 없으면 False, 조회하지 못하면 None"""
+        query = {"identifier": request_id}
+        try:
+            response = self.client.request(
+                "GET",
+                "/v1/order",
+                params=query,
+                headers=lambda: self.signer.authorization(query),
+                group=self.DEFAULT_GROUP,
+            )
+        except UserWarning as error:
+            self.logger.error(f"fail to get order {request_id} - {error}")
+            return None
+        if response.status_code == 404:
+            return False
+        return response.status_code < 400 or None
+
+    def __cancel_order(self, request_id):
+        """주문 하나를 취소, 취소되면 응답 딕셔너리, 실패하면 None"""
+        query = {"identifier": request_id}
+        try:
+            response = self.client.request(
+                "DELETE",
+                "/v1/order",
+                params=query,
+                headers=lambda: self.signer.authorization(query),
+                group=self.ORDER_GROUP,
+            )
+        except UserWarning as error:
+            self.logger.error(f"fail to cancel request {request_id} - {error}")
+            return None
+        if response.status_code >= 400:
+            self.logger.warning(f"fail to cancel request {request_id} - {self.__error_message(response)}")
+            return None
+        return response.json()
+
+    def __list_orders(self, request_ids):
+        """
+        여러 주문을 identifier로 한 번에 조회, 열린 주문과 끝난 주문은 함께 조회할 수 없으므로 두 번 요청한다
+        Returns: {identifier: 주문 응답 딕셔너리}, 거래소에 없는 주문은 포함되지 않는다, 실패하면 None
+        """
+        orders = {}
+        for states in (self.OPEN_ORDER_STATES, self.FINISHED_ORDER_STATES):
+            query = {"identifiers[]": request_ids, "states[]": list(states)}
+            try:
+                response = self.client.request(
+                    "GET",
+                    "/v1/orders",
+                    params=query,
+                    headers=lambda query=query: self.signer.authorization(query),
+                    group=self.DEFAULT_GROUP,
+                )
+            except UserWarning as error:
+                self.logger.error(f"fail to get orders - {error}")
+                return None
+            if response.status_code >= 400:
+                self.logger.warning(f"fail to get orders - {self.__error_message(response)}")
+                return None
+            for order in response.json():
+                orders[order["identifier"]] = order
+        return orders
+
+    def __finish(self, request_id, response, msg):
+        """끝난 주문의 done 결과를 주문 상태에 반영하고 callback으로 전달"""
+        order = self.order_manager.get(request_id)
+        if order is None or not order.is_open():
+            return
+        result = self.__make_result(order.request, msg, "done")
+        result["amount"] = float(response.get("executed_volume") or 0)
+        self.order_manager.apply_result(result)
+        callback = self.__callbacks.pop(request_id, None)
+        if callback is not None:
+            self.__call(callback, result)
+
+    def __reject(self, request_id, msg):
+        """거래소에 없는 것으로 확인된 주문의 rejected 결과를 주문 상태에 반영하고 callback으로 전달"""
+        order = self.order_manager.get(request_id)
+        if order is None or not order.is_open():
+            return
+        self.order_manager.transition(request_id, OrderManager.REJECTED, msg=msg)
+        callback = self.__callbacks.pop(request_id, None)
+        if callback is not None:
+            self.__call(callback, self.__make_result(order.request, msg, "rejected"))
+
+    def __parse(self, response, msg):
+        if response.status_code >= 400:
+            raise UserWarning(f"{msg} - {self.__error_message(response)}")
+        return response.json()
+
+    def __call(self, callback, result):
+        try:
+            callback(result)
+        except Exception as error:  # pylint: disable=broad-except
+            self.logger.error(f"callback error {error}")
+
+    @staticmethod
+    def __error_message(response):
+        try:
+            error = response.json()["error"]
+            return error.get("name") or error.get("message")
+        except (ValueError, KeyError, TypeError, AttributeError):
+            return f"http error {response.status_code}"
+
+    @classmethod
+    def __make_result(cls, request, msg, state):
+        return {
+            "request": request,
+            "type": request["type"],
+            "price": request["price"],
+            "amount": request["amount"] if state == "requested" else 0,
+            "msg": msg,
+            "balance": None,
+            "state": state,
+            "date_time": datetime.now().strftime(cls.ISO_DATEFORMAT),
+        }
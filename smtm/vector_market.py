@@ -0,0 +1,159 @@
+"""
+numpy 배열 기반 일괄 백테스트 엔진
+
+VirtualMarket은 handle_request 한 번에 한 턴씩 진행하면서 캔들 딕셔너리를 조회하고 로그를 남기기 때문에
+긴 기간의 백테스트에는 느리다. VectorMarket은 전체 캔들 배열과 턴별 거래 요청(신호) 배열을 한 번에 받아서
+VirtualMarket과 같은 규칙으로 체결, 수수료, 잔고, 평균 매입 가격을 계산한다.
+
+VirtualMarket과 같은 규칙
+1. i번째 턴의 요청은 i+1번째 캔들로 체결 여부를 판단한다.
+- 매수: 요청 가격이 다음 캔들의 저가 이상이고, 수수료를 포함한 금액이 잔고 이하일 때 체결
+- 매도: 요청 가격이 다음 캔들의 고가 미만이고, 보유 자산이 있을 때 체결, 보유량보다 많으면 보유량만 매도
+2. 마지막 두 턴(다음 턴이 마지막 턴인 경우)은 거래하지 않는다.
+3. 가격 또는 수량이 0이면 거래 없이 넘어간다.
+
+가격 조건은 모든 턴에 대해 배열 연산으로 한 번에 판단하고, 잔고와 보유 자산처럼 이전 체결에 따라
+달라지는 값은 가격 조건을 통과한 턴만 순서대로 계산한다. 잔고는 VirtualMarket과 같이 체결마다
+반올림되기 때문에 누적합으로는 같은 값을 얻을 수 없다. 턴별 잔고, 자산 경로는 다시 배열 연산으로 펼친다.
+"""
+import numpy as np
+
+
+class VectorMarket:
+    """
+    캔들 배열과 신호 배열로 가상 거래 결과를 한 번에 계산
+
+    commission_ratio: 수수료율, VirtualMarket과 같은 기본값
+    """
+
+    BUY = 1
+    SELL = -1
+
+    def __init__(self, commission_ratio=0.0005):
+        self.commission_ratio = commission_ratio
+
+    def run(self, candles, signals, budget):
+        """
+        전체 기간의 거래 결과를 계산
+
+        candles: "low", "high", "close" 배열을 갖는 딕셔너리, CandleStore.load_columns 결과를 그대로 사용
+        signals: 턴별 거래 요청 배열 딕셔너리
+        {
+            "price": 요청 가격
+            "amount": 요청 수량
+            "side": BUY(1), SELL(-1), 거래 없음(0)
+        }
+        budget: 시작 잔고
+        Returns:
+        {
+            "filled": 턴별 체결 여부
+            "fill_amount": 턴별 체결 수량
+            "balance": 턴별 요청 처리 후 잔고
+            "asset_amount": 턴별 요청 처리 후 보유 수량
+            "asset_price": 턴별 요청 처리 후 평균 매입 가격
+            "equity": 턴별 잔고 + 보유 자산 평가 금액, 평가 가격은 다음 턴의 종가
+            "trade_count": 체결 횟수
+            "final_balance": 마지막 잔고
+        }
+        """
+        low = np.asarray(candles["low"], dtype=np.float64)
+        high = np.asarray(candles["high"], dtype=np.float64)
+        close = np.asarray(candles["close"], dtype=np.float64)
+        price = np.asarray(signals["price"], dtype=np.float64)
+        amount = np.asarray(signals["amount"], dtype=np.float64)
+        side = np.asarray(signals["side"])
+        size = len(low)
+
+        # 다음 캔들의 저가, 고가, 종가
+        next_low = np.append(low[1:], np.inf)
+        next_high = np.append(high[1:], -np.inf)
+        next_close = np.append(close[1:], close[-1:])
+
+        tradable = (np.arange(size) < size - 2) & (price != 0) & (amount != 0)
+        is_buy = tradable & (side == self.BUY) & (price >= next_low)
+        is_sell = tradable & (side == self.SELL) & (price < next_high)
+        candidates = np.flatnonzero(is_buy | is_sell)
+
+        fills = self.__settle(candidates, is_buy, price, amount, budget)
+        fill_index, fill_amount, fill_balance, fill_asset_amount, fill_asset_price = fills
+
+        # 체결된 턴의 상태를 이후 턴으로 펼친다, 첫 체결 이전은 초기 상태
+        position = np.full(size, -1, dtype=np.int64)
+        position[fill_index] = np.arange(len(fill_index))
+        position = np.maximum.accumulate(position) + 1
+        balance = np.concatenate(([budget], fill_balance))[position]
+        asset_amount = np.concatenate(([0.0], fill_asset_amount))[position]
+        asset_price = np.concatenate(([0.0], fill_asset_price))[position]
+
+        filled = np.zeros(size, dtype=bool)
+        filled[fill_index] = True
+        amount_path = np.zeros(size, dtype=np.float64)
+        amount_path[fill_index] = fill_amount
+
+        return {
+            "filled": filled,
+            "fill_amount": amount_path,
+            "balance": balance,
+            "asset_amount": asset_amount,
+            "asset_price": asset_price,
+            "equity": balance + asset_amount * next_close,
+            "trade_count": len(fill_index),
+            "final_balance": balance[-1] if size > 0 else budget,
+        }
+
+    def __settle(self, candidates, is_buy, price, amount, budget):
+        """
+        가격 조건을 통과한 턴만 순서대로 잔고, 보유 자산 조건을 확인하고 체결 결과를 계산
+        VirtualMarket.__handle_buy_request, __handle_sell_request와 같은 계산식을 사용한다
+        """
+        balance = budget
+        asset = None
+        fill_index = []
+        fill_amount = []
+        fill_balance = []
+        fill_asset_amount = []
+        fill_asset_price = []
+
+        candidate_is_buy = is_buy[candidates].tolist()
+        candidate_price = price[candidates].tolist()
+        candidate_amount = amount[candidates].tolist()
+        for index, buy, request_price, request_amount in zip(
+            candidates.tolist(), candidate_is_buy, candidate_price, candidate_amount
+        ):
+            if buy:
+                buy_total_value = request_price * request_amount * (1 + self.commission_ratio)
+                if buy_total_value > balance:
+                    continue
+                if asset is not None:
+                    new_amount = round(asset[1] + request_amount, 6)
+                    new_value = (request_amount * request_price) + (asset[0] * asset[1])
+                    asset = (round(new_value / new_amount), new_amount)
+                else:
+                    asset = (request_price, request_amount)
+                balance = round(balance - buy_total_value)
+                traded_amount = request_amount
+            else:
+                if asset is None:
+                    continue
+                traded_amount = request_amount
+                if request_amount > asset[1]:
+                    traded_amount = asset[1]
+                    asset = None
+                else:
+                    asset = (asset[0], round(asset[1] - traded_amount, 6))
+                sell_value = traded_amount * request_price
+                balance = round(balance + sell_value * (1 - self.commission_ratio))
+
+            fill_index.append(index)
+            fill_amount.append(traded_amount)
+            fill_balance.append(balance)
+            fill_asset_amount.append(0.0 if asset is None else asset[1])
+            fill_asset_price.append(0.0 if asset is None else asset[0])
+
+        return (
+            np.array(fill_index, dtype=np.int64),
+            np.array(fill_amount, dtype=np.float64),
+            np.array(fill_balance, dtype=np.float64),
+            np.array(fill_asset_amount, dtype=np.float64),
+            np.array(fill_asset_price, dtype=np.float64),
+        )
@@ -13,16 +13,50 @@
 - 보유 자산 상황을 반영하여 거래 요청 정보에 따른 체결량을 결정한다.
 - 실제 거래 정보를 바탕으로 체결량과 가격을 산출한다.
 - 수수료를 적용한 결과를 생성한다.
+- 체결할 수 없는 요청은 state가 rejected이고 msg에 거부 이유를 담은 결과를 생성한다.
 
 4. 현재 자산, 보유 종목 정보 조회 가능
 - 거래와 자산의 입출금에 따라 자산, 보유 종목의 내역을 저장
 
 5. 아무 거래 없이 다음 턴으로 넘어갈 수 있음
 - 거래 금액 또는 가격이 0일 경우, 해당 턴은 넘어간다.
+
+6. 여러 마켓 동시 거래 가능
+- initialize에 markets를 지정하면 마켓별 캔들을 MarketTimeline으로 하나의 시간 축에 정렬한다.
+- 턴은 시간 축의 한 시간이고, 거래 요청의 market 마켓 캔들로 체결 여부를 확인한다.
+- 해당 시간에 거래가 없었던 마켓의 요청은 체결되지 않는다.
+- 현금 잔고는 모든 마켓이 같이 사용한다.
+
+7. 주문장 사용 가능
+- enable_order_book을 호출하면 체결되지 않은 주문은 마켓별 OrderBook에 남아서 다음 턴에도 체결을 시도한다.
+- 캔들 하나에서 체결되는 수량은 캔들 거래량 * volume_ratio로 제한되므로 주문이 나눠서 체결될 수 있다.
+- 요청 결과는 바로 모두 체결되면 done, 아니면 requested 상태이고, 남은 주문의 결과는 pop_fill_results로 받는다.
+- 남은 주문이 일부 체결된 턴에는 지금까지 체결된 수량을 담은 requested 결과, 모두 체결되면 done 결과를 만든다.
+- 주문장에 남은 매수 주문의 금액(수수료 포함)은 잔고에서 예약하고, 체결되거나 취소되면 예약을 푼다.
+  새 매수 주문은 예약되지 않은 잔고로만 낼 수 있으므로 남은 매수 주문끼리 같은 현금으로 체결되지 않는다.
+- 취소 요청은 턴을 넘기지 않고, 체결된 수량을 담은 done 결과를 바로 반환한다.
+
+8. 시간으로 턴 이동 가능
+- seek으로 원하는 시간의 턴으로 바로 이동한다. 잔고와 보유 자산은 그대로 유지된다.
+- initialize에 fill_gaps를 지정하면 거래가 없었던 시간은 직전 종가의 캔들로 채워서 턴과 시간이 일정한 간격이 된다.
+
+9. 상태 저장, 복원 가능
+- get_state로 잔고, 보유 자산, 턴, 주문장을 저장하고 같은 기간으로 초기화한 가상 거래소에 set_state로 복원한다.
+- 캔들 데이터는 저장하지 않는다.
 """
-import copy, requests
+import logging
 from .date_converter import DataConverter
+from .lazy_module import lazy_module
 from .log_manager import LogManager
+from .instrumentation import Instrumentation
+from .candle import CandleSeries
+from .candle_store import CandleStore, UpbitCandleFetcher
+from .market_timeline import MarketTimeline
+from .order_book import OrderBook
+from .time_index import TimeIndex
+
+# 거래소 요청 오류를 처리할 때만 불러온다
+requests=lazy_module("requests")
 
 
 class VirtualMarket:
@@ -38,12 +72,17 @@ class VirtualMarket:
         commision_rate: 수수료율
         asset: dict -> 자산 목록, 마켓 이름을 키값으로 갖고 (평균 매입 가격, 수량)을 갖는 dict
     }
+    store: 캔들 저장소, SimulationDataProvider와 같은 저장소를 사용하면 같은 기간의 데이터를 다시 받지 않는다
+    timeline: 여러 마켓으로 초기화했을 때 마켓별 캔들을 정렬한 MarketTimeline, 한 마켓이면 None
+    books: 주문장을 사용할 때 마켓별 OrderBook, 사용하지 않으면 None
+    reserved: 주문장에 남은 매수 주문을 위해 예약된 금액(수수료 포함), balance에 포함된다
+    unit: 캔들 단위(분)
     """
 
-    URL="https://api.upbit.com/v1/candles/minute/1"
-    QUERY_STRING={"market":"KRW-BTC", "to":"2020-04-30 00:00:00"}
+    URL="https://api.upbit.com/v1/candles/minutes/1"
+    QUERY_STRING={"market":"KRW-BTC", "to":"2020-04-30T00:00:00"}
 
-    def __init__(self) -> None:
+    def __init__(self, store=None) -> None:
         self.logger=LogManager.get_logger(__class__.__name__)
         self.is_initialized=False
         self.data=None
@@ -51,13 +90,28 @@ class VirtualMarket:
         self.balance=0
         self.commission_ratio=0.0005
         self.asset={}
-
-    def initialize(self, end: str=None, count: int=100, budget: int=0):
+        self.timeline=None
+        self.books=None
+        self.reserved=0.0
+        self.volume_ratio=1.0
+        self.fill_results=[]
+        self.unit=1
+        self.__time_index=None
+        if store is None:
+            store=CandleStore(fetcher=UpbitCandleFetcher(self.URL))
+        self.store=store
+
+    def initialize(self, end: str=None, count: int=100, budget: int=0, markets=None, unit: int=1, fill_gaps=False):
         """
-        실제 거래소에서 거래 데이터를 가져와서 초기화한다
+        캔들 저장소에서 거래 데이터를 가져와서 초기화한다
+        저장소에 없는 구간만 실제 거래소에서 가져온다
         
         end: 언제까지의 거래기간 정보를 사용할 것인지에 대한 날짜 시간 정보
         count: 거래기간까지 가져올 데이터 개수
+        markets: 거래할 마켓 이름 리스트, 지정하지 않으면 QUERY_STRING의 마켓 하나
+            두 개 이상이면 data는 첫 번째 마켓의 캔들이고, 모든 마켓의 캔들은 timeline으로 조회한다
+        unit: 캔들 단위(분), 한 턴은 unit 분 캔들 하나이고 count도 unit 분 캔들 개수
+        fill_gaps: True면 거래가 없었던 시간을 직전 종가의 캔들로 채운다, SimulationDataProvider와 같게 설정해야 한다
         """
 
         # 만약 초기화가 돼 있다면 바로 return
@@ -66,27 +120,30 @@ class VirtualMarket:
 
         # --------------- 초기화가 안 돼 있다면 아래 코드 작동 -------------------
 
-        # 쿼리 str 복사
-        query_str=copy.deepcopy(self.QUERY_STRING)
-
         # 특정 기간이 설정돼 있다면
         if end is not None:
             # 한국 시간 utc-9 적용 시간으로 변환
-            query_str["to"]=DataConverter.from_kst_to_utc_str(end) + "Z"
-        # TODO 설정 안한다면 default 값이 "2020-04-30 00:00:00" -> 추후 default값 변경 필요
+            to=DataConverter.from_kst_to_utc_str(end)
+        # TODO 설정 안한다면 default 값이 "2020-04-30T00:00:00" -> 추후 default값 변경 필요
         else:
-            end=query_str["to"]
-
-        # 가져올 데이터 개수 세팅
-        query_str['count']=count
+            end=to=self.QUERY_STRING["to"]
 
         try:
-            res=requests.get(self.URL, params=query_str)
-            res.raise_for_status()
-            # 업비트 거래 정보 데이터
-            self.data=res.json()
-            # 오름차순 정렬일듯
-            self.data.reverse()
+            if markets is None:
+                markets=[self.QUERY_STRING["market"]]
+            # 업비트 거래 정보 데이터, 과거 데이터부터 오름차순 정렬
+            series_list=[self.store.get_candles(market, to, count, unit) for market in markets]
+            if fill_gaps:
+                start, stop=CandleStore.to_range(to, count, unit)
+                series_list=[
+                    CandleSeries(series.market, TimeIndex.fill(series.columns, start, stop, unit))
+                    for series in series_list
+                ]
+            self.unit=unit
+            self.__time_index=None
+            self.data=series_list[0]
+            # 여러 마켓이면 모든 마켓의 캔들을 하나의 시간 축으로 정렬
+            self.timeline=MarketTimeline(series_list) if len(series_list) > 1 else None
             # 잔고 설정
             self.balance=budget
             # 초기화 상태 변환
@@ -106,6 +163,94 @@ class VirtualMarket:
             self.logger.error(e)
             raise UserWarning("RequestException - all request error") from e
 
+    def enable_order_book(self, volume_ratio=1.0):
+        """
+        체결되지 않은 주문을 보관하는 주문장 사용
+        volume_ratio: 캔들 하나에서 체결 가능한 수량의 캔들 거래량 대비 비율
+        """
+        self.books={}
+        self.reserved=0.0
+        self.volume_ratio=volume_ratio
+        self.fill_results=[]
+
+    @property
+    def time_index(self):
+        """턴 시간의 TimeIndex, 처음 사용할 때 만든다"""
+        if self.__time_index is None:
+            if self.timeline is not None:
+                timestamps=self.timeline.timestamps
+            elif isinstance(self.data, CandleSeries):
+                timestamps=self.data.columns["timestamp"]
+            else:
+                raise UserWarning("time index needs CandleSeries data")
+            self.__time_index=TimeIndex(timestamps, self.unit)
+        return self.__time_index
+
+    def seek(self, date_time):
+        """
+        date_time(한국 시간) 이후(포함)의 첫 번째 턴으로 이동하고 이동한 턴을 반환
+        앞, 뒤 어느 방향으로도 이동할 수 있고 잔고, 보유 자산, 주문장은 그대로 유지된다
+        """
+        if self.is_initialized is not True:
+            raise UserWarning("virtual market is NOT initialized")
+        timestamp=DataConverter.kst_to_utc(DataConverter.to_epoch_min(date_time))
+        turn=self.time_index.seek_row(timestamp)
+        if turn >= self.__get_turn_size():
+            raise UserWarning(f"no data after {date_time}")
+        self.turn_count=turn
+        return turn
+
+    def get_state(self):
+        """
+        잔고, 보유 자산, 턴, 주문장 등 거래 진행 상태, 캔들 데이터는 포함하지 않는다
+        data: 초기화된 기간 확인용 (마켓 목록, 첫 번째 턴 시간, 전체 턴 수)
+        """
+        if self.is_initialized is not True:
+            raise UserWarning("virtual market is NOT initialized")
+        books=None
+        if self.books is not None:
+            books={name: book.get_state() for name, book in self.books.items()}
+        return {
+            "data": self.__get_data_key(),
+            "turn_count": self.turn_count,
+            "balance": self.balance,
+            "asset": self.asset,
+            "commission_ratio": self.commission_ratio,
+            "volume_ratio": self.volume_ratio,
+            "books": books,
+            "fill_results": self.fill_results,
+        }
+
+    def set_state(self, state):
+        """get_state 결과로 상태를 복원, 같은 기간으로 초기화돼 있지 않으면 UserWarning"""
+        if self.is_initialized is not True:
+            raise UserWarning("virtual market is NOT initialized")
+        if tuple(state["data"]) != self.__get_data_key():
+            raise UserWarning(f"data mismatch {state['data']} != {self.__get_data_key()}")
+        self.turn_count=state["turn_count"]
+        self.balance=state["balance"]
+        self.asset=dict(state["asset"])
+        self.commission_ratio=state["commission_ratio"]
+        self.volume_ratio=state["volume_ratio"]
+        self.books=None
+        self.reserved=0.0
+        if state["books"] is not None:
+            self.books={
+                name: OrderBook.from_state(name, orders) for name, orders in state["books"].items()
+            }
+            # 예약 금액은 남은 매수 주문으로 다시 계산한다
+            for book in self.books.values():
+                for order in book.orders.values():
+                    if order.type == "buy":
+                        self.reserved += self.__get_reservation(order.price, order.amount)
+        self.fill_results=list(state["fill_results"])
+
+    def pop_fill_results(self):
+        """주문장에 남아 있던 주문 중 체결이 끝난 주문의 결과 목록을 반환하고 비운다"""
+        results=self.fill_results
+        self.fill_results=[]
+        return results
+
     def get_balance(self):
         """
         현금 포함 모든 자산 정보 제공
@@ -126,14 +271,22 @@ class VirtualMarket:
         # 종목별 현재가격을 세팅
         quote=None
         try:
-            quote={
-                # 현재 turn 수의 마켓 -> Key / 거래 가격 -> Value
-                self.data[self.turn_count]['market']: self.data[self.turn_count]['trade_price']
-            }
+            if self.timeline is None:
+                quote={
+                    # 현재 turn 수의 마켓 -> Key / 거래 가격 -> Value
+                    self.data[self.turn_count]['market']: self.data[self.turn_count]['trade_price']
+                }
+            else:
+                # 마켓마다 현재 턴까지의 마지막 거래 가격
+                quote={}
+                for name in self.timeline.markets:
+                    candle=self.timeline.latest_candle(name, self.turn_count)
+                    if candle is not None:
+                        quote[name]=candle["trade_price"]
             # 
             for name, item in self.asset.items():
                 # name : 마켓 이름 / item[0] : 평균 매입 가격 / item[1] : 수량
-                self.logger.debug(f"asset item: {name}, item price: {item[0]}, amount: {item[1]}")
+                self.logger.debug("asset item: %s, item price: %s, amount: %s", name, item[0], item[1])
         # ? IndexError -> index의 범위를 벗어날 때 반환하는 error
         # ? KeyError -> 딕셔너리 자료구조에서 접근하려는 키값이 없을 대 반환하는 error
         except (KeyError, IndexError) as msg:
@@ -144,15 +297,16 @@ class VirtualMarket:
         # 종목별 현재 가격
         asset_info["quote"] = quote
         # 기준 데이터 시간
-        asset_info["date_time"] = self.data[self.turn_count]["candle_date_time_kst"]
+        asset_info["date_time"] = self.__get_date_time(self.turn_count)
 
         return asset_info
 
+    @Instrumentation.timed("VirtualMarket.handle_request")
     def handle_request(self, request):
         """
         거래 요청을 처리해서 결과 반환
 
-        request: 거래 요청 정보
+        request: 거래 요청 정보, 여러 마켓이면 market에 거래할 마켓 이름(없으면 첫 번째 마켓)
         Returns:
         result:
             {
@@ -160,26 +314,30 @@ class VirtualMarket:
                 "type": 거래 유형 sell, buy, cancel
                 "price": 거래 가격
                 "amount": 거래 수량
-                "state": 거래 상태 requested, done
-                "msg": 거래 결과 메세지
+                "state": 거래 상태 requested, done, rejected
+                "msg": 거래 결과 메세지, rejected면 거부 이유
                 "date_time": 시뮬레이션 모드에서는 데이터 시간
                 "balance": 거래 후 계좌 현금 잔고
             }
+            초기화되지 않았거나 가격 또는 수량이 0이라서 턴만 넘긴 요청은 None
         """
         # 가상 거래소가 초기화 됐는지 확인
         if self.is_initialized is not True:
             self.logger.error("virtual market is NOT initialized")
             return None
-        
+
+        if self.books is not None:
+            return self.__handle_book_request(request)
+
         # 현재 턴의 시간
-        now = self.data[self.turn_count]["candle_date_time_kst"]
+        now = self.__get_date_time(self.turn_count)
         # 다음 턴으로 갱신
         self.turn_count += 1
         # 다음 턴으로 index 세팅
         next_index = self.turn_count
 
         # 다음 턴이 없고, 현재가 마지막 턴이라면
-        if next_index >= len(self.data) - 1:
+        if next_index >= self.__get_turn_size() - 1:
             return {
                 "request": request,
                 "type": request["type"],
@@ -191,10 +349,11 @@ class VirtualMarket:
                 "state": "done",
             }
 
-        # 요청 가격과 수량이 0이라면 거래가 끝났다는 의미
+        # 요청 가격과 수량이 0이라면 거래 없이 턴만 넘긴다, 주문이 아니므로 결과가 없다
         if request["price"] == 0 or request["amount"] == 0:
-            self.logger.warning("turn over")
-            return "error!"
+            # 전략이 거래하지 않는 턴마다 발생하므로 debug 레벨로 남긴다
+            self.logger.debug("turn over")
+            return None
 
         # 실제 요청 type에 따라 요청 처리
         if request["type"] == "buy":
@@ -203,7 +362,7 @@ class VirtualMarket:
             result = self.__handle_sell_request(request, next_index, now)
         else:
             self.logger.warning("invalid type request")
-            result = "error!"
+            result = self.__make_rejected_result(request, "invalid type request", now)
 
         return result
         
@@ -232,15 +391,15 @@ class VirtualMarket:
         # 매수하려는 총 값이 잔고보다 크면 거래 X -> error
         if buy_total_value > self.balance:
             self.logger.info("no money")
-            return "error!"
+            return self.__make_rejected_result(request, "no money", dt)
 
         try:
+            name, candle = self.__get_candle(request, next_index)
             # 만약 요청 가격이 현재 거래하려는 최저가보다 낮다면 거래 X --> error
-            if request["price"] < self.data[next_index]["low_price"]:
+            if candle is None or request["price"] < candle["low_price"]:
                 self.logger.info("not matched")
-                return "error!"
-            
-            name = self.data[next_index]["market"]
+                return self.__make_rejected_result(request, "not matched", dt)
+
             # asset값이 있을경우
             if name in self.asset:
                 # 가격과 수량을 튜플 형식으로 가지고 있음
@@ -275,20 +434,20 @@ class VirtualMarket:
 
         except KeyError as msg:
             self.logger.warning(f"internal error {msg}")
-            return "error!"
+            return self.__make_rejected_result(request, "internal error", dt)
 
     def __handle_sell_request(self, request, next_index, dt):
         old_balance = self.balance
         try:
-            name = self.data[next_index]["market"]
+            name, candle = self.__get_candle(request, next_index)
             if name not in self.asset:
                 self.logger.info("asset empty")
-                return "error!"
+                return self.__make_rejected_result(request, "asset empty", dt)
 
             # 매도할 때는 고가를 기준으로 확인
-            if request["price"] >= self.data[next_index]["high_price"]:
+            if candle is None or request["price"] >= candle["high_price"]:
                 self.logger.info("not matched")
-                return "error!"
+                return self.__make_rejected_result(request, "not matched", dt)
             
             # 매도량
             sell_amount = request["amount"]
@@ -329,19 +488,228 @@ class VirtualMarket:
             }
         except KeyError as msg:
             self.logger.error(f"invalid trading data {msg}")
-            return "error!"
+            return self.__make_rejected_result(request, "internal error", dt)
+
+    def __handle_book_request(self, request):
+        """주문장을 사용할 때의 요청 처리, 취소 요청은 턴을 넘기지 않는다"""
+        if request["type"] == "cancel":
+            return self.__cancel_order(request)
+
+        now = self.__get_date_time(self.turn_count)
+        self.turn_count += 1
+        next_index = self.turn_count
+        if next_index >= self.__get_turn_size() - 1:
+            return {
+                "request": request,
+                "type": request["type"],
+                "price": 0,
+                "amount": 0,
+                "balance": self.balance,
+                "msg": "game-over",
+                "date_time": now,
+                "state": "done",
+            }
+
+        result = None
+        order = None
+        if request["price"] == 0 or request["amount"] == 0:
+            self.logger.debug("turn over")
+        elif request["type"] not in ("buy", "sell"):
+            self.logger.warning("invalid type request")
+            result = self.__make_rejected_result(request, "invalid type request", now)
+        else:
+            try:
+                name, _ = self.__get_candle(request, next_index)
+                order, msg = self.__place_order(request, name)
+                if order is None:
+                    result = self.__make_rejected_result(request, msg, now)
+            except KeyError as msg:
+                self.logger.warning(f"invalid market {msg}")
+                result = self.__make_rejected_result(request, "invalid market", now)
+
+        # 새 주문을 포함해서 주문장 전체를 다음 턴의 캔들로 체결
+        for book in self.books.values():
+            if len(book) == 0:
+                continue
+            self.__match_book(book, next_index, now)
+
+        if order is None:
+            return result
+        # 새 주문의 체결 결과는 요청 결과로 반환한다
+        for index, fill_result in enumerate(self.fill_results):
+            if fill_result["request"] is request:
+                result = self.fill_results.pop(index)
+                break
+        if order.id in self.books[order.market]:
+            return self.__make_order_result(order, "success", "requested", now)
+        return result
+
+    def __place_order(self, request, name):
+        """
+        잔고나 자산을 확인하고 주문장에 주문 추가
+        Returns: (추가된 주문, None), 추가하지 못하면 (None, 거부 이유)
+        """
+        reservation = 0.0
+        if request["type"] == "buy":
+            reservation = self.__get_reservation(request["price"], request["amount"])
+            # 다른 매수 주문에 예약된 금액은 사용할 수 없다
+            if reservation > self.balance - self.reserved:
+                self.logger.info("no money")
+                return None, "no money"
+        elif name not in self.asset:
+            self.logger.info("asset empty")
+            return None, "asset empty"
+
+        book = self.books.get(name)
+        if book is None:
+            book = self.books[name] = OrderBook(name)
+        try:
+            order = book.add(request)
+        except UserWarning as msg:
+            self.logger.warning(msg)
+            return None, "duplicated id"
+        self.reserved += reservation
+        return order, None
+
+    def __match_book(self, book, turn, now):
+        if self.timeline is None:
+            candle = self.data[turn]
+        else:
+            candle = self.timeline.candle(book.market, turn)
+        # 거래가 없었던 시간에는 체결되지 않는다
+        if candle is None:
+            return
+        volume = candle["candle_acc_trade_volume"] * self.volume_ratio
+        filled_orders = book.match(candle["low_price"], candle["high_price"], volume, self.__fill_order)
+        for order in filled_orders:
+            if order.id in book:
+                self.fill_results.append(self.__make_order_result(order, "partially filled", "requested", now))
+            else:
+                self.fill_results.append(self.__make_order_result(order, "success", "done", now))
+
+    def __get_reservation(self, price, amount):
+        """매수 주문에 예약할 금액, 수수료 포함"""
+        return price * amount * (1 + self.commission_ratio)
+
+    def __fill_order(self, order, amount):
+        """
+        주문을 amount 이하로 체결하고 잔고와 자산을 갱신, 실제 체결 수량을 반환
+        매수 주문은 주문을 낼 때 예약한 금액으로 체결하고 체결된 만큼 예약을 푼다
+        """
+        price = order.price
+        name = order.market
+        old_balance = self.balance
+        if order.type == "buy":
+            if amount <= 0:
+                return 0
+            self.reserved = max(self.reserved - self.__get_reservation(price, amount), 0.0)
+            if name in self.asset:
+                asset = self.asset[name]
+                new_amount = round(asset[1] + amount, 6)
+                new_value = (amount * price) + (asset[0] * asset[1])
+                self.asset[name] = (round(new_value / new_amount), new_amount)
+            else:
+                self.asset[name] = (price, amount)
+            self.balance = round(self.balance - price * amount * (1 + self.commission_ratio))
+            self.__print_balance_info("buy", old_balance, self.balance, price * amount)
+            return amount
+
+        if name not in self.asset:
+            return 0
+        amount = min(amount, self.asset[name][1])
+        new_amount = round(self.asset[name][1] - amount, 6)
+        if new_amount > 0:
+            self.asset[name] = (self.asset[name][0], new_amount)
+        else:
+            del self.asset[name]
+        self.balance = round(self.balance + price * amount * (1 - self.commission_ratio))
+        self.__print_balance_info("sell", old_balance, self.balance, price * amount)
+        return amount
+
+    def __cancel_order(self, request):
+        """주문장의 주문 취소, 취소 전까지 체결된 수량을 담은 done 결과 반환"""
+        for book in self.books.values():
+            order = book.cancel(request["id"])
+            if order is not None:
+                if order.type == "buy":
+                    self.reserved = max(self.reserved - self.__get_reservation(order.price, order.amount), 0.0)
+                return self.__make_order_result(
+                    order, "cancelled", "done", self.__get_date_time(self.turn_count)
+                )
+        self.logger.info(f"order not found {request['id']}")
+        return self.__make_rejected_result(request, "order not found", self.__get_date_time(self.turn_count))
+
+    def __make_order_result(self, order, msg, state, now):
+        return {
+            "request": order.request,
+            "type": order.type,
+            "price": order.price,
+            "amount": order.filled,
+            "msg": msg,
+            "balance": self.balance,
+            "state": state,
+            "date_time": now,
+        }
+
+    def __make_rejected_result(self, request, msg, now):
+        """거부된 요청의 결과, 체결된 수량은 0이고 msg는 거부 이유"""
+        return {
+            "request": request,
+            "type": request["type"],
+            "price": request["price"],
+            "amount": 0,
+            "msg": msg,
+            "balance": self.balance,
+            "state": "rejected",
+            "date_time": now,
+        }
+
+    def __get_turn_size(self):
+        """전체 턴 수, 여러 마켓이면 시간 축의 길이"""
+        if self.timeline is None:
+            return len(self.data)
+        return len(self.timeline)
+
+    def __get_data_key(self):
+        """초기화된 데이터 확인용 (마켓 목록, 첫 번째 턴 시간, 전체 턴 수)"""
+        size=self.__get_turn_size()
+        if self.timeline is not None:
+            markets=tuple(self.timeline.markets)
+        else:
+            markets=(self.data[0]["market"],) if size > 0 else ()
+        return (markets, self.__get_date_time(0) if size > 0 else None, size)
+
+    def __get_date_time(self, turn):
+        """turn 시간의 한국 시간 문자열"""
+        if self.timeline is None:
+            return self.data[turn]["candle_date_time_kst"]
+        return self.timeline.date_time(turn)
+
+    def __get_candle(self, request, turn):
+        """
+        요청을 체결할 (마켓 이름, turn 시간의 캔들) 반환
+        여러 마켓이면 요청의 market 마켓, 그 시간에 거래가 없었으면 캔들은 None
+        등록되지 않은 마켓이면 KeyError
+        """
+        if self.timeline is None:
+            candle = self.data[turn]
+            return candle["market"], candle
+        name = request.get("market", self.timeline.markets[0])
+        return name, self.timeline.candle(name, turn)
 
     def __print_balance_info(self, trading_type, old, new, total_asset_value):
-        """현재 잔고 정보 출력"""
+        """현재 잔고 정보 출력, 체결마다 호출되므로 debug 레벨이 꺼져 있으면 메세지를 만들지 않는다"""
+        if not self.logger.isEnabledFor(logging.DEBUG):
+            return
         # 거래 이전 잔고 정보
-        self.logger.debug(f"[Balance] from {old}")
+        self.logger.debug("[Balance] from %s", old)
         # 매수 시
         if trading_type == "buy":
-            self.logger.debug(f"[Balance] - {trading_type}_asset_value {total_asset_value}")
+            self.logger.debug("[Balance] - %s_asset_value %s", trading_type, total_asset_value)
         # 매도 시
         elif trading_type == "sell":
-            self.logger.debug(f"[Balance] + {trading_type}_asset_value {total_asset_value}")
+            self.logger.debug("[Balance] + %s_asset_value %s", trading_type, total_asset_value)
         # 수수료가 반연된 잔고
-        self.logger.debug(f"[Balance] - commission {total_asset_value * self.commission_ratio}")
+        self.logger.debug("[Balance] - commission %s", total_asset_value * self.commission_ratio)
         # 현재 잔고
-        self.logger.debug(f"[Balance] to {new}")
\ No newline at end of file
+        self.logger.debug("[Balance] to %s", new)
\ No newline at end of file
@@ -5,7 +5,7 @@ Trader 모듈을 활용하여 API를 통해 데이터를 받을 때
 실제 거래소의 어떤 API를 사용하든 가능하게끔 구조를 설계한다.
 """
 from typing import List
-from abc import ABCMeta
+from abc import ABCMeta, abstractmethod
 
 class Trader(metaclass=ABCMeta):
     """
@@ -32,9 +32,9 @@ class Trader(metaclass=ABCMeta):
             "type": 거래 유형 sell, buy, cancel
             "price": 거래 가격
             "amount": 거래 수량
-            "msg": 거래 결과메세지 -> success, internal error
+            "msg": 거래 결과메세지 -> success, internal error, rejected면 거부 이유
             "balance": 거래 후 계좌 현금 잔고
-            "state": 거래상태 -> requested, done
+            "state": 거래상태 -> requested, done, rejected
             "date_time": 거래 체결 시간, 시뮬레이션 모드에서는 request의 시간
         }
         """
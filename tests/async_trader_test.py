@@ -0,0 +1,94 @@
+import threading
+import time
+import unittest
+from smtm.async_trader import AsyncTrader
+from smtm.fake_exchange import FakeExchange
+
+
+def make_request(index, request_type="buy", price=1000, amount=1):
+    return {
+        "id": str(index),
+        "type": request_type,
+        "price": price,
+        "amount": amount,
+        "date_time": "2020-05-01T00:40:00",
+    }
+
+
+class AsyncTraderTests(unittest.TestCase):
+    def setUp(self):
+        self.results = []
+        self.lock = threading.Lock()
+
+    def tearDown(self):
+        self.trader.stop()
+
+    def callback(self, result):
+        with self.lock:
+            self.results.append(result)
+
+    def test_send_request_return_before_exchange_respond(self):
+        self.trader = AsyncTrader(FakeExchange(budget=100000, latency=0.05))
+
+        start = time.perf_counter()
+        self.trader.send_request([make_request(1)], self.callback)
+
+        self.assertLess(time.perf_counter() - start, 0.05)
+        self.assertTrue(self.trader.wait_idle(2))
+        self.assertEqual([result["state"] for result in self.results], ["requested", "done"])
+        self.assertEqual(self.results[1]["amount"], 1)
+        self.assertEqual(self.results[1]["balance"], 99000)
+        self.assertEqual(len(self.trader.orders), 0)
+
+    def test_send_request_track_many_inflight_orders(self):
+        self.trader = AsyncTrader(FakeExchange(budget=10000000, latency=0.001, fill_delay=0.01))
+
+        self.trader.send_request([make_request(index) for index in range(500)], self.callback)
+
+        self.assertTrue(self.trader.wait_idle(5))
+        done = [result for result in self.results if result["state"] == "done"]
+        self.assertEqual(len(done), 500)
+        self.assertEqual(self.trader.get_latency_stats()["count"], 500)
+        self.assertEqual(self.trader.get_account_info()["asset"]["KRW-BTC"][1], 500)
+
+    def test_cancel_request_before_fill(self):
+        self.trader = AsyncTrader(FakeExchange(budget=100000, latency=0.001, fill_delay=1))
+        self.trader.send_request([make_request(1), make_request(2)], self.callback)
+        time.sleep(0.05)
+
+        self.trader.cancel_all_requests()
+
+        self.assertTrue(self.trader.wait_idle(2))
+        cancelled = [result for result in self.results if result["type"] == "cancel"]
+        self.assertEqual(len(cancelled), 2)
+        self.assertEqual(cancelled[0]["state"], "done")
+        self.assertEqual(self.trader.get_account_info()["balance"], 100000)
+
+    def test_send_request_report_rejected_request(self):
+        self.trader = AsyncTrader(FakeExchange(budget=100000))
+
+        self.trader.send_request([make_request(1, price=0)], self.callback)
+
+        self.assertTrue(self.trader.wait_idle(2))
+        self.assertEqual(len(self.results), 1)
+        self.assertEqual(self.results[0]["state"], "rejected")
+        self.assertEqual(self.results[0]["msg"], "invalid price or amount")
+        self.assertEqual(self.trader.order_manager.get("1").state, "rejected")
+
+    def test_send_request_reject_duplicated_id(self):
+        self.trader = AsyncTrader(FakeExchange(budget=100000, latency=0.001, fill_delay=1))
+
+        self.trader.send_request([make_request(1), make_request(1, price=2000)], self.callback)
+
+        # 중복 요청은 거래소에 보내지 않고 바로 거부하며, 처리 중인 주문을 덮어쓰지 않는다
+        # 첫 요청의 접수 결과가 event loop thread에서 먼저 올 수 있으므로 순서가 아닌 msg로 찾는다
+        rejected = [result for result in list(self.results) if result["msg"] == "duplicated id"]
+        self.assertEqual(len(rejected), 1)
+        self.assertEqual(rejected[0]["state"], "rejected")
+        self.assertEqual(rejected[0]["request"]["price"], 2000)
+        self.assertEqual(len(self.trader.orders), 1)
+        self.assertEqual(self.trader.orders["1"]["request"]["price"], 1000)
+        time.sleep(0.05)
+        self.trader.cancel_all_requests()
+        self.assertTrue(self.trader.wait_idle(2))
+        self.assertEqual(self.trader.get_account_info()["balance"], 100000)
@@ -0,0 +1,76 @@
+import unittest
+import numpy as np
+from smtm.backtest_batch import BacktestBatch
+from smtm.candle import CandleSeries
+from smtm.parameter_sweep import ParameterSweep
+from smtm.strategy_bnh import StrategyBuyAndHold
+
+
+def make_columns(size, seed):
+    rng = np.random.default_rng(seed)
+    close = 10000000.0 + np.cumsum(rng.integers(-50, 51, size=size)) * 1000.0
+    return {
+        "timestamp": np.arange(26000000, 26000000 + size, dtype=np.int64),
+        "open": close,
+        # 다음 캔들의 저가가 종가보다 높아서 체결되지 않는 턴이 섞이도록 범위를 만든다
+        "high": close + rng.integers(0, 40, size=size) * 1000.0,
+        "low": close - rng.integers(-20, 40, size=size) * 1000.0,
+        "close": close,
+        "acc_price": close,
+        "acc_volume": np.ones(size),
+    }
+
+
+class BacktestBatchTests(unittest.TestCase):
+    def test_window_return_same_result_as_virtual_market_simulation(self):
+        columns = make_columns(200, 1)
+        batch = BacktestBatch(params={"split_count": 3, "min_price": 5000}, budget=500000)
+
+        for start, stop in [(0, 200), (17, 90), (150, 153)]:
+            result = batch.evaluate(columns, ("window", start, stop))
+
+            window = {name: column[start:stop] for name, column in columns.items()}
+            expected = ParameterSweep.simulate(
+                StrategyBuyAndHold, {"SPLIT_COUNT": 3, "min_price": 5000}, CandleSeries("KRW-BTC", window), 500000
+            )
+            self.assertEqual(result["trade_count"], expected["trade_count"])
+            self.assertEqual(result["final_balance"], expected["final_balance"])
+            self.assertAlmostEqual(result["final_value"], expected["final_value"], places=6)
+            self.assertAlmostEqual(result["max_drawdown"], expected["max_drawdown"], places=12)
+
+    def test_walk_forward_select_best_params_on_train_window(self):
+        columns = make_columns(120, 2)
+        batch = BacktestBatch(param_grid={"split_count": [1, 5]}, budget=500000)
+        specs = BacktestBatch.walk_forward(120, train_size=40, test_size=20)
+
+        self.assertEqual(specs[0], ("walk_forward", 0, 40, 60))
+        self.assertEqual(specs[-1], ("walk_forward", 60, 100, 120))
+        for spec in specs:
+            result = batch.evaluate(columns, spec)
+            train = {name: column[spec[1]:spec[2]] for name, column in columns.items()}
+            returns = [batch.simulate(train, {"split_count": count})["return"] for count in (1, 5)]
+            self.assertEqual(result["params"]["split_count"], 1 if returns[0] >= returns[1] else 5)
+            self.assertEqual(result["start"], spec[2])
+
+    def test_run_aggregate_parallel_results_same_as_serial(self):
+        columns = make_columns(500, 3)
+        batch = BacktestBatch(budget=500000, max_workers=2)
+        specs = BacktestBatch.random_offsets(500, 100, 20, seed=7) + BacktestBatch.bootstrap(
+            20, 300, block_size=30, seed=7
+        )
+
+        report = batch.run(columns, specs)
+
+        expected = [batch.evaluate(columns, spec) for spec in specs]
+        self.assertEqual(report["paths"], expected)
+        summary = report["summary"]
+        self.assertEqual(summary["count"], 40)
+        self.assertLessEqual(summary["return"]["p5"], summary["return"]["p50"])
+        self.assertLessEqual(summary["return"]["p50"], summary["return"]["p95"])
+        self.assertGreaterEqual(summary["max_drawdown"]["min"], 0)
+        # bootstrap 경로는 seed와 경로 번호가 같으면 같고 경로 번호가 다르면 다르다
+        self.assertNotEqual(expected[20]["final_value"], expected[21]["final_value"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,17 @@
+import tempfile
+import unittest
+from benchmarks.run import CASES, BenchmarkData, run_case
+
+
+class BenchmarkTests(unittest.TestCase):
+    def test_run_all_cases_with_small_data(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            data = BenchmarkData(tmp_dir, 50)
+            results = [run_case(name, data, calls=20, memory_calls=5) for name in CASES]
+
+        self.assertEqual([result["case"] for result in results], list(CASES))
+        for result in results:
+            self.assertGreater(result["throughput"], 0)
+            self.assertGreater(result["peak_memory"], 0)
+            self.assertLessEqual(result["latency"]["p50"], result["latency"]["max"])
+        self.assertEqual(results[1]["calls"], 1)
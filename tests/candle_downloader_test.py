@@ -0,0 +1,159 @@
+import json
+import tempfile
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+from smtm.candle_downloader import CandleDownloader
+from smtm.candle_store import CandleStore
+from smtm.date_converter import DataConverter
+
+
+class StubUpbitHandler(BaseHTTPRequestHandler):
+    """업비트 분봉 조회 API를 흉내내는 로컬 서버, 97로 나눠지는 분은 거래가 없는 것으로 처리"""
+
+    requests = []
+    times = []
+    throttle_once = False
+    exhaust_once = False
+    fail_status = None
+
+    def do_GET(self):
+        query = parse_qs(urlparse(self.path).query)
+        to = DataConverter.to_epoch_min(query["to"][0])
+        count = int(query["count"][0])
+        self.requests.append((to, count))
+        self.times.append(time.monotonic())
+
+        if StubUpbitHandler.fail_status is not None:
+            self.send_response(StubUpbitHandler.fail_status)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        if StubUpbitHandler.throttle_once:
+            StubUpbitHandler.throttle_once = False
+            self.send_response(429)
+            self.send_header("Retry-After", "0")
+            self.end_headers()
+            return
+
+        candles = []
+        minute = to - 1
+        while len(candles) < count:
+            if minute % 97 != 0:
+                candles.append({
+                    "market": query["market"][0],
+                    "candle_date_time_utc": DataConverter.from_epoch_min(minute),
+                    "candle_date_time_kst": DataConverter.from_epoch_min(minute + 540),
+                    "opening_price": 1000.0,
+                    "high_price": 1100.0,
+                    "low_price": 900.0,
+                    "trade_price": 1050.0,
+                    "candle_acc_trade_price": 2100.0,
+                    "candle_acc_trade_volume": 2.0,
+                })
+            minute -= 1
+
+        remaining = 9
+        if StubUpbitHandler.exhaust_once:
+            StubUpbitHandler.exhaust_once = False
+            remaining = 0
+        body = json.dumps(candles).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Remaining-Req", f"group=candles; min=600; sec={remaining}")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class CandleDownloaderTests(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), StubUpbitHandler)
+        cls.thread = threading.Thread(target=cls.server.serve_forever, daemon=True)
+        cls.thread.start()
+        cls.url = f"http://127.0.0.1:{cls.server.server_port}/v1/candles/minutes/1"
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        StubUpbitHandler.requests = []
+        StubUpbitHandler.times = []
+        StubUpbitHandler.throttle_once = False
+        StubUpbitHandler.exhaust_once = False
+        StubUpbitHandler.fail_status = None
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.store = CandleStore(root=self.tmp_dir.name)
+        self.downloader = CandleDownloader(
+            store=self.store, url=self.url, max_workers=4, max_rate=0, backoff=0.01
+        )
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_download_split_range_and_merge_sorted_candles(self):
+        result = self.downloader.download("200220-200221")
+
+        self.assertEqual(result["pages"], 8)
+        self.assertEqual(result["start"], "2020-02-20T00:00:00")
+        self.assertEqual(result["end"], "2020-02-21T00:00:00")
+        columns = self.store.read_columns("KRW-BTC")
+        timestamp = columns["timestamp"]
+        self.assertTrue((timestamp[1:] > timestamp[:-1]).all())
+        missing = sum(gap[1] for gap in result["gaps"])
+        self.assertEqual(result["count"] + missing, 1440)
+        self.assertEqual(len(timestamp), result["count"])
+        self.assertTrue(all(gap[1] == 1 for gap in result["gaps"]))
+
+    def test_download_retry_after_rate_limit_response(self):
+        StubUpbitHandler.throttle_once = True
+        result = self.downloader.download("200220.000000-200220.010000")
+
+        self.assertEqual(result["pages"], 1)
+        self.assertEqual(len(StubUpbitHandler.requests), 2)
+        self.assertEqual(self.downloader.client.throttled_count, 1)
+        self.assertGreater(result["count"], 0)
+
+    def test_download_pause_all_requests_when_no_remaining_request(self):
+        StubUpbitHandler.exhaust_once = True
+        downloader = CandleDownloader(store=self.store, url=self.url, max_workers=1, max_rate=0)
+
+        result = downloader.download("200220.000000-200220.100000")
+
+        # max_rate로 제한하지 않아도 sec=0 을 받으면 그 초가 끝날 때까지 요청하지 않는다
+        times = StubUpbitHandler.times
+        self.assertEqual(result["pages"], 3)
+        self.assertGreaterEqual(times[1] - times[0], CandleDownloader.PAUSE_SEC * 0.9)
+        self.assertLess(times[2] - times[1], CandleDownloader.PAUSE_SEC * 0.5)
+
+    def test_download_resume_only_missing_range(self):
+        self.downloader.download("200220.000000-200220.100000")
+        StubUpbitHandler.requests = []
+
+        result = self.downloader.download("200220.000000-200220.120000")
+
+        self.assertEqual(result["pages"], 1)
+        self.assertEqual(
+            StubUpbitHandler.requests,
+            [(DataConverter.to_epoch_min("2020-02-20T12:00:00"), 120)],
+        )
+
+    def test_download_stop_remaining_pages_when_page_fail(self):
+        StubUpbitHandler.fail_status = 404
+        downloader = CandleDownloader(store=self.store, url=self.url, max_workers=1, max_rate=0, backoff=0.01)
+
+        with self.assertRaises(UserWarning):
+            downloader.download("200220-200221")
+
+        # 8개 구간 중 실패한 뒤의 구간은 요청하지 않는다
+        self.assertLessEqual(len(StubUpbitHandler.requests), 2)
+        self.assertEqual(len(self.store.read_columns("KRW-BTC")["timestamp"]), 0)
@@ -0,0 +1,152 @@
+import os
+import tempfile
+import unittest
+import numpy as np
+from smtm.candle_resampler import CandleResampler
+from smtm.candle_store import CandleStore
+from smtm.date_converter import DataConverter
+from smtm import SimulationDataProvider
+
+
+class SkipFetcher:
+    """3의 배수 분에는 거래가 없는 가짜 fetcher, 업비트처럼 거래가 없는 분을 건너뛰고 count개를 반환"""
+
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, market, to, count):
+        self.calls.append((market, to, count))
+        stop = DataConverter.to_epoch_min(to)
+        candles = []
+        minute = stop
+        while len(candles) < count:
+            minute -= 1
+            if minute % 3 == 0:
+                continue
+            price = float(minute % 1000) * 1000
+            candles.append({
+                "market": market,
+                "candle_date_time_utc": DataConverter.from_epoch_min(minute),
+                "candle_date_time_kst": DataConverter.from_epoch_min(minute + 540),
+                "opening_price": price,
+                "high_price": price + 500 + minute % 7,
+                "low_price": price - 500 - minute % 5,
+                "trade_price": price + 100,
+                "candle_acc_trade_price": price * 2,
+                "candle_acc_trade_volume": 2.0,
+            })
+        return candles
+
+
+def naive_resample(columns, unit):
+    groups = {}
+    for index, timestamp in enumerate(columns["timestamp"].tolist()):
+        groups.setdefault(timestamp // unit * unit, []).append(index)
+    result = {name: [] for name in columns}
+    for bucket, indexes in sorted(groups.items()):
+        result["timestamp"].append(bucket)
+        result["open"].append(columns["open"][indexes[0]])
+        result["close"].append(columns["close"][indexes[-1]])
+        result["high"].append(max(columns["high"][indexes]))
+        result["low"].append(min(columns["low"][indexes]))
+        result["acc_price"].append(sum(columns["acc_price"][indexes]))
+        result["acc_volume"].append(sum(columns["acc_volume"][indexes]))
+    return {name: np.array(values) for name, values in result.items()}
+
+
+class CandleResamplerTests(unittest.TestCase):
+    def test_resample_same_as_naive_grouping(self):
+        candles = SkipFetcher()("KRW-BTC", "2020-04-30T16:30:00Z", 200)
+        columns = CandleStore.from_upbit_candles(list(reversed(candles)))
+
+        for unit in (3, 5, 60, 1440):
+            result = CandleResampler.resample(columns, unit)
+            expected = naive_resample(columns, unit)
+            for name in CandleResampler.resample(columns, 1):
+                np.testing.assert_array_equal(result[name], expected[name])
+
+    def test_resample_reject_not_supported_unit(self):
+        with self.assertRaises(UserWarning):
+            CandleResampler.resample({"timestamp": np.zeros(0)}, 7)
+
+
+class CandleStoreRollupTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.fetcher = SkipFetcher()
+        self.store = CandleStore(root=self.tmp_dir.name, fetcher=self.fetcher)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_load_columns_persist_rollup_and_fetch_minutes_only(self):
+        columns = self.store.load_columns("KRW-BTC", "2020-04-30T16:32:00", 10, unit=5)
+
+        # 16:30 묶음은 끝나지 않았으므로 15:40 ~ 16:25 묶음
+        self.assertEqual(len(columns["timestamp"]), 10)
+        self.assertEqual(DataConverter.from_epoch_min(int(columns["timestamp"][0])), "2020-04-30T15:40:00")
+        self.assertEqual(self.fetcher.calls, [("KRW-BTC", "2020-04-30T16:30:00Z", 50)])
+        self.assertEqual(self.store.rollup_units("KRW-BTC"), [5])
+
+        start, stop = CandleStore.to_range("2020-04-30T16:32:00", 10, 5)
+        expected = CandleResampler.resample(self.store.read_columns("KRW-BTC", start, stop), 5)
+        for name in CandleStore.COLUMNS:
+            np.testing.assert_array_equal(columns[name], expected[name])
+
+    def test_rollup_updated_with_new_minutes(self):
+        self.store.load_columns("KRW-BTC", "2020-04-30T16:30:00", 4, unit=15)
+        rollup_path = os.path.join(self.tmp_dir.name, "KRW-BTC", "rollup", "15")
+
+        # 마지막 묶음 일부와 새 묶음의 분봉이 들어온다
+        self.store.load_columns("KRW-BTC", "2020-04-30T16:40:00", 10)
+        self.assertTrue(os.path.exists(os.path.join(rollup_path, "dirty.npy")))
+
+        columns = self.store.read_rollup("KRW-BTC", 15)
+
+        self.assertFalse(os.path.exists(os.path.join(rollup_path, "dirty.npy")))
+        expected = CandleResampler.resample(self.store.read_columns("KRW-BTC"), 15)
+        for name in CandleStore.COLUMNS:
+            np.testing.assert_array_equal(columns[name], expected[name])
+        last = DataConverter.to_epoch_min("2020-04-30T16:30:00")
+        self.assertEqual(int(columns["timestamp"][-1]), last)
+
+    def test_rollup_not_duplicate_bucket_of_dirty_ranges_in_same_bucket(self):
+        def make_columns(minute):
+            price = 1000.0 + minute
+            return {
+                "timestamp": np.array([minute], dtype=np.int64),
+                "open": np.array([price]),
+                "high": np.array([price]),
+                "low": np.array([price]),
+                "close": np.array([price]),
+                "acc_price": np.array([price]),
+                "acc_volume": np.array([1.0]),
+            }
+
+        self.store.put_columns("KRW-BTC", make_columns(0))
+        self.store.read_rollup("KRW-BTC", 5)
+        # 같은 묶음 안의 떨어진 dirty 구간 [1, 2), [3, 4)와 다음 묶음의 구간
+        for minute in (1, 3, 5):
+            self.store.put_columns("KRW-BTC", make_columns(minute))
+
+        columns = self.store.read_rollup("KRW-BTC", 5)
+
+        self.assertEqual(columns["timestamp"].tolist(), [0, 5])
+        self.assertEqual(columns["close"].tolist(), [1003.0, 1005.0])
+        self.assertEqual(columns["acc_volume"].tolist(), [3.0, 1.0])
+
+    def test_simulation_data_provider_serve_rollup(self):
+        provider = SimulationDataProvider(store=self.store)
+        provider.initialize_simulation(end="2020-04-30T16:30:00", count=6, batch_size=4, unit=60)
+
+        infos = []
+        while True:
+            info = provider.get_info()
+            if info is None:
+                break
+            infos.append(info)
+
+        self.assertEqual(len(infos), 6)
+        self.assertEqual(infos[0]["date_time"], "2020-04-30T19:00:00")
+        self.assertEqual(infos[-1]["date_time"], "2020-05-01T00:00:00")
+        self.assertEqual(infos[0]["acc_volume"], 2.0 * 40)
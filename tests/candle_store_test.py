@@ -0,0 +1,103 @@
+import tempfile
+import unittest
+import numpy as np
+from smtm.candle_store import CandleStore
+from smtm.date_converter import DataConverter
+from smtm import SimulationDataProvider
+from smtm.virtual_market import VirtualMarket
+
+
+class FakeFetcher:
+    """업비트 응답과 같은 형식(최신순)으로 1분마다 캔들을 만들어주는 가짜 fetcher"""
+
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, market, to, count):
+        self.calls.append((market, to, count))
+        stop = DataConverter.to_epoch_min(to)
+        candles = []
+        for minute in range(stop - 1, stop - 1 - count, -1):
+            price = float(minute % 1000) * 1000
+            candles.append({
+                "market": market,
+                "candle_date_time_utc": DataConverter.from_epoch_min(minute),
+                "candle_date_time_kst": DataConverter.from_epoch_min(minute + 540),
+                "opening_price": price,
+                "high_price": price + 500,
+                "low_price": price - 500,
+                "trade_price": price + 100,
+                "candle_acc_trade_price": price * 2,
+                "candle_acc_trade_volume": 2.0,
+            })
+        return candles
+
+
+class CandleStoreTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.fetcher = FakeFetcher()
+        self.store = CandleStore(root=self.tmp_dir.name, fetcher=self.fetcher, page_size=200)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_get_candles_return_sorted_upbit_candles(self):
+        candles = self.store.get_candles("KRW-BTC", "2020-04-30T16:30:00", 50)
+
+        self.assertEqual(len(candles), 50)
+        self.assertEqual(candles[0]["candle_date_time_utc"], "2020-04-30T15:40:00")
+        self.assertEqual(candles[0]["candle_date_time_kst"], "2020-05-01T00:40:00")
+        self.assertEqual(candles[-1]["candle_date_time_utc"], "2020-04-30T16:29:00")
+        self.assertEqual(candles[0]["market"], "KRW-BTC")
+        self.assertEqual(self.fetcher.calls, [("KRW-BTC", "2020-04-30T16:30:00Z", 50)])
+
+    def test_get_candles_use_stored_data_without_fetch(self):
+        first = self.store.get_candles("KRW-BTC", "2020-04-30T16:30:00", 50)
+        second = self.store.get_candles("KRW-BTC", "2020-04-30T16:20:00", 30)
+
+        self.assertEqual(len(self.fetcher.calls), 1)
+        self.assertEqual(second, first[10:40])
+
+    def test_get_candles_fetch_only_missing_range(self):
+        self.store.get_candles("KRW-BTC", "2020-04-30T16:30:00", 50)
+        candles = self.store.get_candles("KRW-BTC", "2020-04-30T16:40:00", 60)
+
+        self.assertEqual(len(candles), 60)
+        self.assertEqual(self.fetcher.calls[1], ("KRW-BTC", "2020-04-30T16:40:00Z", 10))
+
+    def test_get_candles_split_request_by_page_size(self):
+        candles = self.store.get_candles("KRW-BTC", "2020-04-30T16:30:00", 450)
+
+        self.assertEqual(len(candles), 450)
+        self.assertEqual([call[2] for call in self.fetcher.calls], [200, 200, 50])
+
+    def test_get_candles_not_cover_forming_minute(self):
+        now = DataConverter.now_epoch_min()
+        end = DataConverter.from_epoch_min(now + 1)
+        self.store.get_candles("KRW-BTC", end, 5)
+
+        # 끝나지 않은 현재 분은 다시 받아와야 한다
+        self.assertEqual(self.store.missing_ranges("KRW-BTC", now - 4, now + 1), [(now, now + 1)])
+        self.store.get_candles("KRW-BTC", end, 5)
+        self.assertEqual(self.fetcher.calls[1], ("KRW-BTC", end + "Z", 1))
+
+    def test_load_columns_return_memory_mapped_arrays(self):
+        self.store.get_candles("KRW-BTC", "2020-04-30T16:30:00", 50)
+        columns = self.store.read_columns("KRW-BTC")
+
+        self.assertEqual(columns["timestamp"].dtype, np.int64)
+        self.assertIsInstance(columns["close"], np.memmap)
+        self.assertEqual(len(columns["close"]), 50)
+
+    def test_simulation_data_provider_and_virtual_market_share_store(self):
+        dp = SimulationDataProvider(store=self.store)
+        dp.initialize_simulation(end="2020-04-30T16:30:00", count=50)
+        market = VirtualMarket(store=self.store)
+        market.initialize("2020-05-01T01:30:00", 50, 100000)
+
+        self.assertEqual(len(self.fetcher.calls), 1)
+        self.assertEqual(market.data, dp.data)
+        info = dp.get_info()
+        self.assertEqual(info["date_time"], "2020-05-01T00:40:00")
+        self.assertEqual(info["closing_price"], dp.data[0]["trade_price"])
@@ -0,0 +1,83 @@
+import copy
+import pickle
+import unittest
+import numpy as np
+from smtm.candle import Candle, CandleSeries
+
+
+class CandleSeriesTests(unittest.TestCase):
+    def setUp(self):
+        self.upbit_candles = [
+            {
+                "market": "KRW-BTC",
+                "candle_date_time_utc": "2020-04-30T15:40:00",
+                "candle_date_time_kst": "2020-05-01T00:40:00",
+                "opening_price": 10662000.0,
+                "high_price": 10676000.0,
+                "low_price": 10662000.0,
+                "trade_price": 10675000.0,
+                "candle_acc_trade_price": 3411043.24676,
+                "candle_acc_trade_volume": 0.31962699,
+            },
+            {
+                "market": "KRW-BTC",
+                "candle_date_time_utc": "2020-04-30T15:41:00",
+                "candle_date_time_kst": "2020-05-01T00:41:00",
+                "opening_price": 10675000.0,
+                "high_price": 10676000.0,
+                "low_price": 10675000.0,
+                "trade_price": 10676000.0,
+                "candle_acc_trade_price": 5225724.98887,
+                "candle_acc_trade_volume": 0.48951155,
+            },
+        ]
+        self.series = CandleSeries.from_upbit_candles("KRW-BTC", self.upbit_candles)
+
+    def test_candle_support_get_info_keys(self):
+        candle = self.series[0]
+
+        self.assertEqual(
+            dict(candle),
+            {
+                "market": "KRW-BTC",
+                "date_time": "2020-05-01T00:40:00",
+                "opening_price": 10662000.0,
+                "high_price": 10676000.0,
+                "low_price": 10662000.0,
+                "closing_price": 10675000.0,
+                "acc_price": 3411043.24676,
+                "acc_volume": 0.31962699,
+            },
+        )
+        self.assertTrue("closing_price" in candle)
+        self.assertEqual(candle.get("unknown"), None)
+
+    def test_candle_support_upbit_keys(self):
+        candle = self.series[1]
+
+        for key, value in self.upbit_candles[1].items():
+            self.assertEqual(candle[key], value)
+        self.assertEqual(self.series.to_upbit_candles(), self.upbit_candles)
+
+    def test_candle_copy_and_pickle(self):
+        candle = self.series[0]
+
+        self.assertIs(copy.deepcopy(candle), candle)
+        self.assertEqual(pickle.loads(pickle.dumps(candle)), candle)
+        self.assertNotIsInstance(candle, dict)
+        self.assertFalse(hasattr(candle, "__dict__"))
+
+    def test_series_slice_share_columns(self):
+        part = self.series[1:]
+
+        self.assertEqual(len(part), 1)
+        self.assertTrue(np.shares_memory(part.columns["close"], self.series.columns["close"]))
+        self.assertEqual(part[0], self.series[1])
+        self.assertEqual([candle["date_time"] for candle in self.series],
+                         ["2020-05-01T00:40:00", "2020-05-01T00:41:00"])
+
+    def test_series_use_56_bytes_per_candle(self):
+        size = sum(column.itemsize for column in self.series.columns.values())
+
+        self.assertEqual(size, 56)
+        self.assertIsInstance(Candle.__slots__, tuple)
@@ -0,0 +1,46 @@
+import unittest
+import numpy as np
+from smtm.date_converter import DataConverter
+
+
+class DataConverterTests(unittest.TestCase):
+    def test_epoch_min_array_round_trip_same_as_scalar_conversion(self):
+        epoch_mins = np.random.default_rng(1).integers(-1000000, 60000000, size=5000)
+        # 윤년, 세기 경계(2000-02-29, 2100-03-01)
+        epoch_mins = np.concatenate((epoch_mins, [11016 * 1440 + 1439, 47541 * 1440, 0, -1]))
+
+        strings = DataConverter.from_epoch_min_array(epoch_mins)
+
+        self.assertEqual(strings.tolist(), [DataConverter.from_epoch_min(value) for value in epoch_mins])
+        np.testing.assert_array_equal(DataConverter.to_epoch_min_array(strings.tolist()), epoch_mins)
+        np.testing.assert_array_equal(DataConverter.to_epoch_min_array(strings), epoch_mins)
+
+    def test_to_epoch_min_array_handle_other_formats(self):
+        values = ["2020-04-30T16:30:00Z", "2020-04-30 16:31:59", "2020-04-30T16:32"]
+
+        result = DataConverter.to_epoch_min_array(values)
+
+        self.assertEqual(result.tolist(), [26471070, 26471071, 26471072])
+        self.assertEqual(DataConverter.to_epoch_min_array([]).tolist(), [])
+        with self.assertRaises(ValueError):
+            DataConverter.to_epoch_min_array(["2020-13-30T16:30:00"])
+
+    def test_to_epoch_min_array_reject_invalid_day_and_second(self):
+        for value in ("2021-02-30T00:00:00", "2021-02-29T00:00:00", "2021-04-31T00:00:00", "2020-04-30T16:30:99"):
+            with self.subTest(value=value):
+                with self.assertRaises(ValueError):
+                    DataConverter.to_epoch_min_array([value])
+                with self.assertRaises(ValueError):
+                    DataConverter.to_epoch_min_array(np.array([value]))
+
+        result = DataConverter.to_epoch_min_array(["2020-02-29T00:00:00", "2000-02-29T00:00:59"])
+        self.assertEqual(result.tolist(), [DataConverter.to_epoch_min("2020-02-29T00:00:00"), 11016 * 1440])
+
+    def test_kst_utc_shift(self):
+        kst = DataConverter.to_epoch_min_array(["2020-04-30T09:10:00", "2020-05-01T00:00:00"])
+
+        utc = DataConverter.kst_to_utc(kst)
+
+        self.assertEqual(DataConverter.from_epoch_min_array(utc).tolist(), ["2020-04-30T00:10:00", "2020-04-30T15:00:00"])
+        np.testing.assert_array_equal(DataConverter.utc_to_kst(utc), kst)
+        self.assertEqual(DataConverter.from_kst_to_utc_str("2020-04-30T09:10:30"), "2020-04-30T00:10:30")
@@ -0,0 +1,135 @@
+import tempfile
+import threading
+import time
+import unittest
+from smtm import SimulationDataProvider
+from smtm.candle_store import CandleStore
+from smtm.date_converter import DataConverter
+from smtm.event_operator import Operator
+from smtm.trade_journal import TradeJournal
+from smtm.simulation_trader import SimulationTrader
+from smtm.strategy_bnh import StrategyBuyAndHold
+
+
+class FlatFetcher:
+    """가격이 10000으로 일정한 캔들을 업비트 응답 형식(최신순)으로 만들어주는 가짜 fetcher"""
+
+    def __call__(self, market, to, count):
+        stop = DataConverter.to_epoch_min(to)
+        return [
+            {
+                "market": market,
+                "candle_date_time_utc": DataConverter.from_epoch_min(minute),
+                "candle_date_time_kst": DataConverter.from_epoch_min(minute + 540),
+                "opening_price": 10000.0,
+                "high_price": 10500.0,
+                "low_price": 9500.0,
+                "trade_price": 10000.0,
+                "candle_acc_trade_price": 10000.0,
+                "candle_acc_trade_volume": 1.0,
+            }
+            for minute in range(stop - 1, stop - 1 - count, -1)
+        ]
+
+
+class ListDataProvider:
+    def __init__(self, size):
+        self.infos = [
+            {"market": "KRW-BTC", "date_time": f"2020-04-30T00:{minute:02d}:00", "closing_price": 100}
+            for minute in range(size)
+        ]
+
+    def get_info(self):
+        if len(self.infos) == 0:
+            return None
+        return self.infos.pop(0)
+
+
+class RecordingStrategy:
+    def __init__(self):
+        self.events = []
+        self.result_threads = set()
+
+    def update_trading_info(self, info):
+        self.events.append(("info", info["date_time"]))
+
+    def get_request(self):
+        date_time = self.events[-1][1]
+        return [{"id": date_time, "type": "buy", "price": 100, "amount": 1, "date_time": date_time}]
+
+    def update_result(self, result):
+        self.result_threads.add(threading.get_ident())
+        self.events.append(("result", result["date_time"]))
+
+
+class ThreadTrader:
+    """다른 thread에서 delay 초 후에 결과를 전달하는 가짜 Trader"""
+
+    def __init__(self, delay):
+        self.delay = delay
+
+    def send_request(self, request_list, callback):
+        for request in request_list:
+            result = dict(request, request=request, msg="success", state="done", balance=0)
+            threading.Timer(self.delay, callback, args=(result,)).start()
+
+
+class OperatorTests(unittest.TestCase):
+    def test_run_simulation_with_bnh_strategy(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            store = CandleStore(root=tmp_dir, fetcher=FlatFetcher())
+            data_provider = SimulationDataProvider(store=store)
+            data_provider.initialize_simulation(end="2020-04-30T00:20:00", count=20)
+            trader = SimulationTrader(store=store)
+            trader.initialize_simulation(end="2020-04-30T09:20:00", count=20, budget=500000)
+            strategy = StrategyBuyAndHold()
+            strategy.is_simulation = True
+            strategy.initialize(500000)
+
+            journal = TradeJournal(f"{tmp_dir}/journal.bin")
+
+            report = Operator(data_provider, strategy, trader, journal=journal).run()
+            restored = journal.restore_market(SimulationTrader(store=store).market)
+
+        # 마지막 두 턴은 거래할 수 없고, 19번째 턴의 요청에 game-over 결과를 받는다
+        self.assertEqual(report["turn_count"], 19)
+        self.assertEqual(strategy.result.summary["buy_count"], 5)
+        self.assertEqual(strategy.result[-1]["msg"], "game-over")
+        self.assertEqual(strategy.balance, trader.market.balance)
+        self.assertEqual(trader.market.asset["KRW-BTC"][1], 40)
+        self.assertEqual(report["timing"]["strategy"]["count"], 19)
+        self.assertEqual(restored.balance, trader.market.balance)
+        self.assertEqual(restored.asset, trader.market.asset)
+        self.assertGreater(report["turns_per_sec"], 0)
+
+    def test_run_deliver_result_before_next_candle(self):
+        strategy = RecordingStrategy()
+        operator = Operator(ListDataProvider(3), strategy, ThreadTrader(delay=0.01), interval=0.05)
+
+        start = time.perf_counter()
+        operator.start()
+        operator.thread.join(2)
+
+        self.assertGreaterEqual(time.perf_counter() - start, 0.1)
+        self.assertEqual(
+            strategy.events,
+            [
+                ("info", "2020-04-30T00:00:00"),
+                ("result", "2020-04-30T00:00:00"),
+                ("info", "2020-04-30T00:01:00"),
+                ("result", "2020-04-30T00:01:00"),
+                ("info", "2020-04-30T00:02:00"),
+            ],
+        )
+        self.assertEqual(strategy.result_threads, {operator.thread.ident})
+        self.assertEqual(operator.state, "terminated")
+
+    def test_run_stop_after_max_turns(self):
+        strategy = RecordingStrategy()
+        operator = Operator(ListDataProvider(10), strategy, ThreadTrader(delay=0))
+
+        report = operator.run(max_turns=4)
+
+        self.assertEqual(report["turn_count"], 4)
+        self.assertEqual(strategy.events.count(("info", "2020-04-30T00:03:00")), 1)
+        self.assertNotIn(("info", "2020-04-30T00:04:00"), strategy.events)
@@ -0,0 +1,90 @@
+import time
+import unittest
+from smtm.http_client import HttpClient, SessionPool, TokenBucket
+from smtm.mock_exchange_server import MockExchangeServer
+from smtm.upbit_trader import UpbitSigner
+
+
+class TokenBucketTests(unittest.TestCase):
+    def test_acquire_wait_when_tokens_run_out(self):
+        bucket = TokenBucket(rate=100, capacity=5)
+
+        start = time.perf_counter()
+        for _ in range(15):
+            bucket.acquire()
+        elapsed = time.perf_counter() - start
+
+        # 처음 5개는 바로, 나머지 10개는 초당 100개씩 채워진다
+        self.assertGreaterEqual(elapsed, 0.09)
+        self.assertFalse(bucket.try_acquire())
+
+    def test_drain_remove_remaining_tokens(self):
+        bucket = TokenBucket(rate=1, capacity=10)
+        bucket.drain()
+
+        self.assertFalse(bucket.try_acquire())
+
+
+class HttpClientTests(unittest.TestCase):
+    def setUp(self):
+        self.exchange = MockExchangeServer().start()
+        self.client = HttpClient(self.exchange.url, pool=SessionPool(2), backoff=0.01)
+
+    def tearDown(self):
+        self.client.close()
+        self.exchange.stop()
+
+    def get_ticker(self):
+        return self.client.request("GET", "/v1/ticker", params={"markets": "KRW-BTC"}, group="default")
+
+    def test_request_reuse_keep_alive_session(self):
+        for _ in range(5):
+            self.assertEqual(self.get_ticker().json(), [{"market": "KRW-BTC", "trade_price": 10000}])
+
+        self.assertEqual(self.client.pool.created, 1)
+        self.assertEqual(self.client.latency.count, 5)
+
+    def test_request_retry_rate_limited_response(self):
+        self.client.limits["default"] = TokenBucket(1000)
+        self.exchange.throttle(2)
+
+        response = self.get_ticker()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.client.retry_count, 2)
+        self.assertEqual(self.client.throttled_count, 2)
+        self.assertEqual(self.exchange.request_count, 3)
+
+    def test_request_return_last_response_after_retries(self):
+        self.client.retries = 2
+        self.exchange.throttle(5)
+
+        response = self.get_ticker()
+
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(self.exchange.request_count, 3)
+
+    def test_request_not_retry_server_error_of_not_idempotent_request(self):
+        self.exchange.fail_orders(3)
+        query = {"side": "bid", "price": "1000", "volume": "1", "identifier": "1"}
+        headers = UpbitSigner("access", "secret").authorization(query)
+
+        response = self.client.request("POST", "/v1/orders", json=query, headers=headers, idempotent=False)
+
+        self.assertEqual(response.status_code, 500)
+        self.assertEqual(self.client.retry_count, 0)
+        self.assertEqual(self.exchange.request_count, 1)
+
+    def test_request_raise_user_warning_when_connection_fail(self):
+        client = HttpClient("http://127.0.0.1:1", retries=1, backoff=0.001)
+
+        with self.assertRaises(UserWarning):
+            client.request("GET", "/v1/ticker")
+        self.assertEqual(client.retry_count, 1)
+        client.close()
+
+        client = HttpClient("http://127.0.0.1:1", retries=1, backoff=0.001)
+        with self.assertRaises(UserWarning):
+            client.request("POST", "/v1/orders", idempotent=False)
+        self.assertEqual(client.retry_count, 0)
+        client.close()
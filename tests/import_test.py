@@ -0,0 +1,64 @@
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+CHECK_SCRIPT = """
+import json, sys
+before = set(sys.modules)
+import smtm
+report = {"modules": sorted(name for name in sys.modules if name.startswith("smtm"))}
+report["loaded"] = sorted(set(sys.modules) - before)
+report["requests"] = "requests" in sys.modules
+
+from smtm import LogManager, SimulationDataProvider, StrategyBuyAndHold
+from smtm.virtual_market import VirtualMarket
+from smtm.simulation_trader import SimulationTrader
+report["urllib3"] = "urllib3" in sys.modules
+report["bnh"] = StrategyBuyAndHold.__name__
+report["files_before_log"] = sorted(__import__("os").listdir("."))
+LogManager.get_logger("import-test").warning("first log")
+report["files_after_log"] = sorted(__import__("os").listdir("."))
+print(json.dumps(report))
+"""
+
+
+class ImportTests(unittest.TestCase):
+    def run_check(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            env = dict(os.environ, PYTHONPATH=ROOT)
+            env.pop("SMTM_LOG_FILE", None)
+            output = subprocess.run(
+                [sys.executable, "-c", CHECK_SCRIPT],
+                cwd=tmp_dir,
+                env=env,
+                capture_output=True,
+                text=True,
+                check=True,
+            ).stdout
+        return json.loads(output.splitlines()[-1])
+
+    def test_bare_import_load_nothing_and_touch_no_files(self):
+        report = self.run_check()
+
+        # 시간 대신 불러온 모듈로 확인한다, import smtm은 패키지 모듈 하나만 불러온다
+        self.assertEqual(report["modules"], ["smtm"])
+        self.assertEqual(report["loaded"], ["smtm"])
+        self.assertFalse(report["requests"])
+        # 시뮬레이션 모듈을 불러와도 거래소에 요청하기 전에는 HTTP 모듈을 불러오지 않는다
+        self.assertFalse(report["urllib3"])
+        self.assertEqual(report["bnh"], "StrategyBuyAndHold")
+        self.assertEqual(report["files_before_log"], [])
+        self.assertEqual(report["files_after_log"], ["smtm.log"])
+
+    def test_lazy_attributes(self):
+        import smtm
+
+        self.assertIn("StrategyBuyAndHold", dir(smtm))
+        self.assertIs(smtm.Strategy, __import__("smtm.strategy", fromlist=["Strategy"]).Strategy)
+        with self.assertRaises(AttributeError):
+            smtm.NotExists
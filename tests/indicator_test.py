@@ -0,0 +1,130 @@
+import unittest
+import numpy as np
+from smtm.candle import CandleSeries
+from smtm.indicator import SMA, EMA, RSI, BollingerBands, VWAP, compute_all
+from smtm.strategy_bnh import StrategyBuyAndHold
+
+
+def make_candles(size, seed=7):
+    rng = np.random.default_rng(seed)
+    close = 10000000.0 + np.cumsum(rng.normal(0, 20000, size)).round()
+    volume = rng.uniform(0.1, 5.0, size)
+    return CandleSeries(
+        "KRW-BTC",
+        {
+            "timestamp": np.arange(26000000, 26000000 + size, dtype=np.int64),
+            "open": close,
+            "high": close + 5000,
+            "low": close - 5000,
+            "close": close,
+            "acc_price": close * volume,
+            "acc_volume": volume,
+        },
+    )
+
+
+def make_realistic_candles(size, seed=3):
+    rng = np.random.default_rng(seed)
+    close = 100000000.0 + np.cumsum(rng.normal(0, 50000, size)).round()
+    volume = rng.uniform(0.01, 2.0, size)
+    return CandleSeries(
+        "KRW-BTC",
+        {
+            "timestamp": np.arange(26000000, 26000000 + size, dtype=np.int64),
+            "open": close,
+            "high": close + 5000,
+            "low": close - 5000,
+            "close": close,
+            "acc_price": close * volume,
+            "acc_volume": volume,
+        },
+    )
+
+
+def make_indicators():
+    return {
+        "sma": SMA(20),
+        "ema": EMA(12),
+        "rsi": RSI(14),
+        "bollinger": BollingerBands(20, 2.0),
+        "vwap": VWAP(30),
+        "vwap_all": VWAP(),
+    }
+
+
+def stream(indicator, candles):
+    values = []
+    for candle in candles:
+        value = indicator.update(candle)
+        if value is None:
+            value = (np.nan, np.nan, np.nan) if isinstance(indicator, BollingerBands) else np.nan
+        values.append(value)
+    return np.array(values, dtype=np.float64)
+
+
+class IndicatorTests(unittest.TestCase):
+    def setUp(self):
+        self.candles = make_candles(500)
+
+    def test_streaming_update_equal_batch_compute(self):
+        batch = compute_all(make_indicators(), self.candles)
+        indicators = make_indicators()
+
+        for name, indicator in indicators.items():
+            with self.subTest(name=name):
+                self.assertTrue(np.array_equal(stream(indicator, self.candles), batch[name], equal_nan=True))
+
+    def test_streaming_update_equal_batch_compute_for_any_period(self):
+        for period in [1, 2, 7, 500]:
+            for size in [max(period - 1, 1), period, 3 * period + 1]:
+                candles = self.candles[:size]
+                with self.subTest(period=period, size=size):
+                    for indicator in [SMA(period), BollingerBands(period, 2.0), VWAP(period)]:
+                        batch = type(indicator)(period).compute(candles)
+                        self.assertTrue(np.array_equal(stream(indicator, candles), batch, equal_nan=True))
+
+    def test_values_match_definition(self):
+        close = self.candles.columns["close"]
+
+        sma = SMA(20).compute(self.candles)
+        bands = BollingerBands(20, 2.0).compute(self.candles)
+        rsi = RSI(14).compute(self.candles)
+
+        self.assertTrue(np.isnan(sma[18]))
+        self.assertAlmostEqual(sma[19], close[:20].mean(), places=4)
+        self.assertAlmostEqual(sma[-1], close[-20:].mean(), places=4)
+        self.assertAlmostEqual(bands[-1][2] - bands[-1][1], 2.0 * close[-20:].std(), places=2)
+        self.assertTrue(np.isnan(rsi[13]))
+        self.assertTrue(np.all((rsi[14:] >= 0) & (rsi[14:] <= 100)))
+
+    def test_window_values_keep_precision_over_long_series(self):
+        candles = make_realistic_candles(200000)
+        close = candles.columns["close"]
+        windows = np.lib.stride_tricks.sliding_window_view(close, 20)
+        price_windows = np.lib.stride_tricks.sliding_window_view(candles.columns["acc_price"], 30)
+        volume_windows = np.lib.stride_tricks.sliding_window_view(candles.columns["acc_volume"], 30)
+
+        bands = BollingerBands(20, 2.0).compute(candles)
+        vwap = VWAP(30).compute(candles)
+
+        # 1억 원대 가격에서도 구간마다 직접 계산한 값과 차이가 없어야 한다
+        self.assertLess(np.max(np.abs(bands[19:, 1] - windows.mean(axis=1))), 1e-6)
+        self.assertLess(np.max(np.abs((bands[19:, 2] - bands[19:, 1]) / 2.0 - windows.std(axis=1))), 1e-6)
+        self.assertLess(np.max(np.abs(vwap[29:] - price_windows.sum(axis=1) / volume_windows.sum(axis=1))), 1e-6)
+
+        head = candles[:20000]
+        self.assertTrue(np.array_equal(stream(BollingerBands(20, 2.0), head), bands[:20000], equal_nan=True))
+        self.assertTrue(np.array_equal(stream(VWAP(30), head), vwap[:20000], equal_nan=True))
+
+    def test_strategy_update_subscribed_indicators(self):
+        strategy = StrategyBuyAndHold()
+        strategy.initialize(500000)
+        sma = strategy.subscribe_indicator("sma", SMA(5))
+
+        for candle in self.candles[:10]:
+            strategy.update_trading_info(candle)
+
+        self.assertIs(strategy.indicators["sma"], sma)
+        self.assertEqual(sma.count, 10)
+        self.assertAlmostEqual(sma.value, self.candles.columns["close"][5:10].mean(), places=4)
+
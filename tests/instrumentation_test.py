@@ -0,0 +1,106 @@
+import json
+import os
+import tempfile
+import unittest
+from smtm.instrumentation import Instrumentation, LatencyHistogram
+from smtm.event_operator import Operator
+
+
+class ListDataProvider:
+    def __init__(self, size):
+        self.infos = [
+            {"market": "KRW-BTC", "date_time": f"2020-04-30T00:{minute:02d}:00"}
+            for minute in range(size)
+        ]
+
+    def get_info(self):
+        if len(self.infos) == 0:
+            return None
+        return self.infos.pop(0)
+
+
+class ListStrategy:
+    def __init__(self):
+        self.data = []
+
+    def update_trading_info(self, info):
+        self.data.append(info)
+
+    def get_request(self):
+        return [{"id": "1", "type": "buy", "price": 100, "amount": 1, "date_time": self.data[-1]["date_time"]}]
+
+    def update_result(self, result):
+        pass
+
+
+class EchoTrader:
+    @Instrumentation.timed("EchoTrader.send_request")
+    def send_request(self, request_list, callback):
+        for request in request_list:
+            callback(dict(request, request=request, msg="success", state="done"))
+
+
+class LatencyHistogramTests(unittest.TestCase):
+    def test_percentile_return_value_within_bucket_error(self):
+        histogram = LatencyHistogram()
+        for value in range(1, 1001):
+            histogram.add(value / 1000000)
+
+        result = histogram.to_dict()
+
+        self.assertEqual(result["count"], 1000)
+        self.assertEqual(result["max"], 0.001)
+        self.assertAlmostEqual(result["p50"], 0.0005, delta=0.0005 / LatencyHistogram.SUB_BUCKETS)
+        self.assertAlmostEqual(result["p99"], 0.00099, delta=0.00099 / LatencyHistogram.SUB_BUCKETS)
+        self.assertAlmostEqual(result["mean"], 0.0005005)
+
+    def test_to_dict_sort_zero_before_positive_values(self):
+        histogram = LatencyHistogram()
+        for value in [0, 5, 0, -2, 5, 5]:
+            histogram.add(value)
+
+        result = histogram.to_dict()
+
+        self.assertEqual(result["count"], 6)
+        self.assertEqual(result["min"], -2)
+        self.assertEqual(result["p50"], 0.0)
+        self.assertAlmostEqual(result["p99"], 5, delta=5 / LatencyHistogram.SUB_BUCKETS)
+        self.assertEqual(result["max"], 5)
+
+
+class InstrumentationTests(unittest.TestCase):
+    def tearDown(self):
+        Instrumentation.disable()
+        Instrumentation.reset()
+
+    def test_disabled_instrumentation_record_nothing(self):
+        with Instrumentation.measure("block"):
+            pass
+        EchoTrader().send_request([{"id": "1"}], lambda result: None)
+        Instrumentation.next_turn()
+
+        report = Instrumentation.report()
+
+        self.assertEqual(report["stages"], {})
+        self.assertEqual(report["turn_count"], 0)
+
+    def test_report_stage_histograms_allocations_and_profile_window(self):
+        Instrumentation.enable()
+        Instrumentation.profile_turns(2, 5, use_tracemalloc=True)
+
+        Operator(ListDataProvider(10), ListStrategy(), EchoTrader()).run()
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "report.json")
+            report = Instrumentation.export(path, top=5)
+            with open(path, encoding="utf-8") as file:
+                saved = json.load(file)
+
+        self.assertEqual(report["turn_count"], 10)
+        self.assertEqual(report["stages"]["operator.strategy"]["count"], 10)
+        self.assertEqual(report["stages"]["EchoTrader.send_request"]["count"], 10)
+        self.assertEqual(report["stages"]["operator.data"]["count"], 11)
+        self.assertEqual(report["allocations"]["count"], 10)
+        self.assertIn("event_operator.py", report["profile"])
+        self.assertLessEqual(len(report["tracemalloc"]), 5)
+        self.assertEqual(saved["stages"].keys(), report["stages"].keys())
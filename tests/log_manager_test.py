@@ -0,0 +1,76 @@
+import logging
+import threading
+import unittest
+from smtm import LogManager
+
+
+class RecordingHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.messages = []
+        self.threads = set()
+        self.done = threading.Event()
+
+    def emit(self, record):
+        self.threads.add(threading.get_ident())
+        self.messages.append(self.format(record))
+        self.done.set()
+
+
+class CountingValue:
+    def __init__(self):
+        self.count = 0
+
+    def __str__(self):
+        self.count += 1
+        return "value"
+
+
+class LogManagerTests(unittest.TestCase):
+    def setUp(self):
+        self.handler = RecordingHandler()
+        self.file_handler = LogManager.file_handler
+        self.stream_handler = LogManager.stream_handler
+        LogManager.stream_handler = self.handler
+        LogManager.file_handler = logging.NullHandler()
+
+    def tearDown(self):
+        LogManager.stop_queue()
+        LogManager.set_profile("default")
+        for name in ("queue-test", "profile-test"):
+            logging.getLogger(name).handlers.clear()
+            LogManager.logger_map.pop(name, None)
+        LogManager.stream_handler = self.stream_handler
+        LogManager.file_handler = self.file_handler
+
+    def test_queue_mode_emit_on_background_thread(self):
+        LogManager.start_queue()
+        logger = LogManager.get_logger("queue-test")
+
+        logger.info("price: %s, amount: %s", 1000, 0.5)
+        self.assertTrue(self.handler.done.wait(2))
+        LogManager.stop_queue()
+
+        self.assertEqual(self.handler.messages, ["price: 1000, amount: 0.5"])
+        self.assertNotIn(threading.get_ident(), self.handler.threads)
+        self.assertEqual(logger.handlers, [self.handler, LogManager.file_handler])
+
+    def test_backtest_profile_skip_message_formatting(self):
+        logger = LogManager.get_logger("profile-test")
+        value = CountingValue()
+
+        LogManager.set_profile("backtest")
+        logger.info("value %s", value)
+        logger.debug("value %s", value)
+        self.assertEqual(value.count, 0)
+
+        logger.warning("warning %s", value)
+        self.assertEqual(self.handler.messages, ["warning value"])
+        self.assertFalse(logger.isEnabledFor(logging.INFO))
+
+        LogManager.set_profile("default")
+        self.assertTrue(logger.isEnabledFor(logging.DEBUG))
+
+    def test_set_profile_raise_for_unknown_profile(self):
+        with self.assertRaises(UserWarning):
+            LogManager.set_profile("silent")
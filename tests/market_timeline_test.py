@@ -0,0 +1,118 @@
+import tempfile
+import unittest
+import numpy as np
+from smtm.candle import CandleSeries
+from smtm.candle_store import CandleStore
+from smtm.date_converter import DataConverter
+from smtm.market_timeline import MarketTimeline
+from smtm.virtual_market import VirtualMarket
+
+
+def make_series(market, timestamps, price):
+    timestamps = np.array(timestamps, dtype=np.int64)
+    close = np.full(len(timestamps), float(price))
+    return CandleSeries(
+        market,
+        {
+            "timestamp": timestamps,
+            "open": close,
+            "high": close + 100,
+            "low": close - 100,
+            "close": close + np.arange(len(timestamps)),
+            "acc_price": close,
+            "acc_volume": np.ones(len(timestamps)),
+        },
+    )
+
+
+class GapFetcher:
+    """KRW-ETH는 짝수 분에만 거래가 있는 가짜 fetcher"""
+
+    PRICES = {"KRW-BTC": 10000.0, "KRW-ETH": 1000.0}
+
+    def __call__(self, market, to, count):
+        stop = DataConverter.to_epoch_min(to)
+        candles = []
+        for minute in range(stop - 1, stop - 1 - count, -1):
+            if market == "KRW-ETH" and minute % 2 == 1:
+                continue
+            price = self.PRICES[market]
+            candles.append({
+                "market": market,
+                "candle_date_time_utc": DataConverter.from_epoch_min(minute),
+                "candle_date_time_kst": DataConverter.from_epoch_min(minute + 540),
+                "opening_price": price,
+                "high_price": price + 100,
+                "low_price": price - 100,
+                "trade_price": price,
+                "candle_acc_trade_price": price,
+                "candle_acc_trade_volume": 1.0,
+            })
+        return candles
+
+
+class MarketTimelineTests(unittest.TestCase):
+    def test_timeline_align_markets_by_timestamp(self):
+        timeline = MarketTimeline([
+            make_series("KRW-BTC", [10, 11, 12, 13], 10000),
+            make_series("KRW-ETH", [11, 13, 14], 1000),
+        ])
+
+        self.assertEqual(timeline.timestamps.tolist(), [10, 11, 12, 13, 14])
+        self.assertEqual(timeline.positions.tolist(), [[0, 1, 2, 3, -1], [-1, 0, -1, 1, 2]])
+        self.assertIsNone(timeline.candle("KRW-ETH", 0))
+        self.assertIsNone(timeline.latest_candle("KRW-ETH", 0))
+        self.assertEqual(timeline.latest_candle("KRW-ETH", 2)["closing_price"], 1000)
+        self.assertEqual(timeline.latest_candle("KRW-BTC", 4)["closing_price"], 10003)
+        self.assertEqual([candle["market"] for candle in timeline.candles_at(3)], ["KRW-BTC", "KRW-ETH"])
+        self.assertEqual(timeline.date_time(0), DataConverter.from_epoch_min(10 + 540))
+
+
+class MultiMarketVirtualMarketTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.market = VirtualMarket(store=CandleStore(root=self.tmp_dir.name, fetcher=GapFetcher()))
+        # 2020-04-30T00:00:00(UTC)은 짝수 분
+        self.market.initialize("2020-04-30T09:10:00", 10, 100000, markets=["KRW-BTC", "KRW-ETH"])
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def make_request(self, market, request_type, price, amount):
+        return {"id": "1", "type": request_type, "price": price, "amount": amount, "market": market}
+
+    def test_handle_request_match_each_market_with_shared_balance(self):
+        btc = self.market.handle_request(self.make_request("KRW-BTC", "buy", 10000, 1))
+        eth = self.market.handle_request(self.make_request("KRW-ETH", "buy", 1000, 10))
+
+        self.assertEqual(btc["balance"], 89995)
+        self.assertEqual(eth["balance"], 79990)
+        self.assertEqual(self.market.asset, {"KRW-BTC": (10000, 1), "KRW-ETH": (1000, 10)})
+
+        # 3번 턴(홀수 분)은 거래 없이 넘어간다
+        self.market.handle_request(self.make_request("KRW-ETH", "sell", 0, 0))
+        sell = self.market.handle_request(self.make_request("KRW-ETH", "sell", 1000, 5))
+        self.assertEqual(sell["amount"], 5)
+        self.assertEqual(self.market.asset["KRW-ETH"], (1000, 5.0))
+
+    def test_handle_request_not_matched_when_market_has_no_candle(self):
+        # 첫 번째 요청은 1번 턴(홀수 분)의 캔들로 체결하는데 KRW-ETH는 거래가 없다
+        result = self.market.handle_request(self.make_request("KRW-ETH", "buy", 1000, 1))
+
+        self.assertEqual(result["state"], "rejected")
+        self.assertEqual(result["msg"], "not matched")
+        self.assertEqual(result["amount"], 0)
+        self.assertEqual(self.market.balance, 100000)
+
+    def test_handle_request_reject_unknown_market(self):
+        result = self.market.handle_request(self.make_request("KRW-XRP", "buy", 1000, 1))
+
+        self.assertEqual(result["state"], "rejected")
+
+    def test_get_balance_quote_every_market(self):
+        self.market.handle_request(self.make_request("KRW-BTC", "buy", 0, 0))
+
+        info = self.market.get_balance()
+
+        self.assertEqual(info["quote"], {"KRW-BTC": 10000, "KRW-ETH": 1000})
+        self.assertEqual(info["date_time"], "2020-04-30T09:01:00")
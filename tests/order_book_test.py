@@ -0,0 +1,163 @@
+import unittest
+import numpy as np
+from smtm.candle import CandleSeries
+from smtm.order_book import OrderBook
+from smtm.simulation_trader import SimulationTrader
+from smtm.virtual_market import VirtualMarket
+
+
+def make_request(request_id, request_type, price, amount):
+    return {"id": request_id, "type": request_type, "price": price, "amount": amount, "date_time": "2020-04-30T09:00:00"}
+
+
+def make_candles(lows, highs, volumes):
+    size = len(lows)
+    lows = np.array(lows, dtype=np.float64)
+    highs = np.array(highs, dtype=np.float64)
+    return CandleSeries(
+        "KRW-BTC",
+        {
+            "timestamp": np.arange(26000000, 26000000 + size, dtype=np.int64),
+            "open": lows,
+            "high": highs,
+            "low": lows,
+            "close": highs,
+            "acc_price": highs,
+            "acc_volume": np.array(volumes, dtype=np.float64),
+        },
+    )
+
+
+class FillRecorder:
+    def __init__(self, limit=None):
+        self.fills = []
+        self.limit = limit
+
+    def __call__(self, order, amount):
+        if self.limit is not None:
+            amount = min(amount, self.limit)
+        self.fills.append((order.id, amount))
+        return amount
+
+
+class OrderBookTests(unittest.TestCase):
+    def test_match_fill_by_price_then_time_priority_within_volume(self):
+        book = OrderBook("KRW-BTC")
+        book.add(make_request("low", "buy", 900, 1))
+        book.add(make_request("high", "buy", 1100, 1))
+        book.add(make_request("high-later", "buy", 1100, 1))
+        book.add(make_request("ask", "sell", 1200, 1))
+        recorder = FillRecorder()
+
+        filled = book.match(1000, 1300, 1.5, recorder)
+
+        self.assertEqual(recorder.fills, [("high", 1), ("high-later", 0.5), ("ask", 1)])
+        self.assertEqual([order.id for order in filled], ["high", "high-later", "ask"])
+        self.assertNotIn("high", book)
+        self.assertEqual(book.orders["high-later"].amount, 0.5)
+        self.assertEqual(book.orders["high-later"].filled, 0.5)
+        self.assertEqual(len(book), 2)
+
+    def test_cancel_remove_order_lazily(self):
+        book = OrderBook("KRW-BTC")
+        for index in range(200):
+            book.add(make_request(str(index), "buy", 1000 + index, 1))
+        for index in range(199):
+            self.assertIsNotNone(book.cancel(str(index)))
+        self.assertIsNone(book.cancel("0"))
+        recorder = FillRecorder()
+
+        book.match(0, 0, 10, recorder)
+
+        self.assertEqual(recorder.fills, [("199", 1)])
+        self.assertLess(len(book.bids), 200)
+        self.assertEqual(len(book), 0)
+
+    def test_match_skip_order_without_money(self):
+        book = OrderBook("KRW-BTC")
+        book.add(make_request("big", "buy", 1100, 5))
+        book.add(make_request("small", "buy", 1000, 1))
+        recorder = FillRecorder(limit=1)
+
+        filled = book.match(900, 1300, 10, recorder)
+
+        self.assertEqual([order.id for order in filled], ["big", "small"])
+        self.assertNotIn("small", book)
+        self.assertEqual(book.orders["big"].filled, 1)
+        self.assertIn("big", book)
+
+
+class VirtualMarketOrderBookTests(unittest.TestCase):
+    def setUp(self):
+        self.market = VirtualMarket(store=object())
+        self.market.data = make_candles(
+            [1100, 1100, 950, 950, 950, 950], [1200, 1200, 1000, 1000, 1000, 1000], [1, 1, 0.4, 0.4, 0.4, 0.4]
+        )
+        self.market.balance = 100000
+        self.market.is_initialized = True
+        self.market.enable_order_book()
+
+    def test_resting_order_fill_partially_over_turns(self):
+        result = self.market.handle_request(make_request("1", "buy", 1000, 1))
+        self.assertEqual(result["state"], "requested")
+        self.assertEqual(self.market.balance, 100000)
+
+        self.market.handle_request(make_request("skip", "buy", 0, 0))
+        self.assertEqual(self.market.asset["KRW-BTC"], (1000, 0.4))
+        partial = self.market.pop_fill_results()
+        self.assertEqual([(fill["state"], fill["amount"]) for fill in partial], [("requested", 0.4)])
+        self.assertEqual(partial[0]["msg"], "partially filled")
+
+        self.market.handle_request(make_request("skip", "buy", 0, 0))
+        self.market.handle_request(make_request("skip", "buy", 0, 0))
+        fills = self.market.pop_fill_results()
+
+        self.assertEqual([(fill["state"], fill["amount"]) for fill in fills], [("requested", 0.8), ("done", 1)])
+        self.assertEqual(self.market.asset["KRW-BTC"], (1000, 1.0))
+        self.assertEqual(self.market.balance, 99000)
+        self.assertAlmostEqual(self.market.reserved, 0)
+
+    def test_resting_buy_reserve_balance_until_cancel(self):
+        self.market.balance = 1500
+
+        first = self.market.handle_request(make_request("1", "buy", 1000, 1))
+        second = self.market.handle_request(make_request("2", "buy", 1000, 1))
+
+        # 첫 주문에 예약된 금액은 두 번째 주문에 사용할 수 없다
+        self.assertEqual(first["state"], "requested")
+        self.assertEqual(second["state"], "rejected")
+        self.assertEqual(second["msg"], "no money")
+        self.assertAlmostEqual(self.market.reserved, 1000.5 - 0.4 * 1000.5)
+
+        self.market.handle_request(make_request("1", "cancel", 0, 0))
+        self.assertEqual(self.market.reserved, 0)
+        third = self.market.handle_request(make_request("3", "buy", 1000, 1))
+        self.assertEqual(third["state"], "requested")
+
+    def test_cancel_return_filled_amount_without_advancing_turn(self):
+        self.market.handle_request(make_request("1", "buy", 1000, 1))
+        self.market.handle_request(make_request("skip", "buy", 0, 0))
+        turn = self.market.turn_count
+
+        result = self.market.handle_request(make_request("1", "cancel", 0, 0))
+
+        self.assertEqual(self.market.turn_count, turn)
+        self.assertEqual(result["type"], "buy")
+        self.assertEqual(result["msg"], "cancelled")
+        self.assertEqual(result["amount"], 0.4)
+        rejected = self.market.handle_request(make_request("1", "cancel", 0, 0))
+        self.assertEqual(rejected["state"], "rejected")
+        self.assertEqual(rejected["msg"], "order not found")
+
+    def test_simulation_trader_deliver_requested_and_done_results(self):
+        trader = SimulationTrader(store=object())
+        trader.market = self.market
+        trader.is_initialized = True
+        results = []
+
+        trader.send_request([make_request("1", "buy", 1000, 0.3)], results.append)
+        trader.send_request([make_request("skip", "buy", 0, 0)], results.append)
+
+        self.assertEqual([result["state"] for result in results], ["requested", "done"])
+        self.assertEqual(results[1]["amount"], 0.3)
+        self.assertEqual(trader.order_manager.get("1").state, "done")
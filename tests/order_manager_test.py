@@ -0,0 +1,205 @@
+import time
+import unittest
+from unittest.mock import patch
+import numpy as np
+from smtm.candle import CandleSeries
+from smtm.order_manager import OrderIdGenerator, OrderManager
+from smtm.simulation_trader import SimulationTrader
+from smtm.strategy_bnh import StrategyBuyAndHold
+from smtm.virtual_market import VirtualMarket
+
+
+def make_request(request_id, request_type="buy", price=1000, amount=1, market=None, strategy=None):
+    request = {"id": request_id, "type": request_type, "price": price, "amount": amount}
+    if market is not None:
+        request["market"] = market
+    if strategy is not None:
+        request["strategy"] = strategy
+    return request
+
+
+def make_result(request, state, amount=0, msg="success"):
+    return {"request": request, "type": request["type"], "price": request["price"], "amount": amount, "msg": msg, "state": state}
+
+
+class OrderIdGeneratorTests(unittest.TestCase):
+    def test_next_id_unique_and_increasing_within_same_time(self):
+        generator = OrderIdGenerator()
+        with patch("smtm.order_manager.time.time_ns", return_value=1607862457560075000):
+            ids = [generator.next_id() for _ in range(1000)]
+
+        self.assertEqual(ids[0], "1607862457.560075")
+        self.assertEqual(len(set(ids)), 1000)
+        self.assertEqual(ids, sorted(ids))
+
+    def test_next_id_keep_increasing_when_clock_goes_back(self):
+        generator = OrderIdGenerator(prefix="BnH-")
+        with patch("smtm.order_manager.time.time_ns", return_value=1607862457560075000):
+            first = generator.next_id()
+        with patch("smtm.order_manager.time.time_ns", return_value=1607862400000000000):
+            second = generator.next_id()
+
+        self.assertEqual(first, "BnH-1607862457.560075")
+        self.assertEqual(second, "BnH-1607862457.560076")
+
+
+class OrderManagerTests(unittest.TestCase):
+    def test_transition_follow_state_machine(self):
+        manager = OrderManager()
+        manager.add(make_request("1"))
+
+        manager.transition("1", OrderManager.PARTIAL, 0.3)
+        manager.transition("1", OrderManager.PARTIAL, 0.6)
+        order = manager.transition("1", OrderManager.DONE, 1)
+
+        self.assertEqual(order.state, "done")
+        self.assertEqual(order.filled, 1)
+        self.assertFalse(manager.is_open("1"))
+        with self.assertRaises(UserWarning):
+            manager.transition("1", OrderManager.CANCELLED)
+        manager.add(make_request("2"))
+        manager.transition("2", OrderManager.PARTIAL, 0.5)
+        with self.assertRaises(UserWarning):
+            manager.transition("2", OrderManager.REJECTED)
+        with self.assertRaises(UserWarning):
+            manager.transition("unknown", OrderManager.DONE)
+        with self.assertRaises(UserWarning):
+            manager.add(make_request("2"))
+
+    def test_apply_result_map_trader_result_to_state(self):
+        manager = OrderManager()
+        requests = [make_request(str(index)) for index in range(5)]
+        for request in requests:
+            manager.add(request)
+
+        manager.apply_result(make_result(requests[0], "requested"))
+        manager.apply_result(make_result(requests[1], "requested", 0.4))
+        manager.apply_result(make_result(requests[2], "done", 1))
+        manager.apply_result(make_result(requests[3], "rejected", msg="no money"))
+        manager.apply_result(make_result(requests[4], "done", 0.2, "cancelled"))
+        # 거부된 취소 요청은 주문 상태를 바꾸지 않는다
+        manager.apply_result(make_result(make_request("0", "cancel", 0, 0), "rejected", msg="order not found"))
+
+        self.assertEqual(
+            [manager.get(request["id"]).state for request in requests],
+            ["requested", "partial", "done", "rejected", "cancelled"],
+        )
+        self.assertEqual(manager.get("1").filled, 0.4)
+        self.assertEqual(manager.get("3").msg, "no money")
+        self.assertEqual(manager.get("4").filled, 0.2)
+        self.assertIsNone(manager.apply_result(make_result(requests[2], "done", 1)))
+        self.assertIsNone(manager.apply_result(make_result(make_request("unknown"), "done", 1)))
+
+    def test_find_by_state_market_and_strategy(self):
+        manager = OrderManager()
+        manager.add(make_request("1", market="KRW-BTC", strategy="BnH"))
+        manager.add(make_request("2", market="KRW-ETH", strategy="BnH"))
+        manager.add(make_request("3", market="KRW-BTC", strategy="RSI"))
+        manager.add(make_request("4", market="KRW-BTC", strategy="BnH"))
+        manager.transition("4", OrderManager.DONE, 1)
+        manager.transition("3", OrderManager.PARTIAL, 0.5)
+
+        self.assertEqual([order.id for order in manager.find(market="KRW-BTC")], ["1", "3"])
+        self.assertEqual([order.id for order in manager.find(strategy="BnH")], ["1", "2"])
+        self.assertEqual([order.id for order in manager.find(market="KRW-BTC", strategy="BnH")], ["1"])
+        self.assertEqual([order.id for order in manager.find(state="partial", market="KRW-BTC")], ["3"])
+        self.assertEqual([order.id for order in manager.find(state="done")], ["4"])
+        self.assertEqual(manager.open_ids(), ["1", "2", "3"])
+        self.assertEqual(manager.count(), 3)
+        self.assertEqual(manager.count("requested"), 2)
+
+    def test_cancel_all_many_open_orders_by_market(self):
+        manager = OrderManager(keep_finished=None)
+        markets = ("KRW-BTC", "KRW-ETH")
+        for index in range(50000):
+            manager.add(make_request(str(index), market=markets[index % 2]))
+
+        start = time.perf_counter()
+        cancelled = manager.cancel_all(market="KRW-ETH")
+        elapsed = time.perf_counter() - start
+
+        self.assertEqual(len(cancelled), 25000)
+        self.assertEqual(manager.count(), 25000)
+        self.assertEqual(manager.find(market="KRW-ETH"), [])
+        self.assertEqual(manager.count("cancelled"), 25000)
+        self.assertLess(elapsed, 1)
+
+    def test_keep_only_recent_finished_orders(self):
+        manager = OrderManager(keep_finished=2)
+        for index in range(4):
+            manager.add(make_request(str(index)))
+            manager.transition(str(index), OrderManager.DONE, 1)
+        manager.add(make_request("open"))
+
+        self.assertEqual(list(manager.orders), ["2", "3", "open"])
+        self.assertEqual(manager.count("done"), 2)
+
+    def test_from_state_restore_open_orders(self):
+        manager = OrderManager()
+        manager.add(make_request("1", market="KRW-BTC"))
+        manager.add(make_request("2", market="KRW-BTC"))
+        manager.add(make_request("3", market="KRW-BTC"))
+        manager.transition("2", OrderManager.PARTIAL, 0.5)
+        manager.transition("3", OrderManager.DONE, 1)
+
+        restored = OrderManager.from_state(manager.get_state())
+
+        self.assertEqual(restored.open_ids(), ["1", "2"])
+        self.assertEqual(restored.get("2").state, "partial")
+        self.assertEqual(restored.get("2").filled, 0.5)
+        self.assertEqual(restored.get("2").market, "KRW-BTC")
+
+
+class TraderOrderManagerTests(unittest.TestCase):
+    def setUp(self):
+        lows = np.array([1100, 950, 950, 950, 950, 950], dtype=np.float64)
+        highs = lows + 50
+        self.market = VirtualMarket(store=object())
+        self.market.data = CandleSeries(
+            "KRW-BTC",
+            {
+                "timestamp": np.arange(26000000, 26000000 + len(lows), dtype=np.int64),
+                "open": lows,
+                "high": highs,
+                "low": lows,
+                "close": highs,
+                "acc_price": highs,
+                "acc_volume": np.full(len(lows), 0.4),
+            },
+        )
+        self.market.balance = 100000
+        self.market.is_initialized = True
+        self.trader = SimulationTrader(store=object())
+        self.trader.market = self.market
+        self.trader.is_initialized = True
+        self.results = []
+
+    def test_cancel_all_requests_cancel_open_orders(self):
+        self.market.enable_order_book()
+        self.trader.send_request([make_request("1", price=1000), make_request("2", price=900)], self.results.append)
+
+        self.assertEqual(self.trader.order_manager.get("1").state, "partial")
+        self.assertEqual(self.trader.order_manager.open_ids(), ["1", "2"])
+        self.assertEqual([result["request"]["id"] for result in self.results], ["1", "1", "2"])
+        self.assertEqual(self.results[1]["msg"], "partially filled")
+        self.trader.cancel_all_requests()
+
+        self.assertEqual(self.trader.order_manager.count(), 0)
+        self.assertEqual(self.trader.order_manager.get("1").state, "cancelled")
+        self.assertEqual(len(self.market.books["KRW-BTC"]), 0)
+        # 끝난 주문은 거래소에 취소 요청을 보내지 않는다
+        self.trader.send_request([make_request("1", "cancel", 0, 0)], self.results.append)
+        self.assertEqual(len(self.results), 3)
+
+    def test_send_request_deliver_rejected_result(self):
+        strategy = StrategyBuyAndHold()
+        strategy.initialize(100000)
+        self.trader.send_request([make_request("1", price=1000, amount=1000)], strategy.update_result)
+        self.trader.send_request([make_request("1", price=1000)], self.results.append)
+
+        self.assertEqual(self.trader.order_manager.get("1").state, "rejected")
+        self.assertEqual(self.trader.order_manager.get("1").msg, "no money")
+        self.assertEqual(strategy.balance, 100000)
+        self.assertEqual(len(strategy.result), 0)
+        self.assertEqual(self.results[0]["state"], "rejected")
+        self.assertEqual(self.results[0]["msg"], "duplicated id")
@@ -0,0 +1,60 @@
+import unittest
+import numpy as np
+from smtm.candle import CandleSeries
+from smtm.parameter_sweep import ParameterSweep
+from smtm.strategy_bnh import StrategyBuyAndHold
+
+
+def make_columns(size):
+    close = 10000000.0 + np.arange(size) * 1000.0
+    return {
+        "timestamp": np.arange(26000000, 26000000 + size, dtype=np.int64),
+        "open": close,
+        "high": close + 5000,
+        "low": close - 5000,
+        "close": close,
+        "acc_price": close,
+        "acc_volume": np.ones(size),
+    }
+
+
+class ParameterSweepTests(unittest.TestCase):
+    def test_expand_grid_return_all_combinations(self):
+        grid = {"SPLIT_COUNT": [2, 5], "min_price": [5000, 10000]}
+
+        combinations = ParameterSweep.expand_grid(grid)
+
+        self.assertEqual(len(combinations), 4)
+        self.assertEqual(combinations[0], {"SPLIT_COUNT": 2, "min_price": 5000})
+        self.assertEqual(combinations[-1], {"SPLIT_COUNT": 5, "min_price": 10000})
+
+    def test_run_return_same_result_as_serial_simulation(self):
+        columns = make_columns(30)
+        grid = {"SPLIT_COUNT": [2, 5], "commission_ratio": [0.0005, 0.001]}
+        sweep = ParameterSweep(StrategyBuyAndHold, max_workers=2)
+
+        results = sweep.run(grid, budget=500000, columns=columns)
+
+        candles = CandleSeries("KRW-BTC", columns)
+        expected = [
+            ParameterSweep.simulate(StrategyBuyAndHold, params, candles, 500000)
+            for params in ParameterSweep.expand_grid(grid)
+        ]
+        self.assertEqual(results, expected)
+        self.assertEqual(results[0]["params"]["SPLIT_COUNT"], 2)
+        self.assertEqual(results[0]["trade_count"], 2)
+        self.assertEqual(results[2]["trade_count"], 5)
+        self.assertLess(results[0]["final_balance"], 500000 - 400000)
+        self.assertGreater(results[0]["return"], 0)
+
+    def test_simulate_apply_strategy_commission_to_market(self):
+        candles = CandleSeries("KRW-BTC", make_columns(30))
+
+        by_strategy = ParameterSweep.simulate(StrategyBuyAndHold, {"COMMISSION_RATIO": 0.01}, candles, 500000)
+        by_market = ParameterSweep.simulate(StrategyBuyAndHold, {"commission_ratio": 0.01}, candles, 500000)
+        default = ParameterSweep.simulate(StrategyBuyAndHold, {}, candles, 500000)
+
+        self.assertEqual(by_strategy["final_balance"], by_market["final_balance"])
+        self.assertEqual(by_strategy["final_value"], by_market["final_value"])
+        self.assertLess(by_strategy["final_value"], default["final_value"])
+        self.assertEqual(by_strategy["trade_count"], by_market["trade_count"])
@@ -0,0 +1,87 @@
+import tempfile
+import threading
+import unittest
+from unittest.mock import MagicMock
+from smtm import SimulationDataProvider
+from smtm.candle_store import CandleStore
+from smtm.date_converter import DataConverter
+
+
+class SlowFetcher:
+    """요청한 구간의 캔들을 1분마다 만들어주는 가짜 fetcher, 두 번째 요청부터는 release 될 때까지 대기"""
+
+    def __init__(self):
+        self.calls = []
+        self.release = threading.Event()
+
+    def __call__(self, market, to, count):
+        if len(self.calls) > 0:
+            self.release.wait(timeout=5)
+        self.calls.append((to, count))
+        stop = DataConverter.to_epoch_min(to)
+        return [
+            {
+                "market": market,
+                "candle_date_time_utc": DataConverter.from_epoch_min(minute),
+                "candle_date_time_kst": DataConverter.from_epoch_min(minute + 540),
+                "opening_price": float(minute),
+                "high_price": float(minute),
+                "low_price": float(minute),
+                "trade_price": float(minute),
+                "candle_acc_trade_price": 1.0,
+                "candle_acc_trade_volume": 1.0,
+            }
+            for minute in range(stop - 1, stop - 1 - count, -1)
+        ]
+
+
+class SimulationDataProviderTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.fetcher = SlowFetcher()
+        self.dp = SimulationDataProvider(store=CandleStore(root=self.tmp_dir.name, fetcher=self.fetcher))
+
+    def tearDown(self):
+        self.fetcher.release.set()
+        self.tmp_dir.cleanup()
+
+    def test_get_info_return_all_data_without_batch_size(self):
+        self.fetcher.release.set()
+        self.dp.initialize_simulation(end="2020-04-30T16:30:00", count=5)
+
+        infos = [self.dp.get_info() for _ in range(6)]
+
+        self.assertEqual(len(self.dp.data), 5)
+        self.assertEqual(infos[0]["date_time"], "2020-05-01T01:25:00")
+        self.assertEqual(infos[4]["date_time"], "2020-05-01T01:29:00")
+        self.assertEqual(infos[5], None)
+        self.assertEqual(self.dp.index, 5)
+
+    def test_get_info_serve_first_batch_before_later_batches_are_loaded(self):
+        self.dp.initialize_simulation(end="2020-04-30T16:30:00", count=30, batch_size=10)
+
+        first = self.dp.get_info()
+
+        self.assertEqual(first["date_time"], "2020-05-01T01:00:00")
+        self.assertEqual(len(self.dp.data), 10)
+        self.fetcher.release.set()
+        infos = [first] + [self.dp.get_info() for _ in range(30)]
+        self.assertEqual(infos[-1], None)
+        self.assertEqual(infos[29]["date_time"], "2020-05-01T01:29:00")
+        self.assertEqual(len(self.fetcher.calls), 3)
+
+    def test_iter_batches_stream_series_in_order(self):
+        self.fetcher.release.set()
+        self.dp.initialize_simulation(end="2020-04-30T16:30:00", count=25, batch_size=10)
+
+        sizes = [len(batch) for batch in self.dp.iter_batches()]
+
+        self.assertEqual(sizes, [10, 10, 5])
+
+    def test_iter_batches_raise_error_from_loader_thread(self):
+        self.fetcher.release.set()
+        self.dp.initialize_simulation(end="2020-04-30T16:30:00", count=25, batch_size=10)
+        self.dp.store.get_candles = MagicMock(side_effect=KeyError("broken store"))
+
+        with self.assertRaises(KeyError):
+            list(self.dp.iter_batches())
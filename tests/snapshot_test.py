@@ -0,0 +1,159 @@
+import os
+import tempfile
+import unittest
+from smtm import SimulationDataProvider
+from smtm.candle_store import CandleStore
+from smtm.date_converter import DataConverter
+from smtm.event_operator import Operator
+from smtm.simulation_trader import SimulationTrader
+from smtm.snapshot import Snapshot, SnapshotStore
+from smtm.strategy_bnh import StrategyBuyAndHold
+from smtm.virtual_market import VirtualMarket
+
+
+class WaveFetcher:
+    """분마다 가격이 오르내리는 캔들을 업비트 응답 형식(최신순)으로 만들어주는 가짜 fetcher"""
+
+    def __call__(self, market, to, count):
+        stop = DataConverter.to_epoch_min(to)
+        candles = []
+        for minute in range(stop - 1, stop - 1 - count, -1):
+            price = 10000.0 + (minute % 7) * 100
+            candles.append({
+                "market": market,
+                "candle_date_time_utc": DataConverter.from_epoch_min(minute),
+                "candle_date_time_kst": DataConverter.from_epoch_min(minute + 540),
+                "opening_price": price,
+                "high_price": price + 150,
+                "low_price": price - 150,
+                "trade_price": price,
+                "candle_acc_trade_price": price,
+                "candle_acc_trade_volume": 1.0,
+            })
+        return candles
+
+
+class SnapshotTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.store = CandleStore(root=os.path.join(self.tmp_dir.name, "candles"), fetcher=WaveFetcher())
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def build(self):
+        data_provider = SimulationDataProvider(store=self.store)
+        data_provider.initialize_simulation(end="2020-04-30T00:40:00", count=40)
+        trader = SimulationTrader(store=self.store)
+        trader.initialize_simulation(end="2020-04-30T09:40:00", count=40, budget=500000)
+        strategy = StrategyBuyAndHold()
+        strategy.is_simulation = True
+        strategy.initialize(500000)
+        return {"data_provider": data_provider, "strategy": strategy, "trader": trader}
+
+    def assert_same_run(self, expected, actual):
+        self.assertEqual(actual["strategy"].balance, expected["strategy"].balance)
+        self.assertEqual(actual["strategy"].result.summary, expected["strategy"].result.summary)
+        self.assertEqual(actual["trader"].market.balance, expected["trader"].market.balance)
+        self.assertEqual(actual["trader"].market.asset, expected["trader"].market.asset)
+        self.assertEqual(
+            actual["strategy"].data.column("closing_price").tolist(),
+            expected["strategy"].data.column("closing_price").tolist(),
+        )
+
+    def test_resume_from_latest_snapshot_same_as_full_run(self):
+        expected = self.build()
+        expected_report = Operator(**expected).run()
+
+        snapshot_store = SnapshotStore(os.path.join(self.tmp_dir.name, "snapshots"), keep=2)
+        first = self.build()
+        Operator(**first, snapshot_store=snapshot_store, snapshot_every=5).run(max_turns=23)
+        self.assertEqual(snapshot_store.turns(), [15, 20])
+
+        # 프로세스가 종료된 후 새로 초기화한 구성 요소로 이어서 진행
+        resumed = self.build()
+        operator = Operator(**resumed, snapshot_store=snapshot_store, snapshot_every=5)
+        self.assertEqual(operator.resume(), 20)
+        self.assertEqual(resumed["trader"].market.turn_count, 20)
+        report = operator.run()
+
+        self.assertEqual(report["turn_count"], expected_report["turn_count"])
+        self.assertEqual(report["result_count"], expected_report["result_count"])
+        self.assert_same_run(expected, resumed)
+        self.assertEqual(snapshot_store.turns(), [30, 35])
+
+    def test_fork_independent_branches_from_one_snapshot(self):
+        expected = self.build()
+        Operator(**expected).run()
+
+        components = self.build()
+        operator = Operator(**components)
+        operator.run(max_turns=12)
+        data = operator.snapshot()
+
+        def build_branch():
+            branch = self.build()
+            branch["operator"] = Operator(**branch)
+            return branch
+
+        branches = Snapshot.fork(data, build_branch, count=2)
+        operators = [branch.pop("operator") for branch in branches]
+
+        operators[0].run()
+        self.assert_same_run(expected, branches[0])
+        # 다른 가지는 snapshot 상태 그대로 남아 있다
+        self.assertEqual(branches[1]["trader"].market.turn_count, 12)
+        self.assertEqual(len(branches[1]["strategy"].data), 12)
+        operators[1].run()
+        self.assert_same_run(expected, branches[1])
+
+    def test_restore_reject_other_data_and_broken_snapshot(self):
+        components = self.build()
+        data = Snapshot.dumps({"trader": components["trader"]})
+
+        other = SimulationTrader(store=self.store)
+        other.initialize_simulation(end="2020-04-30T09:30:00", count=40, budget=500000)
+        with self.assertRaises(UserWarning):
+            Snapshot.restore(data, {"trader": other})
+        with self.assertRaises(UserWarning):
+            Snapshot.restore(data, {"strategy": StrategyBuyAndHold()})
+        with self.assertRaises(UserWarning):
+            Snapshot.loads(data[:-10])
+
+
+class VirtualMarketStateTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.store = CandleStore(root=self.tmp_dir.name, fetcher=WaveFetcher())
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def create_market(self):
+        market = VirtualMarket(store=self.store)
+        market.initialize("2020-04-30T09:40:00", 40, 100000)
+        market.enable_order_book(volume_ratio=0.5)
+        return market
+
+    def test_restore_order_book_keep_fill_order(self):
+        market = self.create_market()
+        market.handle_request({"id": "1", "type": "buy", "price": 9500, "amount": 2})
+        market.handle_request({"id": "2", "type": "buy", "price": 9500, "amount": 1})
+        market.handle_request({"id": "3", "type": "buy", "price": 9000, "amount": 1})
+        data = Snapshot.dumps({"market": market})
+
+        restored = self.create_market()
+        Snapshot.restore(data, {"market": restored})
+        self.assertEqual(restored.books["KRW-BTC"].get_state(), market.books["KRW-BTC"].get_state())
+
+        requests = [{"id": str(index), "type": "buy", "price": 9600, "amount": 0.3} for index in range(4, 12)]
+        for target in (market, restored):
+            for request in requests:
+                target.handle_request(dict(request))
+        self.assertEqual(restored.balance, market.balance)
+        self.assertEqual(restored.asset, market.asset)
+        self.assertEqual(restored.turn_count, market.turn_count)
+        self.assertEqual(
+            [(result["request"]["id"], result["amount"]) for result in restored.pop_fill_results()],
+            [(result["request"]["id"], result["amount"]) for result in market.pop_fill_results()],
+        )
@@ -0,0 +1,128 @@
+import tempfile
+import unittest
+import numpy as np
+from smtm import SimulationDataProvider
+from smtm.candle_store import CandleStore
+from smtm.date_converter import DataConverter
+from smtm.synthetic_market import SyntheticMarket
+from smtm.virtual_market import VirtualMarket
+
+
+class SyntheticMarketTests(unittest.TestCase):
+    def test_same_candles_for_any_range(self):
+        market = SyntheticMarket(seed=3)
+        origin = market.origin
+        whole = market.columns(origin, origin + 3 * SyntheticMarket.BLOCK_SIZE)
+
+        # 다른 생성기에서 뒤 구간부터 요청해도 같은 캔들
+        other = SyntheticMarket(seed=3)
+        start = origin + SyntheticMarket.BLOCK_SIZE * 2 - 100
+        part = other.columns(start, start + 300)
+        for name, column in part.items():
+            np.testing.assert_array_equal(column, whole[name][start - origin : start - origin + 300])
+
+        self.assertEqual(whole["open"][1:].tolist(), whole["close"][:-1].tolist())
+        self.assertTrue(np.all(whole["high"] >= np.maximum(whole["open"], whole["close"])))
+        self.assertTrue(np.all(whole["low"] <= np.minimum(whole["open"], whole["close"])))
+        self.assertEqual(len(market.columns(origin - 10, origin + 5)["timestamp"]), 5)
+        self.assertFalse(np.array_equal(SyntheticMarket(seed=4).columns(origin, origin + 10)["close"], whole["close"][:10]))
+
+    def test_fetcher_and_store_serve_simulation_offline(self):
+        market = SyntheticMarket(seed=1, origin="2020-04-30T00:00:00")
+        candles = market("KRW-ETH", "2020-04-30T00:10:00Z", 3)
+        self.assertEqual(
+            [candle["candle_date_time_kst"] for candle in candles],
+            ["2020-04-30T09:09:00", "2020-04-30T09:08:00", "2020-04-30T09:07:00"],
+        )
+        self.assertEqual(candles[0]["market"], "KRW-ETH")
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            store = CandleStore(root=tmp_dir, fetcher=market)
+            start = DataConverter.to_epoch_min("2020-04-30T00:00:00")
+            market.write_to(store, start, start + 500)
+            self.assertEqual(store.missing_ranges("KRW-BTC", start, start + 500), [])
+
+            provider = SimulationDataProvider(store=store)
+            provider.initialize_simulation(end="2020-04-30T08:00:00", count=480)
+            virtual_market = VirtualMarket(store=store)
+            virtual_market.initialize("2020-04-30T17:00:00", 480, 100000)
+
+            info = provider.get_info()
+            self.assertEqual(info["date_time"], "2020-04-30T09:00:00")
+            self.assertEqual(virtual_market.data[0]["trade_price"], info["closing_price"])
+            self.assertEqual(info["closing_price"], market.columns(start, start + 1)["close"][0])
+
+
+class StochasticMarketTests(unittest.TestCase):
+    OPTIONS = {
+        "regimes": [(0.0, 1.0), (0.0002, 3.0)],
+        "regime_switch": 0.002,
+        "vol_persistence": 0.98,
+        "vol_of_vol": 0.1,
+        "crash_prob": 0.0005,
+        "crash_depth": 0.2,
+        "gap_prob": 0.02,
+        "gap_length": 4,
+    }
+
+    def test_same_candles_for_any_range_with_all_features(self):
+        market = SyntheticMarket(seed=9, **self.OPTIONS)
+        origin = market.origin
+        whole = market.columns(origin, origin + 5 * SyntheticMarket.BLOCK_SIZE)
+
+        other = SyntheticMarket(seed=9, **self.OPTIONS)
+        start = origin + 4 * SyntheticMarket.BLOCK_SIZE - 50
+        part = other.columns(start, start + 100)
+        begin = np.searchsorted(whole["timestamp"], start)
+        for name, column in part.items():
+            np.testing.assert_array_equal(column, whole[name][begin : begin + len(column)])
+
+        # 거래 없는 분은 캔들이 없다
+        self.assertLess(len(whole["timestamp"]), 5 * SyntheticMarket.BLOCK_SIZE)
+        self.assertGreater(len(whole["timestamp"]), 4 * SyntheticMarket.BLOCK_SIZE)
+        self.assertTrue(np.all(whole["high"] >= np.maximum(whole["open"], whole["close"])))
+        self.assertTrue(np.all(whole["low"] <= np.minimum(whole["open"], whole["close"])))
+        # 급락한 분의 저가
+        self.assertLess(np.min(whole["low"] / whole["open"]), 0.9)
+
+    def test_volatility_clustering_and_regime(self):
+        origin = SyntheticMarket().origin
+        plain = SyntheticMarket(seed=2).columns(origin, origin + 100000)
+        clustered = SyntheticMarket(seed=2, vol_persistence=0.99, vol_of_vol=0.1).columns(origin, origin + 100000)
+
+        def abs_return_autocorrelation(columns):
+            returns = np.abs(np.diff(np.log(columns["close"])))
+            return np.corrcoef(returns[:-1], returns[1:])[0, 1]
+
+        self.assertLess(abs(abs_return_autocorrelation(plain)), 0.02)
+        self.assertGreater(abs_return_autocorrelation(clustered), 0.1)
+
+        calm = SyntheticMarket(seed=2, regimes=[(0.0, 1.0), (0.0, 5.0)]).columns(origin, origin + 10000)
+        switching = SyntheticMarket(seed=2, regimes=[(0.0, 1.0), (0.0, 5.0)], regime_switch=0.01)
+        switched = switching.columns(origin, origin + 10000)
+        self.assertEqual(calm["close"].tolist(), plain["close"][:10000].tolist())
+        self.assertGreater(np.std(np.diff(np.log(switched["close"]))), 1.5 * np.std(np.diff(np.log(calm["close"]))))
+
+    def test_stream_into_simulation_without_store(self):
+        market = SyntheticMarket(seed=4, origin="2020-04-30T00:00:00", gap_prob=0.05)
+        candles = market("KRW-BTC", "2020-04-30T10:00:00Z", 200)
+        self.assertEqual(len(candles), 200)
+
+        provider = SimulationDataProvider(store=market)
+        provider.initialize_simulation(end="2020-04-30T10:00:00", count=600, batch_size=100)
+        infos = []
+        while True:
+            info = provider.get_info()
+            if info is None:
+                break
+            infos.append(info)
+
+        expected = market.series(market.origin, market.origin + 600)
+        self.assertEqual(len(infos), len(expected))
+        self.assertEqual(infos[-1]["closing_price"], expected[-1]["closing_price"])
+
+        virtual_market = VirtualMarket(store=market)
+        virtual_market.initialize("2020-04-30T19:00:00", 600, 100000)
+        self.assertEqual(len(virtual_market.data), len(expected))
+        hourly = market.get_candles("KRW-BTC", "2020-04-30T10:00:00", 10, unit=60)
+        self.assertEqual(len(hourly), 10)
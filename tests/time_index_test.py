@@ -0,0 +1,137 @@
+import tempfile
+import unittest
+import numpy as np
+from smtm import SimulationDataProvider
+from smtm.candle_store import CandleStore
+from smtm.date_converter import DataConverter
+from smtm.time_index import TimeIndex
+from smtm.virtual_market import VirtualMarket
+
+
+class GapFetcher:
+    """4로 나눈 나머지가 3인 분에는 거래가 없는 가짜 fetcher"""
+
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, market, to, count):
+        self.calls.append((to, count))
+        stop = DataConverter.to_epoch_min(to)
+        candles = []
+        minute = stop
+        while len(candles) < count:
+            minute -= 1
+            if minute % 4 == 3:
+                continue
+            candles.append({
+                "market": market,
+                "candle_date_time_utc": DataConverter.from_epoch_min(minute),
+                "candle_date_time_kst": DataConverter.from_epoch_min(minute + 540),
+                "opening_price": float(minute),
+                "high_price": float(minute),
+                "low_price": float(minute),
+                "trade_price": float(minute),
+                "candle_acc_trade_price": 1.0,
+                "candle_acc_trade_volume": 1.0,
+            })
+        return candles
+
+
+class TimeIndexTests(unittest.TestCase):
+    def test_lookup_rows_by_time(self):
+        index = TimeIndex([10, 11, 14, 15, 20])
+
+        self.assertEqual([index.row(minute) for minute in (9, 10, 12, 14, 20, 21)], [-1, 0, -1, 2, 4, -1])
+        self.assertEqual([index.latest_row(minute) for minute in (9, 12, 14, 25)], [-1, 1, 2, 4])
+        self.assertEqual([index.seek_row(minute) for minute in (0, 12, 14, 16, 20, 21)], [0, 2, 2, 4, 4, 5])
+        self.assertEqual(index.gaps(), [(12, 14), (16, 20)])
+
+        report = index.gap_report(top=1)
+        self.assertEqual(report["expected"], 11)
+        self.assertEqual(report["missing"], 6)
+        self.assertEqual(report["gap_count"], 2)
+        self.assertEqual(report["longest"], [(16, 20)])
+
+    def test_lookup_rows_with_unit(self):
+        index = TimeIndex([0, 5, 15], unit=5)
+
+        self.assertEqual(index.row(5), 1)
+        self.assertEqual(index.row(6), -1)
+        self.assertEqual(index.seek_row(6), 2)
+        self.assertEqual(index.gaps(), [(10, 15)])
+
+    def test_fill_missing_time_with_previous_close(self):
+        columns = {
+            "timestamp": np.array([10, 12]),
+            "open": np.array([1.0, 3.0]),
+            "high": np.array([2.0, 4.0]),
+            "low": np.array([0.5, 2.5]),
+            "close": np.array([1.5, 3.5]),
+            "acc_price": np.array([10.0, 30.0]),
+            "acc_volume": np.array([1.0, 3.0]),
+        }
+
+        filled = TimeIndex.fill(columns, start=9, stop=14)
+        self.assertEqual(filled["timestamp"].tolist(), [10, 11, 12, 13])
+        self.assertEqual(filled["open"].tolist(), [1.0, 1.5, 3.0, 3.5])
+        self.assertEqual(filled["acc_volume"].tolist(), [1.0, 0.0, 3.0, 0.0])
+
+        filled = TimeIndex.fill(columns, start=9, stop=11, last_close=0.7)
+        self.assertEqual(filled["timestamp"].tolist(), [9, 10])
+        self.assertEqual(filled["high"].tolist(), [0.7, 2.0])
+
+
+class SeekTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.fetcher = GapFetcher()
+        self.store = CandleStore(root=self.tmp_dir.name, fetcher=self.fetcher)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_provider_and_market_seek_same_turn_with_filled_gaps(self):
+        provider = SimulationDataProvider(store=self.store)
+        provider.initialize_simulation(end="2020-04-30T16:30:00", count=60, fill_gaps=True)
+        market = VirtualMarket(store=self.store)
+        market.initialize("2020-05-01T01:30:00", 60, 100000, fill_gaps=True)
+
+        self.assertEqual(len(provider.data), 60)
+        self.assertEqual(provider.gap_report()["missing"], 0)
+        self.assertEqual(len(market.data), 60)
+
+        turn = market.seek("2020-05-01T01:00:00")
+        self.assertEqual(provider.seek("2020-05-01T01:00:00"), turn)
+        info = provider.get_info()
+        self.assertEqual(info["date_time"], "2020-05-01T01:00:00")
+        self.assertEqual(market.get_balance()["date_time"], info["date_time"])
+
+        # 뒤로 이동
+        self.assertEqual(provider.seek("2020-05-01T00:40:00"), 10)
+        self.assertEqual(provider.get_info()["date_time"], "2020-05-01T00:40:00")
+        with self.assertRaises(UserWarning):
+            market.seek("2020-05-01T02:00:00")
+
+    def test_provider_seek_skip_missing_minute_without_filling(self):
+        provider = SimulationDataProvider(store=self.store)
+        provider.initialize_simulation(end="2020-04-30T16:30:00", count=60)
+
+        report = provider.gap_report()
+        # 16:03은 거래가 없는 분
+        provider.seek("2020-05-01T01:03:00")
+
+        self.assertEqual(report["missing"], 15)
+        self.assertEqual(provider.get_info()["date_time"], "2020-05-01T01:04:00")
+
+    def test_streamed_provider_seek_load_from_target_time(self):
+        provider = SimulationDataProvider(store=self.store)
+        provider.initialize_simulation(end="2020-04-30T16:30:00", count=600, batch_size=100)
+        self.assertEqual(provider.get_info()["date_time"], "2020-04-30T15:30:00")
+
+        provider.seek("2020-05-01T01:00:00")
+        info = provider.get_info()
+
+        self.assertEqual(info["date_time"], "2020-05-01T01:00:00")
+        # 미리 가져온 묶음 외에는 이동한 시간 이후만 가져온다
+        self.assertIn(("2020-04-30T16:30:00Z", 30), self.fetcher.calls)
+        self.assertLessEqual(len(self.fetcher.calls), 1 + provider.prefetch + 1)
@@ -0,0 +1,110 @@
+import os
+import tempfile
+import unittest
+from smtm.trade_journal import TradeJournal
+from smtm.virtual_market import VirtualMarket
+
+
+def make_request(request_id, request_type, price, amount, date_time):
+    return {"id": request_id, "type": request_type, "price": price, "amount": amount, "date_time": date_time}
+
+
+def make_result(request, amount, balance):
+    return {
+        "request": request,
+        "type": request["type"],
+        "price": request["price"],
+        "amount": amount,
+        "msg": "success",
+        "balance": balance,
+        "state": "done",
+        "date_time": request["date_time"],
+    }
+
+
+class TradeJournalTests(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp_dir.name, "journal.bin")
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def write_flow(self, journal):
+        journal.record_balance(100000, {}, "2020-04-30T09:00:00")
+        buy = make_request("1", "buy", 10000, 3, "2020-04-30T09:01:00")
+        journal.record_request(buy, "KRW-BTC")
+        journal.record_result(make_result(buy, 3, 69985), "KRW-BTC")
+        cancel = make_request("2", "cancel", 0, 0, "2020-04-30T09:02:00")
+        journal.record_request(cancel, "KRW-BTC")
+        sell = make_request("3", "sell", 12000, 1, "2020-04-30T09:03:00")
+        journal.record_request(sell, "KRW-BTC")
+        journal.record_result(make_result(sell, 1, 81979), "KRW-BTC")
+
+    def test_find_and_between_return_records_after_reopen(self):
+        journal = TradeJournal(self.path, buffer_size=2)
+        self.write_flow(journal)
+        journal.flush()
+
+        journal = TradeJournal(self.path)
+        records = journal.find("1")
+        window = journal.between("2020-04-30T09:01:00", "2020-04-30T09:03:00")
+        columns = journal.columns()
+
+        self.assertEqual(len(journal), 6)
+        self.assertEqual(records["kind"].tolist(), [TradeJournal.REQUEST, TradeJournal.FILL])
+        self.assertEqual(records["balance"][1], 69985)
+        self.assertEqual(window["request_id"].tolist(), [b"1", b"1", b"2"])
+        self.assertEqual(window["kind"][-1], TradeJournal.CANCEL)
+        self.assertEqual(columns["side"].tolist(), [0, 1, 1, 0, -1, -1])
+        self.assertEqual(len(journal.find("unknown")), 0)
+
+    def test_find_use_records_appended_after_index_built(self):
+        journal = TradeJournal(self.path)
+        self.write_flow(journal)
+        self.assertEqual(len(journal.find("3")), 2)
+
+        journal.record_request(make_request("3", "buy", 1, 1, "2020-04-30T09:04:00"))
+
+        self.assertEqual(len(journal.find("3")), 3)
+
+    def test_restore_market_replay_fills_after_last_balance(self):
+        journal = TradeJournal(self.path)
+        self.write_flow(journal)
+        market = VirtualMarket(store=object())
+
+        journal.restore_market(market)
+
+        self.assertEqual(market.balance, 81979)
+        self.assertEqual(market.asset, {"KRW-BTC": (10000, 2)})
+
+        journal.record_balance(50000, {"KRW-ETH": (2000, 1.5)}, "2020-04-30T09:05:00")
+        journal.restore_market(market)
+        self.assertEqual(market.balance, 50000)
+        self.assertEqual(market.asset, {"KRW-ETH": (2000, 1.5)})
+
+    def test_restore_market_recompute_balance_of_fills_without_balance(self):
+        journal = TradeJournal(self.path)
+        journal.record_balance(100000, {}, "2020-04-30T09:00:00")
+        buy = make_request("1", "buy", 10000, 3, "2020-04-30T09:01:00")
+        journal.record_result(make_result(buy, 3, None), "KRW-BTC")
+        sell = make_request("2", "sell", 12000, 1, "2020-04-30T09:02:00")
+        journal.record_result(make_result(sell, 1, None), "KRW-BTC")
+        market = VirtualMarket(store=object())
+
+        journal.restore_market(market)
+
+        self.assertEqual(market.balance, 81979)
+        self.assertEqual(market.asset, {"KRW-BTC": (10000, 2)})
+
+    def test_open_drop_partial_record(self):
+        journal = TradeJournal(self.path)
+        self.write_flow(journal)
+        journal.flush()
+        with open(self.path, "ab") as file:
+            file.write(b"\x00" * 10)
+
+        journal = TradeJournal(self.path)
+
+        self.assertEqual(len(journal), 6)
+        self.assertEqual(journal.read()["timestamp"][-1], TradeJournal.to_timestamp("2020-04-30T09:03:00"))
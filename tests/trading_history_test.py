@@ -0,0 +1,110 @@
+import os
+import tempfile
+import unittest
+from smtm.strategy_bnh import StrategyBuyAndHold
+from smtm.trading_history import CandleHistory, ResultHistory
+
+
+def make_info(minute, price):
+    return {
+        "market": "KRW-BTC",
+        "date_time": f"2022-11-18T12:{minute:02d}:00",
+        "opening_price": price,
+        "high_price": price + 10,
+        "low_price": price - 10,
+        "closing_price": price,
+        "acc_price": price * 2,
+        "acc_volume": 2.0,
+    }
+
+
+class CandleHistoryTests(unittest.TestCase):
+    def test_append_keep_only_recent_items(self):
+        history = CandleHistory(capacity=3)
+        for minute in range(5):
+            history.append(make_info(minute, 1000.0 + minute))
+
+        self.assertEqual(len(history), 3)
+        self.assertEqual(history[0]["date_time"], "2022-11-18T12:02:00")
+        self.assertEqual(history[-1]["date_time"], "2022-11-18T12:04:00")
+        self.assertEqual(history[-1]["closing_price"], 1004.0)
+        self.assertEqual(history.column("closing_price").tolist(), [1002.0, 1003.0, 1004.0])
+        with self.assertRaises(IndexError):
+            history[3]
+
+    def test_getitem_return_same_info(self):
+        history = CandleHistory(capacity=2)
+        info = make_info(15, 23011000.0)
+        history.append(info)
+
+        self.assertEqual(dict(history[0]), info)
+
+
+class ResultHistoryTests(unittest.TestCase):
+    def make_result(self, index, result_type="buy"):
+        return {
+            "request": {"id": str(index), "type": result_type, "price": 100, "amount": 2},
+            "type": result_type,
+            "price": 100,
+            "amount": 2,
+            "msg": "success",
+            "balance": 1000 - index,
+            "state": "done",
+            "date_time": "2022-11-18T12:15:00",
+        }
+
+    def test_append_summarize_all_results_and_keep_recent(self):
+        results = ResultHistory(capacity=2)
+        for index in range(3):
+            results.append(self.make_result(index))
+        results.append(self.make_result(3, "sell"))
+
+        self.assertEqual(len(results), 2)
+        self.assertEqual(results[-1]["request"]["id"], "3")
+        self.assertEqual(results.summary["count"], 4)
+        self.assertEqual(results.summary["buy_count"], 3)
+        self.assertEqual(results.summary["sell_value"], 200.0)
+        self.assertEqual(results.summary["last_balance"], 997)
+
+    def test_append_spill_evicted_results_to_file(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, "result.jsonl")
+            results = ResultHistory(capacity=1, spill_path=path)
+            for index in range(3):
+                results.append(self.make_result(index))
+
+            with open(path, encoding="utf-8") as file:
+                self.assertEqual(len(file.readlines()), 2)
+
+
+class StrategyBuyAndHoldHistoryTests(unittest.TestCase):
+    def test_update_trading_info_record_empty_turn_and_request_skip(self):
+        strategy = StrategyBuyAndHold()
+        strategy.is_simulation = True
+        strategy.initialize(500000, 5000)
+        strategy.update_trading_info(make_info(1, 20000.0))
+        strategy.update_trading_info(None)
+
+        self.assertTrue(strategy.is_empty_turn)
+        self.assertEqual(len(strategy.data), 1)
+        requests = strategy.get_request()
+        self.assertEqual(len(requests), 1)
+        self.assertEqual(requests[0]["price"], 0)
+        self.assertEqual(requests[0]["amount"], 0)
+        self.assertEqual(requests[0]["date_time"], "2022-11-18T12:01:00")
+
+        strategy.update_trading_info(make_info(2, 20000.0))
+        self.assertFalse(strategy.is_empty_turn)
+        requests = strategy.get_request()
+        self.assertEqual(requests[-1]["price"], 20000.0)
+        self.assertEqual(requests[-1]["amount"], 5.0)
+
+    def test_get_request_return_skip_request_for_first_empty_turn(self):
+        strategy = StrategyBuyAndHold()
+        strategy.is_simulation = True
+        strategy.initialize(500000, 5000)
+        strategy.update_trading_info(None)
+
+        requests = strategy.get_request()
+        self.assertEqual(len(requests), 1)
+        self.assertEqual(requests[0]["amount"], 0)
@@ -0,0 +1,210 @@
+import base64
+import json
+import time
+import unittest
+from smtm.mock_exchange_server import MockExchangeServer
+from smtm.upbit_trader import UpbitSigner, UpbitTrader
+
+
+def make_request(index, request_type="buy", price=1000, amount=1):
+    return {
+        "id": str(index),
+        "type": request_type,
+        "price": price,
+        "amount": amount,
+        "date_time": "2020-05-01T00:40:00",
+    }
+
+
+class UpbitSignerTests(unittest.TestCase):
+    def test_token_include_query_hash_and_new_nonce(self):
+        signer = UpbitSigner("access", "secret")
+        query = {"market": "KRW-BTC", "identifier": "1"}
+
+        first = signer.token(query)
+        second = signer.token(query)
+        payload = first.split(".")[1]
+        claims = json.loads(base64.urlsafe_b64decode(payload + "=" * (-len(payload) % 4)))
+
+        self.assertEqual(claims["access_key"], "access")
+        self.assertEqual(claims["query_hash"], UpbitSigner.query_hash(query))
+        self.assertEqual(claims["query_hash_alg"], "SHA512")
+        self.assertNotEqual(first, second)
+        self.assertNotIn("query_hash", json.loads(base64.urlsafe_b64decode(signer.token().split(".")[1] + "==")))
+
+
+class UpbitTraderTests(unittest.TestCase):
+    def setUp(self):
+        self.results = []
+        self.exchange = None
+        self.trader = None
+
+    def tearDown(self):
+        if self.trader is not None:
+            self.trader.close()
+        self.exchange.stop()
+
+    def start(self, exchange_options=None, **options):
+        self.exchange = MockExchangeServer(**(exchange_options or {})).start()
+        options.setdefault("check_interval", 60)
+        self.trader = UpbitTrader(
+            access_key="access", secret_key="secret", server_url=self.exchange.url, backoff=0.01, **options
+        )
+
+    def test_send_request_batch_and_check_orders(self):
+        self.start({"budget": 100000})
+
+        self.trader.send_request([make_request(index) for index in range(10)], self.results.append)
+        self.assertEqual([result["state"] for result in self.results], ["requested"] * 10)
+        self.assertEqual(self.trader.order_manager.count(), 10)
+
+        self.assertEqual(self.trader.check_orders(), 10)
+
+        done = self.results[10:]
+        self.assertEqual(len(done), 10)
+        self.assertTrue(all(result["state"] == "done" and result["amount"] == 1 for result in done))
+        self.assertEqual(self.trader.order_manager.count("done"), 10)
+        account = self.trader.get_account_info()
+        self.assertEqual(account["balance"], 89995)
+        self.assertEqual(account["asset"], {"KRW-BTC": (1000.0, 10.0)})
+        self.assertEqual(account["quote"], {"KRW-BTC": 10000})
+
+    def test_check_orders_query_orders_in_batches(self):
+        self.start({"budget": 10**7}, order_rate=1000)
+        self.trader.send_request([make_request(index) for index in range(250)], self.results.append)
+        count = self.exchange.request_count
+
+        self.assertEqual(self.trader.check_orders(), 250)
+
+        # 100개씩 3묶음, 묶음마다 열린 주문과 끝난 주문을 한 번씩 조회한다
+        self.assertEqual(self.exchange.request_count - count, 6)
+        self.assertEqual(self.trader.order_manager.count(), 0)
+        self.assertEqual(self.trader.order_manager.count("done"), 250)
+
+    def test_cancel_all_requests_cancel_open_orders(self):
+        self.start({"budget": 100000, "fill_delay": 60})
+        self.trader.send_request([make_request(index) for index in range(5)], self.results.append)
+
+        self.trader.cancel_all_requests()
+
+        cancelled = self.results[5:]
+        self.assertEqual([result["msg"] for result in cancelled], ["cancelled"] * 5)
+        self.assertEqual(self.trader.order_manager.count(), 0)
+        self.assertEqual(self.trader.order_manager.count("cancelled"), 5)
+        self.assertEqual(self.trader.get_account_info()["balance"], 100000)
+        # 끝난 주문은 거래소에 취소 요청을 보내지 않는다
+        count = self.exchange.request_count
+        self.trader.send_request([make_request(0, "cancel", 0, 0)], self.results.append)
+        self.assertEqual(self.exchange.request_count, count)
+
+    def test_send_request_deliver_rejected_result(self):
+        self.start({"budget": 1000})
+
+        self.trader.send_request([make_request(1), make_request(2, "sell")], self.results.append)
+
+        self.assertEqual([result["state"] for result in self.results], ["rejected", "rejected"])
+        self.assertEqual(self.results[0]["msg"], "insufficient_funds_bid")
+        self.assertEqual(self.trader.order_manager.get("2").state, "rejected")
+
+    def test_send_request_keep_sending_when_duplicated_id_callback_fail(self):
+        self.start({"budget": 100000})
+
+        def callback(result):
+            self.results.append(result)
+            if result["msg"] == "duplicated id":
+                raise ValueError("callback error")
+
+        self.trader.send_request([make_request(1), make_request(1), make_request(2)], callback)
+
+        self.assertEqual([result["msg"] for result in self.results], ["duplicated id", "success", "success"])
+        self.assertEqual(self.trader.order_manager.count(), 2)
+
+    def test_send_request_rejected_with_wrong_secret_key(self):
+        self.start({"budget": 100000, "secret_key": "other"})
+
+        self.trader.send_request([make_request(1)], self.results.append)
+
+        self.assertEqual(self.results[0]["state"], "rejected")
+        self.assertEqual(self.results[0]["msg"], "invalid_access_key")
+
+    def test_send_request_retry_rate_limited_orders(self):
+        self.start({"budget": 100000, "latency": 0.002}, retries=5)
+        self.exchange.throttle(4)
+
+        self.trader.send_request([make_request(index) for index in range(8)], self.results.append)
+
+        self.assertEqual([result["state"] for result in self.results], ["requested"] * 8)
+        self.assertEqual(self.exchange.throttled_count, 4)
+        stats = self.trader.get_latency_stats()
+        self.assertEqual(stats["count"], 8)
+        self.assertEqual(stats["throttled_count"], 4)
+
+    def test_send_request_verify_order_accepted_without_response(self):
+        self.start({"budget": 100000}, retries=5)
+        self.exchange.fail_orders(1, accept=True)
+
+        self.trader.send_request([make_request(1)], self.results.append)
+
+        # 5xx 응답을 받은 주문은 다시 보내지 않고 identifier로 조회해서 열린 주문으로 둔다
+        self.assertEqual(self.results[0]["state"], "requested")
+        self.assertEqual(self.trader.client.retry_count, 0)
+        self.assertEqual(len(self.exchange.orders), 1)
+        self.assertTrue(self.trader.order_manager.is_open("1"))
+        self.assertEqual(self.trader.check_orders(), 1)
+        self.assertEqual(self.results[1]["state"], "done")
+        self.assertEqual(self.results[1]["amount"], 1)
+
+    def test_send_request_reject_order_not_accepted_after_server_error(self):
+        self.start({"budget": 100000}, retries=5)
+        self.exchange.fail_orders(1, accept=False)
+
+        self.trader.send_request([make_request(1)], self.results.append)
+
+        self.assertEqual(self.results[0]["state"], "rejected")
+        self.assertEqual(self.results[0]["msg"], "server_error")
+        self.assertEqual(len(self.exchange.orders), 0)
+        self.assertEqual(self.trader.order_manager.get("1").state, "rejected")
+
+    def test_check_orders_reject_unconfirmed_order_not_on_exchange(self):
+        # 기본 그룹 요청은 모두 429 응답을 받으므로 접수 여부를 확인하지 못한다
+        self.start({"budget": 100000, "default_rate": 0.001}, retries=0)
+        self.exchange.fail_orders(1, accept=False)
+
+        self.trader.send_request([make_request(1)], self.results.append)
+        self.assertEqual(self.results[0]["state"], "requested")
+        self.assertEqual(self.results[0]["msg"], "unconfirmed")
+        self.assertTrue(self.trader.order_manager.is_open("1"))
+
+        self.exchange.limits["default"] = None
+        self.assertEqual(self.trader.check_orders(), 1)
+
+        self.assertEqual(self.results[1]["state"], "rejected")
+        self.assertEqual(self.trader.order_manager.get("1").state, "rejected")
+
+    def test_send_request_keep_duplicated_identifier_order_open(self):
+        self.start({"budget": 100000, "fill_delay": 60})
+        self.trader.send_request([make_request(1)], self.results.append)
+        # 같은 거래소에 같은 id로 다시 보내는 새 Trader
+        trader = UpbitTrader(access_key="access", secret_key="secret", server_url=self.exchange.url, check_interval=60)
+        results = []
+
+        trader.send_request([make_request(1)], results.append)
+        trader.cancel_all_requests()
+        trader.close()
+
+        self.assertEqual([result["state"] for result in results], ["requested", "done"])
+        self.assertEqual(results[1]["msg"], "cancelled")
+        self.assertEqual(len(self.exchange.orders), 1)
+        self.assertEqual(self.exchange.orders["1"]["state"], "cancel")
+
+    def test_order_rate_keep_under_exchange_limit(self):
+        self.start({"budget": 10**9, "order_rate": 30}, order_rate=20)
+
+        start = time.perf_counter()
+        self.trader.send_request([make_request(index) for index in range(30)], self.results.append)
+        elapsed = time.perf_counter() - start
+
+        # 처음 20개는 바로, 나머지 10개는 초당 20개씩 보낸다
+        self.assertGreaterEqual(elapsed, 0.45)
+        self.assertEqual(self.exchange.throttled_count, 0)
+        self.assertEqual(len(self.results), 30)
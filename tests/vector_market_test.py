@@ -0,0 +1,90 @@
+import random
+import unittest
+import numpy as np
+from smtm.vector_market import VectorMarket
+from smtm.virtual_market import VirtualMarket
+
+
+def make_candles(size, seed):
+    rand = random.Random(seed)
+    candles = []
+    price = 10000000.0
+    for index in range(size):
+        price = max(1000.0, price + rand.randint(-50, 50) * 1000)
+        candles.append({
+            "market": "KRW-BTC",
+            "candle_date_time_kst": f"2020-05-01T00:{index % 60:02d}:00",
+            "opening_price": price,
+            "high_price": price + rand.randint(0, 30) * 1000,
+            "low_price": price - rand.randint(0, 30) * 1000,
+            "trade_price": price,
+            "candle_acc_trade_price": price,
+            "candle_acc_trade_volume": 1.0,
+        })
+    return candles
+
+
+def make_signals(candles, seed):
+    rand = random.Random(seed)
+    price, amount, side = [], [], []
+    for candle in candles:
+        side.append(rand.choice([1, 1, -1, 0]))
+        price.append(candle["trade_price"] + rand.randint(-20, 20) * 1000)
+        amount.append(rand.choice([0.001, 0.0025, 0.01, 0.05]))
+    return {"price": np.array(price), "amount": np.array(amount), "side": np.array(side)}
+
+
+class VectorMarketTests(unittest.TestCase):
+    def run_virtual_market(self, candles, signals, budget):
+        market = VirtualMarket()
+        market.data = candles
+        market.balance = budget
+        market.is_initialized = True
+        balance, amount = [], []
+        for index in range(len(candles)):
+            request_type = {1: "buy", -1: "sell", 0: "buy"}[int(signals["side"][index])]
+            request = {
+                "id": str(index),
+                "type": request_type,
+                "price": 0 if signals["side"][index] == 0 else float(signals["price"][index]),
+                "amount": float(signals["amount"][index]),
+            }
+            market.handle_request(request)
+            balance.append(market.balance)
+            asset = market.asset.get("KRW-BTC")
+            amount.append(0.0 if asset is None else asset[1])
+        return balance, amount
+
+    def test_run_match_virtual_market_result(self):
+        candles = make_candles(300, seed=1)
+        signals = make_signals(candles, seed=2)
+        columns = {
+            "low": np.array([candle["low_price"] for candle in candles]),
+            "high": np.array([candle["high_price"] for candle in candles]),
+            "close": np.array([candle["trade_price"] for candle in candles]),
+        }
+
+        result = VectorMarket().run(columns, signals, 1000000)
+        balance, amount = self.run_virtual_market(candles, signals, 1000000)
+
+        self.assertGreater(result["trade_count"], 10)
+        self.assertEqual(result["balance"].tolist(), balance)
+        self.assertEqual(result["asset_amount"].tolist(), amount)
+        self.assertEqual(result["final_balance"], balance[-1])
+
+    def test_run_skip_last_two_turns(self):
+        columns = {
+            "low": np.array([100.0, 100.0, 100.0]),
+            "high": np.array([200.0, 200.0, 200.0]),
+            "close": np.array([150.0, 150.0, 150.0]),
+        }
+        signals = {
+            "price": np.array([150.0, 150.0, 150.0]),
+            "amount": np.array([1.0, 1.0, 1.0]),
+            "side": np.array([1, 1, 1]),
+        }
+
+        result = VectorMarket().run(columns, signals, 1000)
+
+        self.assertEqual(result["filled"].tolist(), [True, False, False])
+        self.assertEqual(result["balance"].tolist(), [850, 850, 850])